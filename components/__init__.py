@@ -1,21 +1,26 @@
 #!/usr/bin/env python3
 """
 Components 模块
+
+面板模块在第一次被访问时才导入，默认隐藏的面板（如渲染设置）
+直到第一次显示时才会加载，缩短启动时间
 """
 
-from .panels import (
-    show_status_panel,
-    show_control_panel,
-    show_info_panel,
-    show_demo_panels
-)
-from .render import show_render_settings_panel
-from .properties import show_property_panel
-from .outline import show_outline_panel
-from .viewport import (
-    ViewportManager,
-    show_viewport_panel
-)
+import importlib
+
+# 组件注册表: 导出名称 -> 所在子模块
+_COMPONENT_MODULES = {
+    'show_status_panel': '.panels',
+    'show_control_panel': '.panels',
+    'show_info_panel': '.panels',
+    'show_demo_panels': '.panels',
+    'show_render_settings_panel': '.render',
+    'show_property_panel': '.properties',
+    'show_outline_panel': '.outline',
+    'ViewportManager': '.viewport',
+    'show_viewport_panel': '.viewport',
+    'show_profiler_panel': '.profiler'
+}
 
 __all__ = [
     'setup_dock_space',
@@ -27,5 +32,22 @@ __all__ = [
     'show_property_panel',
     'show_outline_panel',
     'ViewportManager',
-    'show_viewport_panel'
-]
\ No newline at end of file
+    'show_viewport_panel',
+    'show_profiler_panel'
+]
+
+
+def __getattr__(name):
+    """按需导入组件"""
+    module_name = _COMPONENT_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 缓存到模块命名空间，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_COMPONENT_MODULES))
@@ -8,6 +8,8 @@ from imgui_bundle import imgui
 import re
 import json
 from typing import List, Dict, Set, Optional, Any
+from fonts import request_glyphs
+from scene import outline_scene
 
 # 对象类型枚举
 OBJECT_TYPE_MESH = "mesh"
@@ -100,6 +102,8 @@ class OutlineState:
         self.delete_target_name = ""
         self.hovered_id = ""
         self.dragging_id = ""
+        # 对象增删时递增，视口据此同步可绘制的场景
+        self.revision = 0
 
         # 初始化示例数据
         self._init_sample_data()
@@ -296,16 +300,14 @@ def _show_object_name_in_tree(obj: OutlineObject):
         # 确认按钮
         if _can_rename_to(obj, obj.temp_name):
             if imgui.button("✓##confirm_rename"):
-                obj.name = obj.temp_name
-                obj.renaming = False
+                _commit_rename(obj)
         else:
             imgui.text_colored(imgui.ImVec4(1, 0, 0, 1), "已存在重复命名")
 
         # 按回车确认或ESC取消
         if enter_pressed:
             if _can_rename_to(obj, obj.temp_name):
-                obj.name = obj.temp_name
-                obj.renaming = False
+                _commit_rename(obj)
         elif imgui.is_key_pressed(imgui.Key.escape):
             obj.renaming = False
     else:
@@ -388,16 +390,14 @@ def _show_object_item(obj: OutlineObject, depth: int = 0, is_filtered: bool = Fa
         # 确认按钮
         if _can_rename_to(obj, obj.temp_name):
             if imgui.button("✓##confirm_rename"):
-                obj.name = obj.temp_name
-                obj.renaming = False
+                _commit_rename(obj)
         else:
             imgui.text_colored(imgui.ImVec4(1, 0, 0, 1), "已存在重复命名")
 
         # 按回车确认或ESC取消
         if enter_pressed:
             if _can_rename_to(obj, obj.temp_name):
-                obj.name = obj.temp_name
-                obj.renaming = False
+                _commit_rename(obj)
         elif imgui.is_key_pressed(imgui.Key.escape):
             obj.renaming = False
     else:
@@ -510,6 +510,13 @@ def _get_filtered_objects() -> List[str]:
     return filtered_ids
 
 
+def _commit_rename(obj: OutlineObject):
+    """确认重命名；新名称中字体子集缺少的字符在后台生成后合并"""
+    obj.name = obj.temp_name
+    obj.renaming = False
+    request_glyphs(obj.name)
+
+
 def _can_rename_to(obj: OutlineObject, new_name: str) -> bool:
     """检查是否可以重命名到新名称"""
     if not new_name.strip():
@@ -616,6 +623,8 @@ def _perform_delete():
     for obj_id in all_delete_ids:
         if obj_id in outline_state.objects:
             del outline_state.objects[obj_id]
+        outline_scene.forget(obj_id)
+    outline_state.revision += 1
 
     # 清除选择
     outline_state.selected_ids.difference_update(all_delete_ids)
@@ -671,6 +680,7 @@ def _add_new_object(name: str, obj_type: str):
     # 创建新对象
     new_obj = OutlineObject(obj_id, name, obj_type)
     outline_state.objects[obj_id] = new_obj
+    outline_state.revision += 1
 
     # 选择新对象
     outline_state.selected_ids.clear()
@@ -694,6 +704,16 @@ def get_object_type(obj_id: str) -> Optional[str]:
     return obj.type if obj else None
 
 
+def get_mesh_object_ids() -> List[str]:
+    """获取所有网格对象的ID（视口中可绘制的对象）"""
+    return [obj_id for obj_id, obj in outline_state.objects.items() if obj.type == OBJECT_TYPE_MESH]
+
+
+def get_light_object_ids() -> List[str]:
+    """获取所有光源对象的ID（视口中作为点光源）"""
+    return [obj_id for obj_id, obj in outline_state.objects.items() if obj.type == OBJECT_TYPE_LIGHT]
+
+
 def _update_properties_selection(obj: OutlineObject):
     """更新属性面板选择"""
     try:
@@ -710,8 +730,9 @@ def _update_properties_selection(obj: OutlineObject):
 
         properties_type = type_mapping.get(obj.type, "mesh")
 
-        # 更新属性面板选择
-        properties.select_object(properties_type, obj.name)
+        # 更新属性面板选择（网格对象的变换和光源的参数按ID保存在大纲场景中）
+        obj_id = obj.id if obj.type in (OBJECT_TYPE_MESH, OBJECT_TYPE_LIGHT) else None
+        properties.select_object(properties_type, obj.name, obj_id)
 
     except ImportError:
         print("警告: 无法导入properties模块")
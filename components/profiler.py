@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+性能分析面板组件
+显示最近若干帧的堆叠帧时间图，以及各阶段 CPU/GPU 耗时的 p50/p95/p99
+"""
+
+from imgui_bundle import imgui, implot
+import numpy as np
+from profiling import frame_profiler, sampling_profiler
+
+
+def show_profiler_panel(open: bool) -> bool:
+    """显示性能分析面板"""
+    # 设置可停靠
+    imgui.set_next_window_dock_id(imgui.get_id("DockSpace"), imgui.Cond_.first_use_ever)
+
+    # 设置窗口默认大小
+    imgui.set_next_window_size(imgui.ImVec2(560, 480), imgui.Cond_.first_use_ever)
+
+    window_open = imgui.begin("性能分析", open)[1]
+
+    if window_open:
+        rows = frame_profiler.valid_rows()
+
+        _show_summary(rows)
+        imgui.separator()
+        _show_frame_graph(rows)
+        imgui.separator()
+        _show_scope_table(rows)
+        _show_sampling_results()
+
+    imgui.end()
+    return window_open
+
+
+def _show_summary(rows):
+    """显示帧时间概要和控制选项"""
+    _, frame_profiler.paused = imgui.checkbox("暂停", frame_profiler.paused)
+    imgui.same_line()
+    _, frame_profiler.gpu_enabled = imgui.checkbox("GPU 计时", frame_profiler.gpu_enabled)
+
+    frame_ms = frame_profiler.frame_times[rows] * 1000.0
+    p50, p95, p99 = frame_profiler.percentiles(frame_ms)
+    fps = 1000.0 / p50 if p50 > 0 else 0.0
+    imgui.text(f"帧时间 (最近 {len(rows)} 帧): p50 {p50:.2f} ms  p95 {p95:.2f} ms  p99 {p99:.2f} ms  (~{fps:.0f} FPS)")
+
+    trace = frame_profiler.trace
+    if trace is not None:
+        imgui.text_disabled(f"正在录制帧追踪 ({trace.frame_count} 帧) -> {trace.path}")
+    elif frame_profiler.last_trace_path:
+        imgui.text_disabled(f"帧追踪已保存: {frame_profiler.last_trace_path}")
+
+
+def _show_frame_graph(rows):
+    """显示各阶段 CPU 自身耗时的堆叠图"""
+    if implot.get_current_context() is None:
+        implot.create_context()
+
+    if len(rows) == 0:
+        return
+
+    scope_count = len(frame_profiler.scope_names)
+    cpu_ms = frame_profiler.cpu_times[rows, :scope_count] * 1000.0
+    cumulative = np.cumsum(cpu_ms, axis=1)
+    xs = np.arange(len(rows), dtype=np.float64)
+    baseline = np.zeros(len(rows), dtype=np.float64)
+
+    if implot.begin_plot("##frame_graph", imgui.ImVec2(-1, 200)):
+        implot.setup_axes("帧", "ms", implot.AxisFlags_.auto_fit, implot.AxisFlags_.auto_fit)
+        lower = baseline
+        for index, name in enumerate(frame_profiler.scope_names):
+            upper = np.ascontiguousarray(cumulative[:, index])
+            # 没有 CPU 耗时的作用域（纯 GPU 作用域）不参与堆叠
+            if cpu_ms[:, index].any():
+                implot.plot_shaded(name, xs, lower, upper)
+            lower = upper
+        implot.plot_line("帧总时间", xs, frame_profiler.frame_times[rows] * 1000.0)
+        implot.end_plot()
+
+
+def _show_scope_table(rows):
+    """显示各阶段耗时的百分位表格"""
+    scope_count = len(frame_profiler.scope_names)
+    if scope_count == 0 or len(rows) == 0:
+        return
+
+    cpu_ms = frame_profiler.cpu_times[rows, :scope_count] * 1000.0
+    gpu_ms = frame_profiler.gpu_times[rows, :scope_count] * 1000.0
+    cpu_p = np.percentile(cpu_ms, (50, 95, 99), axis=0)
+    gpu_p = np.percentile(gpu_ms, (50, 95, 99), axis=0)
+    has_gpu = gpu_ms.any(axis=0)
+
+    flags = imgui.TableFlags_.borders | imgui.TableFlags_.row_bg | imgui.TableFlags_.sizing_fixed_fit
+    if imgui.begin_table("##scope_table", 7, flags):
+        for header in ("阶段", "CPU p50", "CPU p95", "CPU p99", "GPU p50", "GPU p95", "GPU p99"):
+            imgui.table_setup_column(header)
+        imgui.table_headers_row()
+
+        for index, name in enumerate(frame_profiler.scope_names):
+            imgui.table_next_row()
+            imgui.table_next_column()
+            imgui.text(name)
+            for q in range(3):
+                imgui.table_next_column()
+                imgui.text(f"{cpu_p[q, index]:.3f}")
+            for q in range(3):
+                imgui.table_next_column()
+                imgui.text(f"{gpu_p[q, index]:.3f}" if has_gpu[index] else "-")
+
+        imgui.end_table()
+
+
+def _show_sampling_results(limit: int = 30):
+    """显示最近一次采样分析的热点函数"""
+    if sampling_profiler.active:
+        imgui.separator()
+        imgui.text_disabled(f"采样分析中，剩余 {sampling_profiler.frames_left} 帧...")
+        return
+    if not sampling_profiler.functions:
+        return
+
+    if not imgui.collapsing_header("采样分析", imgui.TreeNodeFlags_.default_open):
+        return
+
+    total = max(sampling_profiler.sample_count, 1)
+    imgui.text(f"{sampling_profiler.frame_count} 帧，{sampling_profiler.sample_count} 个样本，"
+               f"{sampling_profiler.duration * 1000:.0f} ms")
+    imgui.text_disabled(f"折叠调用栈: {sampling_profiler.last_path}")
+
+    flags = (imgui.TableFlags_.borders | imgui.TableFlags_.row_bg
+             | imgui.TableFlags_.sizing_fixed_fit | imgui.TableFlags_.scroll_y)
+    if imgui.begin_table("##sampling_table", 3, flags, imgui.ImVec2(0, 240)):
+        imgui.table_setup_scroll_freeze(0, 1)
+        for header in ("自身%", "累计%", "函数"):
+            imgui.table_setup_column(header)
+        imgui.table_headers_row()
+
+        for entry in sampling_profiler.functions[:limit]:
+            imgui.table_next_row()
+            imgui.table_next_column()
+            imgui.text(f"{entry.self_samples * 100.0 / total:.1f}")
+            imgui.table_next_column()
+            imgui.text(f"{entry.total_samples * 100.0 / total:.1f}")
+            imgui.table_next_column()
+            imgui.text(entry.label)
+
+        imgui.end_table()
@@ -6,6 +6,8 @@
 
 from imgui_bundle import imgui
 import os
+import copy
+from scene import outline_scene
 
 
 def input_float_with_width(label: str, value: float, width: float = 80.0, format: str = "%.3f") -> tuple[bool, float]:
@@ -30,9 +32,15 @@ def input_float_with_width(label: str, value: float, width: float = 80.0, format
 selected_object = {
     "type": "none",  # "mesh", "material", "camera", "light", "none"
     "name": "",
+    "id": None,  # 大纲对象ID，网格的变换按ID保存在大纲场景中
     "properties": {}
 }
 
+# 网格属性中由大纲场景保存的部分
+TRANSFORM_KEYS = ("position", "rotation", "scale", "visible")
+# 光源属性中由大纲场景保存的部分（点光源参数）
+LIGHT_KEYS = ("position", "color", "intensity", "radius")
+
 # 对象属性默认值
 object_properties = {
     # 网格对象属性
@@ -67,27 +75,41 @@ object_properties = {
         "far_clip": 100.0
     },
 
-    # HDRI光照对象属性
+    # 光源对象属性（HDRI 和点光源）
     "light": {
         "name": "未命名HDRI",
         "hdri_file": "",
         "intensity": 1.0,
-        "rotation": 0.0
+        "rotation": 0.0,
+        "position": [0.0, 3.0, 0.0],
+        "color": [1.0, 1.0, 1.0],
+        "radius": 8.0
     }
 }
 
 
-def select_object(obj_type, obj_name):
+def select_object(obj_type, obj_name, obj_id=None):
     """选择对象并加载其属性"""
     global selected_object
 
     if obj_type in object_properties:
         selected_object["type"] = obj_type
         selected_object["name"] = obj_name
-        selected_object["properties"] = object_properties[obj_type].copy()
+        selected_object["id"] = obj_id
+        # 深拷贝: 位置等列表不能与默认值共享
+        selected_object["properties"] = copy.deepcopy(object_properties[obj_type])
+        if obj_type == "mesh" and obj_id is not None:
+            transform = outline_scene.get_transform(obj_id)
+            for key in TRANSFORM_KEYS:
+                selected_object["properties"][key] = copy.copy(transform[key])
+        elif obj_type == "light" and obj_id is not None:
+            light = outline_scene.get_light(obj_id)
+            for key in LIGHT_KEYS:
+                selected_object["properties"][key] = copy.copy(light[key])
     else:
         selected_object["type"] = "none"
         selected_object["name"] = ""
+        selected_object["id"] = None
         selected_object["properties"] = {}
 
 
@@ -175,40 +197,56 @@ def show_basic_properties(props):
     """显示基本属性（位置、旋转、缩放）"""
     imgui.text("变换")
     imgui.separator()
+    changed = False
 
     # 位置
     imgui.text("位置:")
     imgui.same_line()
-    _, props["position"][0] = input_float_with_width("##pos_x", props["position"][0], 80.0, "%.3f")
+    c, props["position"][0] = input_float_with_width("##pos_x", props["position"][0], 80.0, "%.3f")
+    changed |= c
     imgui.same_line()
-    _, props["position"][1] = input_float_with_width("##pos_y", props["position"][1], 80.0, "%.3f")
+    c, props["position"][1] = input_float_with_width("##pos_y", props["position"][1], 80.0, "%.3f")
+    changed |= c
     imgui.same_line()
-    _, props["position"][2] = input_float_with_width("##pos_z", props["position"][2], 80.0, "%.3f")
+    c, props["position"][2] = input_float_with_width("##pos_z", props["position"][2], 80.0, "%.3f")
+    changed |= c
 
     # 旋转
     imgui.text("旋转:")
     imgui.same_line()
-    _, props["rotation"][0] = input_float_with_width("##rot_x", props["rotation"][0], 80.0, "%.1f")
+    c, props["rotation"][0] = input_float_with_width("##rot_x", props["rotation"][0], 80.0, "%.1f")
+    changed |= c
     imgui.same_line()
-    _, props["rotation"][1] = input_float_with_width("##rot_y", props["rotation"][1], 80.0, "%.1f")
+    c, props["rotation"][1] = input_float_with_width("##rot_y", props["rotation"][1], 80.0, "%.1f")
+    changed |= c
     imgui.same_line()
-    _, props["rotation"][2] = input_float_with_width("##rot_z", props["rotation"][2], 80.0, "%.1f")
+    c, props["rotation"][2] = input_float_with_width("##rot_z", props["rotation"][2], 80.0, "%.1f")
+    changed |= c
 
     # 缩放
     imgui.text("缩放:")
     imgui.same_line()
-    _, props["scale"][0] = input_float_with_width("##scale_x", props["scale"][0], 80.0, "%.3f")
+    c, props["scale"][0] = input_float_with_width("##scale_x", props["scale"][0], 80.0, "%.3f")
+    changed |= c
     imgui.same_line()
-    _, props["scale"][1] = input_float_with_width("##scale_y", props["scale"][1], 80.0, "%.3f")
+    c, props["scale"][1] = input_float_with_width("##scale_y", props["scale"][1], 80.0, "%.3f")
+    changed |= c
     imgui.same_line()
-    _, props["scale"][2] = input_float_with_width("##scale_z", props["scale"][2], 80.0, "%.3f")
+    c, props["scale"][2] = input_float_with_width("##scale_z", props["scale"][2], 80.0, "%.3f")
+    changed |= c
 
     imgui.spacing()
 
     # 可见性
     imgui.text("可见性:")
     imgui.same_line()
-    _, props["visible"] = imgui.checkbox("##visible", props["visible"])
+    c, props["visible"] = imgui.checkbox("##visible", props["visible"])
+    changed |= c
+
+    # 网格对象的变换写回大纲场景，只更新该对象在包围盒树中的叶子
+    if changed and selected_object["id"] is not None:
+        outline_scene.update_object(selected_object["id"], props["position"], props["rotation"],
+                                    props["scale"], props["visible"])
 
 
 def show_material_tab_for_mesh(props):
@@ -379,13 +417,41 @@ def show_light_properties():
     # 强度设置
     imgui.text("强度:")
     imgui.same_line()
-    _, props["intensity"] = imgui.slider_float("##intensity", props["intensity"], 0.0, 5.0)
+    changed, props["intensity"] = imgui.slider_float("##intensity", props["intensity"], 0.0, 5.0)
 
     # 旋转设置
     imgui.text("旋转:")
     imgui.same_line()
     _, props["rotation"] = imgui.slider_float("##light_rotation", props["rotation"], 0.0, 360.0, format="%.1f°")
 
+    # 大纲中的光源在视口中作为点光源（分簇光照）
+    if selected_object["id"] is None:
+        return
+    imgui.spacing()
+    imgui.text("点光源")
+    imgui.separator()
+
+    imgui.text("位置:")
+    for axis, label in enumerate(("##light_pos_x", "##light_pos_y", "##light_pos_z")):
+        imgui.same_line()
+        c, props["position"][axis] = input_float_with_width(label, props["position"][axis], 80.0, "%.3f")
+        changed |= c
+
+    imgui.text("颜色:")
+    imgui.same_line()
+    c, props["color"] = imgui.color_edit3("##light_color", props["color"])
+    changed |= c
+
+    imgui.text("半径:")
+    imgui.same_line()
+    c, props["radius"] = imgui.slider_float("##light_radius", props["radius"], 0.5, 50.0,
+                                            flags=imgui.SliderFlags_.logarithmic)
+    changed |= c
+
+    if changed:
+        outline_scene.update_light(selected_object["id"], props["position"], props["color"], props["intensity"],
+                                   props["radius"])
+
 
 def show_file_input(label, prop_key, props):
     """显示文件输入控件"""
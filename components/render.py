@@ -4,30 +4,7 @@
 """
 
 from imgui_bundle import imgui
-
-# 渲染设置状态变量
-render_settings = {
-    # 基本信息
-    "resolution_width": 1280,
-    "resolution_height": 720,
-    "renderer_type": "rasterizer",
-
-    # 光栅化渲染设置
-    "antialiasing": "OFF",
-    "color_type": "texture",
-    "antialiasing2": "OFF",
-    "ray_tracing_enabled": False,
-    "ambient_occlusion_enabled": False,
-
-    # 路径追踪渲染设置
-    "samples": 64,
-    "max_depth": 8,
-    "russian_roulette": True,
-
-    # 光线追踪渲染设置
-    "reflection_depth": 4,
-    "shadow_quality": "High"
-}
+from components.render_settings import render_settings
 
 
 def show_render_settings_panel(open: bool) -> bool:
@@ -128,6 +105,35 @@ def show_render_settings_panel(open: bool) -> bool:
             imgui.same_line()
             _, render_settings['ambient_occlusion_enabled'] = imgui.checkbox("##ambient_occlusion", render_settings['ambient_occlusion_enabled'])
 
+            # 环境光遮蔽质量：分辨率和采样数
+            if render_settings['ambient_occlusion_enabled']:
+                imgui.text("遮蔽质量:")
+                imgui.same_line()
+                ao_qualities = ["Low", "Medium", "High", "Ultra"]
+
+                if imgui.begin_combo("##ambient_occlusion_quality", render_settings['ambient_occlusion_quality']):
+                    for quality in ao_qualities:
+                        is_selected = (quality == render_settings['ambient_occlusion_quality'])
+                        if imgui.selectable(quality, is_selected):
+                            render_settings['ambient_occlusion_quality'] = quality
+                        if is_selected:
+                            imgui.set_item_default_focus()
+                    imgui.end_combo()
+
+            # 阴影质量：级联数、分辨率和 PCF 核大小（与光线追踪设置共用）
+            imgui.text("阴影质量:")
+            imgui.same_line()
+            shadow_qualities = ["Low", "Medium", "High", "Ultra"]
+
+            if imgui.begin_combo("##raster_shadow_quality", render_settings['shadow_quality']):
+                for quality in shadow_qualities:
+                    is_selected = (quality == render_settings['shadow_quality'])
+                    if imgui.selectable(quality, is_selected):
+                        render_settings['shadow_quality'] = quality
+                    if is_selected:
+                        imgui.set_item_default_focus()
+                imgui.end_combo()
+
         # 路径追踪渲染部分
         elif render_settings['renderer_type'] == "path_tracer":
             imgui.text("路径追踪渲染设置")
@@ -195,7 +201,9 @@ def show_render_settings_panel(open: bool) -> bool:
                 print(f"  颜色类型: {render_settings['color_type']}")
                 print(f"  高级抗锯齿: {render_settings['antialiasing2']}")
                 print(f"  光线追踪: {'开启' if render_settings['ray_tracing_enabled'] else '关闭'}")
-                print(f"  环境光遮蔽: {'开启' if render_settings['ambient_occlusion_enabled'] else '关闭'}")
+                print(f"  环境光遮蔽: {'开启' if render_settings['ambient_occlusion_enabled'] else '关闭'}"
+                      f"（{render_settings['ambient_occlusion_quality']}）")
+                print(f"  阴影质量: {render_settings['shadow_quality']}")
             elif render_settings['renderer_type'] == "path_tracer":
                 print(f"  采样数: {render_settings['samples']}")
                 print(f"  最大深度: {render_settings['max_depth']}")
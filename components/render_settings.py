@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+渲染设置状态
+
+不依赖 imgui，视口和批量渲染可以直接导入，而不会提前加载渲染设置面板
+"""
+
+# 渲染设置状态变量
+render_settings = {
+    # 基本信息
+    "resolution_width": 1280,
+    "resolution_height": 720,
+    "renderer_type": "rasterizer",
+
+    # 光栅化渲染设置
+    "antialiasing": "OFF",
+    "color_type": "texture",
+    "antialiasing2": "OFF",
+    "ray_tracing_enabled": False,
+    "ambient_occlusion_enabled": False,
+    "ambient_occlusion_quality": "Medium",
+
+    # 路径追踪渲染设置
+    "samples": 64,
+    "max_depth": 8,
+    "russian_roulette": True,
+
+    # 光线追踪渲染设置
+    "reflection_depth": 4,
+    "shadow_quality": "High"
+}
@@ -5,10 +5,69 @@ Viewport component with OpenGL API - Display rotating square using OpenGL
 
 from imgui_bundle import imgui
 import time
+import math
 import numpy as np
 import OpenGL.GL as gl
-import OpenGL.GL.shaders as shaders
 import ctypes
+from frame_pacer import request_continuous
+from profiling import frame_profiler
+from gpu import shader_manager, FrameConstants, CAMERA_BINDING, OBJECT_BINDING
+from gpu import Mesh, InstancedScene, cube_arrays, pyramid_arrays
+from gpu import ViewportTarget, render_target_pool, DepthReadback
+from gpu import IndirectScene, indirect_supported
+from gpu import FxaaPass, AntialiasingBenchmark, ANTIALIASING_MODES, parse_antialiasing
+from gpu import resolve_multisample, copy_depth, max_samples
+from gpu import GBuffer, DeferredLighting, gbuffer_bytes, MAX_GBUFFER_BYTES
+from gpu import SsaoPass, ShadowMaps
+from gpu import ClusteredLights, CLUSTER_GLSL, CLUSTER_GRID, disable_clustered_lights
+from gpu import VERTEX_LAYOUTS, LAYOUT_FLOAT32, LAYOUT_COMPACT, quantization_error
+from gpu.transforms import perspective, look_at, to_gl, compose_trs
+from scene import Scene, DepthPyramid, frustum_planes, outline_scene
+from scene import projected_radius, select_lods
+from scene.lod import DEFAULT_LOD_PIXELS
+from scene.bvh import NULL_NODE
+from scene.outline_scene import OUTLINE_PROTOTYPE
+from components.outline import outline_state, get_mesh_object_ids, get_light_object_ids
+from components.render_settings import render_settings
+
+# Square outline color
+OUTLINE_COLOR = (1.0, 1.0, 1.0, 1.0)
+# Per-frame object constants reserved in the uniform ring
+MAX_OBJECTS = 1024
+# Object slots used by the square
+FILL_OBJECT = 0
+OUTLINE_OBJECT = 1
+# The square only has positions; it goes through the same layout path as the meshes
+SQUARE_DTYPE = np.dtype([("position", np.float32, 3)])
+SQUARE_LAYOUT = LAYOUT_FLOAT32
+# Vertex layout for scene meshes; the float32 layout stays selectable for quality comparison
+DEFAULT_VERTEX_LAYOUT = LAYOUT_COMPACT.name
+# Orbit camera far plane in multiples of the orbit radius
+ORBIT_FAR_SCALE = 4.0
+# SSAO sampling radius in multiples of the orbit radius
+SSAO_RADIUS_SCALE = 0.06
+# Demo point lights scattered over the scene bounds; each reaches this many times the average spacing
+MAX_DEMO_LIGHTS = 1024
+DEMO_LIGHT_REACH = 1.0
+
+# Viewport scenes
+SCENE_SQUARE = "square"
+SCENE_INSTANCES = "instances"
+SCENE_OUTLINE = "outline"
+SCENE_IMPORTED = "imported"
+SCENE_NAMES = {SCENE_SQUARE: "正方形", SCENE_INSTANCES: "实例化演示", SCENE_OUTLINE: "大纲对象",
+               SCENE_IMPORTED: "导入网格"}
+# Instancing demo limits and layout
+MAX_DEMO_INSTANCES = 100_000
+DEMO_PROTOTYPES = {"cube": cube_arrays, "pyramid": pyramid_arrays}
+DEMO_SPACING = 1.5
+DEMO_PALETTE = np.array([
+    [0.90, 0.55, 0.20, 1.0],
+    [0.35, 0.65, 0.90, 1.0],
+    [0.55, 0.80, 0.40, 1.0],
+    [0.85, 0.35, 0.45, 1.0],
+    [0.75, 0.75, 0.70, 1.0],
+], dtype=np.float32)
 
 
 class ViewportManager:
@@ -16,71 +75,106 @@ class ViewportManager:
 
     def __init__(self):
         self.rotation_angle = 0.0
-        self.rotation_speed = 1.0  # Rotation speed in degrees per second
+        self.rotation_speed = 1.0  # Rotation speed in degrees per second, 0 pauses the animation
         self.square_color = [1.0, 0.5, 0.0, 1.0]  # Orange color
         self.background_color = [0.1, 0.1, 0.1, 1.0]  # Dark gray background
-        self.texture_id = None
-        self.framebuffer_id = None
-        self.renderbuffer_id = None
+        # Pooled colour + depth-stencil target, sized in buckets with shrink hysteresis
+        self.render_target = None
+        # Anti-aliasing from render_settings['antialiasing']: the scene is drawn into a pooled multisample
+        # (MSAA) or plain (FXAA) target this frame, then resolved into render_target for display
+        self.scene_target = None
+        self.antialiasing = "OFF"
+        self.max_samples = 0
+        self.fxaa_pass = None
+        self.aa_benchmark = AntialiasingBenchmark()
+        # Depth readback requested by this frame's draw, captured from render_target after the resolve
+        self._depth_capture = None
+        # Deferred path for the mesh scenes: a G-buffer pass, then lighting or the render_settings['color_type']
+        # debug view in one fullscreen pass; falls back to forward drawing when the G-buffer exceeds its budget
+        self.deferred = True
+        self.gbuffer = None
+        self.gbuffer_shader = None
+        self.deferred_lighting = None
+        self._deferred_active = False
+        # Half/quarter-resolution SSAO from the G-buffer (render_settings['ambient_occlusion_enabled'])
+        self.ssao_pass = None
+        self._ssao_active = False
+        # Cascaded shadow maps for the deferred path (render_settings['shadow_quality']); cascades are cached
+        # while the casters and the light stay put and the camera stays inside the cached cascade bounds
+        self.shadows_enabled = True
+        self.shadow_maps = None
+        self.shadow_shader = None
+        self._shadows_active = False
+        # Clustered point lights for the mesh scenes: the outline's light objects (outline scene) plus demo
+        # lights scattered over the scene bounds, binned into view-space clusters every frame; forward and
+        # deferred shading loop over only their cluster's lights
+        self.point_lights_enabled = True
+        self.demo_light_count = 0
+        self.clustered_lights = None
+        self._lights_active = False
+        # (count, positions in unit bounds, colours) of the demo lights, regenerated when the count changes
+        self._demo_lights = None
         self.width = 800
         self.height = 600
 
         # Modern OpenGL resources
         self.vao = None
-        self.vbo = None
-        self.shader_program = None
+        self.square_mesh = None
+        self.shader = None
         self.fallback_mode = False
-        self.vertex_shader_source = """
-        #version 330 core
-        layout (location = 0) in vec2 aPos;
-        uniform mat4 model;
-        uniform mat4 projection;
-        void main()
-        {
-            gl_Position = projection * model * vec4(aPos, 0.0, 1.0);
-        }
-        """
 
-        self.fragment_shader_source = """
-        #version 330 core
-        out vec4 FragColor;
-        uniform vec4 color;
-        void main()
-        {
-            FragColor = color;
-        }
-        """
+        # Triple-buffered camera/object constants
+        self.constants = None
+
+        # Instancing demo: prototypes are built on first use
+        self.scene_mode = SCENE_SQUARE
+        self.instance_count = 10_000
+        self.instanced_scene = None
+        self.instanced_shader = None
+        self._built_instance_count = -1
+        # Demo instances live in a culling scene; only visible ones are copied to the batches each frame
+        self.demo_culling = None
+        # GPU-driven path for the demo (GL 4.3): culled by a compute shader, drawn with one indirect multi-draw
+        self.gpu_driven = False
+        self.gpu_driven_supported = False
+        self.indirect_scene = None
+        self._indirect_version = None
+
+        # Occlusion culling against a depth pyramid built from an earlier frame's depth, read back asynchronously
+        self.occlusion_culling = True
+        self.depth_readback = None
+        # (culling scene, DepthPyramid) from the newest completed readback
+        self._depth_pyramid = None
+
+        # Outline mesh objects: culled through the global outline scene, drawn as cube instances
+        self.outline_batches = None
+        # Scene meshes are encoded with this layout; switching re-uploads them
+        self.vertex_layout = VERTEX_LAYOUTS[DEFAULT_VERTEX_LAYOUT]
+
+        # Imported meshes: one prototype with a single instance per mesh
+        self.imported_scene = None
+        self.imported_bounds = None
+        # Source MeshData per prototype, kept (memory-mapped when cached) for re-encoding
+        self.imported_sources = {}
+        # Quantisation error of the imported meshes in the current layout, computed on request
+        self.imported_errors = None
+        # Per-mesh LOD chosen each frame from its projected size; the distance scale moves the camera out
+        self.lod_enabled = True
+        self.lod_pixels = DEFAULT_LOD_PIXELS
+        self.imported_distance = 1.0
+        self.lod_stats = {"triangles": 0, "full": 0, "levels": []}
+
+        # Orthographic projection, identity view and scratch model matrix, reused every frame
+        self.projection = np.identity(4, dtype=np.float32)
+        self.view = np.identity(4, dtype=np.float32)
+        self.model = np.identity(4, dtype=np.float32)
 
     def init_opengl_context(self):
         """Initialize OpenGL context and resources"""
         try:
-            # Generate framebuffer
-            self.framebuffer_id = gl.glGenFramebuffers(1)
-            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer_id)
-
-            # Generate texture
-            self.texture_id = gl.glGenTextures(1)
-            gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture_id)
-            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, self.width, self.height, 0,
-                            gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, None)
-            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
-            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
-
-            # Generate renderbuffer for depth and stencil
-            self.renderbuffer_id = gl.glGenRenderbuffers(1)
-            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, self.renderbuffer_id)
-            gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, gl.GL_DEPTH24_STENCIL8, self.width, self.height)
-
-            # Attach texture and renderbuffer to framebuffer
-            gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_TEXTURE_2D, self.texture_id, 0)
-            gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, gl.GL_DEPTH_STENCIL_ATTACHMENT, gl.GL_RENDERBUFFER, self.renderbuffer_id)
-
-            # Check framebuffer completeness
-            if gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER) != gl.GL_FRAMEBUFFER_COMPLETE:
-                print("ERROR: Framebuffer is not complete!")
-
-            # Unbind framebuffer
-            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+            # Colour texture + depth-stencil renderbuffer from the shared pool
+            self.render_target = ViewportTarget(render_target_pool)
+            self.render_target.resize(self.width, self.height)
 
             # Create shader program
             self._create_shader_program()
@@ -88,6 +182,13 @@ class ViewportManager:
             # Create vertex data
             self._create_vertex_data()
 
+            # Create per-frame uniform ring
+            self.constants = FrameConstants(MAX_OBJECTS)
+
+            # Compute shaders and indirect multi-draw need a 4.3 context; otherwise only the CPU path is offered
+            self.gpu_driven_supported = indirect_supported()
+            self.max_samples = max_samples()
+
             print("OpenGL context initialized successfully")
         except Exception as e:
             print(f"Error initializing OpenGL context: {e}")
@@ -95,38 +196,30 @@ class ViewportManager:
             self.fallback_mode = True
 
     def _create_shader_program(self):
-        """Create shader program"""
+        """Load the viewport program from gpu/shaders (program binary cache, hot reload)"""
         try:
-            # Compile vertex shader
-            vertex_shader = shaders.compileShader(self.vertex_shader_source, gl.GL_VERTEX_SHADER)
-            # Compile fragment shader
-            fragment_shader = shaders.compileShader(self.fragment_shader_source, gl.GL_FRAGMENT_SHADER)
-            # Link shader program
-            self.shader_program = shaders.compileProgram(vertex_shader, fragment_shader)
+            self.shader = shader_manager.load("viewport", vertex_prelude=SQUARE_LAYOUT.glsl())
+            self.shader.bind_block("Camera", CAMERA_BINDING)
+            self.shader.bind_block("Object", OBJECT_BINDING)
         except Exception as e:
             print(f"Shader compilation error: {e}")
 
     def _create_vertex_data(self):
         """Create vertex data for square"""
         # Square vertices
-        vertices = np.array([
-            -0.5, -0.5,  # Bottom-left
-             0.5, -0.5,  # Bottom-right
-             0.5,  0.5,  # Top-right
-            -0.5,  0.5,  # Top-left
-        ], dtype=np.float32)
-
-        # Create VAO and VBO
-        self.vao = gl.glGenVertexArrays(1)
-        self.vbo = gl.glGenBuffers(1)
+        vertices = np.zeros(4, dtype=SQUARE_DTYPE)
+        vertices["position"] = [
+            (-0.5, -0.5, 0.0),  # Bottom-left
+            ( 0.5, -0.5, 0.0),  # Bottom-right
+            ( 0.5,  0.5, 0.0),  # Top-right
+            (-0.5,  0.5, 0.0),  # Top-left
+        ]
+        self.square_mesh = Mesh("square", vertices, mode=gl.GL_TRIANGLE_FAN, layout=SQUARE_LAYOUT)
 
+        # Attribute pointers come from the layout description
+        self.vao = gl.glGenVertexArrays(1)
         gl.glBindVertexArray(self.vao)
-        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
-        gl.glBufferData(gl.GL_ARRAY_BUFFER, vertices.nbytes, vertices, gl.GL_STATIC_DRAW)
-
-        # Set vertex attributes
-        gl.glVertexAttribPointer(0, 2, gl.GL_FLOAT, gl.GL_FALSE, 2 * np.dtype(np.float32).itemsize, None)
-        gl.glEnableVertexAttribArray(0)
+        self.square_mesh.setup_vertex_attributes()
 
         gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
         gl.glBindVertexArray(0)
@@ -136,18 +229,127 @@ class ViewportManager:
         current_time = time.time()
         self.rotation_angle = (current_time * self.rotation_speed) % 360.0
 
+    def is_animating(self) -> bool:
+        """Whether the viewport content changes every frame"""
+        return self.rotation_speed > 0.0
+
     def render_to_texture(self, width: int, height: int):
         """Render OpenGL scene to texture using modern OpenGL"""
-        if width != self.width or height != self.height:
-            self.width = width
-            self.height = height
+        if self.render_target is None:
+            return
+
+        self.width = width
+        self.height = height
+        with frame_profiler.scope("viewport_resize"):
+            # Cheap unless the size bucket changes; a pending shrink needs to be polled every frame
             self.resize_texture(width, height)
+        if self.render_target.shrink_pending:
+            # Keep drawing frames until the delayed shrink has happened
+            request_continuous()
+
+        with frame_profiler.scope("viewport_gbuffer"):
+            self._deferred_active = self._begin_deferred(width, height)
+            self._ssao_active = False
+            self._shadows_active = False
+            self._lights_active = False
+        with frame_profiler.scope("viewport_antialiasing"):
+            samples, fxaa = self._begin_antialiasing(width, height)
+
+        with frame_profiler.scope("viewport_clear"):
+            self._clear_framebuffer(width, height)
+
+        if self.shader and self.vao and self.constants:
+            with frame_profiler.scope("viewport_draw"):
+                if self.scene_mode == SCENE_INSTANCES:
+                    self._draw_instances(width, height)
+                elif self.scene_mode == SCENE_OUTLINE:
+                    self._draw_outline_objects(width, height)
+                elif self.scene_mode == SCENE_IMPORTED:
+                    self._draw_imported(width, height)
+                else:
+                    self._draw_scene()
 
-        # Bind framebuffer
-        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer_id)
+        with frame_profiler.scope("viewport_resolve"):
+            self._resolve(width, height, samples, fxaa)
 
-        # Set viewport
-        gl.glViewport(0, 0, width, height)
+        # Unbind framebuffer
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+
+    def _begin_antialiasing(self, width: int, height: int):
+        """Pick this frame's scene target for the anti-aliasing mode, returns (samples, fxaa)"""
+        self.antialiasing = self.aa_benchmark.mode or render_settings["antialiasing"]
+        samples, fxaa = parse_antialiasing(self.antialiasing)
+        samples = min(samples, self.max_samples)
+        if self._deferred_active:
+            # The G-buffer is single-sampled; lighting writes one colour per pixel
+            samples = 0
+        if fxaa and self.fxaa_pass is None:
+            try:
+                self.fxaa_pass = FxaaPass()
+            except Exception as e:
+                print(f"FXAA unavailable: {e}")
+                render_settings["antialiasing"] = "OFF"
+                fxaa = False
+        if samples:
+            self.scene_target = render_target_pool.acquire(width, height, samples=samples)
+        elif fxaa:
+            self.scene_target = render_target_pool.acquire(width, height)
+        else:
+            self.scene_target = self.render_target.target
+        self.aa_benchmark.begin(width, height)
+        return samples, fxaa
+
+    def _begin_deferred(self, width: int, height: int) -> bool:
+        """Size the G-buffer for this frame, returns whether the deferred path is used"""
+        within_budget = gbuffer_bytes(width, height) <= MAX_GBUFFER_BYTES
+        if not (self.deferred and within_budget):
+            # Give the memory back when deferred drawing is off or the viewport outgrew the budget
+            if self.gbuffer is not None:
+                self.gbuffer.delete()
+                self.gbuffer = None
+            return False
+        if self.scene_mode == SCENE_SQUARE:
+            return False
+        try:
+            if self.deferred_lighting is None:
+                self.deferred_lighting = DeferredLighting()
+            if self.gbuffer is None:
+                self.gbuffer = GBuffer()
+            self.gbuffer.resize(width, height)
+        except Exception as e:
+            print(f"Deferred rendering unavailable: {e}")
+            self.deferred = False
+            return False
+        return True
+
+    def _resolve(self, width: int, height: int, samples: int, fxaa: bool):
+        """Resolve the scene target into the display target and queue a pending depth readback"""
+        display = self.render_target.target
+        capture = self._depth_capture
+        if self.scene_target is not display:
+            if samples:
+                resolve_multisample(self.scene_target, display, depth=capture is not None)
+            else:
+                self.fxaa_pass.apply(self.scene_target, display)
+                if capture is not None:
+                    copy_depth(self.scene_target, display)
+            render_target_pool.release(self.scene_target)
+            self.scene_target = display
+        self.aa_benchmark.end()
+        if self.aa_benchmark.running:
+            request_continuous()
+
+        if capture is not None:
+            self._depth_capture = None
+            with frame_profiler.scope("viewport_depth_readback"):
+                if self.depth_readback is None:
+                    self.depth_readback = DepthReadback()
+                self.depth_readback.capture(display.framebuffer, width, height, capture)
+
+    def _clear_framebuffer(self, width: int, height: int):
+        """Bind the viewport framebuffer and clear it"""
+        # Bind framebuffer, the viewport covers only the used sub-rectangle
+        self.scene_target.bind()
 
         # Clear with background color
         r, g, b, a = self.background_color
@@ -157,80 +359,581 @@ class ViewportManager:
         # Enable depth testing
         gl.glEnable(gl.GL_DEPTH_TEST)
 
-        if self.shader_program and self.vao:
-            # Use shader program
-            gl.glUseProgram(self.shader_program)
-
-            # Create projection matrix (orthographic)
-            projection = np.array([
-                [1.0, 0.0, 0.0, 0.0],
-                [0.0, 1.0, 0.0, 0.0],
-                [0.0, 0.0, 1.0, 0.0],
-                [0.0, 0.0, 0.0, 1.0]
-            ], dtype=np.float32)
-
-            # Create model matrix with rotation
-            angle_rad = np.radians(self.rotation_angle)
-            cos_a = np.cos(angle_rad)
-            sin_a = np.sin(angle_rad)
-            model = np.array([
-                [cos_a, -sin_a, 0.0, 0.0],
-                [sin_a,  cos_a, 0.0, 0.0],
-                [0.0,    0.0,   1.0, 0.0],
-                [0.0,    0.0,   0.0, 1.0]
-            ], dtype=np.float32)
-
-            # Set uniforms
-            projection_loc = gl.glGetUniformLocation(self.shader_program, "projection")
-            model_loc = gl.glGetUniformLocation(self.shader_program, "model")
-            color_loc = gl.glGetUniformLocation(self.shader_program, "color")
-
-            gl.glUniformMatrix4fv(projection_loc, 1, gl.GL_FALSE, projection)
-            gl.glUniformMatrix4fv(model_loc, 1, gl.GL_FALSE, model)
-
-            # Draw filled square
-            r, g, b, a = self.square_color
-            gl.glUniform4f(color_loc, r, g, b, a)
-
-            gl.glBindVertexArray(self.vao)
-            gl.glDrawArrays(gl.GL_TRIANGLE_FAN, 0, 4)
-
-            # Draw square outline in white
-            gl.glUniform4f(color_loc, 1.0, 1.0, 1.0, 1.0)
-            gl.glLineWidth(2.0)
-            gl.glDrawArrays(gl.GL_LINE_LOOP, 0, 4)
-
-            gl.glBindVertexArray(0)
-            gl.glUseProgram(0)
+    def _draw_scene(self):
+        """Draw the rotating square into the bound framebuffer"""
+        constants = self.constants
+        # Waits only if the GPU is still reading this ring region from three frames ago
+        constants.begin_frame()
 
-        # Unbind framebuffer
-        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        # Update the rotation part of the model matrix in place
+        angle_rad = math.radians(self.rotation_angle)
+        cos_a = math.cos(angle_rad)
+        sin_a = math.sin(angle_rad)
+        model = self.model
+        model[0, 0] = cos_a
+        model[0, 1] = -sin_a
+        model[1, 0] = sin_a
+        model[1, 1] = cos_a
+
+        # Write camera and object constants straight into the mapped buffer
+        constants.camera_projection[:] = self.projection
+        constants.camera_view[:] = self.view
+        constants.object_models[FILL_OBJECT] = model
+        constants.object_models[OUTLINE_OBJECT] = model
+        constants.object_colors[FILL_OBJECT] = self.square_color
+        constants.object_colors[OUTLINE_OBJECT] = OUTLINE_COLOR
+        constants.upload(2)
+
+        # Use shader program
+        self.shader.use()
+        constants.bind_camera()
+        gl.glBindVertexArray(self.vao)
+
+        # Draw filled square
+        constants.bind_object(FILL_OBJECT)
+        gl.glDrawArrays(self.square_mesh.mode, 0, self.square_mesh.vertex_count)
+
+        # Draw square outline in white
+        constants.bind_object(OUTLINE_OBJECT)
+        gl.glLineWidth(2.0)
+        gl.glDrawArrays(gl.GL_LINE_LOOP, 0, self.square_mesh.vertex_count)
+
+        gl.glBindVertexArray(0)
+        gl.glUseProgram(0)
+        constants.end_frame()
+
+    def _ensure_instanced_shader(self):
+        """Load the instanced program for the current vertex layout on first use"""
+        if self.instanced_shader is None:
+            layout = self.vertex_layout
+            self.instanced_shader = shader_manager.load(f"instanced.{layout.name}", "instanced.vert", "instanced.frag",
+                                                        vertex_prelude=layout.glsl(), fragment_prelude=CLUSTER_GLSL)
+            self.instanced_shader.bind_block("Camera", CAMERA_BINDING)
+
+    def _ensure_gbuffer_shader(self):
+        """Load the G-buffer program (same vertex stage, MRT fragment stage) for the current vertex layout"""
+        if self.gbuffer_shader is None:
+            layout = self.vertex_layout
+            self.gbuffer_shader = shader_manager.load(f"gbuffer.{layout.name}", "instanced.vert", "gbuffer.frag",
+                                                      vertex_prelude=layout.glsl())
+            self.gbuffer_shader.bind_block("Camera", CAMERA_BINDING)
+
+    def set_vertex_layout(self, name: str):
+        """Switch the scene vertex layout, re-encoding the demo prototypes and imported meshes"""
+        layout = VERTEX_LAYOUTS[name]
+        if layout is self.vertex_layout:
+            return
+        self.vertex_layout = layout
+        # Each layout has its own program; the old one stays loaded for switching back
+        self.instanced_shader = None
+        self.gbuffer_shader = None
+        self.shadow_shader = None
+        self.imported_errors = None
+        if self.instanced_scene is not None:
+            # Rebuilt with the new layout on the next demo frame
+            self.instanced_scene.delete()
+            self.instanced_scene = None
+            self._built_instance_count = -1
+        if self.indirect_scene is not None:
+            self.indirect_scene.delete()
+            self.indirect_scene = None
+        if self.outline_batches is not None:
+            self.outline_batches.delete()
+            self.outline_batches = None
+        if self.imported_scene is not None:
+            self._ensure_instanced_shader()
+            for name, batch in list(self.imported_scene.batches.items()):
+                source = self.imported_sources[name]
+                models = batch.instances["model"][:batch.count].copy()
+                colors = batch.instances["color"][:batch.count].copy()
+                batch.mesh.delete()
+                mesh = Mesh(name, source.vertices, source.indices, layout=layout,
+                            lod_indices=source.lod_indices, lods=source.lods)
+                self.imported_scene.add_prototype(name, mesh, capacity=1)
+                self.imported_scene.set_instances(name, models, colors)
+
+    def measure_imported_error(self):
+        """Worst-case quantisation error over the imported meshes in the current layout"""
+        errors = {}
+        for source in self.imported_sources.values():
+            for key, value in quantization_error(source.vertices, self.vertex_layout).items():
+                errors[key] = max(errors.get(key, 0.0), value)
+        self.imported_errors = errors
+        return errors
+
+    def _add_prototype(self, scene: InstancedScene, name: str, arrays, culling: Scene = None):
+        """Upload a prototype mesh in the current vertex layout and register its bounds for culling"""
+        vertices, indices = arrays
+        scene.add_prototype(name, Mesh(name, vertices, indices, layout=self.vertex_layout))
+        if culling is not None:
+            culling.set_prototype(name, vertices["position"].min(axis=0), vertices["position"].max(axis=0))
+
+    def _build_instancing_demo(self, count: int):
+        """Lay out count instances of a few prototypes on a grid (vectorised)"""
+        if self.instanced_scene is None:
+            self._ensure_instanced_shader()
+            self.instanced_scene = InstancedScene()
+            self.demo_culling = Scene(count)
+            for name, arrays in DEMO_PROTOTYPES.items():
+                self._add_prototype(self.instanced_scene, name, arrays(), self.demo_culling)
+
+        rng = np.random.default_rng(12345)
+        side = max(1, math.ceil(math.sqrt(count)))
+        index = np.arange(count)
+        translations = np.zeros((count, 3), dtype=np.float32)
+        translations[:, 0] = (index % side - (side - 1) * 0.5) * DEMO_SPACING
+        translations[:, 2] = (index // side - (side - 1) * 0.5) * DEMO_SPACING
+        scales = rng.uniform(0.4, 1.0, count).astype(np.float32)
+        translations[:, 1] = scales * 0.5
+        models = compose_trs(translations, rng.uniform(0.0, 2.0 * np.pi, count), scales)
+        colors = DEMO_PALETTE[rng.integers(0, len(DEMO_PALETTE), count)]
+
+        # Alternate prototypes across the grid; the hierarchy is built in one pass
+        names = np.array(list(self.instanced_scene.batches))
+        self.demo_culling.clear()
+        self.demo_culling.add_many(names[index % len(names)], np.swapaxes(models, 1, 2), colors)
+        self._built_instance_count = count
+
+    def _draw_instances(self, width: int, height: int):
+        """Draw the instancing demo with one instanced draw call per prototype"""
+        if self._built_instance_count != self.instance_count:
+            self._build_instancing_demo(self.instance_count)
+
+        # Orbit the camera around the grid
+        extent = math.ceil(math.sqrt(self.instance_count)) * DEMO_SPACING
+        radius = max(extent * 0.75, 4.0)
+        if self.gpu_driven and self.gpu_driven_supported:
+            self._sync_indirect()
+            self._draw_orbit(self.indirect_scene, width, height, (0.0, 0.0, 0.0), radius, near=0.1, cull_faces=True,
+                             gpu_culling=True)
+        else:
+            self._draw_orbit(self.instanced_scene, width, height, (0.0, 0.0, 0.0), radius, near=0.1,
+                             cull_faces=True, culling=self.demo_culling)
+
+    def _sync_indirect(self):
+        """Upload the demo scene's shown objects to the GPU-driven scene when the scene has changed"""
+        if self.indirect_scene is None:
+            self.indirect_scene = IndirectScene({name: arrays() for name, arrays in DEMO_PROTOTYPES.items()},
+                                                self.vertex_layout, self.demo_culling.count)
+            self._indirect_version = None
+        culling = self.demo_culling
+        if culling.version == self._indirect_version:
+            return
+        self._indirect_version = culling.version
+        shown = np.flatnonzero(culling.leaves[:culling.count] != NULL_NODE)
+        names = np.array(culling.prototype_names)
+        self.indirect_scene.set_objects(names[culling.prototypes[shown]], np.swapaxes(culling.models[shown], 1, 2),
+                                        culling.colors[shown], culling.world_low[shown], culling.world_high[shown])
+
+    def _draw_outline_objects(self, width: int, height: int):
+        """Draw the outline's mesh objects, culled through the outline scene's hierarchy"""
+        # Cheap unless objects were added or deleted since the last frame
+        outline_scene.sync(get_mesh_object_ids(), outline_state.revision)
+        if self.outline_batches is None:
+            self._ensure_instanced_shader()
+            self.outline_batches = InstancedScene()
+            self._add_prototype(self.outline_batches, OUTLINE_PROTOTYPE, cube_arrays())
+
+        bounds = outline_scene.bounds()
+        if bounds is None:
+            low, high = np.full(3, -1.0, dtype=np.float32), np.full(3, 1.0, dtype=np.float32)
+        else:
+            low, high = bounds
+        center = tuple(float(c) for c in (low + high) * 0.5)
+        radius = max(float(np.linalg.norm(high - low)) * 0.9, 2.0)
+        self._draw_orbit(self.outline_batches, width, height, center, radius, near=0.1, cull_faces=True,
+                         culling=outline_scene)
+
+    def _orbit_camera(self, width: int, height: int, center, radius: float, near: float):
+        """Eye position, projection and view of the orbit camera at the rotation angle"""
+        angle = math.radians(self.rotation_angle)
+        eye = (center[0] + radius * math.cos(angle), center[1] + radius * 0.6, center[2] + radius * math.sin(angle))
+        projection = perspective(60.0, width / max(height, 1), near, radius * ORBIT_FAR_SCALE)
+        return eye, projection, look_at(eye, center)
+
+    def _draw_orbit(self, scene, width: int, height: int, center, radius: float,
+                    near: float, cull_faces: bool, culling: Scene = None, gpu_culling: bool = False):
+        """Draw an instanced scene with the camera orbiting center at the rotation angle
+
+        With a culling scene, its frustum-visible objects replace the batches' instances first. With
+        occlusion culling on, objects hidden in the newest read-back depth are dropped as well, and this
+        frame's depth is queued for reading back. With gpu_culling, scene is an IndirectScene that
+        culls itself in a compute pass before its indirect draw. On the deferred path the scene is drawn
+        into the G-buffer and composited into the scene target, which also receives the G-buffer depth.
+        Point lights are binned into clusters for this camera before either path shades.
+        """
+        eye, projection, view = self._orbit_camera(width, height, center, radius, near)
+        view_projection = projection @ view
+        far = radius * ORBIT_FAR_SCALE
+        bounds = self._scene_bounds(culling, gpu_culling)
+
+        shadows = None
+        if self._deferred_active and self.shadows_enabled:
+            # Before the camera culling: per-cascade caster culling reuses the same batches
+            with frame_profiler.scope("viewport_shadows"):
+                shadows = self._update_shadows(scene, culling, gpu_culling, bounds, projection, view, near, far)
+
+        lights = None
+        if self.point_lights_enabled:
+            with frame_profiler.scope("viewport_light_binning"):
+                lights = self._update_lights(bounds, projection, view, near, far, width, height)
+
+        occlusion = culling is not None and self.occlusion_culling
+        if gpu_culling:
+            with frame_profiler.scope("viewport_gpu_cull"):
+                scene.cull(frustum_planes(view_projection))
+        elif culling is not None:
+            with frame_profiler.scope("viewport_cull"):
+                visible = culling.cull(view_projection)
+                if occlusion:
+                    visible = self._occlusion_cull(culling, visible, view_projection)
+                for name, (models, colors) in culling.gather(visible).items():
+                    scene.set_instances(name, models, colors)
+
+        constants = self.constants
+        constants.begin_frame()
+        constants.camera_projection[:] = to_gl(projection)
+        constants.camera_view[:] = to_gl(view)
+        constants.upload(0)
+
+        if self._deferred_active:
+            self._ensure_gbuffer_shader()
+            program = self.gbuffer_shader
+            self.gbuffer.bind_and_clear(self.background_color)
+        else:
+            program = self.instanced_shader
+        program.use()
+        constants.bind_camera()
+        if not self._deferred_active:
+            # The forward program has no other samplers; the deferred pass shades the lights later
+            if lights is not None:
+                lights.apply_uniforms(program, 0)
+            else:
+                disable_clustered_lights(program, 0)
+        # Prototypes are closed meshes with counter-clockwise faces; imported meshes may not be closed
+        if cull_faces:
+            gl.glEnable(gl.GL_CULL_FACE)
+        # Per-mesh decode uniforms (quantisation bounds) are set before each batch
+        scene.draw(program)
+        gl.glDisable(gl.GL_CULL_FACE)
+        gl.glUseProgram(0)
+        if lights is not None and not self._deferred_active:
+            lights.unbind(0)
+        constants.end_frame()
+
+        if self._deferred_active:
+            ambient, ambient_scale = None, 0
+            if render_settings["ambient_occlusion_enabled"]:
+                with frame_profiler.scope("viewport_ssao"):
+                    ambient, ambient_scale = self._ambient_occlusion(projection, view, near, far, radius)
+            with frame_profiler.scope("viewport_deferred_lighting"):
+                self.deferred_lighting.apply(self.gbuffer, self.scene_target, render_settings["color_type"],
+                                             near, far, ambient, ambient_scale, shadows, lights)
+                if ambient is not None:
+                    render_target_pool.release(ambient)
+                # Anti-aliasing and the occlusion readback read depth from the scene target
+                self.gbuffer.copy_depth(self.scene_target)
+
+        if occlusion:
+            # Read back after the anti-aliasing resolve, from the single-sample display target
+            self._depth_capture = (culling, view_projection, culling.version)
+
+    def _scene_bounds(self, culling: Scene, gpu_culling: bool):
+        """World bounds (low, high) of the scene drawn by _draw_orbit, or None when it is empty"""
+        if gpu_culling or culling is not None:
+            return (self.demo_culling if gpu_culling else culling).bounds()
+        return self.imported_bounds
+
+    def _update_shadows(self, scene, culling: Scene, gpu_culling: bool, bounds, projection: np.ndarray,
+                        view: np.ndarray, near: float, far: float):
+        """Re-render the invalidated shadow cascades, returns the ShadowMaps or None"""
+        if bounds is None:
+            return None
+        try:
+            if self.shadow_maps is None:
+                self.shadow_maps = ShadowMaps()
+            if self.shadow_shader is None:
+                self.shadow_shader = self.shadow_maps.program_for(self.vertex_layout)
+        except Exception as e:
+            print(f"Shadows unavailable: {e}")
+            self.shadows_enabled = False
+            return None
+
+        # Anything that changes the casters' geometry invalidates every cascade
+        if gpu_culling:
+            caster_key = (id(scene), self._indirect_version)
+        elif culling is not None:
+            caster_key = (id(scene), id(culling), culling.version)
+        else:
+            caster_key = (id(scene), tuple((name, batch.lod) for name, batch in scene.batches.items()))
+        caster_key += (self.vertex_layout.name,)
+
+        def draw_casters(light_view_projection, program):
+            if gpu_culling:
+                scene.cull(frustum_planes(light_view_projection))
+                # The cull dispatch switched to the compute program
+                program.use()
+                scene.draw(program)
+                return scene.count
+            if culling is not None:
+                visible = culling.cull(light_view_projection)
+                for name, (models, colors) in culling.gather(visible).items():
+                    scene.set_instances(name, models, colors)
+                scene.draw(program)
+                return len(visible)
+            # Imported meshes are few; they are all drawn into every cascade
+            scene.draw(program)
+            return scene.instance_count
+
+        self.shadow_maps.update(self.shadow_shader, draw_casters, caster_key, bounds, projection, view, near, far,
+                                render_settings["shadow_quality"])
+        self._shadows_active = True
+        return self.shadow_maps
+
+    def _demo_light_arrays(self, bounds):
+        """Demo point lights spread over the scene bounds: (positions, colours, radii)"""
+        count = self.demo_light_count
+        if self._demo_lights is None or self._demo_lights[0] != count:
+            rng = np.random.default_rng(2024)
+            self._demo_lights = (count, rng.uniform(0.0, 1.0, (count, 3)),
+                                 DEMO_PALETTE[rng.integers(0, len(DEMO_PALETTE), count), :3])
+        _, unit, colors = self._demo_lights
+        low, high = (np.asarray(value, dtype=np.float64) for value in bounds)
+        size = high - low
+        # Radius from the average spacing on the ground plane, so neighbouring lights overlap a little
+        radius = max(math.hypot(size[0], size[2]) * DEMO_LIGHT_REACH / math.sqrt(max(count, 1)), 0.5)
+        positions = low + unit * size
+        # Hover up to half a radius above the tallest object so flat scenes are lit as well
+        positions[:, 1] = low[1] + unit[:, 1] * (size[1] + radius * 0.5)
+        return positions, colors, np.full(count, radius)
+
+    def _update_lights(self, bounds, projection: np.ndarray, view: np.ndarray, near: float, far: float,
+                       width: int, height: int):
+        """Bin this frame's point lights into clusters, returns the ClusteredLights or None"""
+        parts = []
+        if self.scene_mode == SCENE_OUTLINE:
+            parts.append(outline_scene.light_arrays(get_light_object_ids()))
+        if self.demo_light_count and bounds is not None:
+            parts.append(self._demo_light_arrays(bounds))
+        if not parts:
+            return None
+        positions, colors, radii = (np.concatenate(arrays).astype(np.float64) for arrays in zip(*parts))
+        if not len(radii):
+            return None
+        try:
+            if self.clustered_lights is None:
+                self.clustered_lights = ClusteredLights()
+        except Exception as e:
+            print(f"Clustered lights unavailable: {e}")
+            self.point_lights_enabled = False
+            return None
+        self.clustered_lights.update(positions, colors, radii, projection, view, near, far, width, height)
+        self._lights_active = True
+        return self.clustered_lights
+
+    def _ambient_occlusion(self, projection: np.ndarray, view: np.ndarray, near: float, far: float, radius: float):
+        """Compute SSAO from the G-buffer, returns (pooled occlusion target, scale) or (None, 0)"""
+        self._ssao_active = False
+        if self.ssao_pass is None:
+            try:
+                self.ssao_pass = SsaoPass()
+            except Exception as e:
+                print(f"SSAO unavailable: {e}")
+                render_settings["ambient_occlusion_enabled"] = False
+                return None, 0
+        self._ssao_active = True
+        return self.ssao_pass.apply(self.gbuffer, projection, view, near, far, radius * SSAO_RADIUS_SCALE,
+                                    render_settings["ambient_occlusion_quality"])
+
+    def _occlusion_cull(self, culling: Scene, visible: np.ndarray, view_projection: np.ndarray) -> np.ndarray:
+        """Drop objects occluded in the newest read-back depth of the same scene
+
+        The depth is at least a frame old. While it lags behind the camera or the scene, keep the
+        main loop drawing so an object wrongly hidden by the stale depth reappears within a few frames.
+        """
+        if self.depth_readback is not None:
+            result = self.depth_readback.poll()
+            if result is not None:
+                depth, (scene, captured_view_projection, version) = result
+                self._depth_pyramid = (scene, DepthPyramid(depth, captured_view_projection, version))
+        if self._depth_pyramid is None or self._depth_pyramid[0] is not culling:
+            return visible
+
+        pyramid = self._depth_pyramid[1]
+        visible = culling.occlusion_cull(visible, pyramid)
+        current = pyramid.version == culling.version and np.array_equal(pyramid.view_projection, view_projection)
+        if not current:
+            request_continuous()
+        return visible
+
+    def add_imported_mesh(self, mesh_data):
+        """
+        Upload an imported mesh (mesh_import.MeshData) and show it in the imported scene
+
+        Cached meshes are memory-mapped; their arrays go straight to glBufferData.
+        """
+        if self.imported_scene is None:
+            self._ensure_instanced_shader()
+            self.imported_scene = InstancedScene()
+
+        name = mesh_data.name
+        counter = 1
+        while name in self.imported_scene.batches:
+            name = f"{mesh_data.name}_{counter:02d}"
+            counter += 1
+        mesh = Mesh(name, mesh_data.vertices, mesh_data.indices, layout=self.vertex_layout,
+                    lod_indices=mesh_data.lod_indices, lods=mesh_data.lods)
+        self.imported_scene.add_prototype(name, mesh, capacity=1)
+        self.imported_sources[name] = mesh_data
+        self.imported_errors = None
+        color = DEMO_PALETTE[(len(self.imported_scene.batches) - 1) % len(DEMO_PALETTE)]
+        self.imported_scene.set_instances(name, to_gl(np.identity(4, dtype=np.float32))[None], color)
+
+        low, high = (np.asarray(b, dtype=np.float32) for b in mesh_data.bounds)
+        if self.imported_bounds is not None:
+            low = np.minimum(low, self.imported_bounds[0])
+            high = np.maximum(high, self.imported_bounds[1])
+        self.imported_bounds = (low, high)
+        self.scene_mode = SCENE_IMPORTED
+        return name
+
+    def _draw_imported(self, width: int, height: int):
+        """Draw the imported meshes, framing their combined bounding box"""
+        if self.imported_scene is None or not self.imported_scene.batches:
+            return
+        low, high = self.imported_bounds
+        center = tuple(float(c) for c in (low + high) * 0.5)
+        radius = max(float(np.linalg.norm(high - low)) * 0.9, 1e-3) * self.imported_distance
+        with frame_profiler.scope("viewport_lod"):
+            eye, projection, _ = self._orbit_camera(width, height, center, radius, radius * 0.01)
+            self._select_imported_lods(eye, projection, height)
+        self._draw_orbit(self.imported_scene, width, height, center, radius, near=radius * 0.01, cull_faces=False)
+
+    def _select_imported_lods(self, eye, projection: np.ndarray, height: int):
+        """Pick each imported mesh's LOD from its projected bounding sphere (level 0 when LODs are off)"""
+        batches = list(self.imported_scene.batches.items())
+        levels = max(batch.mesh.lod_count for _, batch in batches)
+        errors = np.full((len(batches), levels), np.inf)
+        centers = np.empty((len(batches), 3))
+        radii = np.empty(len(batches))
+        for i, (name, batch) in enumerate(batches):
+            source = self.imported_sources[name]
+            errors[i, 0] = 0.0
+            errors[i, 1:batch.mesh.lod_count] = [lod["error"] for lod in source.lods or ()]
+            low, high = (np.asarray(b, dtype=np.float64) for b in source.bounds)
+            centers[i] = (low + high) * 0.5
+            radii[i] = np.linalg.norm(high - low) * 0.5
+        if self.lod_enabled:
+            current = np.array([batch.lod for _, batch in batches])
+            pixel_radii = projected_radius(centers, radii, np.asarray(eye), projection, height)
+            selected = select_lods(pixel_radii, radii, errors, current, self.lod_pixels)
+        else:
+            selected = np.zeros(len(batches), dtype=np.int64)
+
+        drawn = full = 0
+        for (_, batch), level in zip(batches, selected.tolist()):
+            batch.lod = level
+            drawn += batch.mesh.lod_ranges[level][1] // 3
+            full += batch.mesh.index_count // 3
+        self.lod_stats = {"triangles": drawn, "full": full, "levels": selected.tolist()}
+
+    def read_pixels(self, out: np.ndarray = None) -> np.ndarray:
+        """Read the rendered texture back as a top-down RGBA uint8 array
+
+        Pass a preallocated (height, width, 4) array as out to avoid allocating per frame.
+        """
+        if out is None or out.shape != (self.height, self.width, 4):
+            out = np.empty((self.height, self.width, 4), dtype=np.uint8)
+
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self.render_target.target.framebuffer)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, self.width, self.height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, out)
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, 0)
+
+        # OpenGL rows start at the bottom
+        return out[::-1]
 
     def resize_texture(self, width: int, height: int):
-        """Resize texture and renderbuffer"""
-        if self.texture_id:
-            gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture_id)
-            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA, width, height, 0,
-                           gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, None)
+        """Resize the used area; storage is only reallocated when the size bucket changes"""
+        if self.render_target:
+            self.render_target.resize(width, height)
 
-        if self.renderbuffer_id:
-            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, self.renderbuffer_id)
-            gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, gl.GL_DEPTH24_STENCIL8, width, height)
+    @property
+    def texture_id(self):
+        """Colour texture of the render target, None before initialisation"""
+        if self.render_target is None or self.render_target.target is None:
+            return None
+        return self.render_target.target.texture
+
+    def texture_uvs(self):
+        """UVs of the used sub-rectangle for display, flipped so the image is upright"""
+        u, v = self.render_target.target.uv
+        return imgui.ImVec2(0.0, v), imgui.ImVec2(u, 0.0)
 
     def cleanup(self):
         """Clean up OpenGL resources"""
-        if self.texture_id:
-            gl.glDeleteTextures([self.texture_id])
-        if self.framebuffer_id:
-            gl.glDeleteFramebuffers(1, [self.framebuffer_id])
-        if self.renderbuffer_id:
-            gl.glDeleteRenderbuffers(1, [self.renderbuffer_id])
+        if self.render_target:
+            self.render_target.delete()
+            self.render_target = None
+        if self.depth_readback:
+            self.depth_readback.delete()
+            self.depth_readback = None
+            self._depth_pyramid = None
+        if self.fxaa_pass:
+            self.fxaa_pass.delete()
+            self.fxaa_pass = None
+        self.aa_benchmark.delete()
+        if self.gbuffer:
+            self.gbuffer.delete()
+            self.gbuffer = None
+        if self.deferred_lighting:
+            self.deferred_lighting.delete()
+            self.deferred_lighting = None
+        if self.ssao_pass:
+            self.ssao_pass.delete()
+            self.ssao_pass = None
+        if self.shadow_maps:
+            self.shadow_maps.delete()
+            self.shadow_maps = None
+        if self.clustered_lights:
+            self.clustered_lights.delete()
+            self.clustered_lights = None
         if self.vao:
             gl.glDeleteVertexArrays(1, [self.vao])
-        if self.vbo:
-            gl.glDeleteBuffers(1, [self.vbo])
-        if self.shader_program:
-            gl.glDeleteProgram(self.shader_program)
+        if self.square_mesh:
+            self.square_mesh.delete()
+            self.square_mesh = None
+        if self.shader:
+            self.shader.delete()
+        if self.constants:
+            self.constants.delete()
+            self.constants = None
+        if self.instanced_scene:
+            self.instanced_scene.delete()
+            self.instanced_scene = None
+            self.demo_culling = None
+            self._built_instance_count = -1
+        if self.indirect_scene:
+            self.indirect_scene.delete()
+            self.indirect_scene = None
+        if self.outline_batches:
+            self.outline_batches.delete()
+            self.outline_batches = None
+        if self.imported_scene:
+            self.imported_scene.delete()
+            self.imported_scene = None
+            self.imported_bounds = None
+            self.imported_sources = {}
+            self.imported_errors = None
+        if self.instanced_shader:
+            self.instanced_shader.delete()
+            self.instanced_shader = None
+        if self.gbuffer_shader:
+            self.gbuffer_shader.delete()
+            self.gbuffer_shader = None
+        if self.shadow_shader:
+            self.shadow_shader.delete()
+            self.shadow_shader = None
 
 
 def show_viewport_panel(viewport_manager: ViewportManager, window_open: bool = True) -> bool:
@@ -252,13 +955,154 @@ def show_viewport_panel(viewport_manager: ViewportManager, window_open: bool = T
         imgui.text("旋转速度:")
         _, viewport_manager.rotation_speed = imgui.slider_float("##speed",
                                                               viewport_manager.rotation_speed,
-                                                              0.1, 5.0)
+                                                              0.0, 5.0)
 
         # Square color control
         imgui.text("正方形颜色:")
         _, viewport_manager.square_color = imgui.color_edit4("##square_color",
                                                            viewport_manager.square_color)
 
+        # Scene selection
+        imgui.text("场景:")
+        for mode, label in SCENE_NAMES.items():
+            imgui.same_line()
+            if imgui.radio_button(label, viewport_manager.scene_mode == mode):
+                viewport_manager.scene_mode = mode
+        if viewport_manager.scene_mode == SCENE_INSTANCES:
+            _, viewport_manager.instance_count = imgui.slider_int(
+                "实例数量", viewport_manager.instance_count, 1, MAX_DEMO_INSTANCES,
+                flags=imgui.SliderFlags_.logarithmic
+            )
+            if viewport_manager.gpu_driven_supported:
+                _, viewport_manager.gpu_driven = imgui.checkbox("GPU 驱动绘制", viewport_manager.gpu_driven)
+            else:
+                imgui.text_disabled("GPU 驱动绘制需要 OpenGL 4.3")
+        elif viewport_manager.scene_mode == SCENE_OUTLINE:
+            imgui.text_disabled("在大纲中添加网格对象，在属性面板中修改变换")
+        gpu_driven = (viewport_manager.scene_mode == SCENE_INSTANCES and viewport_manager.gpu_driven
+                      and viewport_manager.gpu_driven_supported)
+        if gpu_driven:
+            indirect = viewport_manager.indirect_scene
+            if indirect is not None:
+                stats = indirect.stats
+                imgui.text(f"计算着色器剔除 {stats['total']} 个物体，{stats['commands']} 条间接命令，"
+                           f"1 次绘制调用，CPU {stats['ms']:.2f} ms")
+        elif viewport_manager.scene_mode in (SCENE_INSTANCES, SCENE_OUTLINE):
+            culling = (viewport_manager.demo_culling if viewport_manager.scene_mode == SCENE_INSTANCES
+                       else outline_scene)
+            if culling is not None:
+                stats = culling.stats
+                imgui.text(f"可见 {stats['visible']} / 剔除 {stats['culled']}（共 {stats['total']}，隐藏 {stats['hidden']}），"
+                           f"测试 {stats['nodes']} 个节点，{stats['ms']:.2f} ms")
+            _, viewport_manager.occlusion_culling = imgui.checkbox("遮挡剔除", viewport_manager.occlusion_culling)
+            if culling is not None and viewport_manager.occlusion_culling:
+                imgui.same_line()
+                imgui.text(f"遮挡 {stats['occluded']}，{stats['occlusion_ms']:.2f} ms（使用之前一帧的深度）")
+        if viewport_manager.scene_mode == SCENE_IMPORTED:
+            scene = viewport_manager.imported_scene
+            if scene is None or not scene.batches:
+                imgui.text_disabled("没有导入的网格（文件 → 导入资产）")
+            else:
+                stats = viewport_manager.lod_stats
+                imgui.text(f"{len(scene.batches)} 个网格，绘制 {stats['triangles']} / {stats['full']} 个三角形，"
+                           f"LOD 级别 {stats['levels']}")
+                _, viewport_manager.lod_enabled = imgui.checkbox("细节层次", viewport_manager.lod_enabled)
+                imgui.same_line()
+                imgui.set_next_item_width(160)
+                _, viewport_manager.lod_pixels = imgui.slider_float("误差阈值（像素）", viewport_manager.lod_pixels,
+                                                                    0.25, 8.0)
+                _, viewport_manager.imported_distance = imgui.slider_float(
+                    "相机距离", viewport_manager.imported_distance, 0.5, 50.0, flags=imgui.SliderFlags_.logarithmic
+                )
+                errors = viewport_manager.imported_errors
+                if errors is None:
+                    if imgui.button("比较量化误差"):
+                        viewport_manager.measure_imported_error()
+                else:
+                    imgui.text(f"最大误差: 位置 {errors.get('position', 0.0) * 100:.4f}% 对角线，"
+                               f"法线 {errors.get('normal_degrees', 0.0):.3f}°，纹理坐标 {errors.get('uv', 0.0):.2e}")
+
+        # Vertex layout of the scene meshes
+        if viewport_manager.scene_mode != SCENE_SQUARE:
+            imgui.text("顶点格式:")
+            for name in VERTEX_LAYOUTS:
+                imgui.same_line()
+                if imgui.radio_button(name, viewport_manager.vertex_layout.name == name):
+                    viewport_manager.set_vertex_layout(name)
+            scene = {SCENE_INSTANCES: viewport_manager.instanced_scene,
+                     SCENE_OUTLINE: viewport_manager.outline_batches,
+                     SCENE_IMPORTED: viewport_manager.imported_scene}[viewport_manager.scene_mode]
+            if scene is not None and scene.batches:
+                imgui.same_line()
+                imgui.text(f"顶点内存 {scene.vertex_bytes / (1024 * 1024):.2f} MB")
+
+        # Anti-aliasing is chosen in the render settings panel; the benchmark times every supported mode
+        benchmark = viewport_manager.aa_benchmark
+        imgui.text(f"抗锯齿: {viewport_manager.antialiasing}（在渲染设置中修改）")
+        imgui.same_line()
+        imgui.begin_disabled(benchmark.running)
+        if imgui.button("抗锯齿基准测试"):
+            # The deferred path renders single-sampled, so MSAA modes would only time the OFF path again
+            sample_limit = 0 if viewport_manager._deferred_active else viewport_manager.max_samples
+            benchmark.start([mode for mode in ANTIALIASING_MODES
+                             if parse_antialiasing(mode)[0] <= sample_limit])
+        imgui.end_disabled()
+        if benchmark.running:
+            imgui.same_line()
+            imgui.text(f"正在测试 {benchmark.mode or '...'}")
+        elif benchmark.results:
+            width, height = benchmark.size
+            imgui.text_wrapped(f"{width} x {height} 场景绘制 + 抗锯齿 GPU 耗时: " + "，".join(
+                f"{mode} {result['gpu_ms']:.2f} ms" for mode, result in benchmark.results.items()))
+
+        # Deferred path: the render settings' colour type picks the G-buffer view
+        if viewport_manager.scene_mode != SCENE_SQUARE:
+            _, viewport_manager.deferred = imgui.checkbox("延迟渲染（G-buffer）", viewport_manager.deferred)
+            imgui.same_line()
+            gbuffer = viewport_manager.gbuffer
+            limit_mb = MAX_GBUFFER_BYTES / (1024 * 1024)
+            if viewport_manager._deferred_active:
+                imgui.text(f"显示: {render_settings['color_type']}，G-buffer {gbuffer.memory_bytes / (1024 * 1024):.1f}"
+                           f" / {limit_mb:.0f} MB")
+                if parse_antialiasing(viewport_manager.antialiasing)[0]:
+                    imgui.text_disabled("延迟渲染不使用 MSAA（FXAA 可用）")
+                _, viewport_manager.shadows_enabled = imgui.checkbox("阴影", viewport_manager.shadows_enabled)
+                if viewport_manager._shadows_active:
+                    shadows = viewport_manager.shadow_maps
+                    stats = shadows.stats
+                    imgui.same_line()
+                    imgui.text(f"{shadows.preset}: {shadows.cascade_count} 级 {shadows.resolution}²，"
+                               f"PCF {2 * shadows.pcf_radius + 1}x{2 * shadows.pcf_radius + 1}，"
+                               f"重绘 {stats['rendered']} / 缓存 {stats['cached']}，投射物体 {stats['casters']}，"
+                               f"{shadows.memory_bytes / (1024 * 1024):.0f} MB")
+                if viewport_manager._ssao_active:
+                    ssao = viewport_manager.ssao_pass.stats
+                    imgui.text(f"环境光遮蔽: {ssao['preset']}，{ssao['width']} x {ssao['height']}，"
+                               f"{ssao['samples']} 个采样，{ssao['memory_bytes'] / (1024 * 1024):.1f} MB")
+            elif viewport_manager.deferred:
+                imgui.text_disabled(f"视口的 G-buffer 超过 {limit_mb:.0f} MB，使用前向渲染")
+            else:
+                imgui.text_disabled("前向渲染，颜色类型的调试视图和环境光遮蔽需要延迟渲染")
+
+        # Point lights: the outline's light objects and the demo lights, shaded per cluster on either path
+        if viewport_manager.scene_mode != SCENE_SQUARE:
+            _, viewport_manager.point_lights_enabled = imgui.checkbox("点光源（分簇光照）",
+                                                                      viewport_manager.point_lights_enabled)
+            imgui.same_line()
+            imgui.set_next_item_width(160)
+            _, viewport_manager.demo_light_count = imgui.slider_int(
+                "演示光源数量", viewport_manager.demo_light_count, 0, MAX_DEMO_LIGHTS,
+                flags=imgui.SliderFlags_.logarithmic
+            )
+            if viewport_manager._lights_active:
+                stats = viewport_manager.clustered_lights.stats
+                x, y, z = CLUSTER_GRID
+                imgui.text(f"{stats['lights']} 个光源（视锥内 {stats['visible']}），{x}x{y}x{z} 个簇，"
+                           f"光源-簇对 {stats['pairs']}，单簇最多 {stats['max']} 个，"
+                           f"分簇 {stats['ms']:.2f} ms，{stats['bytes'] / 1024:.0f} KB")
+            elif viewport_manager.point_lights_enabled:
+                imgui.text_disabled("没有点光源（在大纲中添加光源，或增加演示光源）")
+
         # Background color control
         imgui.text("背景颜色:")
         _, viewport_manager.background_color = imgui.color_edit4("##bg_color",
@@ -283,17 +1127,21 @@ def show_viewport_panel(viewport_manager: ViewportManager, window_open: bool = T
         # Get drawing area size
         draw_size = imgui.get_content_region_avail()
 
-        # Update rotation
+        # Update rotation, keep the main loop redrawing while the square spins
         viewport_manager.update_rotation()
+        if viewport_manager.is_animating():
+            request_continuous()
 
         # Render OpenGL scene to texture
-        viewport_manager.render_to_texture(int(draw_size.x), int(draw_size.y))
+        with frame_profiler.scope("render_to_texture"), frame_profiler.gpu_scope("viewport_fbo_gpu"):
+            viewport_manager.render_to_texture(int(draw_size.x), int(draw_size.y))
 
         # Display OpenGL texture in ImGui
         if viewport_manager.texture_id:
             # Convert OpenGL texture ID to ImGui texture reference
             texture_ref = imgui.ImTextureRef(viewport_manager.texture_id)
-            imgui.image(texture_ref, draw_size)
+            uv0, uv1 = viewport_manager.texture_uvs()
+            imgui.image(texture_ref, draw_size, uv0, uv1)
 
         # # Display information
         # imgui.text(f"旋转角度: {viewport_manager.rotation_angle:.1f}°")
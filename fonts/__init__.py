@@ -0,0 +1,3 @@
+from fonts.font_manager import FontManager, request_glyphs
+from fonts.font_cache import FontCache
+from fonts.glyphs import collect_ui_glyphs
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+字体子集缓存模块
+把完整字体裁剪为只含所需字形的子集字体，并按 字体哈希 + 字形集合 缓存在磁盘上
+
+子集字体保留字形轮廓和度量信息，ImGui 加载它时只需解析很小的文件，
+图集中也只会出现子集内的字形
+"""
+
+import os
+import json
+import hashlib
+import importlib.util
+
+FONT_CACHE_DIR = os.path.join(".cache", "fonts")
+FONT_INDEX_FILE = "index.json"
+# 运行时增量子集文件名中的标记，与启动时加载的子集区分
+RUNTIME_SUBSET_TAG = "runtime"
+
+
+def glyph_set_hash(codepoints) -> str:
+    """字形集合的哈希"""
+    data = ",".join(map(str, sorted(codepoints))).encode("ascii")
+    return hashlib.sha1(data).hexdigest()
+
+
+class FontCache:
+    """字体子集磁盘缓存"""
+
+    def __init__(self, cache_dir: str = FONT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, FONT_INDEX_FILE)
+        self._index = self._read_index()
+
+    @property
+    def available(self) -> bool:
+        """是否可以生成子集字体（需要 fonttools）"""
+        # 只检查是否安装，fonttools 导入较慢，仅在缓存未命中时才导入
+        return importlib.util.find_spec("fontTools") is not None
+
+    def font_hash(self, font_path: str) -> str:
+        """
+        获取字体文件内容的哈希
+
+        文件大小和修改时间不变时直接使用索引中记录的哈希，避免每次启动读取整个字体文件
+        """
+        stat = os.stat(font_path)
+        key = os.path.abspath(font_path)
+        entry = self._index.get("fonts", {}).get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha1"]
+
+        digest = hashlib.sha1()
+        with open(font_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        self._index.setdefault("fonts", {})[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": digest.hexdigest()
+        }
+        self._write_index()
+        return digest.hexdigest()
+
+    def get_subset(self, font_path: str, codepoints, runtime: bool = False) -> str:
+        """
+        获取只含指定字符的子集字体路径
+
+        Args:
+            font_path: 完整字体路径
+            codepoints: 需要的字符
+            runtime: 运行时增量合并的子集；只替换更早的运行时子集，启动时加载的子集保留
+
+        Returns:
+            子集字体路径；无法生成子集时返回原字体路径
+        """
+        if not self.available:
+            print("警告: 未安装 fonttools，加载完整字体")
+            return font_path
+
+        name = os.path.splitext(os.path.basename(font_path))[0]
+        prefix = f"{name}-{RUNTIME_SUBSET_TAG}-" if runtime else f"{name}-"
+        subset_path = os.path.join(
+            self.cache_dir,
+            f"{prefix}{self.font_hash(font_path)[:16]}-{glyph_set_hash(codepoints)[:16]}.ttf"
+        )
+        if os.path.exists(subset_path):
+            return subset_path
+
+        try:
+            self._build_subset(font_path, codepoints, subset_path)
+        except Exception as e:
+            print(f"警告: 生成子集字体失败，加载完整字体: {e}")
+            return font_path
+
+        # 启动时的子集已经包含之前运行时记录的字符，旧的子集（包括运行时子集）都可以删除
+        self._remove_stale_subsets(prefix, subset_path)
+        return subset_path
+
+    def load_extra_glyphs(self) -> set:
+        """读取运行时动态添加过的字符"""
+        return set(self._index.get("extra_glyphs", []))
+
+    def save_extra_glyphs(self, codepoints):
+        """记录运行时动态添加的字符，下次启动时直接包含在子集中"""
+        self._index["extra_glyphs"] = sorted(set(self._index.get("extra_glyphs", [])) | set(codepoints))
+        self._write_index()
+
+    def _build_subset(self, font_path: str, codepoints, subset_path: str):
+        """用 fonttools 生成子集字体"""
+        from fontTools import subset as font_subset
+
+        options = font_subset.Options()
+        options.layout_features = ["*"]
+        options.name_IDs = ["*"]
+        options.notdef_outline = True
+        options.drop_tables += ["DSIG"]
+
+        font = font_subset.load_font(font_path, options)
+        subsetter = font_subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(font)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = subset_path + ".tmp"
+        font_subset.save_font(font, tmp_path, options)
+        font.close()
+        os.replace(tmp_path, subset_path)
+
+    def _remove_stale_subsets(self, prefix: str, keep_path: str):
+        """删除文件名以 prefix 开头的旧子集文件（字体已被 ImGui 读入内存，可以安全删除）"""
+        for file_name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, file_name)
+            if file_name.startswith(prefix) and file_name.endswith(".ttf") and path != keep_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _read_index(self) -> dict:
+        """读取缓存索引"""
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        """写入缓存索引"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+字体管理模块
+只加载界面用到的字形子集，运行时遇到新字符再增量合并
+
+运行时的子集在后台线程中生成（fonttools 解析完整字体需要较长时间），完成后在主线程合并进字体；
+生成期间新申请的字符攒在一起，下一次一并生成和合并
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from imgui_bundle import imgui
+from frame_pacer import request_continuous
+from fonts.glyphs import collect_ui_glyphs
+from fonts.font_cache import FontCache, FONT_CACHE_DIR
+
+# 当前加载字体的管理器，供各面板通过 request_glyphs 申请新字符
+_active_manager = None
+
+
+def request_glyphs(text: str):
+    """申请显示 text 需要的字符，缺少的字形在后台生成子集后合并进字体"""
+    if _active_manager is not None:
+        _active_manager.request_glyphs(text)
+
+
+class FontManager:
+    """字体管理器"""
+
+    def __init__(self, font_path: str, size_pixels: float = 16.0, emoji_font_path: str = None,
+                 cache_dir: str = FONT_CACHE_DIR):
+        """
+        Args:
+            font_path: 主字体文件路径
+            size_pixels: 字体大小
+            emoji_font_path: 表情字体文件路径
+            cache_dir: 子集字体缓存目录
+        """
+        self.font_path = font_path
+        self.size_pixels = size_pixels
+        self.emoji_font_path = emoji_font_path
+        self.cache = FontCache(cache_dir)
+
+        self.codepoints = set()
+        self.font = None
+        self.emoji_font = None
+        self._pending = set()
+        # 后台生成运行时子集: (字符集合, Future)
+        self._executor = None
+        self._subset_job = None
+
+    def load(self):
+        """收集界面字符并加载子集字体"""
+        global _active_manager
+
+        io = imgui.get_io()
+        self.codepoints = collect_ui_glyphs() | self.cache.load_extra_glyphs()
+
+        self.font = io.fonts.add_font_from_file_ttf(
+            self.cache.get_subset(self.font_path, self.codepoints),
+            self.size_pixels
+        )
+
+        if self.emoji_font_path:
+            self.emoji_font = io.fonts.add_font_from_file_ttf(
+                self.cache.get_subset(self.emoji_font_path, self.codepoints),
+                self.size_pixels
+            )
+
+        _active_manager = self
+        return self.font
+
+    def request_glyphs(self, text: str):
+        """记录 text 中尚未加载的字符"""
+        missing = set(map(ord, text)) - self.codepoints
+        if missing:
+            self._pending |= missing
+
+    def update(self) -> bool:
+        """
+        每帧调用一次: 取回完成的子集并合并进主字体，再为新申请的字符启动下一次后台生成
+
+        Returns:
+            是否合并了新字形
+        """
+        if self.font is None:
+            return False
+
+        merged = False
+        if self._subset_job is not None:
+            codepoints, future = self._subset_job
+            if not future.done():
+                # 保持刷新以便及时合并
+                request_continuous()
+                return False
+            self._subset_job = None
+            merged = self._merge_subset(codepoints, future.result())
+
+        if self._pending:
+            pending = self._pending
+            self._pending = set()
+            self.codepoints |= pending
+            # 没有子集能力时加载的是完整字体，无需合并
+            if self.cache.available:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="font-subset")
+                future = self._executor.submit(self.cache.get_subset, self.font_path, pending, True)
+                self._subset_job = (pending, future)
+                request_continuous()
+        return merged
+
+    def _merge_subset(self, codepoints, subset_path: str) -> bool:
+        """把后台生成的子集作为一个合并源加入主字体"""
+        if subset_path == self.font_path:
+            # 生成失败（get_subset 已打印警告），不把完整字体合并进图集
+            return False
+
+        # 记录下来，下次启动时直接包含在子集中
+        self.cache.save_extra_glyphs(codepoints)
+
+        font_cfg = imgui.ImFontConfig()
+        font_cfg.merge_mode = True
+        font_cfg.dst_font = self.font
+        imgui.get_io().fonts.add_font_from_file_ttf(subset_path, self.size_pixels, font_cfg)
+        return True
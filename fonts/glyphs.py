@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+字形收集模块
+收集界面实际用到的字符，用于只烘焙这部分字形
+"""
+
+import os
+import ast
+import glob
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 界面字符串所在的源文件（导入窗口会显示 mesh_import 的错误和报告文本）
+UI_SOURCE_FILES = [os.path.join(PROJECT_DIR, "main.py")] + \
+    sorted(glob.glob(os.path.join(PROJECT_DIR, "components", "*.py"))) + \
+    sorted(glob.glob(os.path.join(PROJECT_DIR, "mesh_import", "*.py")))
+
+# 始终包含的基本字符: 可打印 ASCII、省略号、替换字符以及常用中文标点
+BASE_CODEPOINTS = set(range(0x20, 0x7F)) | {0x2026, 0xFFFD} | set(map(ord, "，。、：；！？（）《》“”‘’…—·"))
+
+
+def collect_source_glyphs(paths=None) -> set:
+    """
+    收集源文件字符串常量中的所有字符（包括 f-string 的常量部分）
+
+    只扫描字符串常量，注释和文档字符串中的字符不会被收集
+    """
+    codepoints = set()
+    for path in paths or UI_SOURCE_FILES:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError) as e:
+            print(f"警告: 无法扫描界面字符串 {path}: {e}")
+            continue
+
+        docstrings = set()
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                body = node.body
+                if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+                    docstrings.add(id(body[0].value))
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in docstrings:
+                codepoints.update(map(ord, node.value))
+
+    return codepoints
+
+
+def collect_outline_glyphs() -> set:
+    """收集大纲面板中对象名称和图标的字符"""
+    try:
+        from components.outline import outline_state, OBJECT_ICONS
+    except ImportError:
+        print("警告: 无法导入outline模块")
+        return set()
+
+    codepoints = set()
+    for obj in outline_state.objects.values():
+        codepoints.update(map(ord, obj.name))
+    for icon in OBJECT_ICONS.values():
+        codepoints.update(map(ord, icon))
+    return codepoints
+
+
+def collect_ui_glyphs() -> set:
+    """收集界面用到的全部字符"""
+    return BASE_CODEPOINTS | collect_source_glyphs() | collect_outline_glyphs()
+
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+帧节奏控制模块
+没有输入、动画和渲染任务时阻塞等待事件，避免空闲时占满一个 CPU 核心；
+需要刷新时按窗口是否聚焦限制帧率
+"""
+
+import time
+import glfw
+from imgui_bundle import imgui
+
+# 循环模式
+MODE_ADAPTIVE = "adaptive"      # 空闲时等待事件
+MODE_CONTINUOUS = "continuous"  # 始终按帧率上限刷新
+
+
+class FramePacer:
+    """主循环帧节奏控制器"""
+
+    def __init__(self, focused_fps: int = 60, unfocused_fps: int = 15,
+                 idle_timeout: float = 1.0, active_linger: float = 1.0, mode: str = MODE_ADAPTIVE):
+        """
+        Args:
+            focused_fps: 窗口聚焦时的帧率上限，0 表示不限制
+            unfocused_fps: 窗口未聚焦时的帧率上限，0 表示不限制
+            idle_timeout: 空闲时最长等待时间（秒），保证定时任务（如主题热重载检查）仍会执行
+            active_linger: 最后一次输入后继续刷新的时间（秒），让悬停提示等延迟效果正常出现
+            mode: MODE_ADAPTIVE 或 MODE_CONTINUOUS
+        """
+        self.focused_fps = focused_fps
+        self.unfocused_fps = unfocused_fps
+        self.idle_timeout = idle_timeout
+        self.active_linger = active_linger
+        self.mode = mode
+
+        self.idle = False
+        self._active_until = 0.0
+        self._last_frame_time = 0.0
+        self._redraw_frames = 1
+        self._continuous_requested = False
+
+    def request_redraw(self, frames: int = 2):
+        """请求再刷新若干帧（状态在界面之外发生变化时使用）"""
+        self._redraw_frames = max(self._redraw_frames, frames)
+
+    def request_continuous(self):
+        """请求下一帧继续刷新（动画或渐进式渲染进行中），需要每帧重新请求"""
+        self._continuous_requested = True
+
+    def wait_for_next_frame(self, window):
+        """
+        处理事件并等待到下一帧应当开始的时间，替代 glfw.poll_events()
+        """
+        # 窗口最小化时不渲染，只等待事件
+        while glfw.get_window_attrib(window, glfw.ICONIFIED) and not glfw.window_should_close(window):
+            glfw.wait_events_timeout(self.idle_timeout)
+
+        now = time.perf_counter()
+        busy = (self.mode == MODE_CONTINUOUS or self._continuous_requested
+                or self._redraw_frames > 0 or now < self._active_until)
+
+        if busy:
+            self.idle = False
+        else:
+            # 空闲: 阻塞直到有事件或超时
+            self.idle = True
+            glfw.wait_events_timeout(self.idle_timeout)
+            waited = time.perf_counter() - now
+            if waited < self.idle_timeout * 0.95:
+                # 提前被事件唤醒，视为有输入
+                self._active_until = time.perf_counter() + self.active_linger
+
+        # 帧率上限: 在聚焦或刚有输入时使用聚焦帧率
+        focused = glfw.get_window_attrib(window, glfw.FOCUSED) or time.perf_counter() < self._active_until
+        fps = self.focused_fps if focused else self.unfocused_fps
+        if fps > 0:
+            remaining = self._last_frame_time + 1.0 / fps - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+        glfw.poll_events()
+        self._last_frame_time = time.perf_counter()
+
+        if self._redraw_frames > 0:
+            self._redraw_frames -= 1
+        self._continuous_requested = False
+
+    def end_frame(self):
+        """在界面函数之后调用，根据本帧的输入状态决定是否保持刷新"""
+        io = imgui.get_io()
+        if (io.mouse_delta.x or io.mouse_delta.y or io.mouse_wheel or io.mouse_wheel_h
+                or io.mouse_down.any() or imgui.is_any_item_active()):
+            self._active_until = time.perf_counter() + self.active_linger
+
+
+# 全局帧节奏控制器
+frame_pacer = FramePacer()
+
+
+def request_redraw(frames: int = 2):
+    """请求再刷新若干帧"""
+    frame_pacer.request_redraw(frames)
+
+
+def request_continuous():
+    """本帧请求连续刷新"""
+    frame_pacer.request_continuous()
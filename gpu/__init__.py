@@ -0,0 +1,14 @@
+from gpu.shader import ShaderProgram, ShaderManager, ShaderError, ProgramBinaryCache, Uniform, shader_manager
+from gpu.uniform_ring import UniformRing, FrameConstants, CAMERA_BINDING, OBJECT_BINDING
+from gpu.mesh import Mesh, VERTEX_DTYPE, cube_arrays, pyramid_arrays, plane_arrays
+from gpu.vertex_layout import VertexLayout, VERTEX_LAYOUTS, LAYOUT_FLOAT32, LAYOUT_HALF, LAYOUT_COMPACT, quantization_error
+from gpu.instancing import InstanceBatch, InstancedScene, INSTANCE_DTYPE
+from gpu.render_targets import RenderTarget, RenderTargetPool, ViewportTarget, render_target_pool
+from gpu.depth_readback import DepthReadback
+from gpu.indirect import IndirectScene, indirect_supported
+from gpu.antialiasing import FxaaPass, AntialiasingBenchmark, ANTIALIASING_MODES, parse_antialiasing
+from gpu.antialiasing import resolve_multisample, copy_depth, max_samples
+from gpu.gbuffer import GBuffer, DeferredLighting, gbuffer_bytes, MAX_GBUFFER_BYTES, GBUFFER_VIEWS
+from gpu.ssao import SsaoPass, SSAO_PRESETS, DEFAULT_SSAO_PRESET
+from gpu.shadows import ShadowMaps, SHADOW_PRESETS, DEFAULT_SHADOW_PRESET
+from gpu.clustered import ClusteredLights, CLUSTER_GLSL, CLUSTER_GRID, disable_clustered_lights
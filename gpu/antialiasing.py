@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+视口抗锯齿
+- MSAA: 场景画到多重采样目标（颜色、深度都是多重采样渲染缓冲），之后 glBlitFramebuffer 解析到显示目标
+- FXAA: 场景画到普通的临时目标，再用一次全屏通道（gpu/shaders/fxaa.frag）写入显示目标
+
+临时目标来自渲染目标池，按尺寸档位复用，切换模式或视口尺寸时不会每帧重新分配
+
+AntialiasingBenchmark 逐个模式渲染若干帧，用 GL_TIMESTAMP 查询测量场景绘制加抗锯齿的 GPU 耗时
+（时间戳查询可以放在帧分析器的 GL_TIME_ELAPSED 作用域里面），结果异步读取
+"""
+
+import time
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+# PyOpenGL 的 glGetQueryObjectui64v 包装无法处理 64 位输出参数，直接使用原始函数
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+from gpu.render_targets import RenderTarget
+from gpu.shader import shader_manager
+
+# 渲染设置中的抗锯齿选项（components.render 的 antialiasing）
+ANTIALIASING_MODES = ("OFF", "FXAA", "MSAA 2x", "MSAA 4x", "MSAA 8x")
+# 基准测试中每个模式先丢弃的帧数（分配目标、编译着色器）和计时的帧数
+BENCHMARK_WARMUP_FRAMES = 3
+BENCHMARK_FRAMES = 30
+
+
+def parse_antialiasing(mode: str):
+    """
+    Returns:
+        (samples, fxaa): 多重采样数（0 表示不用 MSAA）和是否做 FXAA；未知的模式视为 OFF
+    """
+    if mode == "FXAA":
+        return 0, True
+    if mode.startswith("MSAA "):
+        return int(mode[5:].rstrip("x")), False
+    return 0, False
+
+
+def max_samples() -> int:
+    """驱动支持的最大多重采样数"""
+    return int(gl.glGetIntegerv(gl.GL_MAX_SAMPLES))
+
+
+def resolve_multisample(source: RenderTarget, destination: RenderTarget, depth: bool = False):
+    """把多重采样目标解析到同尺寸的普通目标（depth 为 True 时同时复制深度，每个像素取一个采样）"""
+    mask = gl.GL_COLOR_BUFFER_BIT | (gl.GL_DEPTH_BUFFER_BIT if depth else 0)
+    gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, source.framebuffer)
+    gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, destination.framebuffer)
+    gl.glBlitFramebuffer(0, 0, source.width, source.height, 0, 0, destination.width, destination.height,
+                         mask, gl.GL_NEAREST)
+    gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+
+
+def copy_depth(source: RenderTarget, destination: RenderTarget):
+    """复制深度（两个目标都是普通目标）"""
+    gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, source.framebuffer)
+    gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, destination.framebuffer)
+    gl.glBlitFramebuffer(0, 0, source.width, source.height, 0, 0, destination.width, destination.height,
+                         gl.GL_DEPTH_BUFFER_BIT, gl.GL_NEAREST)
+    gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+
+
+class FxaaPass:
+    """FXAA 全屏通道"""
+
+    def __init__(self):
+        self.program = shader_manager.load("fxaa", "fullscreen.vert", "fxaa.frag")
+        # 全屏三角形由 gl_VertexID 生成，核心模式仍然需要绑定一个 VAO
+        self.vao = gl.glGenVertexArrays(1)
+
+    def apply(self, source: RenderTarget, destination: RenderTarget):
+        """读取 source 的颜色纹理，写入 destination 的颜色（不写深度），两者使用尺寸相同"""
+        destination.bind()
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        program = self.program
+        program.use()
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, source.texture)
+        program.uniform("uScene").set(0)
+        program.uniform("uTexelSize").set((1.0 / source.alloc_width, 1.0 / source.alloc_height))
+        program.uniform("uMaxUv").set(((source.width - 0.5) / source.alloc_width,
+                                       (source.height - 0.5) / source.alloc_height))
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(gl.GL_TRIANGLES, 0, 3)
+        gl.glBindVertexArray(0)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glUseProgram(0)
+
+    def delete(self):
+        if self.vao:
+            gl.glDeleteVertexArrays(1, [self.vao])
+            self.vao = None
+
+
+class AntialiasingBenchmark:
+    """逐个模式计时，结果为每个模式的 GPU/CPU 耗时中位数（毫秒）"""
+
+    def __init__(self):
+        # 待测的模式和当前模式已渲染的帧数
+        self.queue = []
+        self.frames = 0
+        self.frame_count = BENCHMARK_FRAMES
+        # 已提交未读取的查询: (模式, 开始查询, 结束查询, CPU 秒)
+        self._pending = []
+        self._samples = {}
+        self._start_query = None
+        self._cpu_start = 0.0
+        self._result = ctypes.c_uint64()
+        # 模式 -> {"gpu_ms", "cpu_ms"}
+        self.results = {}
+        self.size = (0, 0)
+
+    def start(self, modes=ANTIALIASING_MODES, frame_count: int = BENCHMARK_FRAMES):
+        self.queue = list(modes)
+        self.frames = 0
+        self.frame_count = frame_count
+        self._samples = {mode: ([], []) for mode in modes}
+        self.results = {}
+
+    @property
+    def running(self) -> bool:
+        return bool(self.queue or self._pending)
+
+    @property
+    def mode(self):
+        """基准测试期间替代渲染设置的模式，没有时为 None"""
+        return self.queue[0] if self.queue else None
+
+    def begin(self, width: int, height: int):
+        """在场景绘制之前调用"""
+        if not self.queue:
+            return
+        self.size = (width, height)
+        self._start_query = None
+        if self.frames >= BENCHMARK_WARMUP_FRAMES:
+            self._start_query = gl.glGenQueries(1)[0]
+            gl.glQueryCounter(self._start_query, gl.GL_TIMESTAMP)
+            self._cpu_start = time.perf_counter()
+
+    def end(self):
+        """在抗锯齿完成之后调用"""
+        if not self.queue:
+            self.collect()
+            return
+        if self._start_query is not None:
+            end_query = gl.glGenQueries(1)[0]
+            gl.glQueryCounter(end_query, gl.GL_TIMESTAMP)
+            self._pending.append((self.queue[0], self._start_query, end_query, time.perf_counter() - self._cpu_start))
+            self._start_query = None
+        self.frames += 1
+        if self.frames >= BENCHMARK_WARMUP_FRAMES + self.frame_count:
+            self.queue.pop(0)
+            self.frames = 0
+        self.collect()
+
+    def collect(self):
+        """读取已经完成的查询，全部完成后计算结果"""
+        while self._pending:
+            mode, start_query, end_query, cpu_seconds = self._pending[0]
+            if not gl.glGetQueryObjectuiv(end_query, gl.GL_QUERY_RESULT_AVAILABLE):
+                break
+            self._pending.pop(0)
+            glGetQueryObjectui64v(start_query, gl.GL_QUERY_RESULT, ctypes.byref(self._result))
+            start = self._result.value
+            glGetQueryObjectui64v(end_query, gl.GL_QUERY_RESULT, ctypes.byref(self._result))
+            gl.glDeleteQueries(2, [start_query, end_query])
+            gpu_times, cpu_times = self._samples[mode]
+            gpu_times.append((self._result.value - start) * 1e-6)
+            cpu_times.append(cpu_seconds * 1000.0)
+        if not self.running and self._samples:
+            self.results = {mode: {"gpu_ms": float(np.median(gpu)), "cpu_ms": float(np.median(cpu))}
+                            for mode, (gpu, cpu) in self._samples.items() if gpu}
+            self._samples = {}
+
+    def delete(self):
+        for _, start_query, end_query, _ in self._pending:
+            gl.glDeleteQueries(2, [start_query, end_query])
+        self._pending = []
+        self.queue = []
+        self._samples = {}
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+分簇光照（clustered shading）的点光源
+视锥按屏幕图块和指数分布的深度段分成 CLUSTER_GRID 个簇（froxel），每帧在 CPU 上用 NumPy 向量化地
+把点光源分到与其包围球相交的簇中；片段着色器按自己所在的簇只遍历该簇的光源，
+几百个点光源的代价接近几个（每个像素通常只被少数光源覆盖）
+
+- 深度段: 第 0 段覆盖 [near, far * CLUSTER_NEAR_RATIO]，其余按指数分布到 far；投影的近平面很近时，
+  相机前面几乎没有物体的距离不会占用大部分深度段
+- 分簇: 先按光源包围球在屏幕和深度上的范围展开候选簇，再用球与簇的视空间包围盒相交测试剔除
+- 上传: 所有簇的光源列表放在一个 GL_R32UI 纹理缓冲中（先是每簇的 [起始位置, 数量]，后面是光源索引），
+  光源参数放在一个 GL_RGBA32F 纹理缓冲中（每个光源两个纹素），两者都以孤立方式整体上传
+- 着色: CLUSTER_GLSL 作为片段着色器前导代码，提供 clusteredLighting()，前向的 instanced.frag
+  和延迟光照的 deferred.frag 共用；纹理缓冲只需要 OpenGL 3.1
+"""
+
+import time
+import numpy as np
+import OpenGL.GL as gl
+from gpu.transforms import to_gl
+
+# 簇的个数: 屏幕 x、y 方向的图块数和深度段数
+CLUSTER_GRID = (16, 9, 24)
+CLUSTER_COUNT = CLUSTER_GRID[0] * CLUSTER_GRID[1] * CLUSTER_GRID[2]
+# 第 1 个深度段的起点相对远平面的比例
+CLUSTER_NEAR_RATIO = 1.0 / 64.0
+# 每个光源在光源缓冲中的纹素数: (位置, 半径), (颜色 * 强度, 0)
+LIGHT_TEXELS = 2
+
+# 片段着色器前导代码；uLightCount 为 0 时 clusteredLighting() 返回 0
+CLUSTER_GLSL = f"""
+#define CLUSTER_X {CLUSTER_GRID[0]}
+#define CLUSTER_Y {CLUSTER_GRID[1]}
+#define CLUSTER_Z {CLUSTER_GRID[2]}
+uniform int uLightCount;
+uniform usamplerBuffer uClusterLists;
+uniform samplerBuffer uLightData;
+uniform ivec2 uClusterViewport;
+// Start of slice 1 and (CLUSTER_Z - 1) / log(far / start); slice 0 covers everything closer
+uniform vec2 uClusterDepth;
+
+vec3 clusteredLighting(vec2 fragCoord, float distance, vec3 position, vec3 normal)
+{{
+    if (uLightCount == 0)
+    {{
+        return vec3(0.0);
+    }}
+    ivec2 tile = clamp(ivec2(fragCoord * vec2(CLUSTER_X, CLUSTER_Y) / vec2(uClusterViewport)), ivec2(0),
+                       ivec2(CLUSTER_X - 1, CLUSTER_Y - 1));
+    int slice = clamp(int(floor(log(distance / uClusterDepth.x) * uClusterDepth.y)) + 1, 0, CLUSTER_Z - 1);
+    int cluster = (slice * CLUSTER_Y + tile.y) * CLUSTER_X + tile.x;
+    int first = int(texelFetch(uClusterLists, cluster * 2).r);
+    int count = int(texelFetch(uClusterLists, cluster * 2 + 1).r);
+    vec3 sum = vec3(0.0);
+    for (int i = 0; i < count; ++i)
+    {{
+        int light = int(texelFetch(uClusterLists, first + i).r);
+        vec4 sphere = texelFetch(uLightData, light * {LIGHT_TEXELS});
+        vec3 toLight = sphere.xyz - position;
+        float distance2 = dot(toLight, toLight);
+        float radius2 = sphere.w * sphere.w;
+        if (distance2 >= radius2)
+        {{
+            continue;
+        }}
+        // Inverse-square-like falloff windowed to reach zero at the light's radius
+        float window = 1.0 - distance2 * distance2 / (radius2 * radius2);
+        float attenuation = window * window / (1.0 + 16.0 * distance2 / radius2);
+        float diffuse = max(dot(normal, toLight * inversesqrt(max(distance2, 1e-8))), 0.0);
+        sum += texelFetch(uLightData, light * {LIGHT_TEXELS} + 1).rgb * diffuse * attenuation;
+    }}
+    return sum;
+}}
+"""
+
+
+def cluster_depth(near: float, far: float) -> tuple:
+    """(第 1 个深度段的起点, 每单位 log 视距的段数)，与着色器的 uClusterDepth 相同"""
+    start = max(near, far * CLUSTER_NEAR_RATIO)
+    return start, (CLUSTER_GRID[2] - 1) / np.log(far / start)
+
+
+def cluster_slices(distance: np.ndarray, near: float, far: float) -> np.ndarray:
+    """视距所在的深度段"""
+    start, slices_per_log = cluster_depth(near, far)
+    slices = np.floor(np.log(np.maximum(distance, near) / start) * slices_per_log) + 1
+    return np.clip(slices, 0, CLUSTER_GRID[2] - 1).astype(np.int64)
+
+
+def cluster_bounds(tan_x: float, tan_y: float, near: float, far: float) -> tuple:
+    """
+    每个簇的视空间包围盒
+
+    Args:
+        tan_x, tan_y: 视锥水平、竖直半角的正切（1 / P[0][0], 1 / P[1][1]）
+        near, far: 投影的近远平面
+    Returns:
+        (low, high)，形状 (CLUSTER_COUNT, 3)，簇按 (z * CLUSTER_Y + y) * CLUSTER_X + x 排列
+    """
+    nx, ny, nz = CLUSTER_GRID
+    start = cluster_depth(near, far)[0]
+    depths = np.concatenate([[near], start * (far / start) ** (np.arange(nz) / (nz - 1))])
+    x_edges = np.linspace(-1.0, 1.0, nx + 1) * tan_x
+    y_edges = np.linspace(-1.0, 1.0, ny + 1) * tan_y
+    z, y, x = np.meshgrid(np.arange(nz), np.arange(ny), np.arange(nx), indexing="ij")
+    z, y, x = z.ravel(), y.ravel(), x.ravel()
+    start, end = depths[z], depths[z + 1]
+    # 图块的侧面经过相机，x / 视距在图块内不变，包围盒由近端和远端的四个角决定
+    xs = np.stack([x_edges[x] * start, x_edges[x] * end, x_edges[x + 1] * start, x_edges[x + 1] * end])
+    ys = np.stack([y_edges[y] * start, y_edges[y] * end, y_edges[y + 1] * start, y_edges[y + 1] * end])
+    low = np.stack([xs.min(axis=0), ys.min(axis=0), -end], axis=1)
+    high = np.stack([xs.max(axis=0), ys.max(axis=0), -start], axis=1)
+    return low.astype(np.float32), high.astype(np.float32)
+
+
+def bin_lights(centers: np.ndarray, radii: np.ndarray, bounds: tuple, tan_x: float, tan_y: float,
+               near: float, far: float) -> np.ndarray:
+    """
+    把光源分到簇中
+
+    Args:
+        centers: (n, 3) 视空间的光源位置
+        radii: (n,) 光源的作用半径
+        bounds: cluster_bounds() 的结果
+        tan_x, tan_y, near, far: 与 bounds 相同的投影参数
+    Returns:
+        uint32 数组: 前 2 * CLUSTER_COUNT 项是每簇的 [起始位置, 数量]，之后是按簇排列的光源索引
+    """
+    nx, ny, nz = CLUSTER_GRID
+    depth = -centers[:, 2]
+    depth_low = np.maximum(depth - radii, near)
+    depth_high = np.minimum(depth + radii, far)
+    # 包围球在视距 [depth_low, depth_high] 内的屏幕范围（x / 视距的极值在包围盒的角上）
+    x = centers[:, 0][None, :] + np.array([-1.0, 1.0])[:, None] * radii
+    y = centers[:, 1][None, :] + np.array([-1.0, 1.0])[:, None] * radii
+    ndc_x = np.concatenate([x / depth_low, x / depth_high]) / tan_x
+    ndc_y = np.concatenate([y / depth_low, y / depth_high]) / tan_y
+    x_low, x_high = ndc_x.min(axis=0), ndc_x.max(axis=0)
+    y_low, y_high = ndc_y.min(axis=0), ndc_y.max(axis=0)
+    inside = ((depth_low <= depth_high) & (x_high >= -1.0) & (x_low <= 1.0) & (y_high >= -1.0) & (y_low <= 1.0))
+    lights = np.flatnonzero(inside)
+
+    def cells(low, high, count):
+        first = np.clip(np.floor((low[lights] * 0.5 + 0.5) * count), 0, count - 1).astype(np.int64)
+        last = np.clip(np.floor((high[lights] * 0.5 + 0.5) * count), 0, count - 1).astype(np.int64)
+        return first, last - first + 1
+
+    x0, width = cells(x_low, x_high, nx)
+    y0, height = cells(y_low, y_high, ny)
+    z0 = cluster_slices(depth_low[lights], near, far)
+    z1 = cluster_slices(depth_high[lights], near, far)
+    depth_count = z1 - z0 + 1
+
+    # 展开每个光源的候选簇
+    sizes = width * height * depth_count
+    total = int(sizes.sum())
+    owner = np.repeat(np.arange(len(lights)), sizes)
+    local = np.arange(total) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    w, h = width[owner], height[owner]
+    cluster = (((z0[owner] + local // (w * h)) * ny + y0[owner] + local // w % h) * nx + x0[owner] + local % w)
+
+    # 球与簇包围盒相交
+    low, high = bounds
+    center = centers[lights][owner]
+    nearest = np.clip(center, low[cluster], high[cluster])
+    hit = ((nearest - center) ** 2).sum(axis=1) <= radii[lights][owner] ** 2
+    cluster = cluster[hit]
+    light_index = lights[owner[hit]]
+
+    counts = np.bincount(cluster, minlength=CLUSTER_COUNT)
+    lists = np.empty(2 * CLUSTER_COUNT + len(cluster), dtype=np.uint32)
+    lists[0:2 * CLUSTER_COUNT:2] = np.cumsum(counts) - counts + 2 * CLUSTER_COUNT
+    lists[1:2 * CLUSTER_COUNT:2] = counts
+    lists[2 * CLUSTER_COUNT:] = light_index[np.argsort(cluster, kind="stable")]
+    return lists
+
+
+def disable_clustered_lights(program, unit: int):
+    """没有点光源时设置 uniform；两个缓冲采样器即使不用也不能和其他类型的采样器共用纹理单元"""
+    program.uniform("uLightCount").set(0)
+    program.uniform("uClusterLists").set(unit)
+    program.uniform("uLightData").set(unit + 1)
+
+
+class ClusteredLights:
+    """点光源和簇的光源列表，每帧 update() 后在绘制前 apply_uniforms()"""
+
+    def __init__(self):
+        buffers = gl.glGenBuffers(2)
+        textures = gl.glGenTextures(2)
+        self.cluster_buffer, self.light_buffer = (int(buffer) for buffer in buffers)
+        self.cluster_texture, self.light_texture = (int(texture) for texture in textures)
+        for texture, buffer, internal_format in ((self.cluster_texture, self.cluster_buffer, gl.GL_R32UI),
+                                                 (self.light_texture, self.light_buffer, gl.GL_RGBA32F)):
+            gl.glBindBuffer(gl.GL_TEXTURE_BUFFER, buffer)
+            gl.glBufferData(gl.GL_TEXTURE_BUFFER, 16, None, gl.GL_STREAM_DRAW)
+            gl.glBindTexture(gl.GL_TEXTURE_BUFFER, texture)
+            gl.glTexBuffer(gl.GL_TEXTURE_BUFFER, internal_format, buffer)
+        gl.glBindTexture(gl.GL_TEXTURE_BUFFER, 0)
+        gl.glBindBuffer(gl.GL_TEXTURE_BUFFER, 0)
+
+        self.light_count = 0
+        self.viewport = (1, 1)
+        self.depth = (0.1, 1.0)
+        self.inverse_view_projection = np.identity(4)
+        self._bounds_key = None
+        self._bounds = None
+        self._inputs = None
+        # 光源数、视锥内的光源数、光源-簇对数、单簇最多的光源数、分簇耗时、上传字节数
+        self.stats = {"lights": 0, "visible": 0, "pairs": 0, "max": 0, "ms": 0.0, "bytes": 0, "cached": False}
+
+    def update(self, positions: np.ndarray, colors: np.ndarray, radii: np.ndarray, projection: np.ndarray,
+               view: np.ndarray, near: float, far: float, width: int, height: int):
+        """
+        分簇并上传；光源、相机和视口都没有变化时跳过
+
+        Args:
+            positions: (n, 3) 世界空间的光源位置
+            colors: (n, 3) 光源颜色（已乘强度）
+            radii: (n,) 光源的作用半径（世界单位）
+            projection, view: 本帧的投影和视图矩阵（行主序，对称透视投影）
+            near, far: 投影的近远平面
+            width, height: 视口的使用尺寸（像素）
+        """
+        inputs = (positions, colors, radii, projection, view, (near, far, width, height))
+        if self._inputs is not None and all(np.array_equal(a, b) for a, b in zip(inputs, self._inputs)):
+            self.stats["cached"] = True
+            return
+        self._inputs = tuple(np.array(value, copy=True) for value in inputs)
+        start = time.perf_counter()
+        count = len(radii)
+        self.light_count = count
+        self.viewport = (max(1, width), max(1, height))
+        self.depth = cluster_depth(near, far)
+        self.inverse_view_projection = np.linalg.inv(projection @ view)
+        if not count:
+            self.stats = {"lights": 0, "visible": 0, "pairs": 0, "max": 0, "ms": 0.0, "bytes": 0, "cached": False}
+            return
+
+        tan_x, tan_y = 1.0 / projection[0, 0], 1.0 / projection[1, 1]
+        key = (float(tan_x), float(tan_y), near, far)
+        if key != self._bounds_key:
+            self._bounds_key = key
+            self._bounds = cluster_bounds(tan_x, tan_y, near, far)
+        centers = positions @ view[:3, :3].T + view[:3, 3]
+        lists = bin_lights(centers, np.asarray(radii, dtype=np.float64), self._bounds, tan_x, tan_y, near, far)
+
+        lights = np.zeros((count, LIGHT_TEXELS, 4), dtype=np.float32)
+        lights[:, 0, :3] = positions
+        lights[:, 0, 3] = radii
+        lights[:, 1, :3] = colors
+        self._upload(self.cluster_buffer, lists)
+        self._upload(self.light_buffer, lights)
+
+        counts = lists[1:2 * CLUSTER_COUNT:2]
+        self.stats = {
+            "lights": count,
+            "visible": len(np.unique(lists[2 * CLUSTER_COUNT:])),
+            "pairs": len(lists) - 2 * CLUSTER_COUNT,
+            "max": int(counts.max()),
+            "ms": (time.perf_counter() - start) * 1000.0,
+            "bytes": lists.nbytes + lights.nbytes,
+            "cached": False,
+        }
+
+    @staticmethod
+    def _upload(buffer: int, data: np.ndarray):
+        # 孤立旧的数据存储，不等待上一帧的着色器读完
+        gl.glBindBuffer(gl.GL_TEXTURE_BUFFER, buffer)
+        gl.glBufferData(gl.GL_TEXTURE_BUFFER, data.nbytes, None, gl.GL_STREAM_DRAW)
+        gl.glBufferSubData(gl.GL_TEXTURE_BUFFER, 0, data.nbytes, data)
+        gl.glBindBuffer(gl.GL_TEXTURE_BUFFER, 0)
+
+    def apply_uniforms(self, program, unit: int):
+        """设置 CLUSTER_GLSL 的 uniform，簇列表和光源参数绑定到纹理单元 unit 和 unit + 1"""
+        if not self.light_count:
+            disable_clustered_lights(program, unit)
+            return
+        for offset, (name, texture) in enumerate((("uClusterLists", self.cluster_texture),
+                                                  ("uLightData", self.light_texture))):
+            gl.glActiveTexture(gl.GL_TEXTURE0 + unit + offset)
+            gl.glBindTexture(gl.GL_TEXTURE_BUFFER, texture)
+            program.uniform(name).set(unit + offset)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        program.uniform("uLightCount").set(self.light_count)
+        program.uniform("uClusterViewport").set(self.viewport)
+        program.uniform("uClusterDepth").set(tuple(float(value) for value in self.depth))
+        # 延迟光照从深度重建世界空间位置；前向程序没有这个 uniform
+        program.uniform("uInverseViewProjection").set(np.ascontiguousarray(to_gl(self.inverse_view_projection),
+                                                                           dtype=np.float32))
+
+    def unbind(self, unit: int):
+        for offset in (0, 1):
+            gl.glActiveTexture(gl.GL_TEXTURE0 + unit + offset)
+            gl.glBindTexture(gl.GL_TEXTURE_BUFFER, 0)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+
+    def delete(self):
+        if self.cluster_buffer:
+            gl.glDeleteBuffers(2, [self.cluster_buffer, self.light_buffer])
+            gl.glDeleteTextures(2, [self.cluster_texture, self.light_texture])
+            self.cluster_buffer = self.light_buffer = None
+            self.cluster_texture = self.light_texture = None
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+深度缓冲异步读回模块
+绘制完成后用 glReadPixels 把深度读到像素缓冲对象（PBO）中并放置栅栏，之后几帧内栅栏触发时再取回，
+CPU 不等待 GPU；读回的深度用于 CPU 端的层次 Z 遮挡测试（scene.occlusion）
+"""
+
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+# 绑定 PBO 时 data 参数是缓冲内的偏移，PyOpenGL 的包装会把它当作输出数组处理，直接使用原始函数；
+# glGetBufferSubData 同样直接写入 numpy 数组的内存
+from OpenGL.raw.GL.VERSION.GL_1_0 import glReadPixels as _read_pixels_raw
+from OpenGL.raw.GL.VERSION.GL_1_5 import glGetBufferSubData as _get_buffer_sub_data_raw
+
+# 同时在途的读回数量
+READBACK_SLOTS = 3
+
+
+class DepthReadback:
+    """深度读回环: capture() 发起读回，poll() 非阻塞地取最新完成的结果"""
+
+    def __init__(self, slots: int = READBACK_SLOTS):
+        self.buffers = [int(buffer) for buffer in np.atleast_1d(gl.glGenBuffers(slots))]
+        self._sizes = [0] * slots
+        # 每个槽位: (栅栏, 宽, 高, 调用方数据, 序号)，None 表示空闲
+        self._pending = [None] * slots
+        self._next = 0
+        self._serial = 0
+
+    @property
+    def pending(self) -> int:
+        return sum(entry is not None for entry in self._pending)
+
+    def capture(self, framebuffer: int, width: int, height: int, tag=None):
+        """
+        读回 framebuffer 左下角 width x height 的深度
+
+        Args:
+            tag: 与结果一起返回的数据（例如这一帧的投影观察矩阵）
+        """
+        slot = self._next
+        self._next = (slot + 1) % len(self.buffers)
+        # 槽位仍未取回时丢弃旧结果，不等待
+        self._discard(slot)
+
+        size = width * height * 4
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, framebuffer)
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self.buffers[slot])
+        if self._sizes[slot] < size:
+            gl.glBufferData(gl.GL_PIXEL_PACK_BUFFER, size, None, gl.GL_STREAM_READ)
+            self._sizes[slot] = size
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 4)
+        _read_pixels_raw(0, 0, width, height, gl.GL_DEPTH_COMPONENT, gl.GL_FLOAT, ctypes.c_void_p(0))
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, 0)
+
+        fence = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self._serial += 1
+        self._pending[slot] = (fence, width, height, tag, self._serial)
+
+    def poll(self):
+        """
+        最新完成的读回
+
+        Returns:
+            (depth, tag): depth 为 (height, width) float32，第 0 行是画面底部；没有新结果时返回 None
+        """
+        newest = None
+        for slot, entry in enumerate(self._pending):
+            if entry is None:
+                continue
+            status = gl.glClientWaitSync(entry[0], 0, 0)
+            if status in (gl.GL_ALREADY_SIGNALED, gl.GL_CONDITION_SATISFIED):
+                if newest is None or entry[4] > self._pending[newest][4]:
+                    newest = slot
+        if newest is None:
+            return None
+
+        _, width, height, tag, serial = self._pending[newest]
+        depth = np.empty((height, width), dtype=np.float32)
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self.buffers[newest])
+        _get_buffer_sub_data_raw(gl.GL_PIXEL_PACK_BUFFER, 0, depth.nbytes, depth.ctypes.data_as(ctypes.c_void_p))
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        # 更早的结果已经过时
+        for slot, entry in enumerate(self._pending):
+            if entry is not None and entry[4] <= serial:
+                self._discard(slot)
+        return depth, tag
+
+    def _discard(self, slot: int):
+        entry = self._pending[slot]
+        if entry is not None:
+            gl.glDeleteSync(entry[0])
+            self._pending[slot] = None
+
+    def delete(self):
+        for slot in range(len(self._pending)):
+            self._discard(slot)
+        gl.glDeleteBuffers(len(self.buffers), self.buffers)
+        self.buffers = []
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+延迟渲染的 G-buffer
+几何通道把每个像素的反照率、法线、材质参数和深度只写一次（多渲染目标），之后一次全屏通道
+（gpu/shaders/deferred.frag）:
+- 按像素计算一次光照（与前向的 instanced.frag 相同的光照模型），重叠绘制的片段不再各自计算光照
+- 调试视图（法线、深度、反照率）只是选择另一张纹理，切换时不需要重新绘制场景
+- 点光源与前向渲染共用分簇的光源列表（gpu/clustered.py），每个像素只遍历所在簇的光源
+
+附件（每像素 GBUFFER_PIXEL_BYTES 字节）:
+    0  GL_RGBA8            反照率 rgb + alpha（清除为背景色）
+    1  GL_RGB10_A2         世界空间法线 * 0.5 + 0.5
+    2  GL_RGBA8            材质参数: x 环境光, y 漫反射, z 保留, w 1 表示需要光照（清除为 0）
+    深度 GL_DEPTH24_STENCIL8 纹理
+
+尺寸按渲染目标池的档位分配，只使用左下角的子矩形；档位的显存超过 MAX_GBUFFER_BYTES 时
+调用方应改用前向渲染
+"""
+
+import OpenGL.GL as gl
+# PyOpenGL 的 glTexImage2D 包装不认识 GL_UNSIGNED_INT_24_8，分配空纹理时直接使用原始函数
+from OpenGL.raw.GL.VERSION.GL_1_0 import glTexImage2D as _tex_image_2d_raw
+from gpu.clustered import CLUSTER_GLSL, disable_clustered_lights
+from gpu.render_targets import RenderTarget, bucket_size
+from gpu.shader import shader_manager
+
+# 颜色附件: (内部格式, 像素格式, 数据类型, 每像素字节数)
+GBUFFER_ATTACHMENTS = (
+    (gl.GL_RGBA8, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, 4),
+    (gl.GL_RGB10_A2, gl.GL_RGBA, gl.GL_UNSIGNED_INT_2_10_10_10_REV, 4),
+    (gl.GL_RGBA8, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, 4),
+)
+GBUFFER_PIXEL_BYTES = sum(attachment[3] for attachment in GBUFFER_ATTACHMENTS) + 4
+# G-buffer 显存上限（字节）
+MAX_GBUFFER_BYTES = 128 * 1024 * 1024
+
+# 合成通道的视图（render_settings 的 color_type）
+GBUFFER_VIEWS = {"texture": 0, "normal": 1, "depth": 2, "albedo": 3}
+
+
+def gbuffer_bytes(width: int, height: int) -> int:
+    """width x height 的视口需要的 G-buffer 显存（按档位取整后）"""
+    return bucket_size(width) * bucket_size(height) * GBUFFER_PIXEL_BYTES
+
+
+class GBuffer:
+    """多渲染目标帧缓冲，尺寸按档位变化时重新分配"""
+
+    def __init__(self):
+        self.framebuffer = None
+        self.textures = []
+        self.depth_texture = None
+        self.alloc_width = 0
+        self.alloc_height = 0
+        self.width = 0
+        self.height = 0
+        self.memory_bytes = 0
+
+    def resize(self, width: int, height: int):
+        """设置使用尺寸，档位变化时重新分配"""
+        width, height = max(1, width), max(1, height)
+        self.width, self.height = width, height
+        if (bucket_size(width), bucket_size(height)) != (self.alloc_width, self.alloc_height):
+            self._allocate(bucket_size(width), bucket_size(height))
+
+    def _allocate(self, width: int, height: int):
+        self.delete()
+        self.alloc_width, self.alloc_height = width, height
+        self.framebuffer = gl.glGenFramebuffers(1)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        formats = [attachment[:3] for attachment in GBUFFER_ATTACHMENTS]
+        formats.append((gl.GL_DEPTH24_STENCIL8, gl.GL_DEPTH_STENCIL, gl.GL_UNSIGNED_INT_24_8))
+        textures = gl.glGenTextures(len(formats))
+        for texture, (internal_format, pixel_format, pixel_type) in zip(textures, formats):
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+            _tex_image_2d_raw(gl.GL_TEXTURE_2D, 0, internal_format, width, height, 0, pixel_format, pixel_type, None)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        self.textures = [int(texture) for texture in textures[:-1]]
+        self.depth_texture = int(textures[-1])
+        for i, texture in enumerate(self.textures):
+            gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0 + i, gl.GL_TEXTURE_2D, texture, 0)
+        gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_DEPTH_STENCIL_ATTACHMENT, gl.GL_TEXTURE_2D,
+                                  self.depth_texture, 0)
+        gl.glDrawBuffers(len(self.textures), [gl.GL_COLOR_ATTACHMENT0 + i for i in range(len(self.textures))])
+
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            self.delete()
+            raise RuntimeError(f"G-buffer 帧缓冲不完整: 0x{status:04X}")
+        self.memory_bytes = width * height * GBUFFER_PIXEL_BYTES
+
+    def bind_and_clear(self, background):
+        """绑定并清除: 反照率为背景色，法线和材质为 0（不做光照），深度为 1"""
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glViewport(0, 0, self.width, self.height)
+        gl.glClearBufferfv(gl.GL_COLOR, 0, list(background))
+        gl.glClearBufferfv(gl.GL_COLOR, 1, [0.0, 0.0, 0.0, 0.0])
+        gl.glClearBufferfv(gl.GL_COLOR, 2, [0.0, 0.0, 0.0, 0.0])
+        gl.glClearBufferfi(gl.GL_DEPTH_STENCIL, 0, 1.0, 0)
+        gl.glEnable(gl.GL_DEPTH_TEST)
+
+    def copy_depth(self, destination: RenderTarget):
+        """把深度复制到普通渲染目标（遮挡剔除从显示目标读回深度）"""
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self.framebuffer)
+        gl.glBindFramebuffer(gl.GL_DRAW_FRAMEBUFFER, destination.framebuffer)
+        gl.glBlitFramebuffer(0, 0, self.width, self.height, 0, 0, destination.width, destination.height,
+                             gl.GL_DEPTH_BUFFER_BIT, gl.GL_NEAREST)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+
+    def delete(self):
+        if self.framebuffer:
+            gl.glDeleteFramebuffers(1, [self.framebuffer])
+            self.framebuffer = None
+        if self.textures:
+            gl.glDeleteTextures(self.textures + [self.depth_texture])
+            self.textures = []
+            self.depth_texture = None
+        self.alloc_width = self.alloc_height = 0
+        self.memory_bytes = 0
+
+
+class DeferredLighting:
+    """光照/调试视图的全屏合成通道"""
+
+    def __init__(self):
+        self.program = shader_manager.load("deferred", "fullscreen.vert", "deferred.frag",
+                                           fragment_prelude=CLUSTER_GLSL)
+        self.vao = gl.glGenVertexArrays(1)
+
+    def apply(self, gbuffer: GBuffer, destination: RenderTarget, view: str, near: float, far: float,
+              occlusion: RenderTarget = None, occlusion_scale: int = 0, shadows=None, lights=None):
+        """
+        Args:
+            gbuffer: 已经画好的 G-buffer
+            destination: 输出目标（使用尺寸与 G-buffer 相同，不写深度）
+            view: GBUFFER_VIEWS 的键，未知的视图按 texture（光照结果）处理
+            near, far: 投影的近远平面，用于深度视图和遮蔽的上采样
+            occlusion, occlusion_scale: SsaoPass.apply() 的结果，None 表示不做环境光遮蔽
+            shadows: 本帧已更新的 gpu.shadows.ShadowMaps，None 表示没有阴影
+            lights: 本帧已分簇的 gpu.clustered.ClusteredLights，None 表示没有点光源
+        """
+        destination.bind()
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        program = self.program
+        program.use()
+        for unit, (name, texture) in enumerate(zip(("uAlbedo", "uNormal", "uMaterial", "uDepth"),
+                                                   gbuffer.textures + [gbuffer.depth_texture])):
+            gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+            program.uniform(name).set(unit)
+        program.uniform("uView").set(GBUFFER_VIEWS.get(view, 0))
+        program.uniform("uNear").set(near)
+        program.uniform("uFar").set(far)
+        if occlusion is not None:
+            gl.glActiveTexture(gl.GL_TEXTURE4)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, occlusion.texture)
+            program.uniform("uOcclusion").set(4)
+            program.uniform("uOcclusionSize").set((occlusion.width, occlusion.height))
+        program.uniform("uOcclusionScale").set(occlusion_scale if occlusion is not None else 0)
+        program.uniform("uViewportSize").set((gbuffer.width, gbuffer.height))
+        if shadows is not None:
+            shadows.apply_uniforms(program, 5)
+        else:
+            program.uniform("uShadowCascades").set(0)
+            # 阴影采样器即使不用也不能和 2D 采样器共用一个纹理单元
+            program.uniform("uShadowAtlas").set(5)
+        if lights is not None:
+            lights.apply_uniforms(program, 6)
+        else:
+            disable_clustered_lights(program, 6)
+        gl.glBindVertexArray(self.vao)
+        gl.glDrawArrays(gl.GL_TRIANGLES, 0, 3)
+        gl.glBindVertexArray(0)
+        if lights is not None:
+            lights.unbind(6)
+        for unit in reversed(range(6)):
+            gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glUseProgram(0)
+
+    def delete(self):
+        if self.vao:
+            gl.glDeleteVertexArrays(1, [self.vao])
+            self.vao = None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+GPU 驱动的间接绘制（需要 OpenGL 4.3: 计算着色器、着色器存储缓冲、glMultiDrawElementsIndirect）
+所有原型的网格合并到一个顶点/索引缓冲中，每个原型一条 DrawElementsIndirectCommand；
+物体的变换、颜色和世界包围盒放在存储缓冲中，只在场景变化时上传
+
+每帧: 重置命令的实例数 → 计算着色器逐物体测试视锥，可见物体写入实例缓冲并累加所属命令的实例数 →
+一次 glMultiDrawElementsIndirect 画完所有原型。Python 的每帧开销与物体数量无关
+"""
+
+import time
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+from gpu.mesh import Mesh
+from gpu.instancing import InstanceBatch
+from gpu.shader import shader_manager
+from gpu.vertex_layout import VertexLayout
+
+# 计算着色器的工作组大小（与 indirect_cull.comp 一致）
+CULL_GROUP_SIZE = 64
+# 存储缓冲绑定点（与 indirect_cull.comp 一致）
+OBJECT_BUFFER_BINDING = 0
+COMMAND_BUFFER_BINDING = 1
+INSTANCE_BUFFER_BINDING = 2
+
+# std430 物体数据: 列主序 mat4 model; vec4 color; vec4 low; vec4 high; uvec4 info（x: 命令编号）
+OBJECT_DTYPE = np.dtype([
+    ("model", np.float32, (4, 4)),
+    ("color", np.float32, 4),
+    ("low", np.float32, 4),
+    ("high", np.float32, 4),
+    ("info", np.uint32, 4),
+])
+
+# DrawElementsIndirectCommand
+COMMAND_DTYPE = np.dtype([
+    ("count", np.uint32),
+    ("instance_count", np.uint32),
+    ("first_index", np.uint32),
+    ("base_vertex", np.int32),
+    ("base_instance", np.uint32),
+])
+
+
+def indirect_supported() -> bool:
+    """当前上下文是否支持 GPU 驱动绘制（OpenGL 4.3 及以上）"""
+    try:
+        version = (int(gl.glGetIntegerv(gl.GL_MAJOR_VERSION)), int(gl.glGetIntegerv(gl.GL_MINOR_VERSION)))
+    except Exception:
+        return False
+    return version >= (4, 3)
+
+
+class IndirectScene:
+    """原型合并到一个网格、由计算着色器剔除并生成间接绘制命令的场景"""
+
+    def __init__(self, prototypes: dict, layout: VertexLayout = None, capacity: int = 1024):
+        """
+        Args:
+            prototypes: 原型名称 -> (顶点, 索引)，顶点数组的 dtype 必须相同
+            layout: 顶点布局（所有原型共用一组解码参数）
+            capacity: 初始物体容量
+        """
+        names = list(prototypes)
+        vertices = [prototypes[name][0] for name in names]
+        indices = [np.asarray(prototypes[name][1], dtype=np.uint32) for name in names]
+        self.mesh = Mesh("indirect", np.concatenate(vertices), np.concatenate(indices), layout=layout)
+        # 索引不加偏移，由命令的 base_vertex 指向各原型的顶点
+        self.command_ids = {name: i for i, name in enumerate(names)}
+        self.commands = np.zeros(len(names), dtype=COMMAND_DTYPE)
+        self.commands["count"] = [len(array) for array in indices]
+        self.commands["first_index"] = np.concatenate([[0], np.cumsum(self.commands["count"])[:-1]])
+        self.commands["base_vertex"] = np.concatenate([[0], np.cumsum([len(array) for array in vertices])[:-1]])
+
+        # 实例缓冲和 VAO 与 InstanceBatch 相同，只是由计算着色器写入
+        self.batch = InstanceBatch(self.mesh, capacity)
+        self.object_buffer = gl.glGenBuffers(1)
+        self.command_buffer = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, self.command_buffer)
+        gl.glBufferData(gl.GL_DRAW_INDIRECT_BUFFER, self.commands.nbytes, self.commands, gl.GL_DYNAMIC_DRAW)
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, 0)
+        self.object_capacity = 0
+        self.count = 0
+        self.cull_program = shader_manager.load_compute("indirect_cull")
+        self.stats = {"total": 0, "commands": len(names), "ms": 0.0}
+
+    def set_objects(self, prototypes: np.ndarray, models: np.ndarray, colors: np.ndarray,
+                    low: np.ndarray, high: np.ndarray):
+        """
+        替换全部物体并上传
+
+        Args:
+            prototypes: (n,) 原型名称
+            models: (n, 4, 4) 列主序变换矩阵
+            colors: (n, 4) RGBA
+            low, high: (n, 3) 世界包围盒
+        """
+        count = len(models)
+        names, inverse = np.unique(np.asarray(prototypes), return_inverse=True)
+        command = np.array([self.command_ids[name] for name in names], dtype=np.uint32)[inverse.ravel()]
+
+        objects = np.zeros(count, dtype=OBJECT_DTYPE)
+        objects["model"] = models
+        objects["color"] = colors
+        objects["low"][:, :3] = low
+        objects["high"][:, :3] = high
+        objects["info"][:, 0] = command
+        # 每条命令的实例范围按原型的物体数划分
+        counts = np.bincount(command, minlength=len(self.commands))
+        self.commands["base_instance"] = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        self.count = count
+        self.stats["total"] = count
+
+        self.batch.reserve(count)
+        gl.glBindBuffer(gl.GL_SHADER_STORAGE_BUFFER, self.object_buffer)
+        if count > self.object_capacity:
+            self.object_capacity = max(count, self.object_capacity * 2)
+            gl.glBufferData(gl.GL_SHADER_STORAGE_BUFFER, self.object_capacity * OBJECT_DTYPE.itemsize, None,
+                            gl.GL_STATIC_DRAW)
+        if count:
+            gl.glBufferSubData(gl.GL_SHADER_STORAGE_BUFFER, 0, objects.nbytes, objects)
+        gl.glBindBuffer(gl.GL_SHADER_STORAGE_BUFFER, 0)
+
+    def cull(self, planes: np.ndarray):
+        """
+        在 GPU 上做视锥剔除并生成本帧的绘制命令（会切换当前程序，绘制前需要重新绑定）
+
+        Args:
+            planes: (6, 4) 视锥平面 (n, d)，n·p + d >= 0 表示在内侧（scene.frustum_planes 的结果）
+        """
+        start = time.perf_counter()
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, self.command_buffer)
+        gl.glBufferSubData(gl.GL_DRAW_INDIRECT_BUFFER, 0, self.commands.nbytes, self.commands)
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, 0)
+        if self.count:
+            program = self.cull_program
+            program.use()
+            program.uniform("uPlanes").set(np.asarray(planes, dtype=np.float32))
+            program.uniform("uObjectCount").set(self.count)
+            gl.glBindBufferBase(gl.GL_SHADER_STORAGE_BUFFER, OBJECT_BUFFER_BINDING, self.object_buffer)
+            gl.glBindBufferBase(gl.GL_SHADER_STORAGE_BUFFER, COMMAND_BUFFER_BINDING, self.command_buffer)
+            gl.glBindBufferBase(gl.GL_SHADER_STORAGE_BUFFER, INSTANCE_BUFFER_BINDING, self.batch.instance_vbo)
+            gl.glDispatchCompute((self.count + CULL_GROUP_SIZE - 1) // CULL_GROUP_SIZE, 1, 1)
+            # 命令和实例数据在绘制前必须可见
+            gl.glMemoryBarrier(gl.GL_COMMAND_BARRIER_BIT | gl.GL_VERTEX_ATTRIB_ARRAY_BARRIER_BIT)
+            gl.glUseProgram(0)
+        self.stats["ms"] = (time.perf_counter() - start) * 1000.0
+
+    def draw(self, program=None):
+        """一次间接多重绘制画完所有原型（着色器和相机需要事先绑定，program 同 InstanceBatch.draw）"""
+        if self.count == 0:
+            return
+        if program is not None:
+            self.mesh.apply_decode(program)
+        gl.glBindVertexArray(self.batch.vao)
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, self.command_buffer)
+        gl.glMultiDrawElementsIndirect(self.mesh.mode, gl.GL_UNSIGNED_INT, ctypes.c_void_p(0), len(self.commands), 0)
+        gl.glBindBuffer(gl.GL_DRAW_INDIRECT_BUFFER, 0)
+        gl.glBindVertexArray(0)
+
+    @property
+    def vertex_bytes(self) -> int:
+        return self.mesh.vertex_bytes
+
+    def delete(self):
+        self.batch.delete()
+        self.mesh.delete()
+        gl.glDeleteBuffers(2, [self.object_buffer, self.command_buffer])
+        self.object_buffer = self.command_buffer = None
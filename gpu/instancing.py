@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+实例化渲染模块
+原型（网格）只上传一次；引用同一原型的所有实例的变换和颜色打包在一个逐实例属性缓冲中，
+每个原型一次 glDrawElementsInstanced / glDrawArraysInstanced 画完
+
+实例数据只在变化时上传，相机移动不需要重新上传
+"""
+
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+from gpu.mesh import Mesh
+
+# 逐实例属性位置: mat4 占 4 个位置
+MODEL_LOCATION = 4
+COLOR_LOCATION = 8
+
+# 逐实例数据: 列主序 mat4 model; vec4 color;
+INSTANCE_DTYPE = np.dtype([
+    ("model", np.float32, (4, 4)),
+    ("color", np.float32, 4),
+])
+
+
+class InstanceBatch:
+    """一个原型的所有实例"""
+
+    def __init__(self, mesh: Mesh, capacity: int = 1024):
+        self.mesh = mesh
+        self.capacity = 0
+        self.count = 0
+        self.instances = None
+        self._dirty = False
+        # 绘制的 LOD 级别（mesh.lod_ranges 的下标），所有实例相同
+        self.lod = 0
+
+        self.instance_vbo = gl.glGenBuffers(1)
+        self.vao = gl.glGenVertexArrays(1)
+        gl.glBindVertexArray(self.vao)
+        mesh.setup_vertex_attributes()
+
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instance_vbo)
+        stride = INSTANCE_DTYPE.itemsize
+        for column in range(4):
+            location = MODEL_LOCATION + column
+            gl.glEnableVertexAttribArray(location)
+            gl.glVertexAttribPointer(location, 4, gl.GL_FLOAT, gl.GL_FALSE, stride, ctypes.c_void_p(column * 16))
+            gl.glVertexAttribDivisor(location, 1)
+        gl.glEnableVertexAttribArray(COLOR_LOCATION)
+        gl.glVertexAttribPointer(COLOR_LOCATION, 4, gl.GL_FLOAT, gl.GL_FALSE, stride,
+                                 ctypes.c_void_p(INSTANCE_DTYPE.fields["color"][1]))
+        gl.glVertexAttribDivisor(COLOR_LOCATION, 1)
+
+        gl.glBindVertexArray(0)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int):
+        """确保至少能容纳 capacity 个实例（按 2 倍增长，保留已有数据）"""
+        if capacity <= self.capacity:
+            return
+        new_capacity = max(capacity, self.capacity * 2)
+        instances = np.zeros(new_capacity, dtype=INSTANCE_DTYPE)
+        if self.instances is not None:
+            instances[:self.count] = self.instances[:self.count]
+        self.instances = instances
+        self.capacity = new_capacity
+
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instance_vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, instances.nbytes, None, gl.GL_DYNAMIC_DRAW)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        self._dirty = True
+
+    def set_instances(self, models: np.ndarray, colors: np.ndarray):
+        """
+        替换全部实例
+
+        Args:
+            models: (n, 4, 4) 列主序变换矩阵
+            colors: (n, 4) 或 (4,) RGBA 颜色
+        """
+        count = len(models)
+        self.reserve(count)
+        self.instances["model"][:count] = models
+        self.instances["color"][:count] = colors
+        self.count = count
+        self._dirty = True
+
+    def mark_dirty(self):
+        """直接修改 instances 数组后调用"""
+        self._dirty = True
+
+    def upload(self):
+        """把变化的实例数据上传到 GPU"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        if self.count == 0:
+            return
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.instance_vbo)
+        # 先孤立旧存储，避免等待 GPU 读完上一帧的数据
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, self.capacity * INSTANCE_DTYPE.itemsize, None, gl.GL_DYNAMIC_DRAW)
+        gl.glBufferSubData(gl.GL_ARRAY_BUFFER, 0, self.count * INSTANCE_DTYPE.itemsize, self.instances)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+    def draw(self, program=None):
+        """program: 顶点布局生成的程序，设置后先写入网格的解码 uniform"""
+        if self.count == 0:
+            return
+        self.upload()
+        if program is not None:
+            self.mesh.apply_decode(program)
+        gl.glBindVertexArray(self.vao)
+        mesh = self.mesh
+        if mesh.indexed:
+            first, count = mesh.lod_ranges[min(self.lod, mesh.lod_count - 1)]
+            gl.glDrawElementsInstanced(mesh.mode, count, gl.GL_UNSIGNED_INT, ctypes.c_void_p(first * 4), self.count)
+        else:
+            gl.glDrawArraysInstanced(mesh.mode, 0, mesh.vertex_count, self.count)
+
+    def delete(self):
+        gl.glDeleteVertexArrays(1, [self.vao])
+        gl.glDeleteBuffers(1, [self.instance_vbo])
+        self.instances = None
+
+
+class InstancedScene:
+    """原型/实例场景: 每个原型一个网格和一个实例批次"""
+
+    def __init__(self):
+        self.batches = {}
+
+    def add_prototype(self, name: str, mesh: Mesh, capacity: int = 1024) -> InstanceBatch:
+        """注册原型，已存在时替换"""
+        if name in self.batches:
+            self.batches[name].delete()
+        batch = InstanceBatch(mesh, capacity)
+        self.batches[name] = batch
+        return batch
+
+    def set_instances(self, name: str, models: np.ndarray, colors: np.ndarray):
+        self.batches[name].set_instances(models, colors)
+
+    @property
+    def instance_count(self) -> int:
+        return sum(batch.count for batch in self.batches.values())
+
+    @property
+    def vertex_bytes(self) -> int:
+        return sum(batch.mesh.vertex_bytes for batch in self.batches.values())
+
+    def draw(self, program=None):
+        """每个原型一次实例化绘制（着色器和相机需要事先绑定，program 同 InstanceBatch.draw）"""
+        for batch in self.batches.values():
+            batch.draw(program)
+        gl.glBindVertexArray(0)
+
+    def delete(self, delete_meshes: bool = True):
+        for batch in self.batches.values():
+            batch.delete()
+            if delete_meshes:
+                batch.mesh.delete()
+        self.batches.clear()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+网格模块
+网格的顶点和索引只上传一次，所有引用同一网格的实例共享这份 GPU 缓冲
+
+顶点格式: 位置 vec3 + 法线 vec3（交错存放的 float32），导入的网格另有纹理坐标 vec2；
+上传时按顶点布局（gpu.vertex_layout）编码，默认布局是 float32，此时顶点数组
+（包括内存映射的网格缓存）按自身的 dtype 原样上传，不做转换
+
+简化的 LOD 索引接在原索引后面放进同一个索引缓冲，所有级别共享顶点缓冲，
+lod_ranges 记录每级在索引缓冲中的 (起点, 索引数)
+"""
+
+import numpy as np
+import OpenGL.GL as gl
+from gpu.vertex_layout import VertexLayout, LAYOUT_FLOAT32
+
+VERTEX_DTYPE = np.dtype([
+    ("position", np.float32, 3),
+    ("normal", np.float32, 3),
+])
+
+
+class Mesh:
+    """GPU 网格，持有顶点缓冲和可选的索引缓冲"""
+
+    def __init__(self, name: str, vertices: np.ndarray, indices: np.ndarray = None, mode: int = gl.GL_TRIANGLES,
+                 layout: VertexLayout = None, lod_indices: np.ndarray = None, lods: list = None):
+        """
+        Args:
+            name: 网格名称
+            vertices: 含 position、normal（可选 uv、tangent）字段的 float32 结构化数组，例如 VERTEX_DTYPE
+            indices: uint32 索引数组，None 表示非索引绘制
+            mode: 图元类型
+            layout: 顶点布局，None 表示 float32 原样上传
+            lod_indices, lods: 简化的 LOD 索引及每级的 {"first", "count"}（见 mesh_import.simplify）
+        """
+        self.name = name
+        self.mode = mode
+        self.layout = layout or LAYOUT_FLOAT32
+        self.vertex_count = len(vertices)
+        self.index_count = 0 if indices is None else len(indices)
+        self.lod_ranges = [(0, self.index_count)]
+        if indices is not None and lods:
+            self.lod_ranges += [(self.index_count + lod["first"], lod["count"]) for lod in lods]
+            indices = np.concatenate([np.asarray(indices, np.uint32), np.asarray(lod_indices, np.uint32)])
+
+        # 解码 uniform（量化布局的包围盒），绘制前用 apply_decode 设置
+        vertices, self.decode = self.layout.encode(vertices)
+        self.vertex_dtype = vertices.dtype
+        self.vertex_bytes = vertices.nbytes
+
+        # np.memmap 同样直接传指针，数据由驱动从映射页读取
+        self.vbo = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
+        gl.glBufferData(gl.GL_ARRAY_BUFFER, vertices.nbytes, np.ascontiguousarray(vertices), gl.GL_STATIC_DRAW)
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+
+        self.ebo = None
+        if indices is not None:
+            self.ebo = gl.glGenBuffers(1)
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+            gl.glBufferData(gl.GL_ELEMENT_ARRAY_BUFFER, indices.nbytes,
+                            np.ascontiguousarray(indices, np.uint32), gl.GL_STATIC_DRAW)
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    @property
+    def indexed(self) -> bool:
+        return self.ebo is not None
+
+    @property
+    def lod_count(self) -> int:
+        """级数（含原网格）"""
+        return len(self.lod_ranges)
+
+    def setup_vertex_attributes(self):
+        """在当前绑定的 VAO 上配置顶点属性和索引缓冲"""
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.vbo)
+        self.layout.setup_attributes(self.vertex_dtype)
+        if self.ebo is not None:
+            # 索引缓冲绑定记录在 VAO 中
+            gl.glBindBuffer(gl.GL_ELEMENT_ARRAY_BUFFER, self.ebo)
+
+    def apply_decode(self, program):
+        """把解码 uniform 设置到 program（用 self.layout.glsl() 生成的程序，需要已经绑定）"""
+        for name, value in self.decode.items():
+            program.uniform(name).set(value)
+
+    def delete(self):
+        if self.vbo:
+            gl.glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
+        if self.ebo:
+            gl.glDeleteBuffers(1, [self.ebo])
+            self.ebo = None
+
+
+def _faces_to_arrays(face_positions, face_normals):
+    """每个面 4 个顶点（按逆时针顺序）转换为顶点数组和三角形索引"""
+    face_positions = np.asarray(face_positions, dtype=np.float32)
+    face_count = len(face_positions)
+
+    vertices = np.empty(face_count * 4, dtype=VERTEX_DTYPE)
+    vertices["position"] = face_positions.reshape(-1, 3)
+    vertices["normal"] = np.repeat(np.asarray(face_normals, dtype=np.float32), 4, axis=0)
+
+    quad = np.array([0, 1, 2, 0, 2, 3], dtype=np.uint32)
+    indices = (quad[None, :] + 4 * np.arange(face_count, dtype=np.uint32)[:, None]).ravel()
+    return vertices, indices
+
+
+def cube_arrays(size: float = 1.0):
+    """立方体的顶点和索引（每个面独立的法线）"""
+    h = size * 0.5
+    normals = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+    faces = [
+        [(h, -h, h), (h, -h, -h), (h, h, -h), (h, h, h)],
+        [(-h, -h, -h), (-h, -h, h), (-h, h, h), (-h, h, -h)],
+        [(-h, h, h), (h, h, h), (h, h, -h), (-h, h, -h)],
+        [(-h, -h, -h), (h, -h, -h), (h, -h, h), (-h, -h, h)],
+        [(-h, -h, h), (h, -h, h), (h, h, h), (-h, h, h)],
+        [(h, -h, -h), (-h, -h, -h), (-h, h, -h), (h, h, -h)],
+    ]
+    return _faces_to_arrays(faces, normals)
+
+
+def pyramid_arrays(size: float = 1.0):
+    """四棱锥的顶点和索引"""
+    h = size * 0.5
+    apex = np.array([0.0, h, 0.0], dtype=np.float32)
+    base = np.array([(-h, -h, h), (h, -h, h), (h, -h, -h), (-h, -h, -h)], dtype=np.float32)
+
+    # 底面是四边形
+    vertices, indices = _faces_to_arrays([base[::-1]], [(0.0, -1.0, 0.0)])
+
+    # 侧面是三角形，每个面独立的法线
+    sides = np.empty(12, dtype=VERTEX_DTYPE)
+    for i in range(4):
+        a, b = base[i], base[(i + 1) % 4]
+        normal = np.cross(b - a, apex - a)
+        sides["position"][i * 3:i * 3 + 3] = (a, b, apex)
+        sides["normal"][i * 3:i * 3 + 3] = normal / np.linalg.norm(normal)
+    side_indices = np.arange(len(vertices), len(vertices) + 12, dtype=np.uint32)
+    return np.concatenate([vertices, sides]), np.concatenate([indices, side_indices])
+
+
+def plane_arrays(size: float = 1.0):
+    """朝上的平面"""
+    h = size * 0.5
+    return _faces_to_arrays([[(-h, 0, h), (h, 0, h), (h, 0, -h), (-h, 0, -h)]], [(0, 1, 0)])
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+渲染目标池
+渲染目标按尺寸档位（向上取整到 SIZE_BUCKET 的倍数）分配，绘制只使用左下角的子矩形，
+显示时用对应的 UV 取样；拖动停靠分隔条时尺寸每帧变化一两个像素，也不会每帧重新分配纹理
+
+- ViewportTarget: 视口持有的长期目标，变大时立即换到更大的档位，变小时等尺寸稳定 SHRINK_DELAY 秒后才缩小
+- RenderTargetPool.acquire/release: 各视口、各渲染通道共享的临时目标，用完归还，
+  空闲超过 FREE_TARGET_TIMEOUT 秒的目标在 end_frame() 中释放，空闲目标最多保留 MAX_FREE_TARGETS 个
+- 多重采样目标（samples > 0）的颜色也是渲染缓冲，不能直接取样，用 glBlitFramebuffer 解析到普通目标
+"""
+
+import time
+from contextlib import contextmanager
+import OpenGL.GL as gl
+
+# 尺寸档位（像素）
+SIZE_BUCKET = 64
+# 尺寸稳定多久之后才缩小（秒）
+SHRINK_DELAY = 0.5
+# 空闲目标保留时间（秒）
+FREE_TARGET_TIMEOUT = 5.0
+# 空闲目标数量上限，超出时释放最早归还的
+MAX_FREE_TARGETS = 4
+
+# 颜色内部格式 -> (像素格式, 数据类型, 每像素字节数)
+COLOR_FORMATS = {
+    gl.GL_RGBA8: (gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, 4),
+    gl.GL_RGBA16F: (gl.GL_RGBA, gl.GL_HALF_FLOAT, 8),
+    gl.GL_RGBA32F: (gl.GL_RGBA, gl.GL_FLOAT, 16),
+    gl.GL_R8: (gl.GL_RED, gl.GL_UNSIGNED_BYTE, 1),
+    gl.GL_R16F: (gl.GL_RED, gl.GL_HALF_FLOAT, 2),
+    gl.GL_RG16F: (gl.GL_RG, gl.GL_HALF_FLOAT, 4),
+}
+# GL_DEPTH24_STENCIL8 每像素字节数
+DEPTH_STENCIL_BYTES = 4
+
+
+def bucket_size(size: int) -> int:
+    """向上取整到档位"""
+    return max(1, (size + SIZE_BUCKET - 1) // SIZE_BUCKET) * SIZE_BUCKET
+
+
+class RenderTarget:
+    """帧缓冲 + 颜色纹理（多重采样时为颜色渲染缓冲）+ 可选的深度模板渲染缓冲"""
+
+    def __init__(self, width: int, height: int, color_format: int = gl.GL_RGBA8, depth: bool = True,
+                 samples: int = 0):
+        """
+        Args:
+            width, height: 分配尺寸（已按档位取整）
+            color_format: 颜色纹理内部格式，见 COLOR_FORMATS
+            depth: 是否附加深度模板缓冲
+            samples: 多重采样数，0 表示普通目标
+        """
+        pixel_format, pixel_type, pixel_bytes = COLOR_FORMATS[color_format]
+        self.alloc_width = width
+        self.alloc_height = height
+        self.color_format = color_format
+        self.depth = depth
+        self.samples = samples
+        self.memory_bytes = (width * height * max(samples, 1)
+                             * (pixel_bytes + (DEPTH_STENCIL_BYTES if depth else 0)))
+        # 当前使用的子矩形尺寸
+        self.width = width
+        self.height = height
+        self.last_used = 0.0
+
+        self.framebuffer = gl.glGenFramebuffers(1)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+
+        self.texture = None
+        self.color_renderbuffer = None
+        if samples:
+            self.color_renderbuffer = gl.glGenRenderbuffers(1)
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, self.color_renderbuffer)
+            gl.glRenderbufferStorageMultisample(gl.GL_RENDERBUFFER, samples, color_format, width, height)
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, 0)
+            gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0,
+                                         gl.GL_RENDERBUFFER, self.color_renderbuffer)
+        else:
+            self.texture = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, self.texture)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, color_format, width, height, 0, pixel_format, pixel_type, None)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE)
+            gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+            gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_COLOR_ATTACHMENT0, gl.GL_TEXTURE_2D, self.texture, 0)
+
+        self.renderbuffer = None
+        if depth:
+            self.renderbuffer = gl.glGenRenderbuffers(1)
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, self.renderbuffer)
+            gl.glRenderbufferStorageMultisample(gl.GL_RENDERBUFFER, samples, gl.GL_DEPTH24_STENCIL8, width, height)
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, 0)
+            gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, gl.GL_DEPTH_STENCIL_ATTACHMENT,
+                                         gl.GL_RENDERBUFFER, self.renderbuffer)
+
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            self.delete()
+            raise RuntimeError(f"帧缓冲不完整: 0x{status:04X}")
+
+    def fits(self, width: int, height: int, color_format: int, depth: bool, samples: int = 0) -> bool:
+        return (self.color_format == color_format and self.depth == depth and self.samples == samples
+                and self.alloc_width >= width and self.alloc_height >= height)
+
+    @property
+    def uv(self):
+        """使用中子矩形的右上角纹理坐标 (u, v)"""
+        return self.width / self.alloc_width, self.height / self.alloc_height
+
+    def bind(self):
+        """绑定帧缓冲并把视口设置为使用中的子矩形"""
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glViewport(0, 0, self.width, self.height)
+
+    def delete(self):
+        if self.framebuffer:
+            gl.glDeleteFramebuffers(1, [self.framebuffer])
+            self.framebuffer = None
+        if self.texture:
+            gl.glDeleteTextures([self.texture])
+            self.texture = None
+        if self.color_renderbuffer:
+            gl.glDeleteRenderbuffers(1, [self.color_renderbuffer])
+            self.color_renderbuffer = None
+        if self.renderbuffer:
+            gl.glDeleteRenderbuffers(1, [self.renderbuffer])
+            self.renderbuffer = None
+
+
+class RenderTargetPool:
+    """按档位复用渲染目标"""
+
+    def __init__(self):
+        self.free = []
+        self.in_use = set()
+        # 统计: 累计分配次数、当前显存占用（字节）
+        self.allocation_count = 0
+        self.memory_bytes = 0
+
+    def acquire(self, width: int, height: int, color_format: int = gl.GL_RGBA8, depth: bool = True,
+                samples: int = 0) -> RenderTarget:
+        """
+        取得至少 width x height 的渲染目标，优先复用空闲目标中面积最小的一个
+
+        用完后调用 release() 归还；目标的 width/height 设为请求的尺寸
+        """
+        width = max(1, width)
+        height = max(1, height)
+        alloc_width = bucket_size(width)
+        alloc_height = bucket_size(height)
+
+        best = None
+        for target in self.free:
+            # 比需要的档位大出一档以上的目标不复用，避免小通道长期占着大纹理
+            if (target.fits(alloc_width, alloc_height, color_format, depth, samples)
+                    and target.alloc_width <= alloc_width + SIZE_BUCKET
+                    and target.alloc_height <= alloc_height + SIZE_BUCKET):
+                if best is None or target.memory_bytes < best.memory_bytes:
+                    best = target
+
+        if best is not None:
+            self.free.remove(best)
+        else:
+            best = RenderTarget(alloc_width, alloc_height, color_format, depth, samples)
+            self.allocation_count += 1
+            self.memory_bytes += best.memory_bytes
+
+        best.width = width
+        best.height = height
+        self.in_use.add(best)
+        return best
+
+    def release(self, target: RenderTarget):
+        """归还目标，之后可以被其他视口或通道复用"""
+        if target in self.in_use:
+            self.in_use.remove(target)
+            target.last_used = time.perf_counter()
+            self.free.append(target)
+            if len(self.free) > MAX_FREE_TARGETS:
+                self._destroy(self.free.pop(0))
+
+    @contextmanager
+    def transient(self, width: int, height: int, color_format: int = gl.GL_RGBA8, depth: bool = True,
+                  samples: int = 0):
+        """在 with 块内使用的临时目标"""
+        target = self.acquire(width, height, color_format, depth, samples)
+        try:
+            yield target
+        finally:
+            self.release(target)
+
+    def end_frame(self):
+        """释放空闲超时的目标（每帧调用一次）"""
+        if not self.free:
+            return
+        now = time.perf_counter()
+        expired = [target for target in self.free if now - target.last_used > FREE_TARGET_TIMEOUT]
+        for target in expired:
+            self._destroy(target)
+            self.free.remove(target)
+
+    def _destroy(self, target: RenderTarget):
+        self.memory_bytes -= target.memory_bytes
+        target.delete()
+
+    def clear(self):
+        """释放所有空闲目标"""
+        for target in self.free:
+            self._destroy(target)
+        self.free.clear()
+
+    def delete(self):
+        """释放池中所有目标（包括使用中的）"""
+        self.clear()
+        for target in self.in_use:
+            self._destroy(target)
+        self.in_use.clear()
+
+
+class ViewportTarget:
+    """视口持有的渲染目标，尺寸变化带滞后"""
+
+    def __init__(self, pool: RenderTargetPool, color_format: int = gl.GL_RGBA8, depth: bool = True):
+        self.pool = pool
+        self.color_format = color_format
+        self.depth = depth
+        self.target = None
+        # 等待缩小的档位及其开始稳定的时间
+        self._shrink_bucket = None
+        self._shrink_since = 0.0
+
+    def resize(self, width: int, height: int) -> bool:
+        """
+        设置使用尺寸，返回是否换了底层目标
+
+        尺寸落在当前分配范围内时只更新子矩形；超出时立即换到更大的档位；
+        明显变小（档位变小）时等同一档位保持 SHRINK_DELAY 秒后才换小
+        """
+        width = max(1, width)
+        height = max(1, height)
+        target = self.target
+        if target is None or width > target.alloc_width or height > target.alloc_height:
+            self._reallocate(width, height)
+            return True
+
+        target.width = width
+        target.height = height
+        bucket = (bucket_size(width), bucket_size(height))
+        if bucket == (target.alloc_width, target.alloc_height):
+            self._shrink_bucket = None
+            return False
+
+        now = time.perf_counter()
+        if bucket != self._shrink_bucket:
+            self._shrink_bucket = bucket
+            self._shrink_since = now
+            return False
+        if now - self._shrink_since < SHRINK_DELAY:
+            return False
+
+        self._reallocate(width, height)
+        return True
+
+    @property
+    def shrink_pending(self) -> bool:
+        """是否有等待中的缩小（需要继续刷新帧才能完成）"""
+        return self._shrink_bucket is not None
+
+    def _reallocate(self, width: int, height: int):
+        if self.target is not None:
+            self.pool.release(self.target)
+        self.target = self.pool.acquire(width, height, self.color_format, self.depth)
+        self._shrink_bucket = None
+
+    def delete(self):
+        if self.target is not None:
+            self.pool.release(self.target)
+            self.target = None
+
+
+# 全局渲染目标池
+render_target_pool = RenderTargetPool()
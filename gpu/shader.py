@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+着色器程序管理模块
+- 链接后一次性反射所有活动 uniform 和顶点属性，uniform 设置函数按类型预先选好
+- 链接好的程序通过 glGetProgramBinary 缓存到磁盘，按 源码哈希 + 驱动字符串 区分，
+  启动时直接加载二进制，不再编译
+- 按修改时间检查着色器源文件，修改后热重载；编译失败时保留旧程序
+- 顶点着色器可以带生成的前导代码（例如顶点布局的属性声明和解码函数），插在 #version 之后
+- 计算着色器程序（OpenGL 4.3）用 load_compute() 加载，缓存和热重载相同
+"""
+
+import os
+import re
+import time
+import struct
+import ctypes
+import hashlib
+import numpy as np
+import OpenGL.GL as gl
+
+SHADER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "shaders")
+SHADER_CACHE_DIR = os.path.join(".cache", "shaders")
+
+# 缓存文件头: 二进制格式（uint32）
+_BINARY_HEADER = struct.Struct("<I")
+
+# uniform 数组名称的后缀，例如 lights[0]
+_ARRAY_SUFFIX = re.compile(r"\[0\]$")
+
+
+class ShaderError(RuntimeError):
+    """着色器编译或链接失败"""
+
+
+def _get_mtime(path: str):
+    """获取文件修改时间，文件不存在时返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _insert_prelude(source: str, prelude: str) -> str:
+    """把前导代码插在 #version 行之后，#line 让编译错误的行号对应源文件"""
+    lines = source.split("\n")
+    for index, line in enumerate(lines):
+        if line.strip().startswith("#version"):
+            head = "\n".join(lines[:index + 1])
+            tail = "\n".join(lines[index + 1:])
+            return f"{head}\n{prelude.rstrip()}\n#line {index + 2}\n{tail}"
+    return f"{prelude.rstrip()}\n#line 1\n{source}"
+
+
+def driver_string() -> str:
+    """当前上下文的驱动描述，驱动更新后程序二进制缓存自动失效"""
+    parts = []
+    for name in (gl.GL_VENDOR, gl.GL_RENDERER, gl.GL_VERSION):
+        value = gl.glGetString(name)
+        parts.append(value.decode("utf-8", "replace") if value else "")
+    return "|".join(parts)
+
+
+def _make_setter(gl_type: int, location: int, size: int):
+    """按 uniform 类型选择设置函数"""
+    if gl_type in _MATRIX_SETTERS:
+        func = _MATRIX_SETTERS[gl_type]
+        return lambda value: func(location, size, gl.GL_FALSE, value)
+
+    if gl_type in _VECTOR_SETTERS:
+        single, array = _VECTOR_SETTERS[gl_type]
+        if size == 1:
+            return lambda value: single(location, *value)
+        return lambda value: array(location, size, value)
+
+    if gl_type in _SCALAR_SETTERS:
+        single, array = _SCALAR_SETTERS[gl_type]
+        if size == 1:
+            return lambda value: single(location, value)
+        return lambda value: array(location, size, value)
+
+    # 采样器、图像等都按整数设置
+    if size == 1:
+        return lambda value: gl.glUniform1i(location, value)
+    return lambda value: gl.glUniform1iv(location, size, value)
+
+
+_SCALAR_SETTERS = {
+    gl.GL_FLOAT: (gl.glUniform1f, gl.glUniform1fv),
+    gl.GL_INT: (gl.glUniform1i, gl.glUniform1iv),
+    gl.GL_BOOL: (gl.glUniform1i, gl.glUniform1iv),
+    gl.GL_UNSIGNED_INT: (gl.glUniform1ui, gl.glUniform1uiv),
+}
+
+_VECTOR_SETTERS = {
+    gl.GL_FLOAT_VEC2: (gl.glUniform2f, gl.glUniform2fv),
+    gl.GL_FLOAT_VEC3: (gl.glUniform3f, gl.glUniform3fv),
+    gl.GL_FLOAT_VEC4: (gl.glUniform4f, gl.glUniform4fv),
+    gl.GL_INT_VEC2: (gl.glUniform2i, gl.glUniform2iv),
+    gl.GL_INT_VEC3: (gl.glUniform3i, gl.glUniform3iv),
+    gl.GL_INT_VEC4: (gl.glUniform4i, gl.glUniform4iv),
+    gl.GL_BOOL_VEC2: (gl.glUniform2i, gl.glUniform2iv),
+    gl.GL_BOOL_VEC3: (gl.glUniform3i, gl.glUniform3iv),
+    gl.GL_BOOL_VEC4: (gl.glUniform4i, gl.glUniform4iv),
+}
+
+_MATRIX_SETTERS = {
+    gl.GL_FLOAT_MAT2: gl.glUniformMatrix2fv,
+    gl.GL_FLOAT_MAT3: gl.glUniformMatrix3fv,
+    gl.GL_FLOAT_MAT4: gl.glUniformMatrix4fv,
+}
+
+
+class Uniform:
+    """
+    活动 uniform，用法: program.uniforms["model"].set(matrix)
+
+    热重载后同一个对象会更新为新程序的位置，调用方可以长期持有
+    """
+
+    __slots__ = ("name", "location", "gl_type", "size", "set")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.location = -1
+        self.gl_type = 0
+        self.size = 0
+        # 位置为 -1 时设置是空操作
+        self.set = _noop
+
+    def _bind(self, location: int, gl_type: int, size: int):
+        self.location = location
+        self.gl_type = gl_type
+        self.size = size
+        self.set = _make_setter(gl_type, location, size) if location >= 0 else _noop
+
+
+def _noop(value):
+    pass
+
+
+class ProgramBinaryCache:
+    """程序二进制磁盘缓存"""
+
+    def __init__(self, cache_dir: str = SHADER_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._supported = None
+
+    @property
+    def supported(self) -> bool:
+        """驱动是否支持程序二进制（需要当前有 OpenGL 上下文）"""
+        if self._supported is None:
+            try:
+                self._supported = gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS) > 0
+            except Exception:
+                self._supported = False
+        return self._supported
+
+    def path_for(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}.bin")
+
+    def load(self, program: int, name: str, key: str) -> bool:
+        """把缓存的二进制加载到 program，成功返回 True"""
+        if not self.supported:
+            return False
+        try:
+            with open(self.path_for(name, key), "rb") as f:
+                data = f.read()
+        except OSError:
+            return False
+        if len(data) <= _BINARY_HEADER.size:
+            return False
+
+        (binary_format,) = _BINARY_HEADER.unpack_from(data)
+        binary = np.frombuffer(data, dtype=np.uint8, offset=_BINARY_HEADER.size)
+        gl.glProgramBinary(program, binary_format, binary.ctypes.data_as(ctypes.c_void_p), binary.size)
+        # 驱动拒绝二进制时（例如驱动内部版本变化）链接状态为失败，调用方会重新编译
+        return bool(gl.glGetProgramiv(program, gl.GL_LINK_STATUS))
+
+    def store(self, program: int, name: str, key: str):
+        """读取 program 的二进制并写入缓存"""
+        if not self.supported:
+            return
+        length = gl.glGetProgramiv(program, gl.GL_PROGRAM_BINARY_LENGTH)
+        if length <= 0:
+            return
+
+        binary = np.empty(length, dtype=np.uint8)
+        written = gl.GLsizei()
+        binary_format = gl.GLenum()
+        gl.glGetProgramBinary(program, length, ctypes.byref(written), ctypes.byref(binary_format),
+                              binary.ctypes.data_as(ctypes.c_void_p))
+
+        path = self.path_for(name, key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(_BINARY_HEADER.pack(binary_format.value))
+                f.write(binary[:written.value].tobytes())
+            os.replace(tmp_path, path)
+            self._remove_stale(name, path)
+        except OSError as e:
+            print(f"警告: 写入着色器缓存失败: {e}")
+
+    def _remove_stale(self, name: str, keep_path: str):
+        """删除同一程序的旧二进制"""
+        for file_name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, file_name)
+            if file_name.startswith(f"{name}-") and file_name.endswith(".bin") and path != keep_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class ShaderProgram:
+    """由顶点和片段着色器（或一个计算着色器）源文件构建的程序"""
+
+    def __init__(self, name: str, vertex_path: str, fragment_path: str, cache: ProgramBinaryCache = None,
+                 vertex_prelude: str = "", compute_path: str = None, fragment_prelude: str = ""):
+        """
+        Args:
+            name: 程序名称，用于缓存文件名和日志
+            vertex_path: 顶点着色器源文件
+            fragment_path: 片段着色器源文件
+            cache: 程序二进制缓存，None 表示不缓存
+            vertex_prelude: 插在顶点着色器 #version 行之后的代码
+            compute_path: 计算着色器源文件，设置时忽略顶点和片段着色器
+            fragment_prelude: 插在片段着色器 #version 行之后的代码
+        """
+        self.name = name
+        self.vertex_path = vertex_path
+        self.fragment_path = fragment_path
+        self.compute_path = compute_path
+        self.cache = cache
+        self.vertex_prelude = vertex_prelude
+        self.fragment_prelude = fragment_prelude
+        if compute_path is not None:
+            self.stages = ((gl.GL_COMPUTE_SHADER, compute_path),)
+        else:
+            self.stages = ((gl.GL_VERTEX_SHADER, vertex_path), (gl.GL_FRAGMENT_SHADER, fragment_path))
+
+        self.program = 0
+        self.uniforms = {}
+        self.attributes = {}
+        # uniform 块绑定点: 名称 -> 绑定点，重新构建后自动恢复
+        self.block_bindings = {}
+        self.from_cache = False
+        self._mtimes = ()
+
+    def build(self):
+        """构建程序，失败时抛出 ShaderError 并保留旧程序"""
+        self._mtimes = tuple(_get_mtime(path) for _, path in self.stages)
+        sources = []
+        for shader_type, path in self.stages:
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            if shader_type == gl.GL_VERTEX_SHADER and self.vertex_prelude:
+                source = _insert_prelude(source, self.vertex_prelude)
+            elif shader_type == gl.GL_FRAGMENT_SHADER and self.fragment_prelude:
+                source = _insert_prelude(source, self.fragment_prelude)
+            sources.append(source)
+
+        key = hashlib.sha256("\0".join(sources + [driver_string()]).encode("utf-8")).hexdigest()
+
+        program = gl.glCreateProgram()
+        from_cache = self.cache is not None and self.cache.load(program, self.name, key)
+        if not from_cache:
+            try:
+                self._compile_and_link(program, sources)
+            except ShaderError:
+                gl.glDeleteProgram(program)
+                raise
+            if self.cache is not None:
+                self.cache.store(program, self.name, key)
+
+        if self.program:
+            gl.glDeleteProgram(self.program)
+        self.program = program
+        self.from_cache = from_cache
+        self._reflect()
+        return self
+
+    def use(self):
+        gl.glUseProgram(self.program)
+
+    def uniform(self, name: str) -> Uniform:
+        """获取 uniform；程序中不存在时返回空操作的 uniform（热重载后可能出现）"""
+        uniform = self.uniforms.get(name)
+        if uniform is None:
+            uniform = self.uniforms[name] = Uniform(name)
+        return uniform
+
+    def bind_block(self, name: str, binding: int):
+        """把 uniform 块绑定到绑定点（GLSL 3.30 不支持 layout(binding)）"""
+        self.block_bindings[name] = binding
+        index = gl.glGetUniformBlockIndex(self.program, name)
+        if index != gl.GL_INVALID_INDEX:
+            gl.glUniformBlockBinding(self.program, index, binding)
+
+    def sources_changed(self) -> bool:
+        """源文件修改时间是否变化"""
+        return tuple(_get_mtime(path) for _, path in self.stages) != self._mtimes
+
+    def delete(self):
+        if self.program:
+            gl.glDeleteProgram(self.program)
+            self.program = 0
+
+    def _compile_and_link(self, program: int, sources: list):
+        shader_ids = []
+        try:
+            for source, (shader_type, path) in zip(sources, self.stages):
+                shader = gl.glCreateShader(shader_type)
+                shader_ids.append(shader)
+                gl.glShaderSource(shader, source)
+                gl.glCompileShader(shader)
+                if not gl.glGetShaderiv(shader, gl.GL_COMPILE_STATUS):
+                    log = gl.glGetShaderInfoLog(shader).decode("utf-8", "replace")
+                    raise ShaderError(f"着色器编译失败 {path}:\n{log}")
+                gl.glAttachShader(program, shader)
+
+            # 允许读取二进制写入缓存
+            gl.glProgramParameteri(program, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+            gl.glLinkProgram(program)
+            if not gl.glGetProgramiv(program, gl.GL_LINK_STATUS):
+                log = gl.glGetProgramInfoLog(program).decode("utf-8", "replace")
+                raise ShaderError(f"着色器链接失败 {self.name}:\n{log}")
+        finally:
+            for shader in shader_ids:
+                gl.glDeleteShader(shader)
+
+    def _reflect(self):
+        """读取活动 uniform、uniform 块和顶点属性，更新已有的 Uniform 对象"""
+        found = set()
+        for index in range(gl.glGetProgramiv(self.program, gl.GL_ACTIVE_UNIFORMS)):
+            raw_name, size, gl_type = gl.glGetActiveUniform(self.program, index)
+            name = _ARRAY_SUFFIX.sub("", raw_name.decode("utf-8"))
+            # uniform 块中的成员没有位置，返回 -1
+            location = gl.glGetUniformLocation(self.program, name)
+            self.uniform(name)._bind(location, int(gl_type), int(size))
+            found.add(name)
+
+        # 新程序中已删除的 uniform 变为空操作
+        for name, uniform in self.uniforms.items():
+            if name not in found:
+                uniform._bind(-1, 0, 0)
+
+        for name, binding in self.block_bindings.items():
+            self.bind_block(name, binding)
+
+        self.attributes = {}
+        for index in range(gl.glGetProgramiv(self.program, gl.GL_ACTIVE_ATTRIBUTES)):
+            raw_name, size, gl_type = gl.glGetActiveAttrib(self.program, index)
+            name = raw_name.decode("utf-8")
+            self.attributes[name] = (gl.glGetAttribLocation(self.program, name), int(gl_type), int(size))
+
+
+class ShaderManager:
+    """着色器程序管理器，负责程序缓存和热重载"""
+
+    def __init__(self, shader_dir: str = SHADER_DIR, cache_dir: str = SHADER_CACHE_DIR, poll_interval: float = 1.0):
+        """
+        Args:
+            shader_dir: 着色器源文件目录
+            cache_dir: 程序二进制缓存目录，None 表示不缓存
+            poll_interval: 检查源文件修改时间的间隔（秒），None 表示关闭热重载
+        """
+        self.shader_dir = shader_dir
+        self.cache = ProgramBinaryCache(cache_dir) if cache_dir else None
+        self.poll_interval = poll_interval
+        self.programs = {}
+        self._next_poll = 0.0
+
+    def load(self, name: str, vertex: str = None, fragment: str = None, vertex_prelude: str = "",
+             fragment_prelude: str = "") -> ShaderProgram:
+        """
+        加载程序，已加载时直接返回
+
+        Args:
+            name: 程序名称；同一源文件配不同前导代码时需要不同的名称
+            vertex: 顶点着色器文件名（相对 shader_dir），默认 name.vert
+            fragment: 片段着色器文件名（相对 shader_dir），默认 name.frag
+            vertex_prelude: 插在顶点着色器 #version 行之后的代码
+            fragment_prelude: 插在片段着色器 #version 行之后的代码
+        """
+        program = self.programs.get(name)
+        if program is not None and not program.program:
+            # 程序已被删除（例如视口重新初始化），重新构建
+            program.build()
+        elif program is None:
+            program = ShaderProgram(
+                name,
+                os.path.join(self.shader_dir, vertex or f"{name}.vert"),
+                os.path.join(self.shader_dir, fragment or f"{name}.frag"),
+                self.cache,
+                vertex_prelude,
+                fragment_prelude=fragment_prelude
+            )
+            program.build()
+            self.programs[name] = program
+        return program
+
+    def load_compute(self, name: str, compute: str = None) -> ShaderProgram:
+        """
+        加载计算着色器程序，已加载时直接返回（需要 OpenGL 4.3）
+
+        Args:
+            name: 程序名称
+            compute: 计算着色器文件名（相对 shader_dir），默认 name.comp
+        """
+        program = self.programs.get(name)
+        if program is not None and not program.program:
+            program.build()
+        elif program is None:
+            program = ShaderProgram(name, None, None, self.cache,
+                                    compute_path=os.path.join(self.shader_dir, compute or f"{name}.comp"))
+            program.build()
+            self.programs[name] = program
+        return program
+
+    def update(self) -> bool:
+        """
+        每帧调用一次，源文件修改后重新构建
+
+        Returns:
+            本帧是否重新加载了程序
+        """
+        if self.poll_interval is None or not self.programs:
+            return False
+        now = time.monotonic()
+        if now < self._next_poll:
+            return False
+        self._next_poll = now + self.poll_interval
+
+        reloaded = False
+        for program in self.programs.values():
+            if not program.sources_changed():
+                continue
+            try:
+                program.build()
+                print(f"着色器已重新加载: {program.name}")
+                reloaded = True
+            except (OSError, ShaderError) as e:
+                # 保留旧程序，修复源文件后会再次尝试
+                print(f"错误: 着色器重新加载失败: {e}")
+        return reloaded
+
+    def delete_all(self):
+        for program in self.programs.values():
+            program.delete()
+        self.programs.clear()
+
+
+# 全局着色器管理器
+shader_manager = ShaderManager()
@@ -0,0 +1,143 @@
+#version 330 core
+// Deferred lighting and G-buffer debug views in one fullscreen pass (vertices from fullscreen.vert).
+// The G-buffer and the output share the bottom-left origin, so texels are fetched at gl_FragCoord.
+// Point lights: clusteredLighting() and its uniforms come from the clustered lighting prelude (gpu/clustered.py).
+
+uniform sampler2D uAlbedo;
+uniform sampler2D uNormal;
+uniform sampler2D uMaterial;
+uniform sampler2D uDepth;
+// 0: lit, 1: normal, 2: linear depth, 3: albedo
+uniform int uView;
+uniform float uNear;
+uniform float uFar;
+// Reduced-resolution SSAO (r = visibility, g = view distance); uOcclusionScale 0 disables it
+uniform sampler2D uOcclusion;
+uniform int uOcclusionScale;
+uniform ivec2 uOcclusionSize;
+// Cascaded shadow maps (gpu/shadows.py); uShadowCascades 0 disables them
+#define MAX_CASCADES 4
+uniform int uShadowCascades;
+uniform sampler2DShadow uShadowAtlas;
+// World -> atlas texture coordinates and depth, the cascade's tile rectangle and its far view distance
+uniform mat4 uShadowMatrices[MAX_CASCADES];
+uniform vec4 uShadowTiles[MAX_CASCADES];
+uniform float uCascadeSplits[MAX_CASCADES];
+// Receiver offset along the normal (world units, about a texel of the cascade)
+uniform float uNormalOffsets[MAX_CASCADES];
+uniform float uShadowTexel;
+uniform int uPcfRadius;
+uniform mat4 uInverseViewProjection;
+uniform ivec2 uViewportSize;
+
+out vec4 FragColor;
+
+const vec3 LIGHT_DIR = normalize(vec3(0.4, 1.0, 0.3));
+
+float viewDistance(float depth)
+{
+    float z = depth * 2.0 - 1.0;
+    return 2.0 * uNear * uFar / (uFar + uNear - z * (uFar - uNear));
+}
+
+// Joint bilateral upsampling: the four nearest low-resolution texels, weighted bilinearly and by how
+// close their depth is to this pixel's, so occlusion stays on its own side of silhouettes
+float ambientVisibility(ivec2 texel, float distance)
+{
+    vec2 position = (vec2(texel) + 0.5) / float(uOcclusionScale) - 0.5;
+    ivec2 base = ivec2(floor(position));
+    vec2 f = position - vec2(base);
+    float sum = 0.0;
+    float total = 0.0;
+    for (int i = 0; i < 4; ++i)
+    {
+        ivec2 offset = ivec2(i & 1, i >> 1);
+        vec2 value = texelFetch(uOcclusion, clamp(base + offset, ivec2(0), uOcclusionSize - 1), 0).rg;
+        vec2 bilinear = mix(1.0 - f, f, vec2(offset));
+        float weight = bilinear.x * bilinear.y / (1e-3 + abs(value.g - distance) / distance) + 1e-6;
+        sum += value.r * weight;
+        total += weight;
+    }
+    return sum / total;
+}
+
+vec3 worldPosition(ivec2 texel, float depth)
+{
+    vec4 ndc = vec4((vec2(texel) + 0.5) / vec2(uViewportSize) * 2.0 - 1.0, depth * 2.0 - 1.0, 1.0);
+    vec4 world = uInverseViewProjection * ndc;
+    return world.xyz / world.w;
+}
+
+// Fraction of the PCF kernel that sees the light; 1 beyond the last cascade
+float shadowVisibility(ivec2 texel, float depth, float distance, vec3 normal)
+{
+    int cascade = 0;
+    while (cascade < uShadowCascades - 1 && distance > uCascadeSplits[cascade])
+    {
+        ++cascade;
+    }
+    if (distance > uCascadeSplits[cascade])
+    {
+        return 1.0;
+    }
+    vec3 position = worldPosition(texel, depth) + normal * uNormalOffsets[cascade];
+    vec3 coord = (uShadowMatrices[cascade] * vec4(position, 1.0)).xyz;
+    vec4 tile = uShadowTiles[cascade];
+    float sum = 0.0;
+    for (int y = -uPcfRadius; y <= uPcfRadius; ++y)
+    {
+        for (int x = -uPcfRadius; x <= uPcfRadius; ++x)
+        {
+            // Taps stay inside the cascade's tile of the atlas
+            vec2 uv = clamp(coord.xy + vec2(x, y) * uShadowTexel, tile.xy, tile.zw);
+            sum += texture(uShadowAtlas, vec3(uv, coord.z));
+        }
+    }
+    float taps = float((2 * uPcfRadius + 1) * (2 * uPcfRadius + 1));
+    return sum / taps;
+}
+
+void main()
+{
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    vec4 albedo = texelFetch(uAlbedo, texel, 0);
+    if (uView == 3)
+    {
+        FragColor = albedo;
+        return;
+    }
+    if (uView == 2)
+    {
+        // Window depth -> eye distance, shown from black (near) to white (far)
+        float distance = viewDistance(texelFetch(uDepth, texel, 0).r);
+        FragColor = vec4(vec3((distance - uNear) / (uFar - uNear)), 1.0);
+        return;
+    }
+
+    vec4 material = texelFetch(uMaterial, texel, 0);
+    vec3 normal = texelFetch(uNormal, texel, 0).xyz * 2.0 - 1.0;
+    if (uView == 1)
+    {
+        FragColor = vec4(material.w > 0.5 ? normal * 0.5 + 0.5 : vec3(0.0), 1.0);
+        return;
+    }
+    if (material.w < 0.5)
+    {
+        FragColor = albedo;
+        return;
+    }
+    normal = normalize(normal);
+    float diffuse = max(dot(normal, LIGHT_DIR), 0.0);
+    float depth = texelFetch(uDepth, texel, 0).r;
+    float ambient = material.x;
+    if (uOcclusionScale > 0)
+    {
+        ambient *= ambientVisibility(texel, viewDistance(depth));
+    }
+    if (uShadowCascades > 0 && diffuse > 0.0)
+    {
+        diffuse *= shadowVisibility(texel, depth, viewDistance(depth), normal);
+    }
+    vec3 lights = clusteredLighting(gl_FragCoord.xy, viewDistance(depth), worldPosition(texel, depth), normal);
+    FragColor = vec4(albedo.rgb * (ambient + material.y * diffuse + lights), albedo.a);
+}
@@ -0,0 +1,143 @@
+#version 330 core
+// FXAA after Lottes' FXAA 3.11 quality preset: find the local edge from luma contrast,
+// walk along it in both directions to its ends, then resample across the edge with an
+// offset that grows toward the nearer end. A subpixel term softens isolated bright texels.
+
+uniform sampler2D uScene;
+// 1 / allocated size of uScene; the used area starts at the bottom-left corner
+uniform vec2 uTexelSize;
+// Centre of the last used texel, samples are clamped to it so pool padding never bleeds in
+uniform vec2 uMaxUv;
+
+out vec4 fragColor;
+
+const float EDGE_THRESHOLD_MIN = 0.0312;
+const float EDGE_THRESHOLD_MAX = 0.125;
+const float SUBPIXEL_QUALITY = 0.75;
+const int SEARCH_STEPS = 12;
+const float STEP_SIZES[SEARCH_STEPS] = float[](1.0, 1.0, 1.0, 1.0, 1.0, 1.5, 2.0, 2.0, 2.0, 2.0, 4.0, 8.0);
+
+vec4 fetch(vec2 uv)
+{
+    return textureLod(uScene, min(uv, uMaxUv), 0.0);
+}
+
+float luma(vec2 uv)
+{
+    // Perceptual luma, square root as a cheap gamma approximation
+    return sqrt(dot(fetch(uv).rgb, vec3(0.299, 0.587, 0.114)));
+}
+
+void main()
+{
+    vec2 uv = gl_FragCoord.xy * uTexelSize;
+    vec4 colorCenter = fetch(uv);
+    float lumaCenter = sqrt(dot(colorCenter.rgb, vec3(0.299, 0.587, 0.114)));
+    float lumaDown = luma(uv + vec2(0.0, -uTexelSize.y));
+    float lumaUp = luma(uv + vec2(0.0, uTexelSize.y));
+    float lumaLeft = luma(uv + vec2(-uTexelSize.x, 0.0));
+    float lumaRight = luma(uv + vec2(uTexelSize.x, 0.0));
+
+    float lumaMin = min(lumaCenter, min(min(lumaDown, lumaUp), min(lumaLeft, lumaRight)));
+    float lumaMax = max(lumaCenter, max(max(lumaDown, lumaUp), max(lumaLeft, lumaRight)));
+    float lumaRange = lumaMax - lumaMin;
+    // Flat area: keep the pixel
+    if (lumaRange < max(EDGE_THRESHOLD_MIN, lumaMax * EDGE_THRESHOLD_MAX))
+    {
+        fragColor = colorCenter;
+        return;
+    }
+
+    float lumaDownLeft = luma(uv - uTexelSize);
+    float lumaUpRight = luma(uv + uTexelSize);
+    float lumaUpLeft = luma(uv + vec2(-uTexelSize.x, uTexelSize.y));
+    float lumaDownRight = luma(uv + vec2(uTexelSize.x, -uTexelSize.y));
+
+    float lumaDownUp = lumaDown + lumaUp;
+    float lumaLeftRight = lumaLeft + lumaRight;
+    float lumaLeftCorners = lumaDownLeft + lumaUpLeft;
+    float lumaDownCorners = lumaDownLeft + lumaDownRight;
+    float lumaRightCorners = lumaDownRight + lumaUpRight;
+    float lumaUpCorners = lumaUpRight + lumaUpLeft;
+
+    // Edge orientation from the second derivatives across rows and columns
+    float edgeHorizontal = abs(-2.0 * lumaLeft + lumaLeftCorners) + abs(-2.0 * lumaCenter + lumaDownUp) * 2.0
+                         + abs(-2.0 * lumaRight + lumaRightCorners);
+    float edgeVertical = abs(-2.0 * lumaUp + lumaUpCorners) + abs(-2.0 * lumaCenter + lumaLeftRight) * 2.0
+                       + abs(-2.0 * lumaDown + lumaDownCorners);
+    bool isHorizontal = edgeHorizontal >= edgeVertical;
+
+    // Side of the pixel the edge lies on
+    float luma1 = isHorizontal ? lumaDown : lumaLeft;
+    float luma2 = isHorizontal ? lumaUp : lumaRight;
+    float gradient1 = luma1 - lumaCenter;
+    float gradient2 = luma2 - lumaCenter;
+    bool is1Steepest = abs(gradient1) >= abs(gradient2);
+    float gradientScaled = 0.25 * max(abs(gradient1), abs(gradient2));
+
+    float stepLength = isHorizontal ? uTexelSize.y : uTexelSize.x;
+    float lumaLocalAverage;
+    if (is1Steepest)
+    {
+        stepLength = -stepLength;
+        lumaLocalAverage = 0.5 * (luma1 + lumaCenter);
+    }
+    else
+    {
+        lumaLocalAverage = 0.5 * (luma2 + lumaCenter);
+    }
+
+    // Walk along the edge, sampling half a texel off centre so bilinear filtering averages both sides
+    vec2 edgeUv = uv;
+    if (isHorizontal)
+        edgeUv.y += stepLength * 0.5;
+    else
+        edgeUv.x += stepLength * 0.5;
+    vec2 offset = isHorizontal ? vec2(uTexelSize.x, 0.0) : vec2(0.0, uTexelSize.y);
+
+    vec2 uv1 = edgeUv - offset * STEP_SIZES[0];
+    vec2 uv2 = edgeUv + offset * STEP_SIZES[0];
+    float lumaEnd1 = luma(uv1) - lumaLocalAverage;
+    float lumaEnd2 = luma(uv2) - lumaLocalAverage;
+    bool reached1 = abs(lumaEnd1) >= gradientScaled;
+    bool reached2 = abs(lumaEnd2) >= gradientScaled;
+    for (int i = 1; i < SEARCH_STEPS && !(reached1 && reached2); ++i)
+    {
+        if (!reached1)
+        {
+            uv1 -= offset * STEP_SIZES[i];
+            lumaEnd1 = luma(uv1) - lumaLocalAverage;
+            reached1 = abs(lumaEnd1) >= gradientScaled;
+        }
+        if (!reached2)
+        {
+            uv2 += offset * STEP_SIZES[i];
+            lumaEnd2 = luma(uv2) - lumaLocalAverage;
+            reached2 = abs(lumaEnd2) >= gradientScaled;
+        }
+    }
+
+    float distance1 = isHorizontal ? uv.x - uv1.x : uv.y - uv1.y;
+    float distance2 = isHorizontal ? uv2.x - uv.x : uv2.y - uv.y;
+    bool isDirection1 = distance1 < distance2;
+    float distanceFinal = min(distance1, distance2);
+    float edgeLength = distance1 + distance2;
+
+    // Only blend when the luma at the nearer end varies consistently with the centre
+    bool isLumaCenterSmaller = lumaCenter < lumaLocalAverage;
+    bool correctVariation = ((isDirection1 ? lumaEnd1 : lumaEnd2) < 0.0) != isLumaCenterSmaller;
+    float finalOffset = correctVariation ? -distanceFinal / edgeLength + 0.5 : 0.0;
+
+    // Subpixel aliasing: contrast between the pixel and its 3x3 neighbourhood
+    float lumaAverage = (1.0 / 12.0) * (2.0 * (lumaDownUp + lumaLeftRight) + lumaLeftCorners + lumaRightCorners);
+    float subPixel = clamp(abs(lumaAverage - lumaCenter) / lumaRange, 0.0, 1.0);
+    subPixel = (-2.0 * subPixel + 3.0) * subPixel * subPixel;
+    finalOffset = max(finalOffset, subPixel * subPixel * SUBPIXEL_QUALITY);
+
+    vec2 finalUv = uv;
+    if (isHorizontal)
+        finalUv.y += finalOffset * stepLength;
+    else
+        finalUv.x += finalOffset * stepLength;
+    fragColor = vec4(fetch(finalUv).rgb, colorCenter.a);
+}
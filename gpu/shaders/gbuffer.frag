@@ -0,0 +1,21 @@
+#version 330 core
+// Geometry pass: albedo, normal and material parameters are written once per pixel;
+// lighting happens afterwards in deferred.frag
+in vec3 vNormal;
+in vec4 vColor;
+
+layout (location = 0) out vec4 gAlbedo;
+layout (location = 1) out vec4 gNormal;
+layout (location = 2) out vec4 gMaterial;
+
+// Same lighting terms as instanced.frag
+const float AMBIENT = 0.25;
+const float DIFFUSE = 0.75;
+
+void main()
+{
+    gAlbedo = vColor;
+    gNormal = vec4(normalize(vNormal) * 0.5 + 0.5, 1.0);
+    // w = 1 marks lit geometry; cleared pixels (w = 0) keep the background colour in the albedo target
+    gMaterial = vec4(AMBIENT, DIFFUSE, 0.0, 1.0);
+}
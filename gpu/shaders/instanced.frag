@@ -0,0 +1,17 @@
+#version 330 core
+// Point lights: clusteredLighting() and its uniforms come from the clustered lighting prelude (gpu/clustered.py)
+in vec3 vNormal;
+in vec4 vColor;
+in vec3 vPosition;
+in float vViewDistance;
+out vec4 FragColor;
+
+const vec3 LIGHT_DIR = normalize(vec3(0.4, 1.0, 0.3));
+
+void main()
+{
+    vec3 normal = normalize(vNormal);
+    float diffuse = max(dot(normal, LIGHT_DIR), 0.0);
+    vec3 lights = clusteredLighting(gl_FragCoord.xy, vViewDistance, vPosition, normal);
+    FragColor = vec4(vColor.rgb * (0.25 + 0.75 * diffuse + lights), vColor.a);
+}
@@ -0,0 +1,29 @@
+#version 330 core
+// Vertex attributes and decodePosition()/decodeNormal() come from the vertex layout prelude
+// Per-instance attributes
+layout (location = 4) in mat4 iModel;
+layout (location = 8) in vec4 iColor;
+
+layout (std140) uniform Camera
+{
+    mat4 projection;
+    mat4 view;
+};
+
+out vec3 vNormal;
+out vec4 vColor;
+// World position and view distance for the clustered point lights
+out vec3 vPosition;
+out float vViewDistance;
+
+void main()
+{
+    // Instances use uniform scale and rotation, so the model matrix also transforms normals
+    vNormal = mat3(iModel) * decodeNormal();
+    vColor = iColor;
+    vec4 world = iModel * vec4(decodePosition(), 1.0);
+    vec4 eye = view * world;
+    vPosition = world.xyz;
+    vViewDistance = -eye.z;
+    gl_Position = projection * eye;
+}
@@ -0,0 +1,6 @@
+#version 330 core
+// Shadow-map pass: depth only (vertices from instanced.vert with the cascade's light camera)
+
+void main()
+{
+}
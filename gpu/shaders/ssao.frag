@@ -0,0 +1,73 @@
+#version 330 core
+// Screen-space ambient occlusion at a reduced resolution (vertices from fullscreen.vert).
+// Each low-resolution pixel reads one full-resolution G-buffer texel, rotates a hemisphere kernel
+// with a 4x4 interleaved pattern and compares the kernel points against the depth buffer.
+// Output: r = ambient visibility (1 = open), g = view distance for the bilateral blur and upsampling.
+
+#define MAX_SAMPLES 32
+
+uniform sampler2D uNormal;
+uniform sampler2D uDepth;
+// Full-resolution used size and the reduction factor
+uniform ivec2 uSize;
+uniform int uScale;
+// Projection terms: P[0][0], P[1][1], near, far
+uniform vec2 uProjScale;
+uniform float uNear;
+uniform float uFar;
+// World -> view rotation for the G-buffer normals
+uniform mat3 uViewRotation;
+// Hemisphere kernel (tangent space, z along the normal) and rotation vectors in the tangent plane
+uniform vec3 uKernel[MAX_SAMPLES];
+uniform int uSampleCount;
+uniform vec3 uRotation[16];
+uniform float uRadius;
+
+out vec2 Occlusion;
+
+float viewDistance(float depth)
+{
+    float z = depth * 2.0 - 1.0;
+    return 2.0 * uNear * uFar / (uFar + uNear - z * (uFar - uNear));
+}
+
+vec3 viewPosition(vec2 pixel, float distance)
+{
+    vec2 ndc = pixel / vec2(uSize) * 2.0 - 1.0;
+    return vec3(ndc / uProjScale * distance, -distance);
+}
+
+void main()
+{
+    ivec2 low = ivec2(gl_FragCoord.xy);
+    ivec2 texel = min(low * uScale + uScale / 2, uSize - 1);
+    float depth = texelFetch(uDepth, texel, 0).r;
+    float distance = viewDistance(depth);
+    vec4 encoded = texelFetch(uNormal, texel, 0);
+    if (depth >= 1.0 || encoded.w == 0.0)
+    {
+        // Background: nothing to occlude
+        Occlusion = vec2(1.0, distance);
+        return;
+    }
+
+    vec3 position = viewPosition(vec2(texel) + 0.5, distance);
+    vec3 normal = normalize(uViewRotation * (encoded.xyz * 2.0 - 1.0));
+    vec3 rotation = uRotation[(low.y & 3) * 4 + (low.x & 3)];
+    vec3 tangent = normalize(rotation - normal * dot(rotation, normal) + vec3(1e-4, 0.0, 0.0));
+    mat3 tbn = mat3(tangent, cross(normal, tangent), normal);
+
+    float occlusion = 0.0;
+    float bias = uRadius * 0.025;
+    for (int i = 0; i < uSampleCount; ++i)
+    {
+        vec3 point = position + tbn * uKernel[i] * uRadius;
+        vec2 ndc = point.xy * uProjScale / -point.z;
+        ivec2 sampleTexel = clamp(ivec2((ndc * 0.5 + 0.5) * vec2(uSize)), ivec2(0), uSize - 1);
+        float sceneDistance = viewDistance(texelFetch(uDepth, sampleTexel, 0).r);
+        // Only occluders within the radius count, so silhouettes against distant geometry stay open
+        float range = smoothstep(0.0, 1.0, uRadius / abs(distance - sceneDistance));
+        occlusion += (sceneDistance <= -point.z - bias ? 1.0 : 0.0) * range;
+    }
+    Occlusion = vec2(1.0 - occlusion / float(uSampleCount), distance);
+}
@@ -0,0 +1,34 @@
+#version 330 core
+// Separable depth-aware blur of the SSAO target, one axis per pass (vertices from fullscreen.vert).
+// Taps across a depth discontinuity are down-weighted so occlusion does not bleed over silhouettes.
+
+uniform sampler2D uOcclusion;
+uniform ivec2 uDirection;
+uniform ivec2 uSize;
+// Relative depth difference at which a tap's weight falls to 1/e
+uniform float uSharpness;
+
+out vec2 Occlusion;
+
+const int RADIUS = 3;
+const float WEIGHTS[RADIUS + 1] = float[](0.266, 0.213, 0.109, 0.036);
+
+void main()
+{
+    ivec2 texel = ivec2(gl_FragCoord.xy);
+    vec2 center = texelFetch(uOcclusion, texel, 0).rg;
+    float total = WEIGHTS[0];
+    float sum = center.r * total;
+    for (int i = 1; i <= RADIUS; ++i)
+    {
+        for (int side = -1; side <= 1; side += 2)
+        {
+            ivec2 tap = clamp(texel + uDirection * i * side, ivec2(0), uSize - 1);
+            vec2 value = texelFetch(uOcclusion, tap, 0).rg;
+            float weight = WEIGHTS[i] * exp(-abs(value.g - center.g) / (uSharpness * center.g));
+            sum += value.r * weight;
+            total += weight;
+        }
+    }
+    Occlusion = vec2(sum / total, center.g);
+}
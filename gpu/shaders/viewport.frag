@@ -0,0 +1,13 @@
+#version 330 core
+out vec4 FragColor;
+
+layout (std140) uniform Object
+{
+    mat4 model;
+    vec4 color;
+};
+
+void main()
+{
+    FragColor = color;
+}
@@ -0,0 +1,19 @@
+#version 330 core
+// Vertex attributes and decodePosition() come from the vertex layout prelude
+
+layout (std140) uniform Camera
+{
+    mat4 projection;
+    mat4 view;
+};
+
+layout (std140) uniform Object
+{
+    mat4 model;
+    vec4 color;
+};
+
+void main()
+{
+    gl_Position = projection * view * model * vec4(decodePosition(), 1.0);
+}
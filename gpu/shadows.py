@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+方向光的级联阴影贴图（CSM）
+相机视锥按距离分成若干段，每段用一个包围球拟合出光源空间的正交投影，渲染到阴影图集的一个图块；
+延迟光照通道（deferred.frag）按像素的视距选择级联，做 PCF 比较
+
+- 质量档位（render_settings 的 shadow_quality）决定级联数、每级分辨率和 PCF 核大小
+- 图集（GL_DEPTH_COMPONENT24，2x2 图块）跨帧复用，只在档位改变时重新分配
+- 每级的正交范围沿光线方向延伸到整个场景的包围盒，投射物体按该级的光源视锥剔除
+- 缓存: 每级拟合的包围球放大 CASCADE_MARGIN 倍，之后相机移动时只要所需的包围球仍在里面、
+  光源和投射物体（caster_key）没有变化，就直接复用上一次渲染的图块
+- 包围球中心在光源空间按纹素对齐，相机移动时阴影边缘不会闪烁
+"""
+
+import numpy as np
+import OpenGL.GL as gl
+# PyOpenGL 的 glTexImage2D 包装分配空的深度纹理时需要知道像素格式的分量数，直接使用原始函数
+from OpenGL.raw.GL.VERSION.GL_1_0 import glTexImage2D as _tex_image_2d_raw
+from gpu.shader import shader_manager
+from gpu.uniform_ring import CAMERA_BINDING, CAMERA_DTYPE
+from gpu.transforms import look_at, orthographic, to_gl
+
+# 质量档位: 名称 -> (级联数, 每级分辨率, PCF 半径；核为 (2r+1)^2 次比较，0 为一次硬件双线性比较)
+SHADOW_PRESETS = {
+    "Low": (1, 1024, 0),
+    "Medium": (2, 1024, 1),
+    "High": (3, 1536, 1),
+    "Ultra": (4, 2048, 2),
+}
+DEFAULT_SHADOW_PRESET = "High"
+MAX_CASCADES = 4
+# 光线方向（指向光源），与着色器中的 LIGHT_DIR 相同
+LIGHT_DIRECTION = np.array([0.4, 1.0, 0.3]) / np.linalg.norm([0.4, 1.0, 0.3])
+# 对数与均匀分段的混合比例（实用分段法）
+SPLIT_LAMBDA = 0.75
+# 缓存的包围球相对所需包围球的放大倍数
+CASCADE_MARGIN = 1.25
+# 接收面沿法线偏移的纹素数，渲染时的斜率偏移
+NORMAL_OFFSET_TEXELS = 1.5
+POLYGON_OFFSET = (2.0, 4.0)
+
+
+def cascade_splits(near: float, far: float, count: int, blend: float = SPLIT_LAMBDA) -> np.ndarray:
+    """(count + 1,) 各级的起止视距"""
+    ratios = np.arange(count + 1) / count
+    logarithmic = near * (far / near) ** ratios
+    uniform = near + (far - near) * ratios
+    return blend * logarithmic + (1.0 - blend) * uniform
+
+
+def frustum_slice_sphere(view_inverse: np.ndarray, tan_x: float, tan_y: float, start: float, end: float):
+    """视锥在 [start, end] 视距之间那一段的包围球 (世界空间中心, 半径)"""
+    # 中心取在视线上使两端角点距离相等的位置，半径只与分段有关，相机旋转时不变
+    diagonal = tan_x * tan_x + tan_y * tan_y
+    center_distance = min(0.5 * (start + end) * (1.0 + diagonal), end)
+    corner_end = np.array([end * tan_x, end * tan_y, end - center_distance])
+    corner_start = np.array([start * tan_x, start * tan_y, start - center_distance])
+    radius = max(np.linalg.norm(corner_end), np.linalg.norm(corner_start))
+    center = view_inverse @ np.array([0.0, 0.0, -center_distance, 1.0])
+    return center[:3], float(radius)
+
+
+class ShadowMaps:
+    """级联阴影图集、各级的光源矩阵和缓存状态"""
+
+    def __init__(self):
+        self.preset = None
+        self.cascade_count = 0
+        self.resolution = 0
+        self.pcf_radius = 0
+        self.grid = 1
+        self.atlas = None
+        self.framebuffer = None
+        self.memory_bytes = 0
+        # 每级: {"center", "radius", "key", "matrix"（光源 投影 @ 观察）, "texel"（纹素的世界尺寸）}
+        self.cascades = []
+        self.splits = np.zeros(MAX_CASCADES + 1)
+        self.inverse_view_projection = np.identity(4)
+        self.light_view = look_at(LIGHT_DIRECTION, (0.0, 0.0, 0.0))
+
+        # 各级的相机常量（与 instanced.vert 的 Camera 块布局相同），只在重绘时以孤立方式上传
+        alignment = gl.glGetIntegerv(gl.GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT)
+        self.camera_stride = (CAMERA_DTYPE.itemsize + alignment - 1) // alignment * alignment
+        self._camera_memory = np.zeros(self.camera_stride * MAX_CASCADES, dtype=np.uint8)
+        self.camera_buffer = gl.glGenBuffers(1)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.camera_buffer)
+        gl.glBufferData(gl.GL_UNIFORM_BUFFER, self._camera_memory.nbytes, None, gl.GL_STREAM_DRAW)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, 0)
+
+        self.stats = {"rendered": 0, "cached": 0, "casters": []}
+
+    def program_for(self, layout):
+        """阴影程序（instanced.vert + 空片段着色器），每种顶点布局一个"""
+        program = shader_manager.load(f"shadow.{layout.name}", "instanced.vert", "shadow.frag",
+                                      vertex_prelude=layout.glsl())
+        program.bind_block("Camera", CAMERA_BINDING)
+        return program
+
+    def _allocate(self, preset: str):
+        self._delete_atlas()
+        self.preset = preset
+        self.cascade_count, self.resolution, self.pcf_radius = SHADOW_PRESETS[preset]
+        self.grid = 1 if self.cascade_count == 1 else 2
+        size = self.resolution * self.grid
+
+        self.atlas = gl.glGenTextures(1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.atlas)
+        _tex_image_2d_raw(gl.GL_TEXTURE_2D, 0, gl.GL_DEPTH_COMPONENT24, size, size, 0, gl.GL_DEPTH_COMPONENT,
+                          gl.GL_UNSIGNED_INT, None)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_LINEAR)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_CLAMP_TO_EDGE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_CLAMP_TO_EDGE)
+        # sampler2DShadow: 硬件比较，线性过滤时得到 2x2 双线性的比较结果
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_COMPARE_MODE, gl.GL_COMPARE_REF_TO_TEXTURE)
+        gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_COMPARE_FUNC, gl.GL_LEQUAL)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+
+        self.framebuffer = gl.glGenFramebuffers(1)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+        gl.glFramebufferTexture2D(gl.GL_FRAMEBUFFER, gl.GL_DEPTH_ATTACHMENT, gl.GL_TEXTURE_2D, self.atlas, 0)
+        gl.glDrawBuffer(gl.GL_NONE)
+        gl.glReadBuffer(gl.GL_NONE)
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            self._delete_atlas()
+            raise RuntimeError(f"阴影帧缓冲不完整: 0x{status:04X}")
+        self.memory_bytes = size * size * 4
+        self.cascades = [None] * self.cascade_count
+
+    def update(self, program, draw_casters, caster_key, bounds, projection: np.ndarray, view: np.ndarray,
+               near: float, far: float, preset: str = DEFAULT_SHADOW_PRESET):
+        """
+        重绘失效的级联
+
+        Args:
+            program: program_for() 的结果
+            draw_casters: draw_casters(light_view_projection, program) 剔除并绘制投射物体，返回绘制的物体数
+            caster_key: 投射物体的版本，变化时所有级联重绘
+            bounds: 场景的世界包围盒 (low, high)
+            projection, view: 相机的透视投影和观察矩阵（行主序）
+            near, far: 相机的近远平面
+            preset: SHADOW_PRESETS 的键，未知的档位按 DEFAULT_SHADOW_PRESET 处理
+        """
+        if preset not in SHADOW_PRESETS:
+            preset = DEFAULT_SHADOW_PRESET
+        if preset != self.preset:
+            self._allocate(preset)
+        self.inverse_view_projection = np.linalg.inv(np.asarray(projection, dtype=np.float64) @ view)
+
+        # 光源空间中场景包围盒的深度范围，每级的正交投影都延伸到整个范围
+        low, high = (np.asarray(b, dtype=np.float64) for b in bounds)
+        corners = np.array([[x, y, z, 1.0] for x in (low[0], high[0]) for y in (low[1], high[1])
+                            for z in (low[2], high[2])])
+        light_z = (corners @ self.light_view.T.astype(np.float64))[:, 2]
+        view_inverse = np.linalg.inv(np.asarray(view, dtype=np.float64))
+        # 阴影距离不超过最远的场景角点
+        eye_distance = np.linalg.norm(corners[:, :3] - view_inverse[:3, 3], axis=1).max()
+        shadow_far = max(min(far, eye_distance), near * 2.0)
+        self.splits[:] = 0.0
+        self.splits[:self.cascade_count + 1] = cascade_splits(near, shadow_far, self.cascade_count)
+        tan_y = 1.0 / float(projection[1, 1])
+        tan_x = 1.0 / float(projection[0, 0])
+
+        rendered = []
+        casters = []
+        for index in range(self.cascade_count):
+            center, radius = frustum_slice_sphere(view_inverse, tan_x, tan_y, self.splits[index],
+                                                  self.splits[index + 1])
+            cached = self.cascades[index]
+            if (cached is not None and cached["key"] == caster_key
+                    and np.linalg.norm(center - cached["center"]) + radius <= cached["radius"]):
+                continue
+            self.cascades[index] = self._fit(center, radius * CASCADE_MARGIN, light_z, caster_key)
+            rendered.append(index)
+
+        if rendered:
+            camera = self._camera_memory
+            for index in rendered:
+                region = camera[index * self.camera_stride:index * self.camera_stride + CAMERA_DTYPE.itemsize]
+                constants = region.view(CAMERA_DTYPE)[0]
+                constants["projection"] = to_gl(self.cascades[index]["projection"])
+                constants["view"] = to_gl(self.light_view)
+            gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.camera_buffer)
+            gl.glBufferData(gl.GL_UNIFORM_BUFFER, camera.nbytes, camera, gl.GL_STREAM_DRAW)
+            gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, 0)
+
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.framebuffer)
+            gl.glEnable(gl.GL_DEPTH_TEST)
+            gl.glEnable(gl.GL_SCISSOR_TEST)
+            gl.glEnable(gl.GL_POLYGON_OFFSET_FILL)
+            gl.glPolygonOffset(*POLYGON_OFFSET)
+            program.use()
+            for index in rendered:
+                x, y = index % self.grid * self.resolution, index // self.grid * self.resolution
+                gl.glViewport(x, y, self.resolution, self.resolution)
+                gl.glScissor(x, y, self.resolution, self.resolution)
+                gl.glClear(gl.GL_DEPTH_BUFFER_BIT)
+                gl.glBindBufferRange(gl.GL_UNIFORM_BUFFER, CAMERA_BINDING, self.camera_buffer,
+                                     index * self.camera_stride, CAMERA_DTYPE.itemsize)
+                casters.append(draw_casters(self.cascades[index]["matrix"], program))
+            gl.glUseProgram(0)
+            gl.glDisable(gl.GL_POLYGON_OFFSET_FILL)
+            gl.glDisable(gl.GL_SCISSOR_TEST)
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        self.stats = {"rendered": len(rendered), "cached": self.cascade_count - len(rendered), "casters": casters}
+
+    def _fit(self, center: np.ndarray, radius: float, light_z: np.ndarray, caster_key) -> dict:
+        """拟合一级的正交投影，中心按纹素对齐"""
+        texel = 2.0 * radius / self.resolution
+        light_center = self.light_view.astype(np.float64) @ np.append(center, 1.0)
+        light_center[:2] = np.floor(light_center[:2] / texel) * texel
+        # 光源空间看向 -z: 近平面取场景和包围球中离光源最近的一侧
+        near = -max(light_z.max(), light_center[2] + radius) - texel
+        far = -min(light_z.min(), light_center[2] - radius) + texel
+        projection = orthographic(light_center[0] - radius, light_center[0] + radius,
+                                  light_center[1] - radius, light_center[1] + radius, near, far)
+        return {"center": center, "radius": radius, "key": caster_key, "projection": projection,
+                "matrix": projection @ self.light_view, "texel": texel}
+
+    def apply_uniforms(self, program, unit: int):
+        """设置 deferred.frag 的阴影 uniform，图集绑定到纹理单元 unit"""
+        count = self.cascade_count if self.atlas else 0
+        program.uniform("uShadowCascades").set(count)
+        if not count:
+            return
+        gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.atlas)
+        program.uniform("uShadowAtlas").set(unit)
+        # 光源裁剪空间 -> 图集纹理坐标和深度
+        matrices = np.zeros((MAX_CASCADES, 4, 4), dtype=np.float32)
+        tiles = np.zeros((MAX_CASCADES, 4), dtype=np.float32)
+        offsets = np.zeros(MAX_CASCADES, dtype=np.float32)
+        scale = 1.0 / self.grid
+        half_texel = 0.5 / (self.resolution * self.grid)
+        for index, cascade in enumerate(self.cascades):
+            x, y = index % self.grid * scale, index // self.grid * scale
+            atlas = np.array([[0.5 * scale, 0, 0, x + 0.5 * scale],
+                              [0, 0.5 * scale, 0, y + 0.5 * scale],
+                              [0, 0, 0.5, 0.5],
+                              [0, 0, 0, 1.0]])
+            matrices[index] = to_gl(atlas @ cascade["matrix"])
+            tiles[index] = (x + half_texel, y + half_texel, x + scale - half_texel, y + scale - half_texel)
+            offsets[index] = cascade["texel"] * NORMAL_OFFSET_TEXELS
+        program.uniform("uShadowMatrices").set(matrices)
+        program.uniform("uShadowTiles").set(tiles)
+        program.uniform("uNormalOffsets").set(offsets)
+        program.uniform("uCascadeSplits").set(np.ascontiguousarray(self.splits[1:MAX_CASCADES + 1],
+                                                                   dtype=np.float32))
+        program.uniform("uShadowTexel").set(1.0 / (self.resolution * self.grid))
+        program.uniform("uPcfRadius").set(self.pcf_radius)
+        program.uniform("uInverseViewProjection").set(np.ascontiguousarray(to_gl(self.inverse_view_projection),
+                                                                          dtype=np.float32))
+
+    def invalidate(self):
+        """下一次 update() 重绘所有级联"""
+        self.cascades = [None] * self.cascade_count
+
+    def _delete_atlas(self):
+        if self.framebuffer:
+            gl.glDeleteFramebuffers(1, [self.framebuffer])
+            self.framebuffer = None
+        if self.atlas:
+            gl.glDeleteTextures(1, [self.atlas])
+            self.atlas = None
+        self.preset = None
+        self.memory_bytes = 0
+        self.cascades = []
+
+    def delete(self):
+        self._delete_atlas()
+        if self.camera_buffer:
+            gl.glDeleteBuffers(1, [self.camera_buffer])
+            self.camera_buffer = None
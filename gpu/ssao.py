@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+屏幕空间环境光遮蔽（SSAO），从 G-buffer 的深度和法线计算
+- gpu/shaders/ssao.frag: 在 1/2 或 1/4 分辨率下计算，半球采样核按 4x4 交错图案旋转
+- gpu/shaders/ssao_blur.frag: 低分辨率下水平、竖直两次按深度加权的模糊，消除旋转图案又不越过轮廓
+- 上采样在延迟光照通道中完成（deferred.frag 的 ambientVisibility()），按深度选择相邻的低分辨率像素
+
+结果存放在渲染目标池借来的 GL_RG16F 目标中（r 可见度，g 视空间距离），光照之后归还；
+4K 视口半分辨率时两个目标约 16 MB
+"""
+
+import numpy as np
+import OpenGL.GL as gl
+from gpu.gbuffer import GBuffer
+from gpu.render_targets import render_target_pool
+from gpu.shader import shader_manager
+from gpu.transforms import to_gl
+
+# 质量档位（render_settings 的 ambient_occlusion_quality）: 名称 -> (分辨率缩小倍数, 采样数)
+SSAO_PRESETS = {
+    "Low": (4, 8),
+    "Medium": (2, 8),
+    "High": (2, 16),
+    "Ultra": (2, 32),
+}
+DEFAULT_SSAO_PRESET = "Medium"
+# 着色器中采样核数组的长度
+MAX_SSAO_SAMPLES = 32
+# 深度差相对视距超过该比例时模糊权重降为 1/e
+BLUR_SHARPNESS = 0.05
+
+
+def ssao_kernel(count: int, seed: int = 7) -> np.ndarray:
+    """(count, 3) 切线空间的半球采样点，越靠后离中心越远（近处的遮挡更重要）"""
+    rng = np.random.default_rng(seed)
+    points = rng.normal(size=(count, 3))
+    points[:, 2] = np.abs(points[:, 2]) + 0.1
+    points /= np.linalg.norm(points, axis=1, keepdims=True)
+    scale = (np.arange(count) + 1.0) / count
+    points *= (0.1 + 0.9 * scale * scale)[:, None] * rng.uniform(0.5, 1.0, count)[:, None]
+    return points.astype(np.float32)
+
+
+def ssao_rotations(seed: int = 11) -> np.ndarray:
+    """(16, 3) 4x4 图案中每个像素的旋转向量（切线平面内的单位向量）"""
+    rng = np.random.default_rng(seed)
+    # 16 个扇区各取一个角度，打乱顺序后相邻像素的方向差别较大
+    angles = (rng.permutation(16) + rng.uniform(0.0, 1.0, 16)) * (2.0 * np.pi / 16)
+    return np.stack([np.cos(angles), np.sin(angles), np.zeros(16)], axis=1).astype(np.float32)
+
+
+class SsaoPass:
+    """SSAO 计算和模糊，结果交给 DeferredLighting.apply()"""
+
+    def __init__(self):
+        self.program = shader_manager.load("ssao", "fullscreen.vert", "ssao.frag")
+        self.blur_program = shader_manager.load("ssao_blur", "fullscreen.vert", "ssao_blur.frag")
+        self.vao = gl.glGenVertexArrays(1)
+        self.rotations = ssao_rotations()
+        self._kernels = {}
+        # 上一次计算的档位、低分辨率尺寸和目标显存，供面板显示
+        self.stats = {"preset": DEFAULT_SSAO_PRESET, "width": 0, "height": 0, "samples": 0, "memory_bytes": 0}
+
+    def _kernel(self, count: int) -> np.ndarray:
+        """补齐到着色器数组长度的采样核（uniform 数组按声明的长度上传）"""
+        if count not in self._kernels:
+            kernel = np.zeros((MAX_SSAO_SAMPLES, 3), dtype=np.float32)
+            kernel[:count] = ssao_kernel(count)
+            self._kernels[count] = kernel
+        return self._kernels[count]
+
+    def apply(self, gbuffer: GBuffer, projection: np.ndarray, view: np.ndarray, near: float, far: float,
+              radius: float, preset: str = DEFAULT_SSAO_PRESET):
+        """
+        Args:
+            gbuffer: 已经画好的 G-buffer
+            projection, view: 绘制 G-buffer 时的投影和视图矩阵（行主序）
+            near, far: 投影的近远平面
+            radius: 采样半球的半径（世界单位）
+            preset: SSAO_PRESETS 的键，未知的档位按 DEFAULT_SSAO_PRESET 处理
+        Returns:
+            (低分辨率的遮蔽目标, 缩小倍数)；目标在光照之后由调用方 render_target_pool.release() 归还
+        """
+        if preset not in SSAO_PRESETS:
+            preset = DEFAULT_SSAO_PRESET
+        scale, samples = SSAO_PRESETS[preset]
+        samples = min(samples, MAX_SSAO_SAMPLES)
+        width = (gbuffer.width + scale - 1) // scale
+        height = (gbuffer.height + scale - 1) // scale
+        occlusion = render_target_pool.acquire(width, height, gl.GL_RG16F, depth=False)
+        blurred = render_target_pool.acquire(width, height, gl.GL_RG16F, depth=False)
+        self.stats = {"preset": preset, "width": width, "height": height, "samples": samples,
+                      "memory_bytes": occlusion.memory_bytes + blurred.memory_bytes}
+
+        gl.glDisable(gl.GL_DEPTH_TEST)
+        gl.glBindVertexArray(self.vao)
+
+        occlusion.bind()
+        program = self.program
+        program.use()
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, gbuffer.textures[1])
+        gl.glActiveTexture(gl.GL_TEXTURE1)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, gbuffer.depth_texture)
+        program.uniform("uNormal").set(0)
+        program.uniform("uDepth").set(1)
+        program.uniform("uSize").set((gbuffer.width, gbuffer.height))
+        program.uniform("uScale").set(scale)
+        program.uniform("uProjScale").set((float(projection[0, 0]), float(projection[1, 1])))
+        program.uniform("uNear").set(near)
+        program.uniform("uFar").set(far)
+        program.uniform("uViewRotation").set(np.ascontiguousarray(to_gl(view[:3, :3]), dtype=np.float32))
+        program.uniform("uKernel").set(self._kernel(samples))
+        program.uniform("uSampleCount").set(samples)
+        program.uniform("uRotation").set(self.rotations)
+        program.uniform("uRadius").set(radius)
+        gl.glDrawArrays(gl.GL_TRIANGLES, 0, 3)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glActiveTexture(gl.GL_TEXTURE0)
+
+        # 水平模糊写入 blurred，竖直模糊写回 occlusion
+        program = self.blur_program
+        program.use()
+        program.uniform("uOcclusion").set(0)
+        program.uniform("uSize").set((width, height))
+        program.uniform("uSharpness").set(BLUR_SHARPNESS)
+        for source, destination, direction in ((occlusion, blurred, (1, 0)), (blurred, occlusion, (0, 1))):
+            destination.bind()
+            gl.glBindTexture(gl.GL_TEXTURE_2D, source.texture)
+            program.uniform("uDirection").set(direction)
+            gl.glDrawArrays(gl.GL_TRIANGLES, 0, 3)
+        gl.glBindTexture(gl.GL_TEXTURE_2D, 0)
+        gl.glBindVertexArray(0)
+        gl.glUseProgram(0)
+
+        render_target_pool.release(blurred)
+        return occlusion, scale
+
+    def delete(self):
+        if self.vao:
+            gl.glDeleteVertexArrays(1, [self.vao])
+            self.vao = None
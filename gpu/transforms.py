@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+矩阵工具
+函数返回数学约定（列向量，v' = M @ v）的 float32 矩阵；
+写入 OpenGL 缓冲时使用转置（列主序），见 to_gl()
+"""
+
+import math
+import numpy as np
+
+
+def to_gl(matrix: np.ndarray) -> np.ndarray:
+    """转换为 OpenGL 列主序内存布局（支持 (..., 4, 4) 批量矩阵）"""
+    return np.swapaxes(matrix, -1, -2)
+
+
+def perspective(fov_y_degrees: float, aspect: float, near: float, far: float) -> np.ndarray:
+    """透视投影矩阵"""
+    f = 1.0 / math.tan(math.radians(fov_y_degrees) * 0.5)
+    m = np.zeros((4, 4), dtype=np.float32)
+    m[0, 0] = f / aspect
+    m[1, 1] = f
+    m[2, 2] = (far + near) / (near - far)
+    m[2, 3] = 2.0 * far * near / (near - far)
+    m[3, 2] = -1.0
+    return m
+
+
+def orthographic(left: float, right: float, bottom: float, top: float, near: float, far: float) -> np.ndarray:
+    """正交投影矩阵"""
+    m = np.identity(4, dtype=np.float32)
+    m[0, 0] = 2.0 / (right - left)
+    m[1, 1] = 2.0 / (top - bottom)
+    m[2, 2] = -2.0 / (far - near)
+    m[0, 3] = -(right + left) / (right - left)
+    m[1, 3] = -(top + bottom) / (top - bottom)
+    m[2, 3] = -(far + near) / (far - near)
+    return m
+
+
+def look_at(eye, target, up=(0.0, 1.0, 0.0)) -> np.ndarray:
+    """观察矩阵"""
+    eye = np.asarray(eye, dtype=np.float32)
+    forward = np.asarray(target, dtype=np.float32) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, np.asarray(up, dtype=np.float32))
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+
+    m = np.identity(4, dtype=np.float32)
+    m[0, :3] = side
+    m[1, :3] = true_up
+    m[2, :3] = -forward
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+def compose_trs(translations: np.ndarray, yaw_radians: np.ndarray, scales: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    批量组合 平移 * 绕 Y 轴旋转 * 缩放，直接写成 OpenGL 列主序
+
+    Args:
+        translations: (n, 3) 平移
+        yaw_radians: (n,) 绕 Y 轴旋转角
+        scales: (n,) 或 (n, 3) 缩放
+        out: 可选的 (n, 4, 4) 输出数组
+    Returns:
+        (n, 4, 4) 列主序矩阵，out[i, 列, 行]
+    """
+    n = len(translations)
+    if out is None:
+        out = np.empty((n, 4, 4), dtype=np.float32)
+    scales = np.broadcast_to(np.asarray(scales, dtype=np.float32).reshape(n, -1), (n, 3))
+    cos_y = np.cos(yaw_radians)
+    sin_y = np.sin(yaw_radians)
+
+    out[:] = 0.0
+    # 第 0 列: R @ (sx, 0, 0)
+    out[:, 0, 0] = cos_y * scales[:, 0]
+    out[:, 0, 2] = -sin_y * scales[:, 0]
+    # 第 1 列: (0, sy, 0)
+    out[:, 1, 1] = scales[:, 1]
+    # 第 2 列: R @ (0, 0, sz)
+    out[:, 2, 0] = sin_y * scales[:, 2]
+    out[:, 2, 2] = cos_y * scales[:, 2]
+    # 第 3 列: 平移
+    out[:, 3, :3] = translations
+    out[:, 3, 3] = 1.0
+    return out
+
+
+def euler_trs(translation, rotation_degrees, scale) -> np.ndarray:
+    """
+    平移 * 旋转 * 缩放（数学约定），旋转依次绕 X、Y、Z 轴（R = Rz @ Ry @ Rx），与属性面板一致
+
+    Args:
+        translation: (3,) 平移
+        rotation_degrees: (3,) 绕 X、Y、Z 轴的旋转角（度）
+        scale: (3,) 缩放
+    """
+    rx, ry, rz = (math.radians(float(a)) for a in rotation_degrees)
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    rotation = np.array([
+        [cz * cy, cz * sy * sx - sz * cx, cz * sy * cx + sz * sx],
+        [sz * cy, sz * sy * sx + cz * cx, sz * sy * cx - cz * sx],
+        [-sy, cy * sx, cy * cx],
+    ], dtype=np.float32)
+
+    m = np.identity(4, dtype=np.float32)
+    m[:3, :3] = rotation * np.asarray(scale, dtype=np.float32)[None, :]
+    m[:3, 3] = translation
+    return m
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+逐帧 uniform 数据流模块
+三重缓冲的 uniform 缓冲对象：驱动支持 glBufferStorage 时持久映射，
+每帧写入一个区域并用栅栏同步，CPU 不会覆盖 GPU 仍在读取的数据；
+不支持时退回为 CPU 暂存数组 + 缓冲区孤立（orphaning）上传
+
+相机和物体常量通过预先创建的 NumPy 结构化视图直接写入缓冲区，
+上千个物体的常量可以一次向量化赋值完成，渲染路径中不再分配数组
+"""
+
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+
+# 缓冲区域数（三重缓冲）
+RING_REGIONS = 3
+# 等待栅栏的超时时间（纳秒），超时后继续等待
+FENCE_TIMEOUT_NS = 1_000_000_000
+
+# uniform 块绑定点
+CAMERA_BINDING = 0
+OBJECT_BINDING = 1
+
+# std140 布局的相机常量: mat4 projection; mat4 view;
+CAMERA_DTYPE = np.dtype([
+    ("projection", np.float32, (4, 4)),
+    ("view", np.float32, (4, 4)),
+])
+
+# std140 布局的物体常量大小: mat4 model; vec4 color;
+OBJECT_SIZE = 80
+
+
+def object_dtype(stride: int) -> np.dtype:
+    """std140 布局的物体常量: mat4 model; vec4 color; 按 stride 对齐，使每个物体都能单独绑定"""
+    return np.dtype({
+        "names": ["model", "color"],
+        "formats": [(np.float32, (4, 4)), (np.float32, 4)],
+        "offsets": [0, 64],
+        "itemsize": stride,
+    })
+
+
+def _align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
+
+
+def supports_persistent_mapping() -> bool:
+    """当前上下文是否支持持久映射（OpenGL 4.4 或 ARB_buffer_storage）"""
+    version = gl.glGetIntegerv(gl.GL_MAJOR_VERSION) * 10 + gl.glGetIntegerv(gl.GL_MINOR_VERSION)
+    if version >= 44:
+        return True
+    for index in range(gl.glGetIntegerv(gl.GL_NUM_EXTENSIONS)):
+        if gl.glGetStringi(gl.GL_EXTENSIONS, index) == b"GL_ARB_buffer_storage":
+            return True
+    return False
+
+
+class UniformRing:
+    """多区域 uniform 缓冲，每帧使用一个区域"""
+
+    def __init__(self, region_size: int, regions: int = RING_REGIONS, persistent: bool = None):
+        """
+        Args:
+            region_size: 每个区域的字节数（会按 uniform 偏移对齐要求取整）
+            regions: 区域数量
+            persistent: 是否使用持久映射，None 表示按驱动能力自动选择
+        """
+        self.alignment = gl.glGetIntegerv(gl.GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT)
+        self.region_size = _align(region_size, self.alignment)
+        self.persistent = supports_persistent_mapping() if persistent is None else persistent
+        # 孤立模式下每帧重新分配缓冲区存储，只需要一个区域
+        self.regions = regions if self.persistent else 1
+
+        self.buffer = gl.glGenBuffers(1)
+        self.region = 0
+        self._fences = [None] * self.regions
+
+        total = self.region_size * self.regions
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.buffer)
+        if self.persistent:
+            flags = gl.GL_MAP_WRITE_BIT | gl.GL_MAP_PERSISTENT_BIT | gl.GL_MAP_COHERENT_BIT
+            gl.glBufferStorage(gl.GL_UNIFORM_BUFFER, total, None, flags)
+            address = gl.glMapBufferRange(gl.GL_UNIFORM_BUFFER, 0, total, flags)
+            # 映射内存在缓冲区销毁前一直有效
+            self.memory = np.ctypeslib.as_array((ctypes.c_ubyte * total).from_address(address))
+        else:
+            gl.glBufferData(gl.GL_UNIFORM_BUFFER, total, None, gl.GL_STREAM_DRAW)
+            self.memory = np.zeros(total, dtype=np.uint8)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, 0)
+
+    def region_memory(self, region: int) -> np.ndarray:
+        """区域 region 的字节视图"""
+        start = region * self.region_size
+        return self.memory[start:start + self.region_size]
+
+    def region_offset(self) -> int:
+        """当前区域在缓冲区中的字节偏移"""
+        return self.region * self.region_size
+
+    def begin_frame(self) -> int:
+        """切换到下一个区域，等待 GPU 读完该区域上一次的数据，返回区域序号"""
+        self.region = (self.region + 1) % self.regions
+        fence = self._fences[self.region]
+        if fence is not None:
+            while gl.glClientWaitSync(fence, gl.GL_SYNC_FLUSH_COMMANDS_BIT, FENCE_TIMEOUT_NS) == gl.GL_TIMEOUT_EXPIRED:
+                pass
+            gl.glDeleteSync(fence)
+            self._fences[self.region] = None
+        return self.region
+
+    def upload(self, size: int = None):
+        """孤立模式下把暂存数据上传到新的缓冲区存储；持久映射时写入已直接可见，无需上传"""
+        if self.persistent:
+            return
+        size = self.region_size if size is None else _align(size, self.alignment)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.buffer)
+        gl.glBufferData(gl.GL_UNIFORM_BUFFER, self.region_size, None, gl.GL_STREAM_DRAW)
+        gl.glBufferSubData(gl.GL_UNIFORM_BUFFER, 0, size, self.memory)
+        gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, 0)
+
+    def end_frame(self):
+        """当前区域的绘制命令提交后调用，放置栅栏"""
+        if self.persistent:
+            self._fences[self.region] = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+
+    def bind_range(self, binding: int, offset: int, size: int):
+        """把当前区域中 offset 处的 size 字节绑定到 uniform 块绑定点"""
+        gl.glBindBufferRange(gl.GL_UNIFORM_BUFFER, binding, self.buffer, self.region_offset() + offset, size)
+
+    def delete(self):
+        for fence in self._fences:
+            if fence is not None:
+                gl.glDeleteSync(fence)
+        self._fences = [None] * self.regions
+        if self.persistent:
+            gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, self.buffer)
+            gl.glUnmapBuffer(gl.GL_UNIFORM_BUFFER)
+            gl.glBindBuffer(gl.GL_UNIFORM_BUFFER, 0)
+        self.memory = None
+        gl.glDeleteBuffers(1, [self.buffer])
+        self.buffer = None
+
+
+class FrameConstants:
+    """
+    每帧的相机和物体常量
+
+    用法:
+        constants.begin_frame()
+        constants.camera_projection[:] = projection
+        constants.object_models[:n] = models         # 一次写入所有物体
+        constants.upload(n)
+        constants.bind_camera()
+        constants.bind_object(i)                     # 绘制物体 i 之前
+        constants.end_frame()
+    """
+
+    def __init__(self, max_objects: int = 1024, regions: int = RING_REGIONS, persistent: bool = None):
+        """
+        Args:
+            max_objects: 每帧最多的物体数
+            regions: 缓冲区域数量
+            persistent: 是否使用持久映射，None 表示按驱动能力自动选择
+        """
+        alignment = gl.glGetIntegerv(gl.GL_UNIFORM_BUFFER_OFFSET_ALIGNMENT)
+        self.max_objects = max_objects
+        self.camera_size = CAMERA_DTYPE.itemsize
+        self.objects_offset = _align(self.camera_size, alignment)
+        self.object_stride = _align(OBJECT_SIZE, alignment)
+        self.object_dtype = object_dtype(self.object_stride)
+
+        self.ring = UniformRing(self.objects_offset + max_objects * self.object_stride, regions, persistent)
+
+        # 为每个区域预先创建各字段的视图，切换区域时不创建新数组
+        self._region_views = []
+        for region in range(self.ring.regions):
+            memory = self.ring.region_memory(region)
+            camera = memory[:self.camera_size].view(CAMERA_DTYPE)[0]
+            objects = memory[self.objects_offset:self.objects_offset + max_objects * self.object_stride] \
+                .view(self.object_dtype)
+            self._region_views.append((camera["projection"], camera["view"], objects["model"], objects["color"]))
+
+        self.camera_projection, self.camera_view, self.object_models, self.object_colors = self._region_views[0]
+        self.object_count = 0
+
+    @property
+    def persistent(self) -> bool:
+        return self.ring.persistent
+
+    def begin_frame(self):
+        """开始写入新一帧的常量"""
+        region = self.ring.begin_frame()
+        self.camera_projection, self.camera_view, self.object_models, self.object_colors = self._region_views[region]
+        self.object_count = 0
+
+    def upload(self, object_count: int):
+        """写入完成后调用；孤立模式下上传前 object_count 个物体"""
+        self.object_count = object_count
+        self.ring.upload(self.objects_offset + object_count * self.object_stride)
+
+    def bind_camera(self, binding: int = CAMERA_BINDING):
+        self.ring.bind_range(binding, 0, self.camera_size)
+
+    def bind_object(self, index: int, binding: int = OBJECT_BINDING):
+        self.ring.bind_range(binding, self.objects_offset + index * self.object_stride, OBJECT_SIZE)
+
+    def end_frame(self):
+        """本帧使用这些常量的绘制命令提交后调用"""
+        self.ring.end_frame()
+
+    def delete(self):
+        self.ring.delete()
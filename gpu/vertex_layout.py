@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+顶点布局模块
+一份布局描述（属性 -> 编码格式）同时生成:
+- 打包后的 numpy dtype 和 CPU 端的编码（量化）
+- glVertexAttribPointer 配置
+- 顶点着色器的属性声明和解码函数 decodePosition() / decodeNormal() / decodeUv() / decodeTangent()
+
+编码格式:
+- float32: 原样存放
+- float16 / snorm16: 相对网格包围盒归一化到 [-1, 1]，着色器用 offset + q * scale 还原
+- unorm16: 相对取值范围归一化到 [0, 1]（纹理坐标可以超出 [0, 1]）
+- oct16: 单位向量的八面体编码，两个 int16；切线的手性存放在第三个分量
+
+整数分量按非归一化整数上传，除以 32767 / 65535 合并进 scale，
+避免 GL 4.2 前后 snorm 转换规则不同带来的误差
+"""
+
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+
+# 顶点属性位置（与着色器中的 layout(location) 一致，4 以后是逐实例属性）
+POSITION_LOCATION = 0
+NORMAL_LOCATION = 1
+UV_LOCATION = 2
+TANGENT_LOCATION = 3
+
+# 属性: 名称 -> (位置, 逻辑分量数, GLSL 名称)
+ATTRIBUTES = {
+    "position": (POSITION_LOCATION, 3, "Position"),
+    "normal": (NORMAL_LOCATION, 3, "Normal"),
+    "uv": (UV_LOCATION, 2, "Uv"),
+    "tangent": (TANGENT_LOCATION, 4, "Tangent"),
+}
+
+FORMAT_FLOAT32 = "float32"
+FORMAT_FLOAT16 = "float16"
+FORMAT_SNORM16 = "snorm16"
+FORMAT_UNORM16 = "unorm16"
+FORMAT_OCT16 = "oct16"
+
+# 格式: (存储类型, GL 类型)
+_STORAGE = {
+    FORMAT_FLOAT32: (np.float32, gl.GL_FLOAT),
+    FORMAT_FLOAT16: (np.float16, gl.GL_HALF_FLOAT),
+    FORMAT_SNORM16: (np.int16, gl.GL_SHORT),
+    FORMAT_UNORM16: (np.uint16, gl.GL_UNSIGNED_SHORT),
+    FORMAT_OCT16: (np.int16, gl.GL_SHORT),
+}
+# 用包围盒还原的格式（需要 offset/scale uniform）
+_RANGE_FORMATS = (FORMAT_FLOAT16, FORMAT_SNORM16, FORMAT_UNORM16)
+# 可以用于各属性的格式
+_ALLOWED = {
+    "position": (FORMAT_FLOAT32, FORMAT_FLOAT16, FORMAT_SNORM16),
+    "normal": (FORMAT_FLOAT32, FORMAT_OCT16),
+    "uv": (FORMAT_FLOAT32, FORMAT_FLOAT16, FORMAT_UNORM16),
+    "tangent": (FORMAT_FLOAT32, FORMAT_OCT16),
+}
+
+SNORM16_MAX = 32767.0
+UNORM16_MAX = 65535.0
+
+_OCT_DECODE_GLSL = """vec3 octDecode(vec2 e)
+{
+    e = clamp(e, -1.0, 1.0);
+    vec3 v = vec3(e, 1.0 - abs(e.x) - abs(e.y));
+    float t = max(-v.z, 0.0);
+    v.xy += vec2(v.x >= 0.0 ? -t : t, v.y >= 0.0 ? -t : t);
+    return normalize(v);
+}
+"""
+
+
+def _storage_components(attribute: str, fmt: str) -> int:
+    """存储的分量数: 3 分量的 16 位格式补齐到 4 个，保持 4 字节对齐"""
+    components = ATTRIBUTES[attribute][1]
+    if fmt == FORMAT_OCT16:
+        # 八面体 xy（+ 切线手性 + 补齐）
+        return 2 if components == 3 else 4
+    if fmt != FORMAT_FLOAT32 and components == 3:
+        return 4
+    return components
+
+
+def oct_encode(vectors: np.ndarray) -> np.ndarray:
+    """(N, 3) 单位向量 -> (N, 2) [-1, 1] 八面体坐标"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    l1 = np.abs(vectors).sum(axis=1, keepdims=True)
+    # 零向量编码为 (0, 0)，解码为 +Z
+    p = np.divide(vectors, l1, out=np.zeros_like(vectors), where=l1 > 0)
+    xy = p[:, :2].copy()
+    lower = p[:, 2] < 0
+    if lower.any():
+        folded = (1.0 - np.abs(xy[lower][:, ::-1])) * np.where(xy[lower] >= 0, 1.0, -1.0)
+        xy[lower] = folded
+    return xy
+
+
+def oct_decode(encoded: np.ndarray) -> np.ndarray:
+    """oct_encode 的逆运算（与着色器中的 octDecode 相同）"""
+    e = np.clip(np.asarray(encoded, dtype=np.float32), -1.0, 1.0)
+    v = np.empty((len(e), 3), dtype=np.float32)
+    v[:, :2] = e
+    v[:, 2] = 1.0 - np.abs(e[:, 0]) - np.abs(e[:, 1])
+    t = np.maximum(-v[:, 2], 0.0)
+    v[:, :2] += np.where(v[:, :2] >= 0, -t[:, None], t[:, None])
+    length = np.linalg.norm(v, axis=1, keepdims=True)
+    return v / np.maximum(length, 1e-30)
+
+
+def _range(values: np.ndarray, fmt: str):
+    """包围范围 -> (offset, scale)，q = (value - offset) / scale"""
+    if len(values) == 0:
+        low = high = np.zeros(values.shape[1], dtype=np.float64)
+    else:
+        low = values.min(axis=0).astype(np.float64)
+        high = values.max(axis=0).astype(np.float64)
+    if fmt == FORMAT_UNORM16:
+        offset, extent = low, high - low
+        extent[extent <= 0] = 1.0
+        return offset, extent / UNORM16_MAX
+    offset, extent = (low + high) * 0.5, (high - low) * 0.5
+    extent[extent <= 0] = 1.0
+    return offset, (extent / SNORM16_MAX if fmt == FORMAT_SNORM16 else extent)
+
+
+class VertexLayout:
+    """顶点布局描述，例如 VertexLayout("compact", position="snorm16", normal="oct16", uv="unorm16")"""
+
+    def __init__(self, name: str, **formats):
+        """
+        Args:
+            name: 布局名称，用作着色器程序名称的后缀
+            formats: 属性名称 -> 编码格式，未列出的属性不上传
+        """
+        for attribute, fmt in formats.items():
+            if attribute not in ATTRIBUTES:
+                raise ValueError(f"未知的顶点属性: {attribute}")
+            if fmt not in _ALLOWED[attribute]:
+                raise ValueError(f"属性 {attribute} 不支持格式 {fmt}（可选: {', '.join(_ALLOWED[attribute])}）")
+        self.name = name
+        # 按属性位置排列
+        self.formats = {attribute: formats[attribute] for attribute in ATTRIBUTES if attribute in formats}
+
+    def __repr__(self):
+        return f"VertexLayout({self.name!r}, {self.formats})"
+
+    def packed_dtype(self, source_dtype: np.dtype) -> np.dtype:
+        """source_dtype 中存在的属性打包后的 dtype"""
+        fields = []
+        for attribute, fmt in self.formats.items():
+            if attribute in source_dtype.fields:
+                storage, _ = _STORAGE[fmt]
+                fields.append((attribute, storage, _storage_components(attribute, fmt)))
+        return np.dtype(fields)
+
+    def vertex_size(self, source_dtype: np.dtype) -> int:
+        return self.packed_dtype(source_dtype).itemsize
+
+    def encode(self, vertices: np.ndarray):
+        """
+        编码顶点
+
+        Args:
+            vertices: 含 position/normal/uv/tangent 字段的结构化数组（可以是 np.memmap）
+        Returns:
+            (packed, decode): 打包后的数组和解码 uniform（名称 -> 值）；
+            dtype 已经一致时直接返回原数组，不复制
+        """
+        dtype = self.packed_dtype(vertices.dtype)
+        decode = {}
+        if vertices.dtype == dtype:
+            return vertices, decode
+
+        packed = np.zeros(len(vertices), dtype=dtype)
+        for attribute in dtype.names:
+            fmt = self.formats[attribute]
+            glsl_name = ATTRIBUTES[attribute][2]
+            values = np.asarray(vertices[attribute], dtype=np.float32)
+            target = packed[attribute]
+            if fmt == FORMAT_FLOAT32:
+                target[:] = values
+            elif fmt == FORMAT_OCT16:
+                target[:, :2] = np.rint(oct_encode(values[:, :3]) * SNORM16_MAX)
+                if values.shape[1] == 4:
+                    target[:, 2] = np.where(values[:, 3] < 0, -SNORM16_MAX, SNORM16_MAX)
+            else:
+                offset, scale = _range(values, fmt)
+                normalized = (values - offset) / scale
+                count = values.shape[1]
+                if fmt == FORMAT_FLOAT16:
+                    target[:, :count] = normalized
+                elif fmt == FORMAT_SNORM16:
+                    target[:, :count] = np.clip(np.rint(normalized), -SNORM16_MAX, SNORM16_MAX)
+                else:
+                    target[:, :count] = np.clip(np.rint(normalized), 0.0, UNORM16_MAX)
+                decode[f"u{glsl_name}Offset"] = tuple(float(v) for v in offset)
+                decode[f"u{glsl_name}Scale"] = tuple(float(v) for v in scale)
+        return packed, decode
+
+    def decode(self, packed: np.ndarray, decode: dict) -> dict:
+        """CPU 端解码（与生成的着色器代码一致），用于比较量化误差"""
+        result = {}
+        for attribute in packed.dtype.names:
+            fmt = self.formats[attribute]
+            components = ATTRIBUTES[attribute][1]
+            glsl_name = ATTRIBUTES[attribute][2]
+            values = np.asarray(packed[attribute], dtype=np.float32)
+            if fmt == FORMAT_FLOAT32:
+                result[attribute] = values
+            elif fmt == FORMAT_OCT16:
+                vectors = oct_decode(values[:, :2] / SNORM16_MAX)
+                if components == 4:
+                    vectors = np.column_stack([vectors, np.where(values[:, 2] < 0, -1.0, 1.0)])
+                result[attribute] = vectors
+            else:
+                offset = np.array(decode[f"u{glsl_name}Offset"], dtype=np.float64)
+                scale = np.array(decode[f"u{glsl_name}Scale"], dtype=np.float64)
+                result[attribute] = (offset + values[:, :components] * scale).astype(np.float32)
+        return result
+
+    def setup_attributes(self, packed_dtype: np.ndarray):
+        """在当前绑定的 VAO 和 GL_ARRAY_BUFFER 上配置 packed_dtype 中的属性"""
+        stride = packed_dtype.itemsize
+        for attribute in packed_dtype.names:
+            location = ATTRIBUTES[attribute][0]
+            storage, gl_type = _STORAGE[self.formats[attribute]]
+            offset = packed_dtype.fields[attribute][1]
+            components = packed_dtype.fields[attribute][0].shape[0]
+            gl.glEnableVertexAttribArray(location)
+            # 整数按非归一化转换为浮点，缩放在着色器中完成
+            gl.glVertexAttribPointer(location, components, gl_type, gl.GL_FALSE, stride, ctypes.c_void_p(offset))
+
+    def glsl(self) -> str:
+        """
+        顶点着色器前导代码: 属性声明、解码 uniform 和解码函数
+        网格中缺少的属性读到默认值 (0, 0, 0, 1)
+        """
+        lines = []
+        needs_oct = FORMAT_OCT16 in self.formats.values()
+        for attribute, fmt in self.formats.items():
+            location, components, glsl_name = ATTRIBUTES[attribute]
+            stored = _storage_components(attribute, fmt)
+            lines.append(f"layout (location = {location}) in vec{stored} a{glsl_name};")
+            if fmt in _RANGE_FORMATS:
+                lines.append(f"uniform vec{components} u{glsl_name}Offset;")
+                lines.append(f"uniform vec{components} u{glsl_name}Scale;")
+        if needs_oct:
+            lines.append(_OCT_DECODE_GLSL.rstrip())
+
+        for attribute, fmt in self.formats.items():
+            _, components, glsl_name = ATTRIBUTES[attribute]
+            stored = _storage_components(attribute, fmt)
+            value = f"a{glsl_name}"
+            swizzle = "xyzw"[:components]
+            if fmt == FORMAT_FLOAT32:
+                body = value
+            elif fmt == FORMAT_OCT16:
+                body = f"octDecode(a{glsl_name}.xy / {SNORM16_MAX!r})"
+                if components == 4:
+                    body = f"vec4({body}, a{glsl_name}.z < 0.0 ? -1.0 : 1.0)"
+            else:
+                if stored != components:
+                    value = f"{value}.{swizzle}"
+                body = f"u{glsl_name}Offset + {value} * u{glsl_name}Scale"
+            lines.append(f"vec{components} decode{glsl_name}() {{ return {body}; }}")
+
+        # 缺少的属性也提供解码函数，着色器不需要按布局分支
+        for attribute, (_, components, glsl_name) in ATTRIBUTES.items():
+            if attribute not in self.formats:
+                lines.append(f"vec{components} decode{glsl_name}() {{ return vec{components}(0.0); }}")
+        return "\n".join(lines) + "\n"
+
+
+def quantization_error(vertices: np.ndarray, layout: VertexLayout) -> dict:
+    """
+    编码后再解码的最大误差
+
+    Returns:
+        {"position": 最大位置误差（相对包围盒对角线）, "normal_degrees": 法线最大偏差（度）,
+         "uv": 纹理坐标最大误差}，只包含网格中存在的属性
+    """
+    packed, decode = layout.encode(vertices)
+    decoded = layout.decode(packed, decode)
+    errors = {}
+    if len(vertices) == 0:
+        return errors
+    if "position" in decoded:
+        positions = np.asarray(vertices["position"], dtype=np.float32)
+        diagonal = float(np.linalg.norm(positions.max(axis=0) - positions.min(axis=0))) or 1.0
+        errors["position"] = float(np.abs(decoded["position"] - positions).max()) / diagonal
+    if "normal" in decoded:
+        # float64: float32 的 arccos 在 1 附近有约 0.02 度的误差
+        normals = np.asarray(vertices["normal"], dtype=np.float64)
+        length = np.linalg.norm(normals, axis=1)
+        valid = length > 0
+        decoded_normals = decoded["normal"][valid].astype(np.float64)
+        cosine = (decoded_normals * normals[valid]).sum(axis=1) / (length[valid] * np.linalg.norm(decoded_normals, axis=1))
+        errors["normal_degrees"] = float(np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))).max()) if valid.any() else 0.0
+    if "uv" in decoded:
+        errors["uv"] = float(np.abs(decoded["uv"] - np.asarray(vertices["uv"], dtype=np.float32)).max())
+    return errors
+
+
+# 预设布局
+LAYOUT_FLOAT32 = VertexLayout(FORMAT_FLOAT32, position=FORMAT_FLOAT32, normal=FORMAT_FLOAT32,
+                              uv=FORMAT_FLOAT32, tangent=FORMAT_FLOAT32)
+LAYOUT_HALF = VertexLayout("half", position=FORMAT_FLOAT16, normal=FORMAT_OCT16,
+                           uv=FORMAT_UNORM16, tangent=FORMAT_OCT16)
+LAYOUT_COMPACT = VertexLayout("compact", position=FORMAT_SNORM16, normal=FORMAT_OCT16,
+                              uv=FORMAT_UNORM16, tangent=FORMAT_OCT16)
+VERTEX_LAYOUTS = {layout.name: layout for layout in (LAYOUT_FLOAT32, LAYOUT_HALF, LAYOUT_COMPACT)}
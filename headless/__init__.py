@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Headless 模块
+
+批量渲染需要在导入 OpenGL 之前选择上下文后端，
+所以 batch 子模块在第一次被访问时才导入
+"""
+
+import importlib
+
+from headless.context import BACKENDS, HeadlessContext, select_backend
+
+# 导出名称 -> 所在子模块
+_LAZY_MODULES = {
+    'run_batch': '.batch',
+    'load_scene': '.batch',
+    'load_render_settings': '.batch'
+}
+
+__all__ = [
+    'BACKENDS',
+    'HeadlessContext',
+    'select_backend',
+    'run_batch',
+    'load_scene',
+    'load_render_settings'
+]
+
+
+def __getattr__(name):
+    """按需导入子模块"""
+    module_name = _LAZY_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+批量离屏渲染
+读取场景描述（JSON）和渲染设置（TOML），使用 ViewportManager 的离屏帧缓冲逐帧渲染并写出 PNG
+
+用法: python run.py --batch scene.json --out frames/ --settings render.toml
+
+场景文件示例:
+    {
+        "frames": 60,
+        "fps": 30,
+        "background_color": [0.1, 0.1, 0.1, 1.0],
+        "square_color": [1.0, 0.5, 0.0, 1.0],
+        "rotation_angle": 0.0,
+        "rotation_speed": 90.0
+    }
+"""
+
+import os
+import json
+import time
+import tomllib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+from headless.context import HeadlessContext
+
+# 场景字段及默认值
+SCENE_DEFAULTS = {
+    "frames": 1,
+    "fps": 30.0,
+    "background_color": [0.1, 0.1, 0.1, 1.0],
+    "square_color": [1.0, 0.5, 0.0, 1.0],
+    "rotation_angle": 0.0,
+    "rotation_speed": 1.0,  # 度/秒
+}
+
+# 同时在后台编码的最大帧数
+MAX_PENDING_WRITES = 4
+
+
+def _check_color(name: str, value):
+    if not (isinstance(value, list) and len(value) == 4 and all(isinstance(c, (int, float)) for c in value)):
+        raise ValueError(f"场景字段 {name} 必须是 4 个数字组成的 RGBA 颜色: {value!r}")
+    return [float(c) for c in value]
+
+
+def load_scene(path: str) -> dict:
+    """读取并校验场景文件，缺少的字段使用默认值"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"场景文件必须是 JSON 对象: {path}")
+
+    unknown = set(data) - set(SCENE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"场景文件包含未知字段: {', '.join(sorted(unknown))}")
+
+    scene = dict(SCENE_DEFAULTS)
+    scene.update(data)
+
+    if not isinstance(scene["frames"], int) or scene["frames"] <= 0:
+        raise ValueError(f"场景字段 frames 必须是正整数: {scene['frames']!r}")
+    if not isinstance(scene["fps"], (int, float)) or scene["fps"] <= 0:
+        raise ValueError(f"场景字段 fps 必须大于 0: {scene['fps']!r}")
+    for name in ("rotation_angle", "rotation_speed"):
+        if not isinstance(scene[name], (int, float)):
+            raise ValueError(f"场景字段 {name} 必须是数字: {scene[name]!r}")
+    for name in ("background_color", "square_color"):
+        scene[name] = _check_color(name, scene[name])
+    return scene
+
+
+def load_render_settings(path: str = None) -> dict:
+    """
+    读取渲染设置 TOML 并应用到渲染设置面板使用的 render_settings
+
+    TOML 的键与 render_settings 相同，例如 resolution_width = 1920
+    """
+    from components.render_settings import render_settings
+
+    if path is None:
+        return render_settings
+
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    for key, value in data.items():
+        if key not in render_settings:
+            raise ValueError(f"未知的渲染设置: {key}")
+        default = render_settings[key]
+        if isinstance(default, bool) or isinstance(value, bool):
+            # 布尔值不能当作数字
+            valid = isinstance(default, bool) and isinstance(value, bool)
+        elif isinstance(default, float):
+            valid = isinstance(value, (int, float))
+        else:
+            valid = isinstance(value, type(default))
+        if not valid:
+            raise ValueError(f"渲染设置 {key} 的类型应为 {type(default).__name__}: {value!r}")
+        render_settings[key] = value
+    return render_settings
+
+
+def _write_png(path: str, pixels):
+    Image.fromarray(pixels, "RGBA").save(path)
+
+
+def run_batch(scene_path: str, out_dir: str, settings_path: str = None, backend: str = "auto") -> int:
+    """
+    渲染场景的所有帧到 out_dir，返回写出的帧数
+
+    Args:
+        scene_path: 场景 JSON 文件
+        out_dir: 输出目录，帧文件命名为 frame_00000.png
+        settings_path: 渲染设置 TOML 文件
+        backend: 上下文后端，见 headless.context.BACKENDS
+    """
+    scene = load_scene(scene_path)
+    settings = load_render_settings(settings_path)
+    width = settings["resolution_width"]
+    height = settings["resolution_height"]
+    os.makedirs(out_dir, exist_ok=True)
+
+    with HeadlessContext(backend) as context:
+        # 上下文创建之后才能导入使用 OpenGL 的组件
+        from components.viewport import ViewportManager
+
+        viewport = ViewportManager()
+        viewport.width = width
+        viewport.height = height
+        viewport.background_color = scene["background_color"]
+        viewport.square_color = scene["square_color"]
+        viewport.init_opengl_context()
+        if viewport.fallback_mode:
+            raise RuntimeError("离屏帧缓冲初始化失败")
+
+        print(f"批量渲染: {scene['frames']} 帧 {width}x{height}，后端 {context.backend}")
+        start = time.perf_counter()
+
+        # 读回缓冲区只分配一次；PNG 编码在后台线程进行（Pillow 压缩时释放 GIL），与下一帧的渲染重叠
+        readback = np.empty((height, width, 4), dtype=np.uint8)
+        pending = []
+        with ThreadPoolExecutor(max_workers=2) as writer:
+            for index in range(scene["frames"]):
+                # 旋转角度由帧序号决定，结果与渲染速度无关
+                seconds = index / scene["fps"]
+                viewport.rotation_angle = (scene["rotation_angle"] + seconds * scene["rotation_speed"]) % 360.0
+                viewport.render_to_texture(width, height)
+
+                pixels = viewport.read_pixels(readback).copy()
+                path = os.path.join(out_dir, f"frame_{index:05d}.png")
+                pending.append(writer.submit(_write_png, path, pixels))
+
+                if len(pending) >= MAX_PENDING_WRITES:
+                    pending.pop(0).result()
+
+            for future in pending:
+                future.result()
+
+        viewport.cleanup()
+
+    elapsed = time.perf_counter() - start
+    print(f"批量渲染完成: {scene['frames']} 帧，用时 {elapsed:.2f} 秒，输出到 {out_dir}")
+    return scene["frames"]
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+无窗口 OpenGL 上下文
+支持不可见的 GLFW 窗口、EGL（无需显示服务器）和 OSMesa（纯软件渲染），
+在没有 GPU 的 Linux 机器上使用 Mesa 的 llvmpipe 即可运行
+
+PyOpenGL 在第一次导入 OpenGL.GL 时确定平台，select_backend() 必须在此之前调用
+"""
+
+import os
+import sys
+import ctypes
+
+BACKENDS = ("auto", "glfw", "egl", "osmesa")
+
+# 批量渲染使用的 OpenGL 版本（与主窗口一致）
+GL_VERSION = (3, 3)
+
+# PyOpenGL 平台名称
+_PYOPENGL_PLATFORMS = {"egl": "egl", "osmesa": "osmesa"}
+
+# EGL_MESA_platform_surfaceless
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD
+
+
+def has_display() -> bool:
+    """当前环境是否有可用的显示服务器"""
+    if sys.platform != "linux":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def select_backend(backend: str = "auto") -> str:
+    """
+    确定上下文后端并设置 PyOpenGL 平台，返回实际使用的后端
+
+    auto: 有显示服务器时使用不可见的 GLFW 窗口，否则使用 EGL
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的上下文后端: {backend}（可选: {', '.join(BACKENDS)}）")
+    if backend == "auto":
+        backend = "glfw" if has_display() else "egl"
+
+    platform = _PYOPENGL_PLATFORMS.get(backend)
+    if platform is not None:
+        if "OpenGL.GL" in sys.modules and os.environ.get("PYOPENGL_PLATFORM") != platform:
+            raise RuntimeError(f"OpenGL 已经导入，无法切换到 {backend} 后端")
+        os.environ["PYOPENGL_PLATFORM"] = platform
+    return backend
+
+
+class HeadlessContext:
+    """无窗口的 OpenGL 上下文，离屏渲染需要自行创建帧缓冲"""
+
+    def __init__(self, backend: str = "auto"):
+        """
+        Args:
+            backend: "auto"、"glfw"、"egl" 或 "osmesa"
+        """
+        self.backend = select_backend(backend)
+        self._window = None
+        self._egl_display = None
+        self._egl_context = None
+        self._osmesa_context = None
+        self._osmesa_buffer = None
+
+    def create(self):
+        """创建上下文并设为当前上下文"""
+        if self.backend == "glfw":
+            self._create_glfw()
+        elif self.backend == "egl":
+            self._create_egl()
+        else:
+            self._create_osmesa()
+        return self
+
+    def destroy(self):
+        """销毁上下文"""
+        if self._window is not None:
+            import glfw
+            glfw.destroy_window(self._window)
+            glfw.terminate()
+            self._window = None
+        if self._egl_context is not None:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._egl_display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroyContext(self._egl_display, self._egl_context)
+            EGL.eglTerminate(self._egl_display)
+            self._egl_context = None
+        if self._osmesa_context is not None:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._osmesa_context)
+            self._osmesa_context = None
+
+    def __enter__(self):
+        return self.create()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.destroy()
+        return False
+
+    def _create_glfw(self):
+        import glfw
+
+        if not glfw.init():
+            raise RuntimeError("无法初始化GLFW")
+        glfw.window_hint(glfw.VISIBLE, glfw.FALSE)
+        glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, GL_VERSION[0])
+        glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, GL_VERSION[1])
+        glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+
+        self._window = glfw.create_window(16, 16, "batch", None, None)
+        if not self._window:
+            glfw.terminate()
+            raise RuntimeError("无法创建不可见的GLFW窗口")
+        glfw.make_context_current(self._window)
+
+    def _create_egl(self):
+        from OpenGL import EGL
+
+        # 优先使用 Mesa 的无表面平台，不需要显示服务器和 GPU
+        display = EGL.EGL_NO_DISPLAY
+        try:
+            display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+        except Exception:
+            pass
+        if not display:
+            display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("无法初始化EGL")
+
+        config_attribs = (EGL.EGLint * 5)(
+            EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+            EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+            EGL.EGL_NONE
+        )
+        config = EGL.EGLConfig()
+        config_count = EGL.EGLint()
+        if not EGL.eglChooseConfig(display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(config_count)) \
+                or config_count.value == 0:
+            raise RuntimeError("没有可用的EGL配置")
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context_attribs = (EGL.EGLint * 7)(
+            EGL.EGL_CONTEXT_MAJOR_VERSION, GL_VERSION[0],
+            EGL.EGL_CONTEXT_MINOR_VERSION, GL_VERSION[1],
+            EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+            EGL.EGL_NONE
+        )
+        context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, context_attribs)
+        if not context:
+            raise RuntimeError("无法创建EGL上下文")
+
+        # 所有渲染都在帧缓冲对象中进行，不需要表面
+        if not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            raise RuntimeError("无法激活EGL上下文")
+
+        self._egl_display = display
+        self._egl_context = context
+
+    def _create_osmesa(self):
+        from OpenGL import osmesa, arrays
+        import OpenGL.GL as gl
+
+        attribs = [
+            osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+            osmesa.OSMESA_DEPTH_BITS, 24,
+            osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+            osmesa.OSMESA_CONTEXT_MAJOR_VERSION, GL_VERSION[0],
+            osmesa.OSMESA_CONTEXT_MINOR_VERSION, GL_VERSION[1],
+            0
+        ]
+        context = osmesa.OSMesaCreateContextAttribs(attribs, None)
+        if not context:
+            raise RuntimeError("无法创建OSMesa上下文")
+
+        # OSMesa 必须绑定一块颜色缓冲，实际渲染在帧缓冲对象中进行，所以只分配 1x1
+        self._osmesa_buffer = arrays.GLubyteArray.zeros((1, 1, 4))
+        if not osmesa.OSMesaMakeCurrent(context, self._osmesa_buffer, gl.GL_UNSIGNED_BYTE, 1, 1):
+            raise RuntimeError("无法激活OSMesa上下文")
+        self._osmesa_context = context
@@ -1,11 +1,21 @@
 #!/usr/bin/env python3
 import glfw
 import OpenGL.GL as gl
-from imgui_bundle import imgui
+from imgui_bundle import imgui, implot
 import sys
 import ctypes
-from components import show_demo_panels, show_render_settings_panel, show_property_panel, show_outline_panel, ViewportManager, show_viewport_panel
-from themes import apply_theme
+from concurrent.futures import ThreadPoolExecutor
+import components
+from themes import ThemeManager
+from fonts import FontManager, request_glyphs
+from profiling import startup_profiler, frame_profiler, sampling_profiler
+from frame_pacer import frame_pacer, MODE_ADAPTIVE, MODE_CONTINUOUS
+from gpu import shader_manager, render_target_pool
+
+# 默认主题（可选: Classic、Light_Orange、Soft_Cherry）
+DEFAULT_THEME = "Classic"
+# 视图 → 录制帧追踪 / 采样分析 菜单中可选的帧数
+CAPTURE_FRAME_COUNTS = (60, 240, 600)
 
 
 def create_window(width=1280, height=720, title="ImGui App"):
@@ -45,46 +55,77 @@ def init_imgui(window):
     imgui.backends.opengl3_init("#version 130")
 
 
-def run_imgui_app(gui_function, window_title="Pulse", width=1280, height=720):
+def run_imgui_app(gui_function, window_title="Pulse", width=1280, height=720, theme_manager=None):
     """运行ImGui应用程序"""
-    window = create_window(width, height, window_title)
-    init_imgui(window)
+    with startup_profiler.span("create_window"):
+        window = create_window(width, height, window_title)
+    with startup_profiler.span("init_imgui"):
+        init_imgui(window)
+
+    # 主题只在切换或文件修改后应用，不再逐帧解析
+    if theme_manager is None:
+        with startup_profiler.span("ThemeManager"):
+            theme_manager = ThemeManager('./themes/Classic.toml')
 
     # 主循环
     while not glfw.window_should_close(window):
-        glfw.poll_events()
+        # 处理事件；空闲时在这里阻塞，需要刷新时按帧率上限等待
+        frame_pacer.wait_for_next_frame(window)
+        frame_profiler.begin_frame()
+        sampling_profiler.begin_frame()
+        if sampling_profiler.active:
+            # 采样期间保持连续刷新，避免空闲等待占满样本
+            frame_pacer.request_continuous()
+
+        # 应用主题（包含热重载检查）
+        with frame_profiler.scope("theme_update"):
+            theme_manager.update()
+
+        # 着色器源文件热重载检查
+        with frame_profiler.scope("shader_update"):
+            shader_manager.update()
 
         # 开始新帧
-        imgui.backends.opengl3_new_frame()
-        imgui.backends.glfw_new_frame()
-        imgui.new_frame()
+        with frame_profiler.scope("new_frame"):
+            imgui.backends.opengl3_new_frame()
+            imgui.backends.glfw_new_frame()
+            imgui.new_frame()
 
         # 调用用户GUI函数
-        gui_function()
-        
-        # 应用主题
-        apply_theme('./themes/Classic.toml')
-        # apply_theme('./themes/Light_Orange.toml')
-        # apply_theme('./themes/Soft_Cherry.toml')
+        with frame_profiler.scope("gui"):
+            gui_function()
+        frame_pacer.end_frame()
 
         # 渲染
-        imgui.render()
+        with frame_profiler.scope("imgui_render"):
+            imgui.render()
 
-        gl.glClearColor(0.1, 0.1, 0.1, 1)
-        gl.glClear(gl.GL_COLOR_BUFFER_BIT)
+        with frame_profiler.scope("render_draw_data"), frame_profiler.gpu_scope("imgui_draw_gpu"):
+            gl.glClearColor(0.1, 0.1, 0.1, 1)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT)
 
-        imgui.backends.opengl3_render_draw_data(imgui.get_draw_data())
+            imgui.backends.opengl3_render_draw_data(imgui.get_draw_data())
 
         # 处理多视口
         if imgui.get_io().config_flags & imgui.ConfigFlags_.viewports_enable:
-            backup_current_context = glfw.get_current_context()
-            imgui.update_platform_windows()
-            imgui.render_platform_windows_default()
-            glfw.make_context_current(backup_current_context)
+            with frame_profiler.scope("platform_windows"):
+                backup_current_context = glfw.get_current_context()
+                imgui.update_platform_windows()
+                imgui.render_platform_windows_default()
+                glfw.make_context_current(backup_current_context)
 
-        glfw.swap_buffers(window)
+        with frame_profiler.scope("swap_buffers"):
+            glfw.swap_buffers(window)
+        # 释放长时间空闲的渲染目标
+        render_target_pool.end_frame()
+        frame_profiler.end_frame()
+
+        # 启动分析模式下，第一帧显示后输出报告
+        startup_profiler.mark_first_frame()
 
     # 清理
+    if implot.get_current_context() is not None:
+        implot.destroy_context()
     imgui.backends.opengl3_shutdown()
     imgui.backends.glfw_shutdown()
     imgui.destroy_context()
@@ -105,11 +146,29 @@ class ImGuiApp:
         self.show_property_panel = True
         self.show_outline_panel = True
         self.show_viewport = True
+        self.show_profiler = False
+
+        # 资产导入（在后台线程解析，完成后在主线程上传）
+        self.show_import_window = False
+        self.import_path = ""
+        self.import_optimize = True
+        self.import_lods = True
+        self.import_status = ""
+        self._import_executor = None
+        self._import_future = None
 
         # 视口管理器
-        self.viewport_manager = ViewportManager()
+        with startup_profiler.span("ImGuiApp: ViewportManager"):
+            self.viewport_manager = components.ViewportManager()
 
-        # 字体相关
+        # 主题管理器（启动时一次性加载所有主题）
+        with startup_profiler.span("ImGuiApp: load_themes"):
+            self.theme_manager = ThemeManager()
+            self.theme_manager.load_themes()
+            self.theme_manager.set_theme(DEFAULT_THEME)
+
+        # 字体相关（只加载界面用到的字形子集）
+        self.font_manager = FontManager("assets/heiti.ttf", 16.0, emoji_font_path="assets/NotoColorEmoji.ttf")
         self.font = None
         self.font_loaded = False
 
@@ -208,6 +267,28 @@ class ImGuiApp:
                 imgui.separator()
                 if imgui.menu_item("变色视口", "", False, True)[0]:
                     self.show_viewport = not self.show_viewport
+                if imgui.menu_item("性能分析", "", self.show_profiler, True)[0]:
+                    self.show_profiler = not self.show_profiler
+                if imgui.begin_menu("录制帧追踪", not frame_profiler.trace_active):
+                    for frame_count in CAPTURE_FRAME_COUNTS:
+                        if imgui.menu_item(f"{frame_count} 帧", "", False, True)[0]:
+                            self.record_frame_trace(frame_count)
+                    imgui.end_menu()
+                if imgui.begin_menu("采样分析后续帧", not sampling_profiler.active):
+                    for frame_count in CAPTURE_FRAME_COUNTS:
+                        if imgui.menu_item(f"{frame_count} 帧", "", False, True)[0]:
+                            self.profile_next_frames(frame_count)
+                    imgui.end_menu()
+                imgui.separator()
+                if imgui.begin_menu("帧率", True):
+                    self.show_frame_rate_menu()
+                    imgui.end_menu()
+                if imgui.begin_menu("主题", True):
+                    for theme_name in self.theme_manager.theme_names:
+                        is_active = theme_name == self.theme_manager.active_name
+                        if imgui.menu_item(theme_name, "", is_active, True)[0]:
+                            self.theme_manager.set_theme(theme_name)
+                    imgui.end_menu()
                 imgui.end_menu()
 
             # 帮助菜单
@@ -218,6 +299,19 @@ class ImGuiApp:
 
             imgui.end_main_menu_bar()
 
+    def show_frame_rate_menu(self):
+        """显示帧率设置菜单"""
+        if imgui.menu_item("自适应（空闲时休眠）", "", frame_pacer.mode == MODE_ADAPTIVE, True)[0]:
+            frame_pacer.mode = MODE_ADAPTIVE
+        if imgui.menu_item("连续刷新", "", frame_pacer.mode == MODE_CONTINUOUS, True)[0]:
+            frame_pacer.mode = MODE_CONTINUOUS
+        imgui.separator()
+        imgui.set_next_item_width(120)
+        _, frame_pacer.focused_fps = imgui.slider_int("聚焦帧率上限", frame_pacer.focused_fps, 0, 240)
+        imgui.set_next_item_width(120)
+        _, frame_pacer.unfocused_fps = imgui.slider_int("未聚焦帧率上限", frame_pacer.unfocused_fps, 0, 240)
+        imgui.text_disabled("0 表示不限制")
+
     def show_about_window(self):
         """显示关于窗口"""
         if self.show_about:
@@ -254,7 +348,75 @@ class ImGuiApp:
 
     def import_assets(self):
         """导入资产"""
-        print("执行导入资产操作")
+        self.show_import_window = True
+
+    def start_mesh_import(self, path: str):
+        """在后台线程导入网格文件（解析结果或缓存读取）"""
+        from mesh_import import import_mesh
+
+        if self._import_future is not None:
+            return
+        if self._import_executor is None:
+            self._import_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mesh-import")
+        self.import_status = f"正在导入 {path} ..."
+        # 路径和错误信息中可能有字体子集之外的字符
+        request_glyphs(self.import_status)
+        self._import_future = self._import_executor.submit(import_mesh, path, optimize=self.import_optimize,
+                                                          lods=self.import_lods)
+
+    def poll_mesh_import(self):
+        """导入完成后把网格上传到视口（OpenGL 调用必须在主线程）"""
+        future = self._import_future
+        if future is None:
+            return
+        if not future.done():
+            # 保持刷新以便及时取回结果
+            frame_pacer.request_continuous()
+            return
+        self._import_future = None
+        try:
+            mesh = future.result()
+        except Exception as e:
+            self.import_status = f"导入失败: {e}"
+            request_glyphs(self.import_status)
+            print(self.import_status)
+            return
+
+        name = self.viewport_manager.add_imported_mesh(mesh)
+        source = "缓存" if mesh.from_cache else "解析"
+        self.import_status = (f"已导入 {name}: {mesh.vertex_count} 个顶点，{mesh.triangle_count} 个三角形，"
+                              f"{source}用时 {mesh.load_seconds * 1000.0:.1f} ms")
+        if mesh.optimization is not None:
+            from mesh_import.optimize import format_report
+            self.import_status += f"\n{format_report(mesh.optimization)}"
+        if mesh.lods is not None:
+            from mesh_import.simplify import format_lods
+            self.import_status += f"\n{format_lods(mesh.triangle_count, mesh.lods)}"
+        request_glyphs(self.import_status)
+        print(self.import_status)
+
+    def show_import_asset_window(self):
+        """显示资产导入窗口"""
+        from mesh_import import SUPPORTED_EXTENSIONS
+
+        imgui.set_next_window_size(imgui.ImVec2(480, 180), imgui.Cond_.first_use_ever)
+        expanded, self.show_import_window = imgui.begin("导入资产", self.show_import_window)
+        if expanded:
+            imgui.text(f"网格文件（{' '.join(SUPPORTED_EXTENSIONS)}）:")
+            imgui.set_next_item_width(-80)
+            entered, self.import_path = imgui.input_text("##import_path", self.import_path,
+                                                         imgui.InputTextFlags_.enter_returns_true)
+            imgui.same_line()
+            busy = self._import_future is not None
+            imgui.begin_disabled(busy or not self.import_path)
+            if imgui.button("导入") or (entered and not busy and self.import_path):
+                self.start_mesh_import(self.import_path)
+            imgui.end_disabled()
+            _, self.import_optimize = imgui.checkbox("优化顶点缓存和过度绘制", self.import_optimize)
+            _, self.import_lods = imgui.checkbox("生成细节层次（LOD）", self.import_lods)
+            if self.import_status:
+                imgui.text_wrapped(self.import_status)
+        imgui.end()
 
     def undo(self):
         """撤销操作"""
@@ -282,23 +444,24 @@ class ImGuiApp:
         """导出当前帧"""
         print("导出当前帧")
 
+    def record_frame_trace(self, frame_count: int):
+        """录制接下来若干帧并导出 Chrome trace JSON"""
+        trace = frame_profiler.start_trace(frame_count)
+        print(f"开始录制帧追踪: {frame_count} 帧 -> {trace.path}")
+
+    def profile_next_frames(self, frame_count: int):
+        """对接下来若干帧进行采样分析，结果显示在性能分析面板中"""
+        sampling_profiler.start(frame_count)
+        self.show_profiler = True
+        print(f"开始采样分析: {frame_count} 帧 -> {sampling_profiler.path}")
+
     def load_custom_font(self):
         """加载自定义字体"""
+        io = imgui.get_io()
         try:
-            io = imgui.get_io()
-
-            # 加载汉字字体
-            font_path = "assets/heiti.ttf"
-            self.font = io.fonts.add_font_from_file_ttf(
-                font_path,
-                16.0  # 字体大小
-            )
-            
-            # 加载彩色表情字体
-            self.emoji_font = io.fonts.add_font_from_file_ttf(
-                "assets/NotoColorEmoji.ttf",
-                16.0  # 字体大小
-            )
+            # 加载汉字字体和彩色表情字体的字形子集
+            self.font = self.font_manager.load()
+            self.emoji_font = self.font_manager.emoji_font
 
         except Exception as e:
             print(f"字体加载失败: {e}")
@@ -308,16 +471,22 @@ class ImGuiApp:
     def gui(self):
         """主要的GUI函数"""
         # 处理快捷键
-        self.handle_shortcuts()
+        with frame_profiler.scope("handle_shortcuts"):
+            self.handle_shortcuts()
 
         # 在第一次运行时加载字体
         if not self.font_loaded:
-            self.load_custom_font()
+            with startup_profiler.span("ImGuiApp: load_custom_font"):
+                self.load_custom_font()
             self.font_loaded = True
+        else:
+            # 合并运行时新出现的字符
+            self.font_manager.update()
 
         # 在第一次运行时初始化 OpenGL viewport
         if not hasattr(self, '_opengl_initialized'):
-            self.viewport_manager.init_opengl_context()
+            with startup_profiler.span("ImGuiApp: init_opengl_context"):
+                self.viewport_manager.init_opengl_context()
             self._opengl_initialized = True
 
         # 应用自定义字体
@@ -326,25 +495,40 @@ class ImGuiApp:
 
         # 创建界面
         imgui.dock_space_over_viewport()
-        self.create_menu_bar()
-        # self.recording = show_demo_panels(self.file_path, self.recording, self.render_preview)
+        with frame_profiler.scope("create_menu_bar"):
+            self.create_menu_bar()
+        # self.recording = components.show_demo_panels(self.file_path, self.recording, self.render_preview)
         self.show_about_window()
 
+        # 资产导入
+        self.poll_mesh_import()
+        if self.show_import_window:
+            self.show_import_asset_window()
+
         # 显示渲染设置面板
         if self.show_render_settings:
-            self.show_render_settings = show_render_settings_panel(self.show_render_settings)
+            with frame_profiler.scope("show_render_settings_panel"):
+                self.show_render_settings = components.show_render_settings_panel(self.show_render_settings)
 
         # 显示属性面板
         if self.show_property_panel:
-            self.show_property_panel = show_property_panel(self.show_property_panel)
+            with frame_profiler.scope("show_property_panel"):
+                self.show_property_panel = components.show_property_panel(self.show_property_panel)
 
         # 显示大纲面板
         if self.show_outline_panel:
-            self.show_outline_panel = show_outline_panel(self.show_outline_panel)
+            with frame_profiler.scope("show_outline_panel"):
+                self.show_outline_panel = components.show_outline_panel(self.show_outline_panel)
 
         # 显示视口
         if self.show_viewport:
-            self.show_viewport = show_viewport_panel(self.viewport_manager, self.show_viewport)
+            with frame_profiler.scope("show_viewport_panel"):
+                self.show_viewport = components.show_viewport_panel(self.viewport_manager, self.show_viewport)
+
+        # 显示性能分析面板
+        if self.show_profiler:
+            with frame_profiler.scope("show_profiler_panel"):
+                self.show_profiler = components.show_profiler_panel(self.show_profiler)
 
         # 恢复字体
         if self.font:
@@ -353,8 +537,9 @@ class ImGuiApp:
 
 def main():
     """主函数"""
-    app = ImGuiApp()
-    run_imgui_app(app.gui, "Pulse")
+    with startup_profiler.span("ImGuiApp"):
+        app = ImGuiApp()
+    run_imgui_app(app.gui, "Pulse", theme_manager=app.theme_manager)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,5 @@
+from mesh_import.mesh_data import MeshData, MeshImportError, MESH_VERTEX_DTYPE
+from mesh_import.mesh_cache import MeshCache, read_chunks, write_chunks
+from mesh_import.importer import import_mesh, mesh_cache, SUPPORTED_EXTENSIONS
+from mesh_import.optimize import optimize_mesh, acmr, DEFAULT_CACHE_SIZE
+from mesh_import.simplify import simplify, generate_lods, LOD_RATIO
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+glTF 2.0 解析（.gltf + 外部/内嵌缓冲，以及 .glb）
+访问器直接按 componentType / byteStride 用 np.frombuffer 映射为数组；
+场景中所有节点引用的三角形图元按节点的世界变换合并为一个网格
+"""
+
+import os
+import json
+import base64
+import struct
+import numpy as np
+from mesh_import.mesh_data import MeshData, MeshImportError, build_indexed_mesh
+
+# componentType -> NumPy 类型
+_COMPONENT_TYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+
+_TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+_GLB_MAGIC = b"glTF"
+_GLB_HEADER = struct.Struct("<4sII")
+_GLB_CHUNK = struct.Struct("<II")
+_CHUNK_JSON = 0x4E4F534A
+_CHUNK_BIN = 0x004E4942
+
+# 图元模式: 三角形
+_MODE_TRIANGLES = 4
+
+
+def _split_glb(data: bytes):
+    """返回 (JSON 文档, BIN 块)"""
+    magic, version, length = _GLB_HEADER.unpack_from(data, 0)
+    if magic != _GLB_MAGIC or version != 2:
+        raise MeshImportError("不支持的 GLB 文件")
+    offset = _GLB_HEADER.size
+    document = None
+    binary = None
+    while offset < min(length, len(data)):
+        chunk_length, chunk_type = _GLB_CHUNK.unpack_from(data, offset)
+        offset += _GLB_CHUNK.size
+        chunk = data[offset:offset + chunk_length]
+        if chunk_type == _CHUNK_JSON:
+            document = json.loads(bytes(chunk).decode("utf-8"))
+        elif chunk_type == _CHUNK_BIN and binary is None:
+            binary = chunk
+        offset += chunk_length
+    if document is None:
+        raise MeshImportError("GLB 文件缺少 JSON 块")
+    return document, binary
+
+
+def referenced_files(path: str) -> list:
+    """.gltf 引用的外部缓冲文件（缓存键需要包含它们的内容）"""
+    if not path.lower().endswith(".gltf"):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    base_dir = os.path.dirname(path)
+    return [os.path.join(base_dir, buffer["uri"]) for buffer in document.get("buffers", [])
+            if "uri" in buffer and not buffer["uri"].startswith("data:")]
+
+
+class _Document:
+    """glTF 文档和它的缓冲"""
+
+    def __init__(self, document: dict, binary, base_dir: str):
+        self.document = document
+        self.buffers = []
+        for index, buffer in enumerate(document.get("buffers", [])):
+            uri = buffer.get("uri")
+            if uri is None:
+                if binary is None:
+                    raise MeshImportError("glTF 缓冲缺少数据")
+                self.buffers.append(memoryview(binary))
+            elif uri.startswith("data:"):
+                self.buffers.append(memoryview(base64.b64decode(uri.split(",", 1)[1])))
+            else:
+                with open(os.path.join(base_dir, uri), "rb") as f:
+                    self.buffers.append(memoryview(f.read()))
+
+    def accessor(self, index: int) -> np.ndarray:
+        """访问器数据，返回 (count, 分量数) 或 (count,) 数组"""
+        accessor = self.document["accessors"][index]
+        if "sparse" in accessor:
+            raise MeshImportError("不支持稀疏访问器")
+        dtype = np.dtype(_COMPONENT_TYPES[accessor["componentType"]])
+        components = _TYPE_SIZES[accessor["type"]]
+        count = accessor["count"]
+        if "bufferView" not in accessor:
+            return np.zeros((count, components) if components > 1 else count, dtype=dtype)
+
+        view = self.document["bufferViews"][accessor["bufferView"]]
+        buffer = self.buffers[view["buffer"]]
+        offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        element_size = dtype.itemsize * components
+        stride = view.get("byteStride", element_size)
+        if count and offset + stride * (count - 1) + element_size > len(buffer):
+            raise MeshImportError("glTF 访问器超出缓冲范围")
+
+        # 交错存放时按步长取视图，不复制
+        array = np.ndarray((count, components), dtype=dtype, buffer=buffer, offset=offset,
+                           strides=(stride, dtype.itemsize))
+        if accessor.get("normalized") and dtype.kind in "iu":
+            array = np.maximum(array / np.float32(np.iinfo(dtype).max), -1.0).astype(np.float32)
+        return array if components > 1 else array[:, 0]
+
+
+def _node_matrix(node: dict) -> np.ndarray:
+    """节点的局部变换（数学约定，列向量）"""
+    if "matrix" in node:
+        return np.asarray(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    x, y, z, w = node.get("rotation", (0.0, 0.0, 0.0, 1.0))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.identity(4)
+    matrix[:3, :3] = rotation * np.asarray(node.get("scale", (1.0, 1.0, 1.0)))
+    matrix[:3, 3] = node.get("translation", (0.0, 0.0, 0.0))
+    return matrix
+
+
+def _mesh_instances(document: dict):
+    """遍历默认场景，返回 [(网格序号, 世界变换)]"""
+    nodes = document.get("nodes", [])
+    scenes = document.get("scenes")
+    if scenes:
+        roots = scenes[document.get("scene", 0)].get("nodes", [])
+    else:
+        children = {child for node in nodes for child in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+
+    instances = []
+    stack = [(root, np.identity(4)) for root in roots]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ _node_matrix(node)
+        if "mesh" in node:
+            instances.append((node["mesh"], world))
+        stack.extend((child, world) for child in node.get("children", []))
+    if not nodes and document.get("meshes"):
+        # 没有节点时直接使用所有网格
+        instances = [(i, np.identity(4)) for i in range(len(document["meshes"]))]
+    return instances
+
+
+def parse_gltf(data: bytes, name: str = "gltf", base_dir: str = ".") -> MeshData:
+    """解析 .gltf（JSON）或 .glb 文件内容"""
+    if data[:4] == _GLB_MAGIC:
+        document, binary = _split_glb(data)
+    else:
+        document, binary = json.loads(data.decode("utf-8")), None
+    gltf = _Document(document, binary, base_dir)
+
+    positions, normals, uvs, indices = [], [], [], []
+    vertex_offset = 0
+    has_uvs = False
+    for mesh_index, world in _mesh_instances(document):
+        normal_matrix = np.linalg.inv(world[:3, :3]).T
+        for primitive in document["meshes"][mesh_index].get("primitives", []):
+            if primitive.get("mode", _MODE_TRIANGLES) != _MODE_TRIANGLES:
+                continue
+            attributes = primitive["attributes"]
+            if "POSITION" not in attributes:
+                continue
+            position = gltf.accessor(attributes["POSITION"]).astype(np.float64)
+            count = len(position)
+            positions.append(position @ world[:3, :3].T + world[:3, 3])
+
+            if "NORMAL" in attributes:
+                normal = gltf.accessor(attributes["NORMAL"]) @ normal_matrix.T
+                length = np.linalg.norm(normal, axis=1, keepdims=True)
+                normals.append(np.divide(normal, length, out=np.zeros_like(normal), where=length > 0))
+            else:
+                normals.append(None)
+
+            if "TEXCOORD_0" in attributes:
+                uvs.append(gltf.accessor(attributes["TEXCOORD_0"]))
+                has_uvs = True
+            else:
+                uvs.append(np.zeros((count, 2), dtype=np.float32))
+
+            if "indices" in primitive:
+                primitive_indices = gltf.accessor(primitive["indices"]).astype(np.int64)
+            else:
+                primitive_indices = np.arange(count, dtype=np.int64)
+            indices.append(primitive_indices + vertex_offset)
+            vertex_offset += count
+
+    if not positions:
+        raise MeshImportError("glTF 文件中没有三角形网格")
+
+    if any(normal is None for normal in normals):
+        # 部分图元缺少法线时全部重新计算
+        merged_normals = None
+    else:
+        merged_normals = np.concatenate(normals)
+    return build_indexed_mesh(
+        name,
+        np.concatenate(positions),
+        np.concatenate(indices),
+        np.concatenate(uvs) if has_uvs else None,
+        merged_normals,
+    )
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+网格导入入口
+按扩展名选择解析器；结果写入内容哈希缓存，源文件未修改时直接内存映射缓存文件，
+重新导入大网格只需要几毫秒
+
+可选的优化阶段（顶点缓存、过度绘制、顶点读取顺序）的结果作为同一源文件的另一个变体
+缓存在旁边，名称为 <网格名>.opt-<哈希>.mesh；生成的 LOD 变体 <网格名>[.opt].lod-<哈希>.mesh
+只保存 LOD 索引，顶点和原索引仍从不带 LOD 的缓存读取
+"""
+
+import os
+import time
+import numpy as np
+from mesh_import.mesh_data import MeshData, MeshImportError
+from mesh_import.mesh_cache import MeshCache
+from mesh_import.obj import parse_obj
+from mesh_import.ply import parse_ply
+from mesh_import.gltf import parse_gltf, referenced_files
+from mesh_import.optimize import optimize_mesh, format_report, DEFAULT_CACHE_SIZE, OPTIMIZE_VERSION
+from mesh_import.simplify import generate_lods, format_lods, LOD_VERSION
+
+SUPPORTED_EXTENSIONS = (".obj", ".ply", ".gltf", ".glb")
+
+
+def _parse(path: str, name: str) -> MeshData:
+    """读取并解析源文件"""
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "rb") as f:
+        data = f.read()
+    if extension == ".obj":
+        return parse_obj(data, name)
+    if extension == ".ply":
+        return parse_ply(data, name)
+    return parse_gltf(data, name, os.path.dirname(path))
+
+
+def mesh_name(path: str) -> str:
+    """由文件名得到网格名称"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def source_files(path: str) -> list:
+    """源文件及其引用的文件"""
+    return [path] + referenced_files(path)
+
+
+def mesh_to_chunks(mesh: MeshData):
+    """网格 -> (缓存数据块, 元数据)"""
+    low, high = mesh.bounds
+    chunks = {"vertices": mesh.vertices, "indices": mesh.indices}
+    meta = {"name": mesh.name, "bounds": [np.asarray(low).tolist(), np.asarray(high).tolist()]}
+    if mesh.optimization is not None:
+        meta["optimization"] = mesh.optimization
+    return chunks, meta
+
+
+def lods_to_chunks(mesh: MeshData):
+    """网格的 LOD -> (缓存数据块, 元数据)，记录原索引数以确认与基础网格对应"""
+    return {"lod_indices": mesh.lod_indices}, {"lods": mesh.lods, "index_count": len(mesh.indices)}
+
+
+def mesh_from_chunks(chunks: dict, meta: dict) -> MeshData:
+    """缓存数据块 -> 网格（数组保持内存映射）"""
+    mesh = MeshData(meta["name"], chunks["vertices"], chunks["indices"])
+    low, high = meta["bounds"]
+    mesh.bounds = (np.array(low, dtype=np.float32), np.array(high, dtype=np.float32))
+    mesh.optimization = meta.get("optimization")
+    return mesh
+
+
+def import_mesh(path: str, use_cache: bool = True, optimize: bool = False,
+                cache_size: int = DEFAULT_CACHE_SIZE, lods: bool = False) -> MeshData:
+    """
+    导入网格文件
+
+    Args:
+        path: .obj / .ply / .gltf / .glb 文件
+        use_cache: 是否读取和写入二进制缓存
+        optimize: 是否执行顶点缓存/过度绘制优化（结果同样缓存）
+        cache_size: 优化目标的后变换缓存大小
+        lods: 是否生成简化的 LOD 索引（mesh.lod_indices / mesh.lods，结果同样缓存）
+    Returns:
+        MeshData，来自缓存时 vertices/indices 是只读的 np.memmap
+    Raises:
+        MeshImportError: 格式不支持或文件内容有误
+        OSError: 无法读取文件
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise MeshImportError(f"不支持的网格格式: {extension}（可选: {', '.join(SUPPORTED_EXTENSIONS)}）")
+
+    start = time.perf_counter()
+    name = mesh_name(path)
+    variant = f"opt{OPTIMIZE_VERSION}-c{cache_size}" if optimize else ""
+    cache_name = f"{name}.opt" if optimize else name
+    if lods:
+        return _import_lods(path, name, cache_name, variant, use_cache, optimize, cache_size, start)
+
+    cache_path = None
+    if use_cache:
+        cache_path = mesh_cache.path_for(cache_name, mesh_cache.key(source_files(path), variant))
+        cached = mesh_cache.load(cache_path, source=path)
+        if cached is not None:
+            mesh = mesh_from_chunks(*cached)
+            mesh.from_cache = True
+            mesh.load_seconds = time.perf_counter() - start
+            return mesh
+
+    if optimize:
+        # 未优化的结果本身也有缓存，源文件未修改时不再解析
+        mesh, report = optimize_mesh(import_mesh(path, use_cache), cache_size)
+        mesh.optimization = report
+        print(f"网格优化 {name}: {format_report(report)}，用时 {report['seconds']:.2f} 秒")
+    else:
+        mesh = _parse(path, name)
+
+    if cache_path is not None:
+        try:
+            mesh_cache.store(cache_path, *mesh_to_chunks(mesh), source=path)
+        except OSError as e:
+            print(f"警告: 写入网格缓存失败: {e}")
+    mesh.load_seconds = time.perf_counter() - start
+    return mesh
+
+
+def _import_lods(path: str, name: str, cache_name: str, variant: str, use_cache: bool, optimize: bool,
+                 cache_size: int, start: float) -> MeshData:
+    """导入带 LOD 的网格: 基础网格（或优化结果）走自己的缓存，LOD 变体只缓存 LOD 索引"""
+    mesh = import_mesh(path, use_cache, optimize, cache_size)
+    cache_path = None
+    if use_cache:
+        cache_path = mesh_cache.path_for(f"{cache_name}.lod",
+                                         mesh_cache.key(source_files(path), f"{variant}-lod{LOD_VERSION}"))
+        cached = mesh_cache.load(cache_path, source=path)
+        # 基础网格的缓存被重新生成后索引数不同时，LOD 缓存作废
+        if cached is not None and cached[1].get("index_count") == len(mesh.indices):
+            mesh.lod_indices = cached[0]["lod_indices"]
+            mesh.lods = cached[1]["lods"]
+            mesh.load_seconds = time.perf_counter() - start
+            return mesh
+
+    lod_start = time.perf_counter()
+    # LOD 索引引用基础网格的同一组顶点
+    mesh.lod_indices, mesh.lods = generate_lods(mesh, cache_size=cache_size if optimize else None)
+    mesh.from_cache = False
+    print(f"网格 LOD {name}: {format_lods(mesh.triangle_count, mesh.lods)}，"
+          f"用时 {time.perf_counter() - lod_start:.2f} 秒")
+
+    if cache_path is not None:
+        try:
+            mesh_cache.store(cache_path, *lods_to_chunks(mesh), source=path)
+        except OSError as e:
+            print(f"警告: 写入网格缓存失败: {e}")
+    mesh.load_seconds = time.perf_counter() - start
+    return mesh
+
+
+# 全局网格缓存
+mesh_cache = MeshCache()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+网格二进制缓存
+导入结果按 源文件内容哈希 缓存为分块文件，之后用 np.memmap 打开，
+数组直接交给 glBufferData 上传，不经过解析也不复制
+
+文件格式:
+    8 字节魔数 | uint32 头部长度 | JSON 头部 | 按 CHUNK_ALIGNMENT 对齐的数据块 ...
+JSON 头部记录每个数据块的 dtype、形状和偏移，以及网格元数据（名称、包围盒等）
+"""
+
+import os
+import json
+import struct
+import hashlib
+import numpy as np
+from numpy.lib.format import dtype_to_descr, descr_to_dtype
+
+MESH_CACHE_DIR = os.path.join(".cache", "meshes")
+MESH_INDEX_FILE = "index.json"
+MESH_FILE_EXTENSION = ".mesh"
+
+# 解析或文件格式变化时递增，旧缓存自动失效
+MESH_CACHE_VERSION = 1
+
+_MAGIC = b"SRMESH\x00\x01"
+_HEADER_LENGTH = struct.Struct("<I")
+# 数据块对齐（字节）
+CHUNK_ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + CHUNK_ALIGNMENT - 1) // CHUNK_ALIGNMENT * CHUNK_ALIGNMENT
+
+
+def write_chunks(path: str, chunks: dict, meta: dict = None):
+    """
+    写出分块文件（先写临时文件再替换）
+
+    Args:
+        path: 输出路径
+        chunks: 名称 -> NumPy 数组
+        meta: 写入头部的 JSON 元数据
+    """
+    entries = {}
+    for name, array in chunks.items():
+        entries[name] = {"dtype": dtype_to_descr(array.dtype), "shape": list(array.shape)}
+    header = {"chunks": entries, "meta": meta or {}}
+
+    # 偏移依赖头部长度，头部长度又依赖偏移的位数: 预留足够的空间后再填写
+    header_bytes = json.dumps(header).encode("utf-8")
+    offset = _align(len(_MAGIC) + _HEADER_LENGTH.size + len(header_bytes) + 32 * len(chunks) + 64)
+    data_start = offset
+    for name, array in chunks.items():
+        entries[name]["offset"] = offset
+        offset = _align(offset + array.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    if len(_MAGIC) + _HEADER_LENGTH.size + len(header_bytes) > data_start:
+        raise RuntimeError("网格缓存头部过长")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in chunks.items():
+            f.seek(entries[name]["offset"])
+            f.write(np.ascontiguousarray(array).data)
+        f.truncate(offset)
+    os.replace(tmp_path, path)
+
+
+def read_chunks(path: str):
+    """
+    以内存映射方式打开分块文件
+
+    Returns:
+        (名称 -> np.memmap, 元数据)
+    """
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"不是网格缓存文件: {path}")
+        (length,) = _HEADER_LENGTH.unpack(f.read(_HEADER_LENGTH.size))
+        header = json.loads(f.read(length).decode("utf-8"))
+
+    chunks = {}
+    for name, entry in header["chunks"].items():
+        dtype = descr_to_dtype(entry["dtype"])
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            # 长度为 0 的数组不能映射
+            chunks[name] = np.zeros(shape, dtype=dtype)
+        else:
+            chunks[name] = np.memmap(path, dtype=dtype, mode="r", offset=entry["offset"], shape=shape)
+    return chunks, header["meta"]
+
+
+class MeshCache:
+    """按源文件内容哈希索引的网格缓存"""
+
+    def __init__(self, cache_dir: str = MESH_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._index_path = os.path.join(cache_dir, MESH_INDEX_FILE)
+        self._index = self._read_index()
+
+    def file_hash(self, path: str) -> str:
+        """
+        获取文件内容的哈希
+
+        文件大小和修改时间不变时直接使用索引中记录的哈希，重新导入未修改的大文件时不必读取整个文件
+        """
+        stat = os.stat(path)
+        key = os.path.abspath(path)
+        entry = self._index.get("files", {}).get(key)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha1"]
+
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        self._index.setdefault("files", {})[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha1": digest.hexdigest()
+        }
+        self._write_index()
+        return digest.hexdigest()
+
+    def key(self, paths, variant: str = "") -> str:
+        """
+        由源文件（主文件和它引用的文件）内容、缓存版本和变体名生成缓存键
+
+        Args:
+            paths: 源文件路径列表
+            variant: 同一源文件的不同处理结果（例如优化后的网格）
+        """
+        digest = hashlib.sha1(f"v{MESH_CACHE_VERSION}|{variant}".encode("utf-8"))
+        for path in paths:
+            digest.update(self.file_hash(path).encode("ascii"))
+        return digest.hexdigest()
+
+    def path_for(self, name: str, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{name}-{key[:16]}{MESH_FILE_EXTENSION}")
+
+    def load(self, path: str, source: str = None):
+        """
+        读取缓存文件，不存在或损坏时返回 None
+
+        Args:
+            path: path_for() 得到的缓存路径
+            source: 源文件路径；内容相同的不同源文件共用一个缓存，命中时也记为它的使用者
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            cached = read_chunks(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"警告: 网格缓存损坏，重新导入: {path}: {e}")
+            return None
+        if source is not None and self._add_owner(path, source):
+            self._write_index()
+        return cached
+
+    def store(self, path: str, chunks: dict, meta: dict, source: str = None):
+        """
+        写入缓存并删除同一源文件的旧缓存
+
+        Args:
+            path: path_for() 得到的缓存路径
+            chunks, meta: 写入的数据块和元数据
+            source: 源文件路径；记录在索引中，只删除属于同一源文件的旧缓存，None 时不删除
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        write_chunks(path, chunks, meta)
+        if source is not None:
+            self._add_owner(path, source)
+            self._remove_stale(path, os.path.abspath(source))
+            self._write_index()
+
+    def _add_owner(self, path: str, source: str) -> bool:
+        """把源文件记为缓存文件的使用者，返回索引是否变化"""
+        owners = self._index.setdefault("owners", {}).setdefault(os.path.basename(path), [])
+        source = os.path.abspath(source)
+        if source in owners:
+            return False
+        owners.append(source)
+        return True
+
+    def _remove_stale(self, keep_path: str, source: str):
+        """
+        source 不再使用同一网格的旧缓存文件，没有其他使用者的文件被删除（已打开的内存映射在 Linux 上不受影响）
+
+        不同目录中的同名文件（a/chair.obj 和 b/chair.obj）缓存文件名前缀相同，按索引中记录的使用者区分；
+        没有记录使用者的缓存不删除
+        """
+        owners = self._index.get("owners", {})
+        prefix = os.path.basename(keep_path).rsplit("-", 1)[0] + "-"
+        for file_name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, file_name)
+            if (file_name.startswith(prefix) and file_name.endswith(MESH_FILE_EXTENSION)
+                    and path != keep_path and "-" not in file_name[len(prefix):]
+                    and source in owners.get(file_name, ())):
+                owners[file_name].remove(source)
+                if owners[file_name]:
+                    continue
+                del owners[file_name]
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _read_index(self) -> dict:
+        """读取缓存索引"""
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self):
+        """写入缓存索引"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._index_path)
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+导入网格的数据结构
+解析器输出的 位置/纹理坐标/法线 各自独立编号的角点索引在这里去重为索引缓冲，
+顶点交错存放为 MESH_VERTEX_DTYPE，可以直接（或从内存映射的缓存文件）上传到 VBO
+
+本模块不导入 OpenGL，可以在创建上下文之前使用
+"""
+
+import numpy as np
+
+# 交错顶点格式: 位置 vec3 + 法线 vec3 + 纹理坐标 vec2（float32，32 字节）
+MESH_VERTEX_DTYPE = np.dtype([
+    ("position", np.float32, 3),
+    ("normal", np.float32, 3),
+    ("uv", np.float32, 2),
+])
+
+
+class MeshImportError(ValueError):
+    """网格文件格式错误或包含不支持的特性"""
+
+
+class MeshData:
+    """CPU 端的索引网格"""
+
+    def __init__(self, name: str, vertices: np.ndarray, indices: np.ndarray):
+        """
+        Args:
+            name: 网格名称
+            vertices: MESH_VERTEX_DTYPE 结构化数组（可以是 np.memmap）
+            indices: uint32 三角形索引（可以是 np.memmap）
+        """
+        self.name = name
+        self.vertices = vertices
+        self.indices = indices
+        # 由导入器填写: 是否来自缓存、导入耗时（秒）、优化报告（见 mesh_import.optimize）
+        self.from_cache = False
+        self.load_seconds = 0.0
+        self.optimization = None
+        # LOD 索引（mesh_import.simplify.generate_lods）: 各级索引依次拼接，lods 为每级的
+        # {"first", "count", "error"}，未生成时为 None
+        self.lod_indices = None
+        self.lods = None
+        self._bounds = None
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.indices) // 3
+
+    @property
+    def bounds(self):
+        """轴对齐包围盒 (min, max)，各为 float32 (3,)"""
+        if self._bounds is None:
+            if self.vertex_count == 0:
+                zero = np.zeros(3, dtype=np.float32)
+                self._bounds = (zero, zero)
+            else:
+                positions = self.vertices["position"]
+                self._bounds = (positions.min(axis=0), positions.max(axis=0))
+        return self._bounds
+
+    @bounds.setter
+    def bounds(self, value):
+        self._bounds = value
+
+
+def triangulate_fans(corner_counts: np.ndarray) -> np.ndarray:
+    """
+    把多边形按扇形拆成三角形
+
+    Args:
+        corner_counts: (F,) 每个多边形的角点数，角点在角点数组中连续存放
+    Returns:
+        (T, 3) 三角形的角点序号
+    """
+    corner_counts = np.asarray(corner_counts, dtype=np.int64)
+    if (corner_counts < 3).any():
+        raise MeshImportError("存在少于 3 个角点的面")
+    if (corner_counts == 3).all():
+        return np.arange(3 * len(corner_counts)).reshape(-1, 3)
+    triangle_counts = corner_counts - 2
+    face_offsets = np.cumsum(corner_counts) - corner_counts
+
+    face_of_triangle = np.repeat(np.arange(len(corner_counts)), triangle_counts)
+    first_triangle = np.cumsum(triangle_counts) - triangle_counts
+    fan_step = np.arange(int(triangle_counts.sum())) - np.repeat(first_triangle, triangle_counts)
+    base = face_offsets[face_of_triangle]
+    return np.stack([base, base + fan_step + 1, base + fan_step + 2], axis=1)
+
+
+def weld_corners(corners: np.ndarray):
+    """
+    对角点（位置, 纹理坐标, 法线 的索引三元组）去重
+
+    Args:
+        corners: (C, 3) int64，缺失的分量为 -1
+    Returns:
+        (unique_corners, indices): 去重后的三元组（按第一次出现的顺序，顶点读取更连续）
+        和 (C,) uint32 的顶点编号
+    """
+    if len(corners) == 0:
+        return corners.reshape(0, 3), np.zeros(0, dtype=np.uint32)
+
+    shifted = corners + 1
+    sizes = shifted.max(axis=0) + 1
+    if float(sizes[0]) * float(sizes[1]) * float(sizes[2]) < 2.0 ** 62:
+        # 三个分量打包成一个 int64 键，一维 unique 比按行 unique 快得多
+        keys = (shifted[:, 0] * sizes[1] + shifted[:, 1]) * sizes[2] + shifted[:, 2]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+    else:
+        unique_keys, inverse = np.unique(shifted, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+    # 每个键第一次出现的位置: 倒序写入，重复的键保留最后写入的（即最靠前的）位置；
+    # 比 return_index 需要的稳定排序快
+    first = np.empty(len(unique_keys), dtype=np.int64)
+    first[inverse[::-1]] = np.arange(len(corners) - 1, -1, -1)
+
+    # unique 按键排序，改为按第一次出现的顺序编号
+    order = np.argsort(first, kind="stable")
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return corners[first[order]], rank[inverse].astype(np.uint32)
+
+
+def compute_normals(positions: np.ndarray, triangles: np.ndarray) -> np.ndarray:
+    """
+    按面积加权的平滑顶点法线
+
+    Args:
+        positions: (N, 3) 顶点位置
+        triangles: (T, 3) 顶点索引
+    Returns:
+        (N, 3) float32 单位法线
+    """
+    normals = np.zeros((len(positions), 3), dtype=np.float64)
+    if len(triangles) == 0:
+        return normals.astype(np.float32)
+
+    p0 = positions[triangles[:, 0]].astype(np.float64)
+    face_normals = np.cross(positions[triangles[:, 1]] - p0, positions[triangles[:, 2]] - p0)
+    # bincount 按顶点累加，比 np.add.at 快一个数量级
+    for corner in range(3):
+        for axis in range(3):
+            normals[:, axis] += np.bincount(triangles[:, corner], face_normals[:, axis], minlength=len(positions))
+
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals.astype(np.float32)
+
+
+def build_mesh(name: str, positions: np.ndarray, corners: np.ndarray,
+               uvs: np.ndarray = None, normals: np.ndarray = None) -> MeshData:
+    """
+    由解析结果构建索引网格
+
+    Args:
+        name: 网格名称
+        positions: (P, 3) 位置
+        corners: (T * 3, 3) 三角形角点的 (位置, 纹理坐标, 法线) 索引，缺失为 -1
+        uvs: (U, 2) 纹理坐标，可选
+        normals: (N, 3) 法线，可选
+    """
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    corners = np.asarray(corners, dtype=np.int64).reshape(-1, 3)
+    for column, (label, values) in enumerate((("位置", positions), ("纹理坐标", uvs), ("法线", normals))):
+        if values is None:
+            corners[:, column] = -1
+        elif len(corners) and (corners[:, column].max() >= len(values) or corners[:, column].min() < -1):
+            raise MeshImportError(f"{label}索引超出范围")
+    if len(corners) and corners[:, 0].min() < 0:
+        raise MeshImportError("面缺少位置索引")
+
+    unique_corners, indices = weld_corners(corners)
+    position_index = unique_corners[:, 0]
+
+    vertices = np.zeros(len(unique_corners), dtype=MESH_VERTEX_DTYPE)
+    vertices["position"] = positions[position_index]
+    if uvs is not None:
+        uv_index = unique_corners[:, 1]
+        has_uv = uv_index >= 0
+        vertices["uv"][has_uv] = np.asarray(uvs, dtype=np.float32)[uv_index[has_uv]]
+
+    normal_index = unique_corners[:, 2]
+    missing_normal = normal_index < 0
+    if normals is not None:
+        vertices["normal"][~missing_normal] = np.asarray(normals, dtype=np.float32)[normal_index[~missing_normal]]
+    if missing_normal.any():
+        # 按原始位置索引计算平滑法线，纹理接缝处拆开的顶点也得到相同的法线
+        triangles = position_index[indices].reshape(-1, 3)
+        smooth = compute_normals(positions, triangles)
+        vertices["normal"][missing_normal] = smooth[position_index[missing_normal]]
+
+    return MeshData(name, vertices, indices)
+
+
+def build_indexed_mesh(name: str, positions: np.ndarray, indices: np.ndarray,
+                       uvs: np.ndarray = None, normals: np.ndarray = None) -> MeshData:
+    """由已经共享顶点的数据（PLY、glTF）构建网格，不需要去重"""
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    indices = np.asarray(indices).reshape(-1)
+    if len(indices) and (indices.min() < 0 or indices.max() >= len(positions)):
+        raise MeshImportError("顶点索引超出范围")
+
+    vertices = np.zeros(len(positions), dtype=MESH_VERTEX_DTYPE)
+    vertices["position"] = positions
+    if uvs is not None:
+        vertices["uv"] = uvs
+    if normals is not None:
+        vertices["normal"] = normals
+    else:
+        vertices["normal"] = compute_normals(positions, indices.reshape(-1, 3).astype(np.int64))
+    return MeshData(name, vertices, indices.astype(np.uint32))
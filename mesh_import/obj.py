@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Wavefront OBJ 解析
+整个文件读入一个字节数组，用 NumPy 按行首字符分类，把同类行的文本拼接后一次性用
+np.fromstring 解析为数字，不逐行执行 Python 代码
+
+支持 v / vt / vn / f（三角形和多边形、v、v/vt、v//vn、v/vt/vn 以及负数索引），
+角点格式按每个角点分别判断，同一文件甚至同一个面中可以混用；行尾的 # 注释被忽略。
+其他语句（o、g、s、usemtl、mtllib 等）被忽略，所有对象合并为一个网格
+"""
+
+import numpy as np
+from mesh_import.mesh_data import MeshData, MeshImportError, build_mesh, triangulate_fans
+
+_NEWLINE = ord("\n")
+_SPACE = ord(" ")
+_SLASH = ord("/")
+_HASH = ord("#")
+
+# 角点格式（按斜杠数和是否有 //）: 数字个数和各数字对应的分量（0 位置 / 1 纹理坐标 / 2 法线）
+# v, v/vt, v//vn, v/vt/vn
+_CORNER_NUMBERS = np.array([1, 2, 2, 3])
+_CORNER_UV_COLUMN = np.array([-1, 1, -1, 1])
+_CORNER_NORMAL_COLUMN = np.array([-1, -1, 1, 2])
+
+# 制表符和回车统一为空格
+_WHITESPACE_TABLE = bytes.maketrans(b"\t\r", b"  ")
+
+
+def _fromstring(data: bytes, dtype) -> np.ndarray:
+    """把空白分隔的数字解析为数组，无法解析时抛出 MeshImportError"""
+    try:
+        return np.fromstring(data, dtype=dtype, sep=" ")
+    except ValueError as e:
+        raise MeshImportError(f"OBJ 文件中有无法解析的数字: {e}") from None
+
+
+def _strip_comments(text: np.ndarray):
+    """把每行 # 之后的内容替换为空格（原地修改）"""
+    hashes = np.flatnonzero(text == _HASH)
+    if not len(hashes):
+        return
+    index = np.arange(len(text))
+    last_hash = np.maximum.accumulate(np.where(text == _HASH, index, -1))
+    last_newline = np.maximum.accumulate(np.where(text == _NEWLINE, index, -1))
+    text[last_hash > last_newline] = _SPACE
+
+
+def _select_lines(text: np.ndarray, line_starts: np.ndarray, line_ends: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """
+    把 mask 选中的行拼接为一个字节数组（保留行尾换行符）
+
+    OBJ 文件中同类语句通常连续成块，按连续的行区间切片，切片数量约等于对象/材质分组数
+    """
+    if not mask.any():
+        return np.zeros(0, dtype=np.uint8)
+    flags = np.concatenate(([False], mask, [False])).astype(np.int8)
+    change = np.diff(flags)
+    run_first = np.flatnonzero(change == 1)
+    run_last = np.flatnonzero(change == -1) - 1
+    chunks = [text[line_starts[a]:line_ends[b] + 1] for a, b in zip(run_first, run_last)]
+    return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+
+def _tokens_per_line(text: np.ndarray) -> np.ndarray:
+    """每行的数字个数（text 中只有数字、空格和换行）"""
+    newlines = np.flatnonzero(text == _NEWLINE)
+    separator = (text == _SPACE) | (text == _NEWLINE)
+    token_starts = np.flatnonzero(~separator & np.concatenate(([True], separator[:-1])))
+    line_of_token = np.searchsorted(newlines, token_starts)
+    return np.bincount(line_of_token, minlength=len(newlines))
+
+
+def _parse_rows(text: np.ndarray, line_count: int, columns: int, dtype) -> np.ndarray:
+    """
+    解析每行若干个数字，取前 columns 列，不足的列填 0
+
+    多数文件每行数字个数相同，直接 reshape；否则按每行个数取列
+    """
+    values = _fromstring(text.tobytes(), dtype)
+    if line_count == 0:
+        return np.zeros((0, columns), dtype=dtype)
+    counts = _tokens_per_line(text)
+    if (counts == counts[0]).all() and counts[0] >= columns and counts.sum() == len(values):
+        return values.reshape(line_count, -1)[:, :columns]
+
+    if counts.sum() != len(values):
+        raise MeshImportError("无法解析的数字")
+    rows = np.zeros((line_count, columns), dtype=dtype)
+    starts = np.cumsum(counts) - counts
+    for column in range(columns):
+        present = counts > column
+        rows[present, column] = values[starts[present] + column]
+    return rows
+
+
+def _parse_faces(face_text: np.ndarray):
+    """
+    解析面语句（已清除关键字，只剩数字、斜杠、空格和换行），每个角点按自己的斜杠判断格式
+
+    Returns:
+        (角点 (C, 3) 的 (位置, 纹理坐标, 法线) 索引（从 1 开始，缺失为 0）, 每个面的角点数)
+    """
+    separator = (face_text == _SPACE) | (face_text == _NEWLINE)
+    boundary = np.concatenate(([True], separator, [True]))
+    token_starts = np.flatnonzero(~boundary[1:-1] & boundary[:-2])
+    token_ends = np.flatnonzero(~boundary[1:-1] & boundary[2:]) + 1
+
+    slash = face_text == _SLASH
+    slash_before = np.concatenate(([0], np.cumsum(slash)))
+    double = np.concatenate((slash[:-1] & slash[1:], [False]))
+    double_before = np.concatenate(([0], np.cumsum(double)))
+    slashes = slash_before[token_ends] - slash_before[token_starts]
+    doubles = double_before[token_ends] - double_before[token_starts]
+    if (slashes > 2).any() or ((doubles > 0) & (slashes != 2)).any():
+        raise MeshImportError("OBJ 文件中的面格式不正确")
+    # 0: v, 1: v/vt, 2: v//vn, 3: v/vt/vn
+    kind = np.where(slashes == 2, np.where(doubles > 0, 2, 3), slashes)
+
+    text = face_text.copy()
+    text[slash] = _SPACE
+    values = _fromstring(text.tobytes(), np.int64)
+    numbers = _CORNER_NUMBERS[kind]
+    if numbers.sum() != len(values):
+        raise MeshImportError("OBJ 文件中的面格式不正确")
+    first = np.cumsum(numbers) - numbers
+
+    corners = np.zeros((len(kind), 3), dtype=np.int64)
+    corners[:, 0] = values[first]
+    for component, columns in ((1, _CORNER_UV_COLUMN), (2, _CORNER_NORMAL_COLUMN)):
+        column = columns[kind]
+        present = column >= 0
+        corners[present, component] = values[first[present] + column[present]]
+
+    newlines = np.flatnonzero(face_text == _NEWLINE)
+    corner_counts = np.bincount(np.searchsorted(newlines, token_starts), minlength=len(newlines))
+    return corners, corner_counts
+
+
+def parse_obj(data: bytes, name: str = "obj") -> MeshData:
+    """解析 OBJ 文件内容"""
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    # 需要一份可写的副本来清除关键字
+    text = np.frombuffer(bytearray(data.translate(_WHITESPACE_TABLE)), dtype=np.uint8)
+    _strip_comments(text)
+
+    line_ends = np.flatnonzero(text == _NEWLINE)
+    line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+    # 跳过行首空白，关键字从每行第一个非空格字符开始（空行落在行尾换行符上）
+    non_space = np.flatnonzero(text != _SPACE)
+    keyword_starts = non_space[np.searchsorted(non_space, line_starts)]
+    first = text[keyword_starts]
+    second = text[np.minimum(keyword_starts + 1, len(text) - 1)]
+
+    is_position = (first == ord("v")) & (second == _SPACE)
+    is_uv = (first == ord("v")) & (second == ord("t"))
+    is_normal = (first == ord("v")) & (second == ord("n"))
+    is_face = (first == ord("f")) & (second == _SPACE)
+
+    # 清除关键字，选中的行只剩数字
+    keyword_lines = keyword_starts[is_position | is_uv | is_normal | is_face]
+    text[keyword_lines] = _SPACE
+    text[keyword_lines + 1] = _SPACE
+
+    positions = _parse_rows(_select_lines(text, line_starts, line_ends, is_position),
+                            int(is_position.sum()), 3, np.float32)
+    uvs = normals = None
+    if is_uv.any():
+        uvs = _parse_rows(_select_lines(text, line_starts, line_ends, is_uv), int(is_uv.sum()), 2, np.float32)
+    if is_normal.any():
+        normals = _parse_rows(_select_lines(text, line_starts, line_ends, is_normal),
+                              int(is_normal.sum()), 3, np.float32)
+
+    face_count = int(is_face.sum())
+    if face_count == 0:
+        return build_mesh(name, positions, np.zeros((0, 3), dtype=np.int64), uvs, normals)
+
+    values, corner_counts = _parse_faces(_select_lines(text, line_starts, line_ends, is_face))
+    if (corner_counts < 3).any():
+        raise MeshImportError("OBJ 文件中有少于 3 个角点的面")
+    all_triangles = (corner_counts == 3).all()
+
+    # 索引从 1 开始，0 表示该角点没有这个分量
+    corners = np.full(values.shape, -1, dtype=np.int64)
+    for component, is_element in enumerate((is_position, is_uv, is_normal)):
+        indices = values[:, component]
+        negative = indices < 0
+        if negative.any():
+            # 负数索引相对于该面之前已定义的元素个数
+            defined_before = np.repeat(np.cumsum(is_element)[is_face], corner_counts)
+            indices = np.where(negative, indices + defined_before + 1, indices)
+        corners[:, component] = indices - 1
+
+    if not all_triangles:
+        corners = corners[triangulate_fans(corner_counts).reshape(-1)]
+    return build_mesh(name, positions, corners, uvs, normals)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+PLY 解析
+支持 ascii、binary_little_endian、binary_big_endian 三种格式；
+二进制顶点元素按属性拼出结构化 dtype 后用 np.frombuffer 一次读入，
+面元素在多边形大小相同（通常全是三角形）时同样整块读入，否则逐个面读取
+"""
+
+import numpy as np
+from mesh_import.mesh_data import MeshData, MeshImportError, build_indexed_mesh, triangulate_fans
+
+# PLY 标量类型 -> NumPy 类型代码
+_PLY_TYPES = {
+    "char": "i1", "int8": "i1",
+    "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2",
+    "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4",
+    "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4",
+    "double": "f8", "float64": "f8",
+}
+
+_FORMATS = {"ascii": None, "binary_little_endian": "<", "binary_big_endian": ">"}
+
+# 纹理坐标可能使用的属性名
+_UV_NAMES = (("u", "v"), ("s", "t"), ("texture_u", "texture_v"))
+
+
+class _Element:
+    """头部声明的元素"""
+
+    def __init__(self, name: str, count: int):
+        self.name = name
+        self.count = count
+        # (名称, 类型代码) 或 (名称, (个数类型代码, 元素类型代码))
+        self.properties = []
+
+    @property
+    def has_lists(self) -> bool:
+        return any(isinstance(kind, tuple) for _, kind in self.properties)
+
+    def scalar_dtype(self, byte_order: str) -> np.dtype:
+        return np.dtype([(name, byte_order + kind) for name, kind in self.properties])
+
+
+def _parse_header(data: bytes):
+    """返回 (格式, 元素列表, 数据起始偏移)"""
+    end = data.find(b"end_header")
+    if not data.startswith(b"ply") or end < 0:
+        raise MeshImportError("不是 PLY 文件")
+    body_start = data.index(b"\n", end) + 1
+
+    file_format = None
+    elements = []
+    for line in data[:end].decode("ascii", "replace").splitlines()[1:]:
+        words = line.split()
+        if not words or words[0] in ("comment", "obj_info"):
+            continue
+        if words[0] == "format":
+            if words[1] not in _FORMATS:
+                raise MeshImportError(f"不支持的 PLY 格式: {words[1]}")
+            file_format = words[1]
+        elif words[0] == "element":
+            elements.append(_Element(words[1], int(words[2])))
+        elif words[0] == "property":
+            if not elements:
+                raise MeshImportError("PLY 属性不属于任何元素")
+            try:
+                if words[1] == "list":
+                    kind = (_PLY_TYPES[words[2]], _PLY_TYPES[words[3]])
+                    elements[-1].properties.append((words[4], kind))
+                else:
+                    elements[-1].properties.append((words[2], _PLY_TYPES[words[1]]))
+            except (KeyError, IndexError):
+                raise MeshImportError(f"无法解析的 PLY 属性: {line}")
+    if file_format is None:
+        raise MeshImportError("PLY 头部缺少 format")
+    return file_format, elements, body_start
+
+
+def _vertex_arrays(table):
+    """从顶点表（结构化数组或 名称->列 字典）取出位置、纹理坐标和法线"""
+    names = table.dtype.names if hasattr(table, "dtype") else tuple(table)
+
+    def columns(keys):
+        return np.stack([np.asarray(table[key], dtype=np.float32) for key in keys], axis=1)
+
+    if not all(key in names for key in ("x", "y", "z")):
+        raise MeshImportError("PLY 顶点缺少 x/y/z")
+    positions = columns(("x", "y", "z"))
+    normals = columns(("nx", "ny", "nz")) if all(key in names for key in ("nx", "ny", "nz")) else None
+    uvs = None
+    for keys in _UV_NAMES:
+        if all(key in names for key in keys):
+            uvs = columns(keys)
+            break
+    return positions, uvs, normals
+
+
+def _face_list_name(element: _Element) -> str:
+    for name, kind in element.properties:
+        if isinstance(kind, tuple) and name in ("vertex_indices", "vertex_index"):
+            return name
+    raise MeshImportError("PLY 面元素缺少 vertex_indices")
+
+
+def _read_binary_faces(data: bytes, offset: int, element: _Element, byte_order: str):
+    """
+    读取二进制面元素，返回 (所有角点, 每个面的角点数, 结束偏移)
+
+    先假设所有面的角点数与第一个面相同，整块读入后校验；不满足时逐个面读取
+    """
+    list_name = _face_list_name(element)
+    count = element.count
+    if count == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), offset
+
+    def field_dtype(corners):
+        fields = []
+        for name, kind in element.properties:
+            if isinstance(kind, tuple):
+                fields.append((name + "_count", byte_order + kind[0]))
+                fields.append((name, byte_order + kind[1], (corners,)))
+            else:
+                fields.append((name, byte_order + kind))
+        return np.dtype(fields)
+
+    # 第一个面的角点数（列表属性之前可能还有标量属性）
+    head = 0
+    for name, kind in element.properties:
+        if name == list_name:
+            break
+        head += np.dtype(kind[1] if isinstance(kind, tuple) else kind).itemsize
+    first_count = int(np.frombuffer(data, byte_order + dict(element.properties)[list_name][0], 1, offset + head)[0])
+
+    uniform = field_dtype(first_count)
+    if offset + uniform.itemsize * count <= len(data):
+        faces = np.frombuffer(data, uniform, count, offset)
+        if (faces[list_name + "_count"] == first_count).all():
+            corners = faces[list_name].astype(np.int64).reshape(-1)
+            return corners, np.full(count, first_count, dtype=np.int64), offset + uniform.itemsize * count
+
+    # 多边形大小不一: 逐个面读取
+    corners = []
+    corner_counts = np.empty(count, dtype=np.int64)
+    for face in range(count):
+        for name, kind in element.properties:
+            if isinstance(kind, tuple):
+                count_type = np.dtype(byte_order + kind[0])
+                item_type = np.dtype(byte_order + kind[1])
+                n = int(np.frombuffer(data, count_type, 1, offset)[0])
+                offset += count_type.itemsize
+                if name == list_name:
+                    corners.append(np.frombuffer(data, item_type, n, offset))
+                    corner_counts[face] = n
+                offset += item_type.itemsize * n
+            else:
+                offset += np.dtype(kind).itemsize
+    return np.concatenate(corners).astype(np.int64), corner_counts, offset
+
+
+def _skip_binary_element(data: bytes, offset: int, element: _Element, byte_order: str) -> int:
+    """跳过不需要的二进制元素"""
+    if not element.has_lists:
+        return offset + element.scalar_dtype(byte_order).itemsize * element.count
+    for _ in range(element.count):
+        for _, kind in element.properties:
+            if isinstance(kind, tuple):
+                count_type = np.dtype(byte_order + kind[0])
+                n = int(np.frombuffer(data, count_type, 1, offset)[0])
+                offset += count_type.itemsize + np.dtype(kind[1]).itemsize * n
+            else:
+                offset += np.dtype(kind).itemsize
+    return offset
+
+
+def _parse_binary(data: bytes, elements, offset: int, byte_order: str):
+    vertex_table = None
+    corners = corner_counts = None
+    for element in elements:
+        if element.name == "vertex":
+            if element.has_lists:
+                raise MeshImportError("不支持带列表属性的 PLY 顶点")
+            dtype = element.scalar_dtype(byte_order)
+            vertex_table = np.frombuffer(data, dtype, element.count, offset)
+            offset += dtype.itemsize * element.count
+        elif element.name == "face":
+            corners, corner_counts, offset = _read_binary_faces(data, offset, element, byte_order)
+        elif vertex_table is not None and corners is not None:
+            break
+        else:
+            offset = _skip_binary_element(data, offset, element, byte_order)
+    return vertex_table, corners, corner_counts
+
+
+def _parse_ascii(data: bytes, elements, offset: int):
+    lines = data[offset:].splitlines()
+    vertex_table = None
+    corners = corner_counts = None
+    line = 0
+    for element in elements:
+        block = lines[line:line + element.count]
+        line += element.count
+        if element.name == "vertex":
+            if element.has_lists:
+                raise MeshImportError("不支持带列表属性的 PLY 顶点")
+            values = np.fromstring(b" ".join(block), dtype=np.float64, sep=" ")
+            names = [name for name, _ in element.properties]
+            if len(values) != len(names) * element.count:
+                raise MeshImportError("PLY 顶点数据不完整")
+            values = values.reshape(element.count, len(names))
+            vertex_table = {name: values[:, i] for i, name in enumerate(names)}
+        elif element.name == "face":
+            list_name = _face_list_name(element)
+            if element.properties[0][0] != list_name:
+                raise MeshImportError("ASCII PLY 的 vertex_indices 必须是面的第一个属性")
+            extra = len(element.properties) - 1
+            values = np.fromstring(b" ".join(block), dtype=np.int64, sep=" ")
+            first = int(values[0]) if len(values) else 0
+            width = first + 1 + extra
+            if element.count and len(values) == width * element.count and (values[::width] == first).all():
+                table = values.reshape(element.count, width)
+                corners = table[:, 1:first + 1].reshape(-1)
+                corner_counts = np.full(element.count, first, dtype=np.int64)
+            else:
+                # 多边形大小不一: 只遍历每行的个数
+                counts = []
+                parts = []
+                position = 0
+                for _ in range(element.count):
+                    n = int(values[position])
+                    counts.append(n)
+                    parts.append(values[position + 1:position + 1 + n])
+                    position += 1 + n + extra
+                corners = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+                corner_counts = np.array(counts, dtype=np.int64)
+    return vertex_table, corners, corner_counts
+
+
+def parse_ply(data: bytes, name: str = "ply") -> MeshData:
+    """解析 PLY 文件内容"""
+    file_format, elements, offset = _parse_header(data)
+    byte_order = _FORMATS[file_format]
+    if byte_order is None:
+        vertex_table, corners, corner_counts = _parse_ascii(data, elements, offset)
+    else:
+        vertex_table, corners, corner_counts = _parse_binary(data, elements, offset, byte_order)
+
+    if vertex_table is None:
+        raise MeshImportError("PLY 文件缺少顶点元素")
+    positions, uvs, normals = _vertex_arrays(vertex_table)
+    if corners is None or len(corners) == 0:
+        indices = np.zeros(0, dtype=np.int64)
+    elif (corner_counts == 3).all():
+        indices = corners
+    else:
+        indices = corners[triangulate_fans(corner_counts).reshape(-1)]
+    return build_indexed_mesh(name, positions, indices, uvs, normals)
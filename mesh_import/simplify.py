@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+网格简化和细节层次（LOD）生成
+二次误差度量（QEM，Garland & Heckbert 1997）的半边折叠: 顶点 v 折叠到相邻顶点 u，
+代价是 u 的位置到 v、u 周围所有三角形平面的距离平方和（按面积加权）。顶点缓冲保持不变，
+每级 LOD 只是一组新的索引，所有 LOD 共享同一个顶点缓冲
+
+折叠按轮批量进行（全部向量化）: 每个顶点提出代价最小的折叠，只接受代价在 1 环邻域中最小的提议，
+这样同一轮的折叠互不相邻，每个三角形最多被一个折叠修改，可以同时执行
+- 拓扑按位置焊接（纹理接缝、硬边拆开的顶点视为同一个），接缝两侧一起折叠，不会产生裂缝；
+  折叠后的角点选择目标位置上属性（法线、纹理坐标）最接近的顶点
+- 开放边界的顶点只沿边界折叠，边界另外加上垂直平面的二次误差，轮廓基本保持
+- 非流形边上的顶点不折叠；会使三角形翻转或破坏流形（连接条件）的折叠被拒绝
+"""
+
+import numpy as np
+from mesh_import.mesh_data import MeshData
+from mesh_import.optimize import tipsify
+
+# 每级 LOD 的目标三角形比例（相对上一级）
+LOD_RATIO = 0.5
+# 最多生成的级数（不含原始网格）
+MAX_LODS = 4
+# 三角形少于这个数时不再简化
+MIN_LOD_TRIANGLES = 64
+# 一级 LOD 的三角形数超过上一级的这个比例时停止（网格已无法继续简化）
+MIN_LOD_REDUCTION = 0.8
+# 边界平面二次误差的权重（相对三角形平面）
+BORDER_WEIGHT = 10.0
+# 折叠后三角形法线与原法线夹角的余弦下限
+FLIP_COSINE = 0.5
+# 每轮中一个顶点的折叠不可行时最多改选几次
+PROPOSAL_ATTEMPTS = 3
+# 每轮选择互不相邻的折叠时重复的次数
+INDEPENDENT_SET_ROUNDS = 3
+# 每级 LOD 最多折叠的轮数
+MAX_PASSES = 100
+
+# 算法变化时递增，缓存中的 LOD 随之失效
+LOD_VERSION = 1
+
+# 对称 4x4 二次型的 10 个系数对应的 (行, 列)
+_QUADRIC_TERMS = ((0, 0), (0, 1), (0, 2), (0, 3), (1, 1), (1, 2), (1, 3), (2, 2), (2, 3), (3, 3))
+_NO_RANK = np.iinfo(np.int64).max
+
+
+def _plane_quadrics(normals: np.ndarray, points: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """平面 (n, -n·p) 的加权二次型系数，(10, k)（按系数存放，按顶点收集时访存连续）"""
+    plane = np.concatenate([normals, -np.einsum("ij,ij->i", normals, points)[:, None]], axis=1)
+    return np.stack([plane[:, i] * plane[:, j] * weights for i, j in _QUADRIC_TERMS])
+
+
+def _evaluate_quadrics(q: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """q(p) = [p 1] Q [p 1]^T，q 为 (10, k)"""
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    return (q[0] * x * x + 2 * q[1] * x * y + 2 * q[2] * x * z + 2 * q[3] * x + q[4] * y * y
+            + 2 * q[5] * y * z + 2 * q[6] * y + q[7] * z * z + 2 * q[8] * z + q[9])
+
+
+def _accumulate(values: np.ndarray, index: np.ndarray, size: int) -> np.ndarray:
+    """按 index 累加 values 的最后一维（每一行分别累加，bincount 比 np.add.at 快得多）"""
+    if values.ndim == 1:
+        return np.bincount(index, values, minlength=size)
+    return np.stack([np.bincount(index, row, minlength=size) for row in values])
+
+
+def _non_degenerate(triangles: np.ndarray) -> np.ndarray:
+    return (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & \
+           (triangles[:, 0] != triangles[:, 2])
+
+
+def _edges(triangles: np.ndarray, count: int):
+    """
+    三角形的边
+
+    Returns:
+        (a, b, half_uses, edge_keys, edge_uses): 每个三角形的有向边 a -> b（3T）及其被几个三角形使用，
+        排序后的唯一无向边键 min * count + max 及其被几个三角形使用
+    """
+    a = triangles.ravel()
+    b = triangles[:, [1, 2, 0]].ravel()
+    keys = np.minimum(a, b) * count + np.maximum(a, b)
+    edge_keys, inverse, edge_uses = np.unique(keys, return_inverse=True, return_counts=True)
+    return a, b, edge_uses[inverse.ravel()], edge_keys, edge_uses
+
+
+def _attribute_vectors(vertices: np.ndarray) -> np.ndarray:
+    """接缝处选择顶点时比较的属性（法线、纹理坐标）"""
+    names = [name for name in ("normal", "uv") if name in (vertices.dtype.names or ())]
+    if not names:
+        return np.zeros((len(vertices), 1))
+    return np.concatenate([np.asarray(vertices[name], dtype=np.float64).reshape(len(vertices), -1)
+                           for name in names], axis=1)
+
+
+def weld_positions(positions: np.ndarray):
+    """
+    位置完全相同的顶点焊接
+
+    Returns:
+        (welded, vertex_to_welded): (P, 3) float64 唯一位置，(N,) 每个顶点的位置编号
+    """
+    keys = np.ascontiguousarray(positions, dtype=np.float32).view(np.dtype((np.void, 12))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    return np.asarray(positions, dtype=np.float64)[first], inverse.ravel()
+
+
+def _invalid_collapses(positions: np.ndarray, triangles: np.ndarray, collapse_target: np.ndarray,
+                       edge_keys: np.ndarray, edge_uses: np.ndarray) -> np.ndarray:
+    """
+    逐个检查折叠 v -> collapse_target[v]（-1 表示不折叠，每个折叠单独判断）
+
+    拒绝使三角形法线转过太大角度的折叠，以及不满足连接条件的折叠: v 和 u 的公共邻点数必须等于
+    共享边 (v, u) 的三角形数，否则折叠后出现重复面或非流形边
+
+    Returns:
+        (count,) bool，折叠不可执行的顶点
+    """
+    count = len(positions)
+    sources = np.flatnonzero(collapse_target >= 0)
+    targets = collapse_target[sources]
+    invalid = np.zeros(count, dtype=bool)
+
+    # 翻转: 每个 (三角形, 移动角点) 单独检查，跳过包含目标点（折叠后退化）的三角形
+    face, corner = np.nonzero(collapse_target[triangles] >= 0)
+    local = triangles[face]
+    source = local[np.arange(len(local)), corner]
+    target = collapse_target[source]
+    surviving = ~(local == target[:, None]).any(axis=1)
+    local, source, target, corner = local[surviving], source[surviving], target[surviving], corner[surviving]
+    before = np.cross(positions[local[:, 1]] - positions[local[:, 0]], positions[local[:, 2]] - positions[local[:, 0]])
+    after_positions = positions[local]
+    after_positions[np.arange(len(local)), corner] = positions[target]
+    after = np.cross(after_positions[:, 1] - after_positions[:, 0], after_positions[:, 2] - after_positions[:, 0])
+    cosine = np.einsum("ij,ij->i", before, after)
+    invalid[source[cosine <= FLIP_COSINE * np.linalg.norm(before, axis=1) * np.linalg.norm(after, axis=1)]] = True
+
+    # 连接条件: 对 v 的每个邻点 x（x != u），检查 (x, u) 是否也是一条边
+    low, high = edge_keys // count, edge_keys % count
+    neighbour_from = np.concatenate([low, high])
+    neighbour_to = np.concatenate([high, low])
+    order = np.argsort(neighbour_from, kind="stable")
+    neighbour_from, neighbour_to = neighbour_from[order], neighbour_to[order]
+    start = np.searchsorted(neighbour_from, sources)
+    end = np.searchsorted(neighbour_from, sources, side="right")
+    degree = end - start
+    owner = np.repeat(np.arange(len(sources)), degree)
+    x = neighbour_to[np.repeat(start - np.cumsum(degree) + degree, degree) + np.arange(degree.sum())]
+    u = targets[owner]
+    candidate = np.minimum(x, u) * count + np.maximum(x, u)
+    found = np.searchsorted(edge_keys, candidate)
+    is_edge = (x != u) & (edge_keys[np.minimum(found, len(edge_keys) - 1)] == candidate)
+    common = np.bincount(owner, is_edge, minlength=len(sources))
+    shared = edge_uses[np.searchsorted(edge_keys, np.minimum(sources, targets) * count
+                                       + np.maximum(sources, targets))]
+    invalid[sources[common != shared]] = True
+    return invalid
+
+
+def _pick_vertices(old_vertices: np.ndarray, new_positions: np.ndarray, order: np.ndarray,
+                   position_start: np.ndarray, attributes: np.ndarray) -> np.ndarray:
+    """折叠后的角点: 新位置上属性最接近原角点顶点的顶点"""
+    first = position_start[new_positions]
+    candidates = position_start[new_positions + 1] - first
+    result = order[first]
+    seam = np.flatnonzero(candidates > 1)
+    if len(seam):
+        width = int(candidates[seam].max())
+        slots = first[seam, None] + np.arange(width)[None, :]
+        valid = np.arange(width)[None, :] < candidates[seam, None]
+        options = order[np.where(valid, slots, first[seam, None])]
+        distance = np.square(attributes[options] - attributes[old_vertices[seam]][:, None, :]).sum(axis=2)
+        distance[~valid] = np.inf
+        result[seam] = options[np.arange(len(seam)), distance.argmin(axis=1)]
+    return result
+
+
+def simplify(vertices: np.ndarray, indices: np.ndarray, target_triangles: int, max_error: float = np.inf):
+    """
+    把索引网格简化到不超过 target_triangles 个三角形（或误差达到 max_error 为止）
+
+    Args:
+        vertices: 含 position 字段的结构化数组（可选 normal、uv，用于选择接缝处的顶点）
+        indices: 三角形索引
+        target_triangles: 目标三角形数
+        max_error: 允许的最大误差（世界单位）
+    Returns:
+        (indices, error): 新的 uint32 索引（引用原顶点数组），以及折叠引入的最大误差
+            （折叠代价除以周围三角形面积后的平方根，近似为到原表面的均方根距离）
+    """
+    corner_vertex = np.asarray(indices, dtype=np.int64).reshape(-1, 3)
+    positions, vertex_position = weld_positions(vertices["position"])
+    count = len(positions)
+    triangles = vertex_position[corner_vertex]
+    alive = _non_degenerate(triangles)
+    triangles, corner_vertex = triangles[alive], corner_vertex[alive]
+    if len(triangles) <= target_triangles:
+        return corner_vertex.astype(np.uint32).ravel(), 0.0
+
+    # 每个位置的二次误差和周围面积
+    normals = np.cross(positions[triangles[:, 1]] - positions[triangles[:, 0]],
+                       positions[triangles[:, 2]] - positions[triangles[:, 0]])
+    double_area = np.linalg.norm(normals, axis=1)
+    unit = normals / np.maximum(double_area, 1e-30)[:, None]
+    face_quadrics = _plane_quadrics(unit, positions[triangles[:, 0]], double_area * 0.5)
+    quadrics = sum(_accumulate(face_quadrics, triangles[:, corner], count) for corner in range(3))
+    areas = sum(_accumulate(double_area * 0.5, triangles[:, corner], count) for corner in range(3))
+
+    # 边界边加上垂直平面的二次误差；非流形边的顶点锁定
+    a, b, uses, _, _ = _edges(triangles, count)
+    locked = np.zeros(count, dtype=bool)
+    locked[a[uses > 2]] = True
+    locked[b[uses > 2]] = True
+    border = uses == 1
+    border_vertex = np.zeros(count, dtype=bool)
+    border_vertex[a[border]] = True
+    border_vertex[b[border]] = True
+    if border.any():
+        face = np.repeat(np.arange(len(triangles)), 3)[border]
+        edge = positions[b[border]] - positions[a[border]]
+        side = np.cross(edge, unit[face])
+        side /= np.maximum(np.linalg.norm(side, axis=1), 1e-30)[:, None]
+        weight = np.einsum("ij,ij->i", edge, edge) * BORDER_WEIGHT
+        border_quadrics = _plane_quadrics(side, positions[a[border]], weight)
+        quadrics += _accumulate(border_quadrics, a[border], count) + _accumulate(border_quadrics, b[border], count)
+
+    # 同一位置上的顶点按位置编号排列，接缝处折叠后从中选择
+    order = np.argsort(vertex_position, kind="stable")
+    position_start = np.searchsorted(vertex_position[order], np.arange(count + 1))
+    attributes = _attribute_vectors(vertices)
+
+    error = 0.0
+    for _ in range(MAX_PASSES):
+        if len(triangles) <= target_triangles:
+            break
+        _, _, _, edge_keys, edge_uses = _edges(triangles, count)
+        low, high = edge_keys // count, edge_keys % count
+
+        # 候选折叠 v -> u: 每条边的两个方向，边界顶点只沿边界
+        source = np.concatenate([low, high])
+        target = np.concatenate([high, low])
+        along_border = np.concatenate([edge_uses == 1, edge_uses == 1])
+        valid = ~locked[source] & (~border_vertex[source] | along_border)
+        source, target = source[valid], target[valid]
+        # Q_v(u) + Q_u(u)，后者每个顶点只算一次
+        self_cost = _evaluate_quadrics(quadrics, positions)
+        cost = np.maximum(_evaluate_quadrics(quadrics[:, source], positions[target]) + self_cost[target], 0.0)
+        collapse_error = np.sqrt(cost / np.maximum(areas[source] + areas[target], 1e-30))
+        keep = collapse_error <= max_error
+        source, target, cost, collapse_error = source[keep], target[keep], cost[keep], collapse_error[keep]
+        if len(source) == 0:
+            break
+
+        # 每个顶点提出代价最小的可行折叠: 不可行的候选删去后重新选择，最多 PROPOSAL_ATTEMPTS 次
+        order_by_cost = np.lexsort((cost, source))
+        source, target, cost, collapse_error = (source[order_by_cost], target[order_by_cost], cost[order_by_cost],
+                                                collapse_error[order_by_cost])
+        candidate = np.ones(len(source), dtype=bool)
+        collapse_target = np.full(count, -1, dtype=np.int64)
+        choice = np.full(count, -1, dtype=np.int64)
+        pending = np.ones(count, dtype=bool)
+        for _ in range(PROPOSAL_ATTEMPTS):
+            remaining = np.flatnonzero(candidate & pending[source])
+            if len(remaining) == 0:
+                break
+            first = np.ones(len(remaining), dtype=bool)
+            first[1:] = source[remaining][1:] != source[remaining][:-1]
+            proposal = remaining[first]
+            trial = np.full(count, -1, dtype=np.int64)
+            trial[source[proposal]] = target[proposal]
+            invalid = _invalid_collapses(positions, triangles, trial, edge_keys, edge_uses)
+            good = proposal[~invalid[source[proposal]]]
+            collapse_target[source[good]] = target[good]
+            choice[source[good]] = good
+            pending[source[good]] = False
+            candidate[proposal] = False
+        sources = np.flatnonzero(collapse_target >= 0)
+        if len(sources) == 0:
+            break
+
+        # 全局排名唯一，接受在 1 环邻域中排名最小的提议，同一轮的折叠互不相邻；
+        # 接受的顶点及其邻点退出后，剩下的提议再选一次（贪心的独立集）
+        rank = np.full(count, _NO_RANK, dtype=np.int64)
+        rank[sources] = np.argsort(np.argsort(cost[choice[sources]], kind="stable"), kind="stable")
+        edge_from, edge_to = np.concatenate([low, high]), np.concatenate([high, low])
+        selected = []
+        for _ in range(INDEPENDENT_SET_ROUNDS):
+            neighbour_rank = np.full(count, _NO_RANK, dtype=np.int64)
+            np.minimum.at(neighbour_rank, edge_from, rank[edge_to])
+            chosen = sources[rank[sources] < neighbour_rank[sources]]
+            selected.append(chosen)
+            blocked = np.zeros(count, dtype=bool)
+            blocked[chosen] = True
+            blocked[edge_to[blocked[edge_from]]] = True
+            rank[blocked] = _NO_RANK
+            sources = sources[~blocked[sources]]
+            if len(sources) == 0:
+                break
+        sources = np.concatenate(selected)
+        rank[sources] = np.argsort(np.argsort(cost[choice[sources]], kind="stable"), kind="stable")
+        # 不超过目标: 每个内部折叠删除 2 个三角形，只保留代价最小的部分
+        excess = len(triangles) - target_triangles
+        if 2 * len(sources) > excess:
+            sources = sources[np.argsort(rank[sources], kind="stable")[:(excess + 1) // 2]]
+        targets = collapse_target[sources]
+        collapse_target[:] = -1
+        collapse_target[sources] = targets
+        error = max(error, float(collapse_error[choice[sources]].max()))
+        quadrics[:, targets] += quadrics[:, sources]
+        areas[targets] += areas[sources]
+
+        moved = collapse_target[triangles] >= 0
+        remap = np.arange(count)
+        remap[sources] = targets
+        triangles = remap[triangles]
+        corner_vertex[moved] = _pick_vertices(corner_vertex[moved], triangles[moved], order, position_start,
+                                              attributes)
+        alive = _non_degenerate(triangles)
+        triangles, corner_vertex = triangles[alive], corner_vertex[alive]
+
+    return corner_vertex.astype(np.uint32).ravel(), error
+
+
+def generate_lods(mesh: MeshData, ratio: float = LOD_RATIO, max_lods: int = MAX_LODS, cache_size: int = None):
+    """
+    逐级简化生成 LOD（每级从上一级简化，误差累加）
+
+    Args:
+        mesh: 原始网格（LOD 0）
+        ratio: 每级的目标三角形比例
+        max_lods: 最多生成的级数
+        cache_size: 设置时每级的三角形按 Tipsify 重排（与导入优化一致）
+    Returns:
+        (lod_indices, lods): 所有级别的索引依次拼接成的 uint32 数组，以及每级的
+            {"first", "count", "error"}（first/count 是 lod_indices 中的索引范围，error 为世界单位）
+    """
+    indices = np.asarray(mesh.indices, dtype=np.uint32)
+    vertices = np.asarray(mesh.vertices)
+    parts, lods = [], []
+    first = 0
+    error = 0.0
+    while len(lods) < max_lods and len(indices) // 3 > MIN_LOD_TRIANGLES:
+        triangles = len(indices) // 3
+        simplified, step_error = simplify(vertices, indices, max(int(triangles * ratio), MIN_LOD_TRIANGLES // 2))
+        if len(simplified) // 3 > triangles * MIN_LOD_REDUCTION:
+            break
+        if cache_size is not None:
+            order, _ = tipsify(simplified.reshape(-1, 3).astype(np.int64), len(vertices), cache_size)
+            simplified = simplified.reshape(-1, 3)[order].ravel()
+        error += step_error
+        parts.append(simplified)
+        lods.append({"first": first, "count": len(simplified), "error": error})
+        first += len(simplified)
+        indices = simplified
+    lod_indices = np.concatenate(parts) if parts else np.zeros(0, dtype=np.uint32)
+    return lod_indices, lods
+
+
+def format_lods(triangle_count: int, lods: list) -> str:
+    """LOD 报告: 每级的三角形数和误差"""
+    if not lods:
+        return f"{triangle_count} 个三角形，无法简化"
+    levels = " -> ".join(f"{lod['count'] // 3}（{lod['error']:.2g}）" for lod in lods)
+    return f"LOD 三角形 {triangle_count} -> {levels}"
@@ -0,0 +1,4 @@
+from profiling.startup import StartupProfiler, startup_profiler
+from profiling.frame_profiler import FrameProfiler, frame_profiler
+from profiling.trace_export import TraceCapture
+from profiling.sampler import SamplingProfiler, sampling_profiler
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+帧性能分析模块
+记录每帧各阶段的 CPU 耗时（命名作用域）和 GPU 耗时（GL_TIME_ELAPSED 查询），
+保存最近 N 帧到环形缓冲区，供性能面板显示帧时间图和 p50/p95/p99
+
+GPU 查询结果在几帧之后异步读取，不会让 CPU 等待 GPU。
+start_trace() 录制接下来若干帧的全部作用域，并导出为 Chrome trace JSON
+"""
+
+import time
+import ctypes
+import numpy as np
+import OpenGL.GL as gl
+# PyOpenGL 的 glGetQueryObjectui64v 包装无法处理 64 位输出参数，直接使用原始函数
+from OpenGL.raw.GL.VERSION.GL_3_3 import glGetQueryObjectui64v
+from profiling.trace_export import TraceCapture, TRACK_CPU, TRACK_GPU, FRAME_SCOPE, STATE_COLLECTING
+
+# 环形缓冲区初始的作用域列数，作用域更多时按倍数扩充；同时也是作用域最大嵌套深度
+MAX_SCOPES = 32
+# GPU 查询结果延迟读取的帧数
+GPU_QUERY_LATENCY = 4
+# 超过该值（秒）的 GPU 查询结果视为无效
+MAX_GPU_QUERY_TIME = 10.0
+
+
+class _CpuScope:
+    """CPU 作用域，每个名称一个实例，重复使用不产生分配"""
+
+    __slots__ = ("profiler", "index")
+
+    def __init__(self, profiler, index: int):
+        self.profiler = profiler
+        self.index = index
+
+    def __enter__(self):
+        self.profiler._push(self.index)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._pop()
+        return False
+
+
+class _GpuScope:
+    """GPU 作用域，在进入和退出时开始/结束 GL_TIME_ELAPSED 查询"""
+
+    __slots__ = ("profiler", "index")
+
+    def __init__(self, profiler, index: int):
+        self.profiler = profiler
+        self.index = index
+
+    def __enter__(self):
+        self.profiler._begin_gpu_query(self.index)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._end_gpu_query()
+        return False
+
+
+class _NullScope:
+    """禁用时使用的空作用域"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class FrameProfiler:
+    """帧性能分析器"""
+
+    def __init__(self, history: int = 240):
+        """
+        Args:
+            history: 环形缓冲区保存的帧数
+        """
+        self.history = history
+        self.enabled = True
+        self.gpu_enabled = True
+        self.paused = False
+
+        self.scope_names = []
+        self._scope_index = {}
+        self._cpu_scopes = {}
+        self._gpu_scopes = {}
+
+        # 环形缓冲区（单位: 秒），第 f 帧存放在 f % history 行
+        self.frame_ids = np.full(history, -1, dtype=np.int64)
+        self.frame_times = np.zeros(history, dtype=np.float64)
+        self.cpu_times = np.zeros((history, MAX_SCOPES), dtype=np.float64)
+        self.gpu_times = np.zeros((history, MAX_SCOPES), dtype=np.float64)
+        self.frame_number = -1
+
+        self._frame_start = 0.0
+        self._row = 0
+        # 作用域栈: 作用域序号、开始时间、子作用域耗时
+        self._stack_index = np.zeros(MAX_SCOPES, dtype=np.int64)
+        self._stack_start = np.zeros(MAX_SCOPES, dtype=np.float64)
+        self._stack_child = np.zeros(MAX_SCOPES, dtype=np.float64)
+        self._depth = 0
+
+        # GPU 查询池: 每个延迟槽位一组查询对象
+        self._gpu_supported = None
+        self._query_ids = None
+        self._query_frame = np.full(GPU_QUERY_LATENCY, -1, dtype=np.int64)
+        self._query_used = np.zeros((GPU_QUERY_LATENCY, MAX_SCOPES), dtype=bool)
+        # GPU 查询开始时的 CPU 时间，用于在追踪中放置 GPU 事件
+        self._query_start = np.zeros((GPU_QUERY_LATENCY, MAX_SCOPES), dtype=np.float64)
+        self._query_active = False
+        self._query_result = ctypes.c_uint64()
+
+        # 当前的帧追踪录制，没有录制时为 None
+        self.trace = None
+        self._tracing = False
+        self.last_trace_path = None
+
+    def scope(self, name: str):
+        """获取名为 name 的 CPU 作用域，用法: with frame_profiler.scope("name"): ..."""
+        if not self.enabled:
+            return _NULL_SCOPE
+        scope = self._cpu_scopes.get(name)
+        if scope is None:
+            scope = _CpuScope(self, self._register(name))
+            self._cpu_scopes[name] = scope
+        return scope
+
+    def gpu_scope(self, name: str):
+        """获取名为 name 的 GPU 作用域，GPU 作用域之间不能嵌套"""
+        if not (self.enabled and self.gpu_enabled and self._gpu_supported):
+            return _NULL_SCOPE
+        scope = self._gpu_scopes.get(name)
+        if scope is None:
+            scope = _GpuScope(self, self._register(name))
+            self._gpu_scopes[name] = scope
+        return scope
+
+    def start_trace(self, frame_count: int, path: str = None) -> TraceCapture:
+        """
+        从下一帧开始录制 frame_count 帧，结束后写出 Chrome trace JSON
+
+        Args:
+            frame_count: 录制的帧数
+            path: 输出文件路径，默认写到 traces/ 目录
+        """
+        if self.trace is not None:
+            raise RuntimeError("已有帧追踪正在录制")
+        self.trace = TraceCapture(frame_count, path)
+        self.enabled = True
+        self.paused = False
+        return self.trace
+
+    @property
+    def trace_active(self) -> bool:
+        return self.trace is not None
+
+    def begin_frame(self):
+        """帧开始时调用（需要当前有 OpenGL 上下文）"""
+        if not self.enabled:
+            return
+
+        if self._gpu_supported is None:
+            self._init_gpu_queries()
+
+        if not self.paused:
+            self.frame_number += 1
+            self._row = self.frame_number % self.history
+            self.frame_ids[self._row] = self.frame_number
+            self.frame_times[self._row] = 0.0
+            self.cpu_times[self._row] = 0.0
+            self.gpu_times[self._row] = 0.0
+
+        if self._gpu_supported:
+            self._collect_gpu_results()
+
+        self._depth = 0
+        self._frame_start = time.perf_counter()
+
+        if self.trace is not None:
+            self._update_trace()
+
+    def end_frame(self):
+        """帧结束时调用"""
+        if not self.enabled or self.paused:
+            return
+        now = time.perf_counter()
+        self.frame_times[self._row] = now - self._frame_start
+        if self._tracing:
+            self.trace.record(TRACK_CPU, FRAME_SCOPE, self.frame_number,
+                              self._frame_start, now - self._frame_start)
+
+    def valid_rows(self):
+        """环形缓冲区中有数据的行，按帧顺序排列"""
+        if self.frame_number < 0:
+            return np.zeros(0, dtype=np.int64)
+        count = min(self.frame_number + 1, self.history)
+        first = self.frame_number - count + 1
+        return np.arange(first, self.frame_number + 1) % self.history
+
+    def percentiles(self, values, q=(50, 95, 99)):
+        """计算 p50/p95/p99，没有数据时返回 0"""
+        if len(values) == 0:
+            return np.zeros(len(q))
+        return np.percentile(values, q)
+
+    def _register(self, name: str) -> int:
+        """为作用域名称分配列号"""
+        index = self._scope_index.get(name)
+        if index is None:
+            index = len(self.scope_names)
+            if index >= self.cpu_times.shape[1]:
+                self._grow_columns(index * 2)
+            self.scope_names.append(name)
+            self._scope_index[name] = index
+        return index
+
+    def _grow_columns(self, columns: int):
+        """把每个作用域一列的缓冲区扩充到 columns 列，已有数据保留（可能在帧中途调用）"""
+        def grow(array, fill=0):
+            grown = np.full((array.shape[0], columns), fill, dtype=array.dtype)
+            grown[:, :array.shape[1]] = array
+            return grown
+
+        old_columns = self.cpu_times.shape[1]
+        self.cpu_times = grow(self.cpu_times)
+        self.gpu_times = grow(self.gpu_times)
+        self._query_used = grow(self._query_used, False)
+        self._query_start = grow(self._query_start)
+        if self._query_ids is not None:
+            try:
+                extra = np.asarray(
+                    gl.glGenQueries(GPU_QUERY_LATENCY * (columns - old_columns)), dtype=np.uint32
+                ).reshape(GPU_QUERY_LATENCY, columns - old_columns)
+                self._query_ids = np.concatenate((self._query_ids, extra), axis=1)
+            except Exception as e:
+                # 无法创建更多查询时关闭 GPU 计时，CPU 计时继续工作
+                print(f"GPU timer queries unavailable: {e}")
+                self._gpu_supported = False
+
+    def _push(self, index: int):
+        depth = self._depth
+        self._stack_index[depth] = index
+        self._stack_start[depth] = time.perf_counter()
+        self._stack_child[depth] = 0.0
+        self._depth = depth + 1
+
+    def _pop(self):
+        self._depth -= 1
+        depth = self._depth
+        duration = time.perf_counter() - self._stack_start[depth]
+        # 记录自身耗时，嵌套作用域叠加后等于总耗时
+        if not self.paused:
+            self.cpu_times[self._row, self._stack_index[depth]] += duration - self._stack_child[depth]
+        if self._tracing:
+            self.trace.record(TRACK_CPU, self._stack_index[depth], self.frame_number,
+                              self._stack_start[depth], duration)
+        if depth > 0:
+            self._stack_child[depth - 1] += duration
+
+    def _init_gpu_queries(self):
+        """创建 GPU 查询池"""
+        try:
+            self._query_ids = np.asarray(
+                gl.glGenQueries(GPU_QUERY_LATENCY * MAX_SCOPES), dtype=np.uint32
+            ).reshape(GPU_QUERY_LATENCY, MAX_SCOPES)
+            self._gpu_supported = True
+        except Exception as e:
+            print(f"GPU timer queries unavailable: {e}")
+            self._gpu_supported = False
+
+    def _begin_gpu_query(self, index: int):
+        if self.paused or self._query_active or not self._gpu_supported:
+            return
+        slot = self.frame_number % GPU_QUERY_LATENCY
+        self._query_frame[slot] = self.frame_number
+        self._query_used[slot, index] = True
+        self._query_start[slot, index] = time.perf_counter()
+        gl.glBeginQuery(gl.GL_TIME_ELAPSED, int(self._query_ids[slot, index]))
+        self._query_active = True
+
+    def _end_gpu_query(self):
+        if not self._query_active:
+            return
+        gl.glEndQuery(gl.GL_TIME_ELAPSED)
+        self._query_active = False
+
+    def _collect_gpu_results(self):
+        """读取已经完成的 GPU 查询，结果写回对应帧"""
+        current_slot = self.frame_number % GPU_QUERY_LATENCY
+        for slot in range(GPU_QUERY_LATENCY):
+            frame = self._query_frame[slot]
+            if frame < 0:
+                continue
+
+            queries = [(index, int(self._query_ids[slot, index]))
+                       for index in np.flatnonzero(self._query_used[slot])]
+            ready = all(gl.glGetQueryObjectuiv(query, gl.GL_QUERY_RESULT_AVAILABLE) for _, query in queries)
+
+            # 结果未就绪时等以后的帧再读；槽位要被本帧复用时直接丢弃，避免阻塞
+            if not ready and slot != current_slot:
+                continue
+
+            row = frame % self.history
+            if ready and self.frame_ids[row] == frame:
+                for index, query in queries:
+                    # GL_QUERY_RESULT 单位为纳秒
+                    glGetQueryObjectui64v(query, gl.GL_QUERY_RESULT, ctypes.byref(self._query_result))
+                    elapsed = self._query_result.value * 1e-9
+                    # 部分软件驱动（如 llvmpipe）第一个查询会返回异常大的值，直接丢弃
+                    if elapsed < MAX_GPU_QUERY_TIME:
+                        self.gpu_times[row, index] = elapsed
+                        if self.trace is not None and self.trace.is_recording(frame):
+                            # GPU 事件放在提交查询时的 CPU 时间上，时长为 GPU 实际耗时
+                            self.trace.record(TRACK_GPU, index, frame,
+                                              self._query_start[slot, index], elapsed)
+
+            self._query_used[slot] = False
+            self._query_frame[slot] = -1
+
+    def _update_trace(self):
+        """在帧开始时推进帧追踪录制状态"""
+        trace = self.trace
+        if trace.first_frame < 0:
+            if not self.paused:
+                trace.start(self.frame_number, self._frame_start)
+        elif self.frame_number > trace.last_frame:
+            trace.state = STATE_COLLECTING
+
+        self._tracing = trace.is_recording(self.frame_number) and not self.paused
+
+        # 录制范围内所有帧的 GPU 查询都已读取或丢弃后写出文件
+        if self.frame_number >= trace.last_frame + GPU_QUERY_LATENCY:
+            self.trace = None
+            self._tracing = False
+            try:
+                self.last_trace_path = trace.write(self.scope_names)
+                print(f"帧追踪已保存: {self.last_trace_path} ({trace.count} 个事件，丢弃 {trace.dropped} 个)")
+            except OSError as e:
+                print(f"帧追踪保存失败: {e}")
+
+
+# 全局帧性能分析器
+frame_profiler = FrameProfiler()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+采样性能分析模块
+在后台线程中定时读取主线程的 Python 调用栈，统计接下来若干帧内的热点函数，
+输出火焰图工具（flamegraph.pl、speedscope 等）可读取的折叠调用栈文件和函数排行
+
+采样线程只在录制期间运行，每次采样只记录代码对象元组，标签在录制结束后才生成
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# 调用栈最大记录深度
+MAX_STACK_DEPTH = 128
+
+
+def default_sample_path() -> str:
+    """默认的折叠调用栈文件路径: traces/samples-时间.collapsed"""
+    return os.path.join("traces", time.strftime("samples-%Y%m%d-%H%M%S.collapsed"))
+
+
+def code_label(code) -> str:
+    """函数标签: 函数名 (文件:行号)，项目内文件使用相对路径，第三方库使用包内路径"""
+    filename = code.co_filename
+    marker = filename.rfind("site-packages")
+    if marker >= 0:
+        # 第三方库只保留包内路径
+        filename = filename[marker + len("site-packages") + 1:]
+    else:
+        try:
+            relative = os.path.relpath(filename)
+            if not relative.startswith(".."):
+                filename = relative
+        except ValueError:
+            # Windows 下不同盘符无法计算相对路径
+            pass
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class FunctionStats:
+    """函数采样统计"""
+
+    __slots__ = ("label", "self_samples", "total_samples")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.self_samples = 0   # 位于栈顶的采样数
+        self.total_samples = 0  # 出现在栈中的采样数
+
+
+class SamplingProfiler:
+    """主线程采样分析器"""
+
+    def __init__(self, interval: float = 0.002):
+        """
+        Args:
+            interval: 采样间隔（秒）。实际采样率还受 GIL 切换间隔限制
+        """
+        self.interval = interval
+
+        self.frame_count = 0
+        self.frames_left = 0
+        self.path = None
+        self.pending = False
+
+        self._stacks = Counter()
+        self._thread = None
+        self._stop = threading.Event()
+        self._start_time = 0.0
+
+        # 最近一次录制的结果
+        self.sample_count = 0
+        self.duration = 0.0
+        self.functions = []
+        self.last_path = None
+
+    @property
+    def active(self) -> bool:
+        """是否有录制正在等待或进行"""
+        return self.pending or self._thread is not None
+
+    def start(self, frame_count: int, path: str = None):
+        """
+        从下一帧开始采样 frame_count 帧，结束后写出折叠调用栈文件
+
+        Args:
+            frame_count: 采样的帧数
+            path: 输出文件路径，默认写到 traces/ 目录
+        """
+        if self.active:
+            raise RuntimeError("已有采样分析正在进行")
+        if frame_count <= 0:
+            raise ValueError(f"采样帧数必须大于 0: {frame_count}")
+        self.frame_count = frame_count
+        self.frames_left = frame_count
+        self.path = path or default_sample_path()
+        self.pending = True
+
+    def begin_frame(self):
+        """每帧开始时调用，推进录制状态"""
+        if self.pending:
+            self.pending = False
+            self._start_sampling()
+        elif self._thread is not None:
+            self.frames_left -= 1
+            if self.frames_left <= 0:
+                self._stop_sampling()
+
+    def _start_sampling(self):
+        self._stacks.clear()
+        self._stop.clear()
+        self._start_time = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(threading.main_thread().ident,),
+            name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+
+    def _stop_sampling(self):
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.perf_counter() - self._start_time
+
+        self.functions = self.build_function_stats()
+        self.sample_count = sum(self._stacks.values())
+        try:
+            self.last_path = self.write_collapsed(self.path)
+            print(f"采样分析已保存: {self.last_path} "
+                  f"({self.frame_count} 帧，{self.sample_count} 个样本)")
+            print(self.format_top_functions())
+        except OSError as e:
+            print(f"采样分析保存失败: {e}")
+
+    def _run(self, thread_id: int):
+        """采样线程"""
+        stacks = self._stacks
+        interval = self.interval
+        while not self._stop.wait(interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                # 采样时只保存代码对象，从外到内排列
+                stacks[tuple(reversed(stack))] += 1
+
+    def build_function_stats(self) -> list:
+        """按自身采样数排序的函数统计"""
+        stats = {}
+        for stack, count in self._stacks.items():
+            for code in set(stack):
+                entry = stats.get(code)
+                if entry is None:
+                    entry = stats[code] = FunctionStats(code_label(code))
+                entry.total_samples += count
+            stats[stack[-1]].self_samples += count
+        return sorted(stats.values(), key=lambda s: (s.self_samples, s.total_samples), reverse=True)
+
+    def write_collapsed(self, path: str) -> str:
+        """写出折叠调用栈文件，每行: 函数;函数;...;函数 采样数"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        labels = {}
+        lines = []
+        for stack, count in self._stacks.most_common():
+            names = []
+            for code in stack:
+                label = labels.get(code)
+                if label is None:
+                    # 分号是折叠格式的分隔符
+                    label = labels[code] = code_label(code).replace(";", ":")
+                names.append(label)
+            lines.append(f"{';'.join(names)} {count}")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+            f.write("\n")
+        return path
+
+    def format_top_functions(self, limit: int = 15) -> str:
+        """生成热点函数排行文本"""
+        total = max(self.sample_count, 1)
+        lines = [f"{'自身%':>7} {'累计%':>7}  函数"]
+        for entry in self.functions[:limit]:
+            lines.append(f"{entry.self_samples * 100.0 / total:7.1f} "
+                         f"{entry.total_samples * 100.0 / total:7.1f}  {entry.label}")
+        return "\n".join(lines)
+
+
+# 全局采样分析器
+sampling_profiler = SamplingProfiler()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+启动性能分析模块
+记录每个模块的导入耗时以及应用各初始化步骤的耗时，在第一帧显示后输出排序报告
+
+用法: python run.py --profile-startup
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupSpan:
+    """一段启动耗时记录"""
+
+    def __init__(self, name: str, category: str, start: float, depth: int):
+        self.name = name
+        self.category = category  # "import" 或 "init"
+        self.start = start
+        self.depth = depth
+        self.duration = 0.0
+        self.self_time = 0.0
+        self.children_time = 0.0
+
+
+class _TimedLoader:
+    """包装模块加载器，记录模块执行耗时"""
+
+    def __init__(self, loader, profiler, name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def create_module(self, spec):
+        # 扩展模块在 create_module 中完成初始化，同样需要计时
+        self._profiler._begin(self._name, "import")
+        try:
+            return self._loader.create_module(spec)
+        finally:
+            self._profiler._end()
+
+    def exec_module(self, module):
+        self._profiler._begin(self._name, "import")
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._end()
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _TimedFinder:
+    """插入 sys.meta_path 的查找器，为找到的模块包装计时加载器"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profiler, fullname)
+                return spec
+        return None
+
+
+class StartupProfiler:
+    """启动性能分析器，未启用时所有记录调用都是空操作"""
+
+    def __init__(self):
+        self.enabled = False
+        self.finished = False
+        self.spans = []
+        self.import_total = 0.0
+        self._stack = []
+        self._finder = None
+        self._origin = 0.0
+
+    def enable(self):
+        """开始记录，需要在导入 main 之前调用"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._origin = time.perf_counter()
+        self._finder = _TimedFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+    @contextmanager
+    def span(self, name: str):
+        """记录一个初始化步骤"""
+        if not self.enabled or self.finished:
+            yield
+            return
+        self._begin(name, "init")
+        try:
+            yield
+        finally:
+            self._end()
+
+    def mark_first_frame(self):
+        """第一帧显示后调用：停止记录并输出报告"""
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        first_frame_time = time.perf_counter() - self._origin
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        print(self.format_report(first_frame_time))
+
+    def _begin(self, name: str, category: str):
+        span = StartupSpan(name, category, time.perf_counter(), len(self._stack))
+        self._stack.append(span)
+
+    def _end(self):
+        span = self._stack.pop()
+        span.duration = time.perf_counter() - span.start
+        span.self_time = span.duration - span.children_time
+        if self._stack:
+            self._stack[-1].children_time += span.duration
+        # 只累计最外层的导入，嵌套导入已包含在父模块中
+        if span.category == "import" and not any(p.category == "import" for p in self._stack):
+            self.import_total += span.duration
+        self.spans.append(span)
+
+    def format_report(self, first_frame_time: float, limit: int = 25) -> str:
+        """生成排序后的启动报告"""
+        inits = [s for s in self.spans if s.category == "init"]
+
+        # 扩展模块的 create_module 和 exec_module 分别计时，这里按模块名合并
+        imports = {}
+        for s in self.spans:
+            if s.category == "import":
+                self_time, duration = imports.get(s.name, (0.0, 0.0))
+                imports[s.name] = (self_time + s.self_time, duration + s.duration)
+
+        lines = [
+            "",
+            "=" * 64,
+            f"启动分析: 第一帧在启动后 {first_frame_time * 1000:.1f} ms 显示",
+            f"模块导入: {len(imports)} 个，共 {self.import_total * 1000:.1f} ms",
+            "=" * 64,
+            f"{'自身(ms)':>10} {'累计(ms)':>10}  初始化步骤",
+        ]
+        for s in sorted(inits, key=lambda s: s.duration, reverse=True):
+            lines.append(f"{s.self_time * 1000:10.1f} {s.duration * 1000:10.1f}  {s.name}")
+
+        lines.append("-" * 64)
+        lines.append(f"{'自身(ms)':>10} {'累计(ms)':>10}  模块（按自身耗时排序，前 {limit} 个）")
+        ranked = sorted(imports.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (self_time, duration) in ranked[:limit]:
+            lines.append(f"{self_time * 1000:10.1f} {duration * 1000:10.1f}  {name}")
+        lines.append("=" * 64)
+        return "\n".join(lines)
+
+
+# 全局启动分析器
+startup_profiler = StartupProfiler()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+帧追踪导出模块
+录制一段连续帧内的 CPU/GPU 作用域，导出为 Chrome trace_event JSON，
+可在 chrome://tracing 或 Perfetto 中打开查找卡顿
+
+录制期间只向预先分配的数组写入数值，不创建对象，JSON 在录制结束后才生成
+"""
+
+import os
+import json
+import time
+import numpy as np
+
+# 事件所在的轨道
+TRACK_CPU = 0
+TRACK_GPU = 1
+TRACK_NAMES = {TRACK_CPU: "CPU", TRACK_GPU: "GPU"}
+
+# 帧事件使用的作用域序号
+FRAME_SCOPE = -1
+
+# 录制状态
+STATE_PENDING = "pending"      # 等待下一帧开始
+STATE_RECORDING = "recording"  # 正在录制
+STATE_COLLECTING = "collecting"  # 录制结束，等待 GPU 查询结果
+STATE_DONE = "done"            # 已写出文件
+
+
+def default_trace_path() -> str:
+    """默认的追踪文件路径: traces/frame-trace-时间.json"""
+    return os.path.join("traces", time.strftime("frame-trace-%Y%m%d-%H%M%S.json"))
+
+
+class TraceCapture:
+    """一次帧追踪录制，事件缓冲区在创建时一次分配"""
+
+    def __init__(self, frame_count: int, path: str = None, events_per_frame: int = 128):
+        """
+        Args:
+            frame_count: 录制的帧数
+            path: 输出文件路径，默认写到 traces/ 目录
+            events_per_frame: 每帧预留的事件数，超出的事件会被丢弃并计数
+        """
+        if frame_count <= 0:
+            raise ValueError(f"录制帧数必须大于 0: {frame_count}")
+
+        self.frame_count = frame_count
+        self.path = path or default_trace_path()
+        self.state = STATE_PENDING
+        self.first_frame = -1
+        self.origin = 0.0
+
+        capacity = frame_count * events_per_frame
+        self.capacity = capacity
+        self.count = 0
+        self.dropped = 0
+        self.tracks = np.zeros(capacity, dtype=np.int8)
+        self.scopes = np.zeros(capacity, dtype=np.int16)
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.durations = np.zeros(capacity, dtype=np.float64)
+
+    @property
+    def last_frame(self) -> int:
+        return self.first_frame + self.frame_count - 1
+
+    @property
+    def active(self) -> bool:
+        return self.state != STATE_DONE
+
+    def is_recording(self, frame: int) -> bool:
+        """frame 是否在录制范围内"""
+        return self.first_frame <= frame <= self.last_frame
+
+    def start(self, frame: int, now: float):
+        """从第 frame 帧开始录制"""
+        self.first_frame = frame
+        self.origin = now
+        self.state = STATE_RECORDING
+
+    def record(self, track: int, scope: int, frame: int, start: float, duration: float):
+        """记录一个事件（时间单位: 秒，start 为 perf_counter 时间）"""
+        i = self.count
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        self.tracks[i] = track
+        self.scopes[i] = scope
+        self.frames[i] = frame
+        self.starts[i] = start
+        self.durations[i] = duration
+        self.count = i + 1
+
+    def build_events(self, scope_names) -> list:
+        """生成 trace_event 事件列表"""
+        pid = os.getpid()
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": track, "args": {"name": name}}
+            for track, name in TRACK_NAMES.items()
+        ]
+
+        n = self.count
+        ts = (self.starts[:n] - self.origin) * 1e6
+        dur = self.durations[:n] * 1e6
+        for i in range(n):
+            scope = int(self.scopes[i])
+            frame = int(self.frames[i])
+            events.append({
+                "name": f"frame {frame}" if scope == FRAME_SCOPE else scope_names[scope],
+                "cat": "frame" if scope == FRAME_SCOPE else TRACK_NAMES[int(self.tracks[i])].lower(),
+                "ph": "X",
+                "ts": round(float(ts[i]), 3),
+                "dur": round(float(dur[i]), 3),
+                "pid": pid,
+                "tid": int(self.tracks[i]),
+                "args": {"frame": frame},
+            })
+        return events
+
+    def write(self, scope_names) -> str:
+        """写出 Chrome trace JSON，返回文件路径"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        trace = {
+            "traceEvents": self.build_events(scope_names),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "frames": self.frame_count,
+                "first_frame": self.first_frame,
+                "dropped_events": self.dropped,
+            },
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+
+        self.state = STATE_DONE
+        return self.path
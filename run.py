@@ -1,14 +1,70 @@
 #!/usr/bin/env python3
 """
 启动脚本 - ImGui Bundle 应用程序
+
+用法:
+    python run.py                    启动应用程序
+    python run.py --profile-startup  启动并在第一帧显示后输出启动耗时报告
+    python run.py --trace-frames 120 录制前 120 帧并导出 Chrome trace JSON
+    python run.py --batch scene.json --out frames/ --settings render.toml
+                                     不创建可见窗口，批量渲染场景帧到 frames/
 """
 
 import sys
 import os
+import argparse
 
 # 添加当前目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="ImGui Bundle 应用程序")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="记录模块导入和初始化耗时，第一帧显示后输出排序报告")
+    parser.add_argument("--trace-frames", type=int, default=0, metavar="N",
+                        help="录制启动后的前 N 帧，导出为 Chrome trace_event JSON")
+    parser.add_argument("--trace-output", default=None, metavar="PATH",
+                        help="帧追踪输出路径（默认 traces/frame-trace-时间.json）")
+
+    batch = parser.add_argument_group("批量渲染")
+    batch.add_argument("--batch", metavar="SCENE", default=None,
+                       help="无窗口批量渲染场景 JSON，不启动界面")
+    batch.add_argument("--out", metavar="DIR", default="frames",
+                       help="批量渲染输出目录（默认 frames/）")
+    batch.add_argument("--settings", metavar="TOML", default=None,
+                       help="批量渲染使用的渲染设置文件")
+    batch.add_argument("--backend", default="auto", choices=("auto", "glfw", "egl", "osmesa"),
+                       help="OpenGL 上下文后端，auto 在没有显示服务器时使用 EGL")
+    return parser.parse_args()
+
+
+args = parse_args()
+
+# 批量渲染: 必须在导入任何 OpenGL 模块之前选择上下文后端
+if args.batch:
+    from headless import select_backend
+    select_backend(args.backend)
+
+# 必须在导入 main 之前启用，才能记录所有模块的导入耗时
+if args.profile_startup:
+    from profiling import startup_profiler
+    startup_profiler.enable()
+
+if args.trace_frames > 0:
+    from profiling import frame_profiler
+    frame_profiler.start_trace(args.trace_frames, args.trace_output)
+
+if args.batch:
+    try:
+        from headless import run_batch
+        run_batch(args.batch, args.out, args.settings, args.backend)
+    except Exception as e:
+        print(f"批量渲染失败: {e}")
+        sys.exit(1)
+    sys.exit(0)
+
 try:
     from main import main
 
@@ -29,4 +85,4 @@ except ImportError as e:
     sys.exit(1)
 except Exception as e:
     print(f"运行时错误: {e}")
-    sys.exit(1)
\ No newline at end of file
+    sys.exit(1)
@@ -0,0 +1,6 @@
+from scene.frustum import frustum_planes, classify_aabbs, transform_aabbs
+from scene.bvh import DynamicBVH
+from scene.occlusion import DepthPyramid
+from scene.lod import projected_radius, select_lods
+from scene.scene import Scene
+from scene.outline_scene import OutlineScene, outline_scene
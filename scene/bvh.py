@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+动态包围盒层次（dynamic AABB tree）
+- 叶子保存放大了 margin 的"胖"包围盒，物体在胖包围盒内移动时不修改树
+- 移出时删除叶子并按表面积代价重新插入（Box2D b2DynamicTree 的插入方式），只更新祖先节点
+- 大量物体一次性加入时按 Morton 码排序后自底向上两两合并，全部用 NumPy 完成
+- 视锥查询按层遍历: 每层的所有节点一次向量化测试 6 个平面，完全在内侧的子树不再测试
+
+节点数据存放在 NumPy 数组中（按 2 倍扩容），节点编号在删除后复用
+"""
+
+import numpy as np
+from scene.frustum import classify_aabbs
+
+NULL_NODE = -1
+# 胖包围盒的扩展量: 尺寸的比例 + 绝对值
+FAT_MARGIN_RATIO = 0.1
+FAT_MARGIN_MIN = 0.05
+
+
+def _surface(low, high) -> float:
+    """包围盒的半表面积（插入代价）"""
+    dx, dy, dz = high[0] - low[0], high[1] - low[1], high[2] - low[2]
+    return dx * dy + dy * dz + dz * dx
+
+
+def _morton_codes(points: np.ndarray) -> np.ndarray:
+    """(n, 3) 点 -> 30 位 Morton 码（每轴 10 位）"""
+    low = points.min(axis=0)
+    size = np.maximum(points.max(axis=0) - low, 1e-30)
+    cells = np.clip(((points - low) / size * 1023.0).astype(np.int64), 0, 1023)
+    codes = np.zeros(len(points), dtype=np.int64)
+    for axis in range(3):
+        v = cells[:, axis]
+        # 把 10 位分散到每 3 位一位
+        v = (v | (v << 16)) & 0x030000FF
+        v = (v | (v << 8)) & 0x0300F00F
+        v = (v | (v << 4)) & 0x030C30C3
+        v = (v | (v << 2)) & 0x09249249
+        codes |= v << (2 - axis)
+    return codes
+
+
+class DynamicBVH:
+    """动态包围盒树，叶子对应调用方的物体编号（item）"""
+
+    def __init__(self, capacity: int = 64):
+        self.root = NULL_NODE
+        self.capacity = 0
+        self.low = np.zeros((0, 3), dtype=np.float32)
+        self.high = np.zeros((0, 3), dtype=np.float32)
+        self.parent = np.zeros(0, dtype=np.int32)
+        self.left = np.zeros(0, dtype=np.int32)
+        self.right = np.zeros(0, dtype=np.int32)
+        # 叶子的物体编号，内部节点为 -1
+        self.item = np.zeros(0, dtype=np.int32)
+        self._free = []
+        self._next = 0
+        self.leaf_count = 0
+        self._grow(capacity)
+
+    def _grow(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+        extra = capacity - self.capacity
+        self.low = np.concatenate([self.low, np.zeros((extra, 3), dtype=np.float32)])
+        self.high = np.concatenate([self.high, np.zeros((extra, 3), dtype=np.float32)])
+        for name in ("parent", "left", "right", "item"):
+            setattr(self, name, np.concatenate([getattr(self, name), np.full(extra, NULL_NODE, dtype=np.int32)]))
+        self.capacity = capacity
+
+    def _allocate(self) -> int:
+        if self._free:
+            node = self._free.pop()
+        else:
+            if self._next == self.capacity:
+                self._grow(self.capacity + 1)
+            node = self._next
+            self._next += 1
+        self.parent[node] = self.left[node] = self.right[node] = self.item[node] = NULL_NODE
+        return node
+
+    def _release(self, node: int):
+        self.item[node] = NULL_NODE
+        self._free.append(node)
+
+    def clear(self):
+        self.root = NULL_NODE
+        self._free = []
+        self._next = 0
+        self.leaf_count = 0
+
+    @staticmethod
+    def fatten(low: np.ndarray, high: np.ndarray):
+        """胖包围盒（支持 (3,) 和 (n, 3)）"""
+        margin = np.maximum((high - low).max(axis=-1, keepdims=True) * FAT_MARGIN_RATIO, FAT_MARGIN_MIN)
+        return low - margin, high + margin
+
+    # ------------------------------------------------------------------ 增量修改
+
+    def insert(self, item: int, low: np.ndarray, high: np.ndarray) -> int:
+        """插入物体，返回叶子节点编号"""
+        leaf = self._allocate()
+        self.low[leaf], self.high[leaf] = self.fatten(np.asarray(low, dtype=np.float32),
+                                                      np.asarray(high, dtype=np.float32))
+        self.item[leaf] = item
+        self._insert_leaf(leaf)
+        self.leaf_count += 1
+        return leaf
+
+    def remove(self, leaf: int):
+        self._remove_leaf(leaf)
+        self._release(leaf)
+        self.leaf_count -= 1
+
+    def move(self, leaf: int, low: np.ndarray, high: np.ndarray) -> bool:
+        """
+        更新叶子的包围盒
+
+        Returns:
+            是否修改了树（新包围盒仍在胖包围盒内时不修改）
+        """
+        low = np.asarray(low, dtype=np.float32)
+        high = np.asarray(high, dtype=np.float32)
+        if (low >= self.low[leaf]).all() and (high <= self.high[leaf]).all():
+            return False
+        self._remove_leaf(leaf)
+        self.low[leaf], self.high[leaf] = self.fatten(low, high)
+        self._insert_leaf(leaf)
+        return True
+
+    def _insert_leaf(self, leaf: int):
+        if self.root == NULL_NODE:
+            self.root = leaf
+            self.parent[leaf] = NULL_NODE
+            return
+
+        # 沿代价较小的子节点向下，找到合并代价最小的兄弟节点
+        leaf_low = self.low[leaf].tolist()
+        leaf_high = self.high[leaf].tolist()
+        left, right, low_all, high_all = self.left, self.right, self.low, self.high
+        node = self.root
+        while left[node] != NULL_NODE:
+            node_low = low_all[node].tolist()
+            node_high = high_all[node].tolist()
+            area = _surface(node_low, node_high)
+            combined = _surface([min(a, b) for a, b in zip(node_low, leaf_low)],
+                                [max(a, b) for a, b in zip(node_high, leaf_high)])
+            # 在这里新建父节点的代价，以及继续向下时祖先增大的代价
+            cost = 2.0 * combined
+            inheritance = 2.0 * (combined - area)
+
+            costs = []
+            for child in (int(left[node]), int(right[node])):
+                child_low = low_all[child].tolist()
+                child_high = high_all[child].tolist()
+                merged = _surface([min(a, b) for a, b in zip(child_low, leaf_low)],
+                                  [max(a, b) for a, b in zip(child_high, leaf_high)])
+                if left[child] != NULL_NODE:
+                    merged -= _surface(child_low, child_high)
+                costs.append(merged + inheritance)
+            if cost < costs[0] and cost < costs[1]:
+                break
+            node = int(left[node]) if costs[0] <= costs[1] else int(right[node])
+
+        sibling = node
+        old_parent = int(self.parent[sibling])
+        new_parent = self._allocate()
+        self.parent[new_parent] = old_parent
+        self.left[new_parent] = sibling
+        self.right[new_parent] = leaf
+        self.parent[sibling] = new_parent
+        self.parent[leaf] = new_parent
+        # 复用的节点可能保留旧包围盒，先直接写入，再从上一层开始向上更新
+        self.low[new_parent] = np.minimum(self.low[sibling], self.low[leaf])
+        self.high[new_parent] = np.maximum(self.high[sibling], self.high[leaf])
+        if old_parent == NULL_NODE:
+            self.root = new_parent
+        else:
+            if self.left[old_parent] == sibling:
+                self.left[old_parent] = new_parent
+            else:
+                self.right[old_parent] = new_parent
+            self._refit(old_parent)
+
+    def _remove_leaf(self, leaf: int):
+        if leaf == self.root:
+            self.root = NULL_NODE
+            return
+        parent = int(self.parent[leaf])
+        grandparent = int(self.parent[parent])
+        sibling = int(self.right[parent] if self.left[parent] == leaf else self.left[parent])
+        # 兄弟节点顶替父节点
+        self.parent[sibling] = grandparent
+        if grandparent == NULL_NODE:
+            self.root = sibling
+        else:
+            if self.left[grandparent] == parent:
+                self.left[grandparent] = sibling
+            else:
+                self.right[grandparent] = sibling
+            self._refit(grandparent)
+        self._release(parent)
+
+    def _refit(self, node: int):
+        """从 node 向上重新计算祖先的包围盒，包围盒不再变化时提前结束"""
+        while node != NULL_NODE:
+            a, b = self.left[node], self.right[node]
+            low = np.minimum(self.low[a], self.low[b])
+            high = np.maximum(self.high[a], self.high[b])
+            if (low == self.low[node]).all() and (high == self.high[node]).all():
+                break
+            self.low[node] = low
+            self.high[node] = high
+            node = int(self.parent[node])
+
+    # ------------------------------------------------------------------ 批量构建
+
+    def build(self, items: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """
+        清空并一次性构建（Morton 排序 + 自底向上两两合并）
+
+        Returns:
+            (n,) 每个物体的叶子节点编号
+        """
+        self.clear()
+        count = len(items)
+        if count == 0:
+            return np.zeros(0, dtype=np.int32)
+        self._grow(2 * count)
+        fat_low, fat_high = self.fatten(np.asarray(low, dtype=np.float32), np.asarray(high, dtype=np.float32))
+        leaves = np.arange(count, dtype=np.int32)
+        self.low[:count] = fat_low
+        self.high[:count] = fat_high
+        self.item[:count] = items
+        self.left[:count] = NULL_NODE
+        self.right[:count] = NULL_NODE
+
+        level = leaves[np.argsort(_morton_codes((fat_low + fat_high) * 0.5), kind="stable")]
+        next_node = count
+        while len(level) > 1:
+            pairs = len(level) // 2
+            parents = np.arange(next_node, next_node + pairs, dtype=np.int32)
+            next_node += pairs
+            a = level[0:2 * pairs:2]
+            b = level[1:2 * pairs:2]
+            self.left[parents] = a
+            self.right[parents] = b
+            self.item[parents] = NULL_NODE
+            self.parent[a] = parents
+            self.parent[b] = parents
+            self.low[parents] = np.minimum(self.low[a], self.low[b])
+            self.high[parents] = np.maximum(self.high[a], self.high[b])
+            # 奇数个时最后一个直接进入上一层
+            level = parents if len(level) % 2 == 0 else np.append(parents, level[-1])
+        self.root = int(level[0])
+        self.parent[self.root] = NULL_NODE
+        self._next = next_node
+        self.leaf_count = count
+        return leaves
+
+    # ------------------------------------------------------------------ 查询
+
+    def query_frustum(self, planes: np.ndarray):
+        """
+        视锥查询
+
+        Args:
+            planes: (6, 4) scene.frustum.frustum_planes() 的结果
+        Returns:
+            (items, tested): 可见叶子的物体编号，以及做了平面测试的节点数
+        """
+        if self.root == NULL_NODE:
+            return np.zeros(0, dtype=np.int32), 0
+        visible = []
+        tested = 0
+        frontier = np.array([self.root], dtype=np.int32)
+        # 完全在视锥内的子树，其后代不需要再测试
+        accepted = np.zeros(0, dtype=np.int32)
+        while len(frontier) or len(accepted):
+            if len(frontier):
+                tested += len(frontier)
+                outside, inside = classify_aabbs(planes, self.low[frontier], self.high[frontier])
+                accepted = np.concatenate([accepted, frontier[inside]])
+                frontier = frontier[~outside & ~inside]
+
+            # 叶子输出物体编号，内部节点展开到下一层
+            frontier_leaf = self.left[frontier] == NULL_NODE
+            accepted_leaf = self.left[accepted] == NULL_NODE
+            visible.append(self.item[frontier[frontier_leaf]])
+            visible.append(self.item[accepted[accepted_leaf]])
+            frontier = self._children(frontier[~frontier_leaf])
+            accepted = self._children(accepted[~accepted_leaf])
+        return np.concatenate(visible), tested
+
+    def _children(self, nodes: np.ndarray) -> np.ndarray:
+        return np.concatenate([self.left[nodes], self.right[nodes]])
+
+    def bounds(self):
+        """整棵树的（胖）包围盒，空树返回 None"""
+        if self.root == NULL_NODE:
+            return None
+        return self.low[self.root].copy(), self.high[self.root].copy()
+
+    def validate(self):
+        """检查父子关系和包围盒包含关系（调试用）"""
+        if self.root == NULL_NODE:
+            assert self.leaf_count == 0
+            return
+        stack = [self.root]
+        leaves = 0
+        while stack:
+            node = stack.pop()
+            if self.left[node] == NULL_NODE:
+                leaves += 1
+                continue
+            for child in (int(self.left[node]), int(self.right[node])):
+                assert self.parent[child] == node
+                assert (self.low[child] >= self.low[node]).all() and (self.high[child] <= self.high[node]).all()
+                stack.append(child)
+        assert leaves == self.leaf_count, (leaves, self.leaf_count)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+视锥体和包围盒工具（全部向量化）
+矩阵使用数学约定（列向量，v' = M @ v），与 gpu.transforms 一致
+"""
+
+import numpy as np
+
+# 视锥平面的顺序
+PLANE_NAMES = ("left", "right", "bottom", "top", "near", "far")
+
+
+def frustum_planes(view_projection: np.ndarray) -> np.ndarray:
+    """
+    从 投影 @ 观察 矩阵提取 6 个视锥平面（Gribb/Hartmann）
+
+    Returns:
+        (6, 4) float64 平面 (n, d)，n·p + d >= 0 表示在内侧，n 已归一化
+    """
+    m = np.asarray(view_projection, dtype=np.float64)
+    planes = np.empty((6, 4), dtype=np.float64)
+    planes[0] = m[3] + m[0]
+    planes[1] = m[3] - m[0]
+    planes[2] = m[3] + m[1]
+    planes[3] = m[3] - m[1]
+    planes[4] = m[3] + m[2]
+    planes[5] = m[3] - m[2]
+    planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+    return planes
+
+
+def classify_aabbs(planes: np.ndarray, low: np.ndarray, high: np.ndarray):
+    """
+    包围盒与视锥的关系
+
+    Args:
+        planes: (6, 4) frustum_planes() 的结果
+        low, high: (n, 3) 包围盒
+    Returns:
+        (outside, inside): (n,) bool，完全在外侧 / 完全在内侧；都为 False 表示与边界相交
+    """
+    center = (low + high) * 0.5
+    extent = (high - low) * 0.5
+    # 包围盒中心到各平面的距离，以及包围盒在平面法线方向上的半径
+    distance = center @ planes[:, :3].T + planes[:, 3]
+    radius = extent @ np.abs(planes[:, :3]).T
+    outside = (distance < -radius).any(axis=1)
+    inside = (distance >= radius).all(axis=1)
+    return outside, inside
+
+
+def transform_aabbs(low: np.ndarray, high: np.ndarray, matrices: np.ndarray):
+    """
+    局部包围盒经过变换后的世界包围盒（Arvo 方法，不展开 8 个角点）
+
+    Args:
+        low, high: (n, 3) 或 (3,) 局部包围盒
+        matrices: (n, 4, 4) 数学约定的变换矩阵
+    Returns:
+        (low, high): (n, 3) float32
+    """
+    center = (np.asarray(low, dtype=np.float32) + high) * 0.5
+    extent = (np.asarray(high, dtype=np.float32) - low) * 0.5
+    linear = matrices[:, :3, :3]
+    world_center = np.einsum("nij,nj->ni", linear, np.broadcast_to(center, (len(matrices), 3))) + matrices[:, :3, 3]
+    world_extent = np.einsum("nij,nj->ni", np.abs(linear), np.broadcast_to(extent, (len(matrices), 3)))
+    return world_center - world_extent, world_center + world_extent
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+细节层次（LOD）选择（全部向量化）
+物体的包围球按透视投影换算成屏幕上的半径（像素），每级 LOD 的简化误差按相对包围球半径的比例
+换算成像素，选择误差不超过阈值的最粗一级
+
+切换带滞后: 变粗时误差要低于阈值的 (1 - LOD_HYSTERESIS) 倍，变细只在当前级超过阈值时发生，
+物体停在阈值附近时不会逐帧来回切换
+"""
+
+import numpy as np
+
+# 默认的屏幕空间误差阈值（像素）
+DEFAULT_LOD_PIXELS = 1.0
+# 变粗时阈值的缩小比例
+LOD_HYSTERESIS = 0.25
+
+
+def projected_radius(centers: np.ndarray, radii: np.ndarray, eye: np.ndarray, projection: np.ndarray,
+                     viewport_height: int) -> np.ndarray:
+    """
+    包围球投影到屏幕上的半径（像素）
+
+    Args:
+        centers: (n, 3) 世界空间球心
+        radii: (n,) 半径
+        eye: (3,) 相机位置
+        projection: 透视投影矩阵（projection[1, 1] = 1 / tan(fov_y / 2)）
+        viewport_height: 视口高度（像素）
+    Returns:
+        (n,) 像素半径，相机在球内时为 inf
+    """
+    distance = np.linalg.norm(np.asarray(centers, dtype=np.float64) - np.asarray(eye, dtype=np.float64), axis=1)
+    # 按球面最近点的距离估计，偏保守（偏大）
+    nearest = distance - radii
+    scale = float(projection[1, 1]) * viewport_height * 0.5
+    with np.errstate(divide="ignore"):
+        return np.where(nearest > 0.0, radii * scale / np.maximum(nearest, 1e-30), np.inf)
+
+
+def select_lods(pixel_radii: np.ndarray, radii: np.ndarray, errors: np.ndarray, current: np.ndarray = None,
+                threshold: float = DEFAULT_LOD_PIXELS) -> np.ndarray:
+    """
+    Args:
+        pixel_radii: (n,) projected_radius() 的结果
+        radii: (n,) 包围球半径（世界单位）
+        errors: (n, levels) 每级的简化误差（世界单位，第 0 级为 0，级数不足的物体用 inf 补齐）
+        current: (n,) 上一帧的级别，None 表示没有（不做滞后）
+        threshold: 屏幕空间误差阈值（像素）
+    Returns:
+        (n,) int64 选择的级别
+    """
+    # 相机在包围球内时 inf * 0 为 nan，只能用第 0 级
+    with np.errstate(invalid="ignore"):
+        pixel_errors = np.asarray(errors, dtype=np.float64) * (pixel_radii / np.maximum(radii, 1e-30))[:, None]
+    # 误差随级别单调增加，满足条件的级数就是最粗可用级别的下一级
+    allowed = np.maximum((pixel_errors <= threshold).sum(axis=1) - 1, 0)
+    if current is None:
+        return allowed
+    coarser = np.maximum((pixel_errors <= threshold * (1.0 - LOD_HYSTERESIS)).sum(axis=1) - 1, 0)
+    current = np.minimum(np.asarray(current, dtype=np.int64), errors.shape[1] - 1)
+    return np.where(current > allowed, allowed, np.maximum(current, coarser))
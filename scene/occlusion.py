@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+CPU 层次 Z（Hi-Z）遮挡测试
+之前某一帧读回的深度按 2x2 取最大值逐级缩小成深度金字塔。物体的世界包围盒用同一帧的
+投影观察矩阵投影到屏幕，选择包围矩形最多覆盖 2x2 个纹素的层级；包围盒最近的深度比这些纹素中
+最远的深度还远时，物体在那一帧被完全遮挡
+
+结果晚一帧（或几帧），和异步遮挡查询一样不会让 CPU 等待 GPU。穿过近平面或超出那一帧视口的
+物体无法判断，始终视为可见
+"""
+
+import numpy as np
+
+# 深度比较的余量（深度缓冲是 24 位定点数）
+DEPTH_BIAS = 1e-5
+# 包围盒的 8 个角点选择 low/high 的掩码
+_CORNERS = np.array([[(i >> axis) & 1 for axis in range(3)] for i in range(8)], dtype=bool)
+
+
+class DepthPyramid:
+    """最大深度金字塔"""
+
+    def __init__(self, depth: np.ndarray, view_projection: np.ndarray, version=None):
+        """
+        Args:
+            depth: (height, width) 窗口深度 [0, 1]，第 0 行是画面底部
+            view_projection: 渲染这一帧时的 投影 @ 观察 矩阵
+            version: 调用方的场景版本，用于判断结果是否过时
+        """
+        self.view_projection = np.asarray(view_projection, dtype=np.float64)
+        self.version = version
+        self.height, self.width = depth.shape
+        self.levels = [np.ascontiguousarray(depth, dtype=np.float32)]
+        level = self.levels[0]
+        while level.shape[0] > 1 or level.shape[1] > 1:
+            h, w = level.shape
+            # 奇数尺寸用 1.0（最远）补齐，取最大值时保持保守
+            if h % 2 or w % 2:
+                padded = np.ones((h + h % 2, w + w % 2), dtype=np.float32)
+                padded[:h, :w] = level
+                level = padded
+            level = level.reshape(level.shape[0] // 2, 2, level.shape[1] // 2, 2).max(axis=(1, 3))
+            self.levels.append(level)
+
+    def test(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """
+        Args:
+            low, high: (n, 3) 世界包围盒
+        Returns:
+            (n,) bool，在这一帧中被完全遮挡
+        """
+        n = len(low)
+        occluded = np.zeros(n, dtype=bool)
+        if n == 0:
+            return occluded
+
+        # 角点的裁剪坐标 = low 的裁剪坐标 + 选中轴上的边长乘矩阵列，逐个角点累计最小/最大值，
+        # 避免 (n, 8, 4) 的中间数组
+        matrix = self.view_projection.astype(np.float32)
+        base = low @ matrix[:, :3].T + matrix[:, 3]
+        size = (high - low).astype(np.float32)
+        edges = [size[:, axis, None] * matrix[:, axis] for axis in range(3)]
+        ndc_low = np.full((n, 3), np.inf, dtype=np.float32)
+        ndc_high = np.full((n, 3), -np.inf, dtype=np.float32)
+        w_low = np.full(n, np.inf, dtype=np.float32)
+        for corner in _CORNERS:
+            clip = base.copy()
+            for axis in np.flatnonzero(corner):
+                clip += edges[axis]
+            w = clip[:, 3]
+            np.minimum(w_low, w, out=w_low)
+            ndc = clip[:, :3] / np.where(w > 1e-6, w, 1.0)[:, None]
+            np.minimum(ndc_low, ndc, out=ndc_low)
+            np.maximum(ndc_high, ndc, out=ndc_high)
+        # 有角点在近平面后方时无法投影
+        testable = w_low > 1e-6
+        testable &= (ndc_low[:, :2] >= -1.0).all(axis=1) & (ndc_high[:, :2] <= 1.0).all(axis=1)
+        testable &= ndc_low[:, 2] >= -1.0
+        candidates = np.flatnonzero(testable)
+        if len(candidates) == 0:
+            return occluded
+
+        nearest = ndc_low[candidates, 2] * 0.5 + 0.5
+        x0 = np.clip(((ndc_low[candidates, 0] * 0.5 + 0.5) * self.width).astype(np.int64), 0, self.width - 1)
+        x1 = np.clip(((ndc_high[candidates, 0] * 0.5 + 0.5) * self.width).astype(np.int64), 0, self.width - 1)
+        y0 = np.clip(((ndc_low[candidates, 1] * 0.5 + 0.5) * self.height).astype(np.int64), 0, self.height - 1)
+        y1 = np.clip(((ndc_high[candidates, 1] * 0.5 + 0.5) * self.height).astype(np.int64), 0, self.height - 1)
+
+        # 矩形尺寸 s 在第 ceil(log2(s)) 层最多跨 2 个纹素
+        extent = np.maximum(x1 - x0, y1 - y0) + 1
+        level_index = np.minimum(np.ceil(np.log2(extent)).astype(np.int64), len(self.levels) - 1)
+        farthest = np.zeros(len(candidates), dtype=np.float32)
+        for level in np.unique(level_index).tolist():
+            selected = np.flatnonzero(level_index == level)
+            texels = self.levels[level]
+            lx0, lx1 = x0[selected] >> level, x1[selected] >> level
+            ly0, ly1 = y0[selected] >> level, y1[selected] >> level
+            farthest[selected] = np.maximum(np.maximum(texels[ly0, lx0], texels[ly0, lx1]),
+                                            np.maximum(texels[ly1, lx0], texels[ly1, lx1]))
+        occluded[candidates] = nearest > farthest + DEPTH_BIAS
+        return occluded
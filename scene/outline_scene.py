@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+大纲中的网格对象作为可绘制的场景
+变换（位置、旋转、缩放、可见性）按对象 ID 保存在这里，属性面板读取并修改；
+修改时只更新该对象的世界包围盒和包围盒树中的叶子
+
+大纲增删对象后 revision 变化，sync() 只在变化时比较对象列表
+
+大纲中的光源对象作为点光源，参数（位置、颜色、强度、半径）同样按对象 ID 保存在这里，
+视口每帧用 light_arrays() 取出分簇
+"""
+
+import numpy as np
+from scene.scene import Scene
+from gpu.transforms import euler_trs
+
+# 大纲网格对象使用的原型（边长 1 的立方体）
+OUTLINE_PROTOTYPE = "cube"
+# 没有设置过变换的对象按加入顺序排成网格
+DEFAULT_COLUMNS = 4
+DEFAULT_SPACING = 3.0
+OUTLINE_PALETTE = (
+    (0.90, 0.55, 0.20, 1.0),
+    (0.35, 0.65, 0.90, 1.0),
+    (0.55, 0.80, 0.40, 1.0),
+    (0.85, 0.35, 0.45, 1.0),
+    (0.75, 0.75, 0.70, 1.0),
+)
+# 没有设置过参数的光源排在网格对象上方
+DEFAULT_LIGHT_HEIGHT = 3.0
+DEFAULT_LIGHT_RADIUS = 8.0
+DEFAULT_LIGHT_COLOR = (1.0, 0.9, 0.75)
+
+
+class OutlineScene(Scene):
+    """大纲网格对象的场景，键是大纲对象 ID"""
+
+    def __init__(self):
+        super().__init__()
+        self.set_prototype(OUTLINE_PROTOTYPE, (-0.5, -0.5, -0.5), (0.5, 0.5, 0.5))
+        # 对象 ID -> {"position", "rotation", "scale", "visible"}
+        self.transforms = {}
+        # 光源对象 ID -> {"position", "color", "intensity", "radius"}
+        self.lights = {}
+        self.revision = None
+        self._next_slot = 0
+        self._next_light_slot = 0
+
+    def get_transform(self, key: str) -> dict:
+        """对象的变换，第一次访问时分配默认位置"""
+        transform = self.transforms.get(key)
+        if transform is None:
+            slot = self._next_slot
+            self._next_slot += 1
+            row, column = divmod(slot, DEFAULT_COLUMNS)
+            transform = self.transforms[key] = {
+                "position": [(column - (DEFAULT_COLUMNS - 1) * 0.5) * DEFAULT_SPACING, 0.5, row * DEFAULT_SPACING],
+                "rotation": [0.0, 0.0, 0.0],
+                "scale": [1.0, 1.0, 1.0],
+                "visible": True,
+                "color": OUTLINE_PALETTE[slot % len(OUTLINE_PALETTE)],
+            }
+        return transform
+
+    def update_object(self, key: str, position, rotation, scale, visible: bool = True):
+        """属性面板修改了对象的变换或可见性"""
+        transform = self.get_transform(key)
+        transform["position"] = list(position)
+        transform["rotation"] = list(rotation)
+        transform["scale"] = list(scale)
+        transform["visible"] = visible
+        if key in self.index:
+            self.set_transform(key, euler_trs(position, rotation, scale))
+            self.set_visible(key, visible)
+
+    def get_light(self, key: str) -> dict:
+        """光源的点光源参数，第一次访问时分配默认位置"""
+        light = self.lights.get(key)
+        if light is None:
+            slot = self._next_light_slot
+            self._next_light_slot += 1
+            row, column = divmod(slot, DEFAULT_COLUMNS)
+            light = self.lights[key] = {
+                "position": [(column - (DEFAULT_COLUMNS - 1) * 0.5) * DEFAULT_SPACING, DEFAULT_LIGHT_HEIGHT,
+                             row * DEFAULT_SPACING],
+                "color": list(DEFAULT_LIGHT_COLOR),
+                "intensity": 1.0,
+                "radius": DEFAULT_LIGHT_RADIUS,
+            }
+        return light
+
+    def update_light(self, key: str, position, color, intensity: float, radius: float):
+        """属性面板修改了光源的参数"""
+        light = self.get_light(key)
+        light["position"] = list(position)
+        light["color"] = list(color)
+        light["intensity"] = float(intensity)
+        light["radius"] = float(radius)
+
+    def light_arrays(self, light_ids):
+        """
+        光源对象的参数数组
+
+        Returns:
+            (位置 (n, 3), 颜色 * 强度 (n, 3), 半径 (n,))
+        """
+        lights = [self.get_light(key) for key in light_ids]
+        positions = np.array([light["position"] for light in lights], dtype=np.float32).reshape(-1, 3)
+        colors = np.array([light["color"] for light in lights], dtype=np.float32).reshape(-1, 3)
+        intensities = np.array([light["intensity"] for light in lights], dtype=np.float32)
+        radii = np.array([light["radius"] for light in lights], dtype=np.float32)
+        return positions, colors * intensities[:, None], radii
+
+    def sync(self, mesh_ids, revision):
+        """
+        与大纲的网格对象同步
+
+        Args:
+            mesh_ids: 大纲中所有网格对象的 ID
+            revision: 大纲的修改计数，未变化时直接返回
+        """
+        if revision == self.revision:
+            return
+        self.revision = revision
+        wanted = set(mesh_ids)
+        for key in [key for key in self.index if key not in wanted]:
+            self.remove(key)
+        for key in mesh_ids:
+            if key not in self.index:
+                t = self.get_transform(key)
+                self.add(key, OUTLINE_PROTOTYPE, euler_trs(t["position"], t["rotation"], t["scale"]),
+                         t["color"], t["visible"])
+
+    def forget(self, key: str):
+        """对象被删除时丢弃保存的变换或光源参数"""
+        self.transforms.pop(key, None)
+        self.lights.pop(key, None)
+
+
+# 全局大纲场景
+outline_scene = OutlineScene()
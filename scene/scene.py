@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+可剔除的物体集合
+每个物体有原型（网格）名称、变换、颜色和世界包围盒；物体数据按数组存放（删除时与最后一个交换），
+世界包围盒放在 DynamicBVH 中，变换修改时只更新该物体的叶子
+
+每帧 cull() 用视锥查询得到可见物体，occlusion_cull() 再用之前一帧的深度去掉被遮挡的物体，
+gather() 按原型整理成实例数据，只有可见物体进入绘制提交
+"""
+
+import time
+import numpy as np
+from scene.bvh import DynamicBVH, NULL_NODE
+from scene.frustum import frustum_planes, transform_aabbs
+from scene.occlusion import DepthPyramid
+
+
+class Scene:
+    """物体集合 + 动态包围盒树"""
+
+    def __init__(self, capacity: int = 64):
+        self.bvh = DynamicBVH(capacity * 2)
+        # 原型: 名称 -> 编号，编号 -> 局部包围盒
+        self.prototype_ids = {}
+        self.prototype_names = []
+        self._prototype_low = np.zeros((0, 3), dtype=np.float32)
+        self._prototype_high = np.zeros((0, 3), dtype=np.float32)
+
+        self.count = 0
+        self.capacity = 0
+        self.models = np.zeros((0, 4, 4), dtype=np.float32)
+        self.colors = np.zeros((0, 4), dtype=np.float32)
+        self.prototypes = np.zeros(0, dtype=np.int32)
+        self.world_low = np.zeros((0, 3), dtype=np.float32)
+        self.world_high = np.zeros((0, 3), dtype=np.float32)
+        # 物体的叶子节点，隐藏的物体不在树中（NULL_NODE）
+        self.leaves = np.zeros(0, dtype=np.int32)
+        # 物体编号 <-> 调用方的键（批量加入的物体没有键）
+        self.keys = []
+        self.index = {}
+        # 物体或变换每次修改加一，用于判断旧的遮挡结果是否过时
+        self.version = 0
+
+        # 最近一次 cull() / occlusion_cull() 的统计
+        self.stats = {"total": 0, "visible": 0, "culled": 0, "hidden": 0, "nodes": 0, "ms": 0.0,
+                      "occluded": 0, "occlusion_ms": 0.0}
+        self._reserve(capacity)
+
+    def _reserve(self, capacity: int):
+        if capacity <= self.capacity:
+            return
+        capacity = max(capacity, self.capacity * 2)
+
+        def grown(array, fill=0):
+            result = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+            result[:self.count] = array[:self.count]
+            return result
+
+        self.models = grown(self.models)
+        self.colors = grown(self.colors)
+        self.prototypes = grown(self.prototypes)
+        self.world_low = grown(self.world_low)
+        self.world_high = grown(self.world_high)
+        self.leaves = grown(self.leaves, NULL_NODE)
+        self.capacity = capacity
+
+    def set_prototype(self, name: str, low, high) -> int:
+        """注册原型及其局部包围盒，返回原型编号"""
+        prototype = self.prototype_ids.get(name)
+        if prototype is None:
+            prototype = self.prototype_ids[name] = len(self.prototype_names)
+            self.prototype_names.append(name)
+            self._prototype_low = np.vstack([self._prototype_low, np.zeros((1, 3), dtype=np.float32)])
+            self._prototype_high = np.vstack([self._prototype_high, np.zeros((1, 3), dtype=np.float32)])
+        self._prototype_low[prototype] = low
+        self._prototype_high[prototype] = high
+        return prototype
+
+    def _update_bounds(self, indices: np.ndarray):
+        prototypes = self.prototypes[indices]
+        self.world_low[indices], self.world_high[indices] = transform_aabbs(
+            self._prototype_low[prototypes], self._prototype_high[prototypes], self.models[indices])
+
+    # ------------------------------------------------------------------ 修改
+
+    def add(self, key, prototype: str, model: np.ndarray, color, visible: bool = True) -> int:
+        """
+        加入一个物体
+
+        Args:
+            key: 调用方的键（例如大纲对象 ID），用于之后修改或删除
+            prototype: 已注册的原型名称
+            model: (4, 4) 数学约定的变换矩阵
+            color: RGBA
+            visible: 是否可见；隐藏的物体不放入树中
+        """
+        if key in self.index:
+            raise KeyError(f"物体已存在: {key}")
+        self._reserve(self.count + 1)
+        i = self.count
+        self.count += 1
+        self.models[i] = model
+        self.colors[i] = color
+        self.prototypes[i] = self.prototype_ids[prototype]
+        self.keys.append(key)
+        self.index[key] = i
+        self.version += 1
+        self._update_bounds(np.array([i]))
+        self.leaves[i] = self.bvh.insert(i, self.world_low[i], self.world_high[i]) if visible else NULL_NODE
+        return i
+
+    def add_many(self, prototypes: np.ndarray, models: np.ndarray, colors: np.ndarray) -> np.ndarray:
+        """
+        批量加入没有键的物体；场景为空时整棵树一次构建
+
+        Args:
+            prototypes: (n,) 原型名称
+            models: (n, 4, 4) 数学约定的变换矩阵
+            colors: (n, 4) 或 (4,) RGBA
+        Returns:
+            (n,) 物体编号
+        """
+        n = len(models)
+        self._reserve(self.count + n)
+        indices = np.arange(self.count, self.count + n)
+        self.models[indices] = models
+        self.colors[indices] = colors
+        names, inverse = np.unique(np.asarray(prototypes), return_inverse=True)
+        self.prototypes[indices] = np.array([self.prototype_ids[name] for name in names], dtype=np.int32)[inverse]
+        self.keys.extend([None] * n)
+        was_empty = self.count == 0
+        self.count += n
+        self.version += 1
+        self._update_bounds(indices)
+
+        if was_empty:
+            self.leaves[indices] = self.bvh.build(indices.astype(np.int32), self.world_low[indices],
+                                                  self.world_high[indices])
+        else:
+            for i in indices.tolist():
+                self.leaves[i] = self.bvh.insert(i, self.world_low[i], self.world_high[i])
+        return indices
+
+    def remove(self, key):
+        """删除物体（最后一个物体移动到空出的位置）"""
+        i = self.index.pop(key)
+        if self.leaves[i] != NULL_NODE:
+            self.bvh.remove(int(self.leaves[i]))
+        last = self.count - 1
+        if i != last:
+            for array in (self.models, self.colors, self.prototypes, self.world_low, self.world_high, self.leaves):
+                array[i] = array[last]
+            moved_key = self.keys[last]
+            self.keys[i] = moved_key
+            if moved_key is not None:
+                self.index[moved_key] = i
+            if self.leaves[i] != NULL_NODE:
+                self.bvh.item[self.leaves[i]] = i
+        self.keys.pop()
+        self.count = last
+        self.version += 1
+
+    def clear(self):
+        self.bvh.clear()
+        self.count = 0
+        self.keys = []
+        self.index = {}
+        self.version += 1
+
+    def set_transform(self, key, model: np.ndarray) -> bool:
+        """
+        修改物体的变换，只更新它的世界包围盒和叶子
+
+        Returns:
+            树是否被修改（物体移出了胖包围盒）
+        """
+        i = self.index[key]
+        self.models[i] = model
+        self.version += 1
+        self._update_bounds(np.array([i]))
+        leaf = int(self.leaves[i])
+        if leaf == NULL_NODE:
+            return False
+        return self.bvh.move(leaf, self.world_low[i], self.world_high[i])
+
+    def set_visible(self, key, visible: bool):
+        i = self.index[key]
+        in_tree = self.leaves[i] != NULL_NODE
+        if visible != in_tree:
+            self.version += 1
+        if visible and not in_tree:
+            self.leaves[i] = self.bvh.insert(i, self.world_low[i], self.world_high[i])
+        elif not visible and in_tree:
+            self.bvh.remove(int(self.leaves[i]))
+            self.leaves[i] = NULL_NODE
+
+    # ------------------------------------------------------------------ 查询
+
+    def cull(self, view_projection: np.ndarray) -> np.ndarray:
+        """
+        视锥剔除
+
+        Args:
+            view_projection: 投影 @ 观察（数学约定）
+        Returns:
+            可见物体编号（升序），统计写入 self.stats
+        """
+        start = time.perf_counter()
+        visible, tested = self.bvh.query_frustum(frustum_planes(view_projection))
+        visible = np.sort(visible)
+        in_tree = self.bvh.leaf_count
+        stats = self.stats
+        stats["total"] = self.count
+        stats["visible"] = len(visible)
+        stats["culled"] = in_tree - len(visible)
+        stats["hidden"] = self.count - in_tree
+        stats["nodes"] = tested
+        stats["ms"] = (time.perf_counter() - start) * 1000.0
+        stats["occluded"] = 0
+        stats["occlusion_ms"] = 0.0
+        return visible
+
+    def occlusion_cull(self, indices: np.ndarray, pyramid: DepthPyramid) -> np.ndarray:
+        """
+        遮挡剔除：去掉在 pyramid 那一帧中被完全遮挡的物体
+
+        Args:
+            indices: cull() 得到的可见物体编号
+            pyramid: 之前某一帧的深度金字塔
+        Returns:
+            未被遮挡的物体编号（保持顺序）
+        """
+        start = time.perf_counter()
+        occluded = pyramid.test(self.world_low[indices], self.world_high[indices])
+        kept = indices[~occluded]
+        self.stats["occluded"] = len(indices) - len(kept)
+        self.stats["occlusion_ms"] = (time.perf_counter() - start) * 1000.0
+        return kept
+
+    def gather(self, indices: np.ndarray) -> dict:
+        """
+        按原型整理物体的实例数据
+
+        Returns:
+            原型名称 -> ((k, 4, 4) 列主序矩阵, (k, 4) 颜色)，没有可见物体的原型为空数组
+        """
+        prototypes = self.prototypes[indices]
+        result = {}
+        for prototype, name in enumerate(self.prototype_names):
+            selected = indices[prototypes == prototype]
+            result[name] = (np.swapaxes(self.models[selected], 1, 2), self.colors[selected])
+        return result
+
+    def bounds(self):
+        """可见（未隐藏）物体的世界包围盒，没有时返回 None"""
+        shown = self.leaves[:self.count] != NULL_NODE
+        if not shown.any():
+            return None
+        return self.world_low[:self.count][shown].min(axis=0), self.world_high[:self.count][shown].max(axis=0)
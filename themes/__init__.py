@@ -1 +1,4 @@
 from themes.apply_toml_theme import apply_toml_theme as apply_theme
+from themes.apply_toml_theme import ThemeSnapshot, compile_theme
+from themes.theme_manager import ThemeManager
+from themes.theme_bundle import load_theme_bundle, write_theme_bundle, validate_theme
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+主题编译入口
+
+用法:
+    python -m themes.compile [--theme-dir DIR] [--output FILE] [--strict]
+
+校验 themes/ 下的所有 TOML 主题，报告未知字段和无法解析的颜色，
+然后写出程序启动时加载的主题包
+"""
+
+import argparse
+import sys
+from themes.theme_bundle import THEME_DIR, DEFAULT_BUNDLE_PATH, compile_theme_dir, write_theme_bundle
+
+
+def main(argv=None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description="校验并编译 TOML 主题为主题包")
+    parser.add_argument("--theme-dir", default=THEME_DIR, help="TOML 主题所在目录")
+    parser.add_argument("--output", default=DEFAULT_BUNDLE_PATH, help="主题包输出路径")
+    parser.add_argument("--strict", action="store_true", help="存在任何问题时不写出主题包")
+    args = parser.parse_args(argv)
+
+    entries, report = compile_theme_dir(args.theme_dir)
+
+    problem_count = 0
+    for theme_file_path, problems in report.items():
+        if problems:
+            print(f"{theme_file_path}:")
+            for problem in problems:
+                print(f"  - {problem}")
+            problem_count += len(problems)
+        else:
+            print(f"{theme_file_path}: OK")
+
+    if not entries:
+        print(f"错误: 在 {args.theme_dir} 中没有找到可用的主题")
+        return 1
+
+    if problem_count and args.strict:
+        print(f"共 {problem_count} 个问题，未写出主题包")
+        return 1
+
+    write_theme_bundle(entries, args.output)
+    print(f"已写出 {len(entries)} 个主题到 {args.output}（{problem_count} 个问题）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
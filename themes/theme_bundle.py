@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+主题包模块
+把 themes/ 下的所有 TOML 主题校验并编译为一个 pickle 主题包，
+程序启动时一次读取即可得到全部主题快照
+"""
+
+import os
+import glob
+import pickle
+from themes.apply_toml_theme import (
+    STYLE_FIELDS, IGNORED_FIELDS, COLOR_FIELDS,
+    ThemeSnapshot, load_theme_file, try_parse_color, compile_theme
+)
+
+# 主题包格式版本，格式变化时递增
+BUNDLE_VERSION = 1
+
+THEME_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUNDLE_PATH = os.path.join(THEME_DIR, "themes.bundle")
+
+
+def theme_name_from_path(theme_file_path: str) -> str:
+    """主题名称取文件名（不含扩展名）"""
+    return os.path.splitext(os.path.basename(theme_file_path))[0]
+
+
+def validate_theme(theme_data: dict) -> list:
+    """
+    校验主题字典
+
+    Returns:
+        问题描述列表，为空表示主题完全合法
+    """
+    problems = []
+
+    for key, value in theme_data.items():
+        if key == 'colors' or key in IGNORED_FIELDS:
+            continue
+        if key not in STYLE_FIELDS:
+            problems.append(f"未知样式字段: {key}")
+            continue
+
+        kind = STYLE_FIELDS[key][1]
+        if kind == 'vec2':
+            if (not isinstance(value, list) or len(value) != 2
+                    or not all(isinstance(v, (int, float)) for v in value)):
+                problems.append(f"字段 {key} 应为两个数字组成的数组: {value!r}")
+        elif isinstance(kind, dict):
+            if value not in kind:
+                problems.append(f"字段 {key} 的取值无效: {value!r}，可选: {', '.join(kind)}")
+        elif isinstance(value, bool) or not isinstance(value, (int, float)):
+            problems.append(f"字段 {key} 应为数字: {value!r}")
+
+    colors = theme_data.get('colors', {})
+    if not isinstance(colors, dict):
+        problems.append("colors 应为表")
+        return problems
+
+    for color_name, color_value in colors.items():
+        if color_name not in COLOR_FIELDS:
+            problems.append(f"未知颜色: {color_name}")
+        elif not isinstance(color_value, str) or try_parse_color(color_value) is None:
+            problems.append(f"无法解析颜色 {color_name}: {color_value!r}")
+
+    return problems
+
+
+def compile_theme_dir(theme_dir: str = THEME_DIR):
+    """
+    校验并编译目录下的所有 TOML 主题
+
+    Returns:
+        (entries, report): entries 为 {名称: (源文件, 修改时间, 样式值, 颜色值)}，
+        report 为 {源文件: 问题列表}
+    """
+    entries = {}
+    report = {}
+
+    for theme_file_path in sorted(glob.glob(os.path.join(theme_dir, "*.toml"))):
+        theme_data = load_theme_file(theme_file_path)
+        if theme_data is None:
+            report[theme_file_path] = ["无法读取主题文件"]
+            continue
+
+        report[theme_file_path] = validate_theme(theme_data)
+
+        snapshot = compile_theme(theme_data, theme_name_from_path(theme_file_path))
+        mtime = os.stat(theme_file_path).st_mtime_ns
+        entries[snapshot.name] = (theme_file_path, mtime, snapshot.style_values, snapshot.color_values)
+
+    return entries, report
+
+
+def write_theme_bundle(entries: dict, bundle_path: str = DEFAULT_BUNDLE_PATH):
+    """写入主题包"""
+    # 源文件路径保存为相对主题包的路径，仓库移动后热重载仍然有效
+    bundle_dir = os.path.dirname(os.path.abspath(bundle_path))
+    themes = {}
+    for name, (source_path, mtime, style_values, color_values) in entries.items():
+        themes[name] = (os.path.relpath(source_path, bundle_dir), mtime, style_values, color_values)
+
+    bundle = {
+        "version": BUNDLE_VERSION,
+        "themes": themes
+    }
+    # 先写临时文件再替换，避免程序读到写了一半的主题包
+    tmp_path = bundle_path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, bundle_path)
+
+
+def load_theme_bundle(bundle_path: str = DEFAULT_BUNDLE_PATH):
+    """
+    读取主题包
+
+    Returns:
+        {名称: (源文件, 修改时间, ThemeSnapshot)}，主题包不存在或版本不匹配时返回 None
+    """
+    try:
+        with open(bundle_path, 'rb') as f:
+            bundle = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"警告: 主题包读取失败: {e}")
+        return None
+
+    if not isinstance(bundle, dict) or bundle.get("version") != BUNDLE_VERSION:
+        print("警告: 主题包版本不匹配，请重新运行 python -m themes.compile")
+        return None
+
+    bundle_dir = os.path.dirname(os.path.abspath(bundle_path))
+    themes = {}
+    for name, (source_path, mtime, style_values, color_values) in bundle["themes"].items():
+        source_path = os.path.join(bundle_dir, source_path)
+        themes[name] = (source_path, mtime, ThemeSnapshot(name, style_values, color_values))
+    return themes
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+主题管理模块
+主题只在切换或文件变化时应用一次，并通过文件修改时间实现热重载
+
+启动时优先从主题包一次性加载所有主题快照，切换主题只是替换当前快照
+"""
+
+import os
+import glob
+import time
+from themes.apply_toml_theme import ThemeSnapshot, load_theme_file, compile_theme
+from themes.theme_bundle import THEME_DIR, DEFAULT_BUNDLE_PATH, load_theme_bundle, theme_name_from_path
+
+
+def _get_mtime(path: str):
+    """获取文件修改时间，文件不存在时返回 None"""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ThemeManager:
+    """主题管理器"""
+
+    def __init__(self, theme: str = None, poll_interval: float = 1.0):
+        """
+        Args:
+            theme: 初始主题名称或 TOML 文件路径
+            poll_interval: 检查主题文件修改时间的间隔（秒），None 表示关闭热重载
+        """
+        self.poll_interval = poll_interval
+        self.active_name = None
+        self.active_snapshot: ThemeSnapshot = None
+
+        # 已编译的主题: 名称 -> (源文件, 修改时间, 快照)
+        self._themes = {}
+        self._dirty = False
+        self._next_poll = 0.0
+
+        if theme:
+            self.set_theme(theme)
+
+    @property
+    def theme_names(self):
+        """所有已加载的主题名称"""
+        return list(self._themes)
+
+    def load_themes(self, theme_dir: str = THEME_DIR, bundle_path: str = DEFAULT_BUNDLE_PATH) -> int:
+        """
+        预加载所有主题
+
+        优先读取主题包；主题包不存在时直接编译目录下的 TOML 文件
+
+        Returns:
+            加载的主题数量
+        """
+        themes = load_theme_bundle(bundle_path)
+        if themes is None:
+            themes = {}
+            for theme_file_path in sorted(glob.glob(os.path.join(theme_dir, "*.toml"))):
+                snapshot = self._compile_file(theme_file_path)
+                if snapshot is not None:
+                    themes[snapshot.name] = (theme_file_path, _get_mtime(theme_file_path), snapshot)
+
+        self._themes.update(themes)
+        return len(themes)
+
+    def set_theme(self, theme: str) -> bool:
+        """
+        切换主题，下一次 update 时应用
+
+        Args:
+            theme: 已加载的主题名称，或 TOML 文件路径
+        """
+        name = theme
+        if name not in self._themes:
+            name = self._load_file(theme)
+            if name is None:
+                return False
+
+        if name == self.active_name:
+            return True
+
+        self.active_name = name
+        self.active_snapshot = self._themes[name][2]
+        self._dirty = True
+        return True
+
+    def update(self) -> bool:
+        """
+        每帧调用一次
+
+        Returns:
+            本帧是否重新应用了主题
+        """
+        if self.active_name and self.poll_interval is not None:
+            now = time.monotonic()
+            if now >= self._next_poll:
+                self._next_poll = now + self.poll_interval
+                self._check_reload()
+
+        if not self._dirty:
+            return False
+
+        self.active_snapshot.apply()
+        self._dirty = False
+        return True
+
+    def _check_reload(self):
+        """主题文件被修改后重新编译"""
+        source_path, cached_mtime, _ = self._themes[self.active_name]
+        mtime = _get_mtime(source_path)
+        if mtime is None or mtime == cached_mtime:
+            return
+
+        if self._load_file(source_path) is not None:
+            print(f"主题已重新加载: {source_path}")
+            self.active_snapshot = self._themes[self.active_name][2]
+            self._dirty = True
+
+    def _load_file(self, theme_file_path: str):
+        """读取并编译 TOML 主题文件，返回主题名称"""
+        snapshot = self._compile_file(theme_file_path)
+        if snapshot is None:
+            return None
+
+        self._themes[snapshot.name] = (theme_file_path, _get_mtime(theme_file_path), snapshot)
+        return snapshot.name
+
+    @staticmethod
+    def _compile_file(theme_file_path: str):
+        """编译 TOML 主题文件，失败时返回 None"""
+        theme_data = load_theme_file(theme_file_path)
+        if theme_data is None:
+            # 保留旧快照，避免写到一半的文件破坏当前主题
+            return None
+
+        try:
+            return compile_theme(theme_data, theme_name_from_path(theme_file_path))
+        except Exception as e:
+            print(f"错误: 编译主题时发生错误: {e}")
+            return None